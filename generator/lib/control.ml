@@ -74,6 +74,10 @@ type key = string [@@deriving rpcty]
 
 type key_list = key list [@@deriving rpcty]
 
+type task_id = string [@@deriving rpcty]
+(** Identifier of a long-running task, whose progress can be queried with
+    the Task interface. *)
+
 (** A set of properties associated with a volume. These properties can
     change dynamically and can be queried by the Volume.stat call. *)
 type volume = {
@@ -272,6 +276,54 @@ module Volume(R: RPC) = struct
       ["[stat sr volume] returns metadata associated with [volume]."]
       (dbg @-> sr @-> key @-> returning volume errors)
 
+  let reclaim =
+    let task = Param.mk ~name:"task" ~description:
+        ["The task freeing the space; see Task.stat"] task_id
+    in
+    R.declare "reclaim"
+      ["[reclaim sr volume] starts freeing the space allocated to the ";
+       "blocks of [volume] which hold only zeros, for example because the ";
+       "guest has zeroed or discarded them, and returns the task doing so. ";
+       "The contents of the volume are not changed. This call should only ";
+       "be made if the plugin declares the VDI_RECLAIM feature in the query ";
+       "response."]
+      (dbg @-> sr @-> key @-> returning task errors)
+
+  let stream_path = Param.mk ~name:"path" ~description:
+      ["A local file or named pipe holding the stream"] Types.string
+
+  let stream_format = Param.mk ~name:"stream_format" ~description:
+      ["The format of the stream: sparse, which holds only the blocks of ";
+       "the volume which are not zero, compressed, or raw, which holds the ";
+       "whole virtual size"] Types.string
+
+  let export_stream =
+    let task = Param.mk ~name:"task" ~description:
+        ["The task writing the stream; see Task.stat"] task_id
+    in
+    R.declare "export_stream"
+      ["[export_stream sr volume path stream_format] starts writing the ";
+       "contents of [volume] to [path] as a stream in [stream_format], and ";
+       "returns the task doing so. [path] is created if it does not exist. ";
+       "This call should only be made if the plugin declares the ";
+       "VDI_EXPORT_STREAM feature in the query response."]
+      (dbg @-> sr @-> key @-> stream_path @-> stream_format
+       @-> returning task errors)
+
+  let import_stream =
+    let task = Param.mk ~name:"task" ~description:
+        ["The task reading the stream; see Task.stat"] task_id
+    in
+    R.declare "import_stream"
+      ["[import_stream sr volume path stream_format] starts replacing the ";
+       "contents of [volume] with those of the stream in [stream_format] ";
+       "read from [path], and returns the task doing so. The volume must be ";
+       "at least as large as the stream and must not be attached. This call ";
+       "should only be made if the plugin declares the VDI_IMPORT_STREAM ";
+       "feature in the query response."]
+      (dbg @-> sr @-> key @-> stream_path @-> stream_format
+       @-> returning task errors)
+
   let compare =
     let blocklist_result = Param.mk blocklist in
     R.declare "compare"
@@ -365,6 +417,27 @@ type probe_result = {
 
 type probe_results = probe_result list [@@deriving rpcty]
 
+(** The volumes which changed in an SR since a previous call to
+    SR.ls_changes. *)
+type volume_changes = {
+  token : string;
+  (** An opaque token identifying the state of the SR at the time of the
+      call. Pass this to the next call to SR.ls_changes to receive only
+      the changes made after this one. *)
+
+  full : bool;
+  (** True if the token passed in was empty or no longer recognised by the
+      plugin, for example because its change log has been truncated. In
+      this case [changed] contains every volume in the SR and the caller
+      should treat any volume not listed as destroyed. *)
+
+  changed : volume list;
+  (** Volumes which were created or modified since the token was issued *)
+
+  destroyed : key list;
+  (** Keys of the volumes which were destroyed since the token was issued *)
+} [@@deriving rpcty]
+
 module Sr(R : RPC) = struct
   open R
 
@@ -450,6 +523,39 @@ module Sr(R : RPC) = struct
       ["[ls sr] returns a list of volumes contained within an attached SR."]
       (dbg @-> sr @-> returning volumes errors)
 
+  let ls_changes =
+    let token = Param.mk ~name:"token" ~description:
+        ["The token returned by the previous call to SR.ls_changes, or the";
+         "empty string to request a full listing"]
+        Types.string
+    in
+    let changes = Param.mk ~name:"changes" ~description:
+        ["The volumes changed since [token] was issued, and a new token"]
+        volume_changes
+    in
+    R.declare "ls_changes"
+      ["[ls_changes sr token] returns the volumes which were created, ";
+       "modified or destroyed in an attached SR since [token] was returned ";
+       "by a previous call, together with a new token. This allows a caller ";
+       "which periodically rescans the SR to do work proportional to the ";
+       "number of changes rather than to the number of volumes. If the ";
+       "token is not recognised the plugin returns a full listing. This ";
+       "call should only be made if the plugin declares the SR_LS_CHANGES ";
+       "feature in the query response."]
+      (dbg @-> sr @-> token @-> returning changes errors)
+
+  let reclaim =
+    let task = Param.mk ~name:"task" ~description:
+        ["The task freeing the space; see Task.stat"] task_id
+    in
+    R.declare "reclaim"
+      ["[reclaim sr] starts freeing the space allocated to zero-filled ";
+       "blocks in every volume of an attached SR, as Volume.reclaim does ";
+       "for one volume, and returns the task doing so. This call should ";
+       "only be made if the plugin declares the SR_RECLAIM feature in the ";
+       "query response."]
+      (dbg @-> sr @-> returning task errors)
+
   let implementation = R.implement
       {Idl.Interface.name = "SR";
        namespace = Some "SR";
@@ -54,6 +54,10 @@ type backend = {
 }
 [@@deriving rpcty]
 
+(** The backends of a batch of volumes, in the order of their URIs. *)
+type backends = backend list
+[@@deriving rpcty]
+
 (** True means the disk data is persistent and should be preserved when
     the datapath is closed i.e. when a VM is shutdown or rebooted. False
     means the data should be thrown away when the VM is shutdown or
@@ -67,6 +71,16 @@ let uri_p = Param.mk
     ~description:["A URI which represents how to access the volume disk data."]
     Common.uri
 
+(** URIs of several volumes. *)
+type uris = Common.uri list
+[@@deriving rpcty]
+
+let uris_p = Param.mk
+    ~name:"uris"
+    ~description:["URIs which represent how to access the disk data of";
+                  "several volumes."]
+    uris
+
 let domain = Param.mk
     ~name:"domain"
     ~description:["An opaque string which represents the Xen domain."]
@@ -114,6 +128,27 @@ module Datapath(R: RPC) = struct
       "users and should be minimised. This function is idempotent."]
       (dbg @-> uri_p @-> domain @-> returning unit error)
 
+  let attach_batch =
+    let backends = Param.mk (* Inherit the description from the type *)
+        ~name:"backends"
+        backends
+    in
+    declare "attach_batch" [
+      "[attach_batch uris domain] does what [attach uri domain] does for each";
+      "of [uris], which are typically all the disks of a VM, and returns their";
+      "backends in the same order. This allows an implementation to share the";
+      "work of attaching the disks, for example by scanning the host's devices";
+      "once rather than once per disk. This function is idempotent."]
+      (dbg @-> uris_p @-> domain @-> returning backends error)
+
+  let activate_batch =
+    declare "activate_batch" [
+      "[activate_batch uris domain] does what [activate uri domain] does for";
+      "each of [uris]. This function is called in the migration downtime";
+      "window, so activating the disks of a VM together saves the overhead of";
+      "one call per disk. This function is idempotent."]
+      (dbg @-> uris_p @-> domain @-> returning unit error)
+
   let deactivate =
     declare "deactivate" [
       "[deactivate uri domain] is called as soon as a VM has finished reading";
@@ -171,6 +206,12 @@ Volumes must be attached via the following sequence of calls:
    it is acceptible for this to be an exclusive operation, such that
    it is an error for a volume to be activated on more than one host
    simultaneously.
+
+A VM with several disks may instead be started with one
+[attach_batch uris domain] and one [activate_batch uris domain] call for
+all its disks. A plugin which does not implement these returns
+`Unimplemented`, after which the toolstack falls back to the calls for
+each disk.
       |}];
       version=(5,0,0);
     }
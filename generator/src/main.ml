@@ -21,12 +21,21 @@ let gen_python path =
 
   List.iter
     (fun api ->
-       with_output_file (Printf.sprintf "%s/%s.py" path api.Codegen.Interfaces.name)
-         (fun oc ->
-            let p = Pythongen.of_interfaces ~helpers:"from xapi import *" api |> Pythongen.string_of_ts in
-            output_string oc p
-         )
+       let interfaces =
+         List.map
+           (fun i -> i.Codegen.Interface.details.Idl.Interface.name)
+           api.Codegen.Interfaces.interfaces
+       in
+       Pythongen.of_interfaces ~helpers:"from xapi import *" api
+       |> Pyrewrite.all
+       |> Pysplit.split ~api:api.Codegen.Interfaces.name ~interfaces
+       |> List.iter (fun (name, ts) ->
+           with_output_file (Printf.sprintf "%s/%s.py" path name)
+             (fun oc -> output_string oc (Pythongen.string_of_ts ts)))
     ) Apis.apis;
+  with_output_file (Printf.sprintf "%s/records.py" path)
+    (fun oc ->
+       Pyrecords.of_records () |> Pythongen.string_of_ts |> output_string oc);
   `Ok ()
 
 let gen_python_cmd =
@@ -0,0 +1,161 @@
+(* Generates compact Python classes for the structured types of the IDL.
+   Each class declares __slots__, so an instance holds only its field values
+   rather than a per-instance dict, and checks the types of the fields when
+   it is constructed. Records are converted to and from the dict form used
+   on the wire by xapi.Record.to_dict and from_dict. *)
+
+open Rpc.Types
+open Pythongen
+
+(** The types for which a record class is generated *)
+let records =
+  let open Xapi_storage in
+  [ BoxedDef Control.volume
+  ; BoxedDef Control.sr_stat
+  ; BoxedDef Control.probe_result
+  ; BoxedDef Control.changed_blocks
+  ; BoxedDef Common.blocklist
+  ]
+
+(** [class_name "sr_stat"] is "SrStat" *)
+let class_name name =
+  String.split_on_char '_' name
+  |> List.map String.capitalize_ascii
+  |> String.concat ""
+
+(** The record class generated for the struct named [sname], if any *)
+let record_class sname =
+  if List.exists (fun (BoxedDef d) -> d.name = sname) records
+  then Some (class_name sname)
+  else None
+
+let counter = ref 0
+let fresh () =
+  incr counter;
+  Printf.sprintf "tmp_%d" !counter
+
+let raise_type_error name v =
+  Block [Line (Printf.sprintf "raise (TypeError(\"%s\", repr(%s)))" name v)]
+
+let basic_check : type a. a basic -> string -> string * string = fun b v ->
+  let is_string = Printf.sprintf "isinstance(%s, str) or isinstance(%s, unicode)" v v in
+  match b with
+  | Int -> Printf.sprintf "is_long(%s)" v, "int"
+  | Int32 -> Printf.sprintf "is_long(%s)" v, "int32"
+  | Int64 -> Printf.sprintf "is_long(%s)" v, "int64"
+  | Bool -> Printf.sprintf "isinstance(%s, bool)" v, "bool"
+  | Float -> Printf.sprintf "isinstance(%s, float)" v, "float"
+  | String -> is_string, "string"
+  | Char -> is_string, "char"
+
+(** [typecheck ty v] checks that the python expression [v] is a value of
+    type [ty], raising TypeError if not *)
+let rec typecheck : type a. a typ -> string -> t list = fun ty v ->
+  match ty with
+  | Basic b ->
+    let check, name = basic_check b v in
+    [ Line (Printf.sprintf "if not(%s):" check); raise_type_error name v ]
+  | Option t ->
+    begin match typecheck t v with
+      | [] -> []
+      | checks -> [ Line (Printf.sprintf "if %s is not None:" v); Block checks ]
+    end
+  | List t -> sequence t v
+  | Array t -> sequence t v
+  | Dict (k, t) ->
+    let key = fresh () in
+    let value = fresh () in
+    [ Line (Printf.sprintf "if not isinstance(%s, dict):" v)
+    ; raise_type_error "dict" v
+    ; Line (Printf.sprintf "for %s, %s in %s.items():" key value v)
+    ; Block (typecheck (Basic k) key @ typecheck t value)
+    ]
+  | Tuple (a, b) ->
+    [ Line (Printf.sprintf "if not isinstance(%s, (list, tuple)) or len(%s) != 2:" v v)
+    ; raise_type_error "pair" v
+    ]
+    @ typecheck a (v ^ "[0]")
+    @ typecheck b (v ^ "[1]")
+  | Struct { sname; fields; _ } ->
+    begin match record_class sname with
+      | Some cls ->
+        [ Line (Printf.sprintf "if not isinstance(%s, %s):" v cls)
+        ; raise_type_error sname v
+        ]
+      | None ->
+        [ Line (Printf.sprintf "if not isinstance(%s, dict):" v)
+        ; raise_type_error sname v
+        ]
+        @ List.concat (List.map (fun (BoxedField f) ->
+            typecheck f.field (Printf.sprintf "%s['%s']" v f.fname)) fields)
+    end
+  | Variant { vname; variants; _ } ->
+    let tags =
+      List.map (fun (BoxedTag t) -> Printf.sprintf "'%s'" t.tname) variants
+      |> String.concat ", "
+    in
+    [ Line (Printf.sprintf "if not isinstance(%s, (list, tuple)) or %s[0] not in (%s,):" v v tags)
+    ; raise_type_error vname v
+    ]
+  | _ -> []
+
+and sequence : type a. a typ -> string -> t list = fun t v ->
+  let element = fresh () in
+  [ Line (Printf.sprintf "if not isinstance(%s, list):" v)
+  ; raise_type_error "list" v
+  ]
+  @ (match typecheck t element with
+      | [] -> []
+      | checks -> [ Line (Printf.sprintf "for %s in %s:" element v); Block checks ])
+
+(** Fields holding another record may also be given in dict form *)
+let rec accept_dict : type a. a typ -> string -> t list = fun ty v ->
+  match ty with
+  | Option t -> accept_dict t v
+  | Struct { sname; _ } ->
+    begin match record_class sname with
+      | Some cls ->
+        [ Line (Printf.sprintf "if isinstance(%s, dict):" v)
+        ; Block [ Line (Printf.sprintf "%s = %s.from_dict(%s)" v cls v) ]
+        ]
+      | None -> []
+    end
+  | _ -> []
+
+(** The description of a type as a one-line docstring *)
+let docstring = function
+  | [] -> []
+  | lines ->
+    let text =
+      String.concat " " lines
+      |> String.split_on_char '\n'
+      |> List.map String.trim
+      |> String.concat " "
+    in
+    [ Line (Printf.sprintf "\"\"\"%s\"\"\"" text) ]
+
+let of_record (BoxedDef d) =
+  match d.ty with
+  | Struct { fields; _ } ->
+    let names = List.map (fun (BoxedField f) -> f.fname) fields in
+    let slots =
+      List.map (Printf.sprintf "'%s'") names |> String.concat ", "
+    in
+    let init =
+      List.concat (List.map (fun (BoxedField f) ->
+          accept_dict f.field f.fname @ typecheck f.field f.fname) fields)
+      @ List.map (fun n -> Line (Printf.sprintf "self.%s = %s" n n)) names
+    in
+    [ Line (Printf.sprintf "class %s(Record):" (class_name d.name))
+    ; Block
+        (docstring d.description
+         @ [ Line (Printf.sprintf "__slots__ = (%s,)" slots)
+           ; Line (Printf.sprintf "def __init__(self, %s):" (String.concat ", " names))
+           ; Block init
+           ])
+    ]
+  | _ -> failwith (Printf.sprintf "%s is not a record type" d.name)
+
+let of_records () =
+  [ Line "from xapi import Record, TypeError, is_long" ]
+  @ List.concat (List.map of_record records)
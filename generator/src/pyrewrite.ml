@@ -0,0 +1,170 @@
+(* Passes over the python generated by rpclib's Pythongen, applied before
+   the files are written out. Each pass only matches the exact statements
+   Pythongen produces and leaves everything else untouched. A pass which
+   matches nothing fails, so that a change to Pythongen's output breaks the
+   build rather than silently dropping the rewrite. *)
+
+open Pythongen
+
+(** [rewrite f ts] walks [ts] replacing any run of statements matched by
+    [f]. [f] is given the remaining statements of the current block and
+    returns the replacement together with the statements it did not
+    consume. *)
+let rec rewrite f ts =
+  match f ts with
+  | Some (replacement, rest) -> replacement @ rewrite f rest
+  | None ->
+    begin match ts with
+      | [] -> []
+      | Block b :: rest -> Block (rewrite f b) :: rewrite f rest
+      | line :: rest -> line :: rewrite f rest
+    end
+
+(** [map_lines f ts] applies [f] to every line of [ts] *)
+let rec map_lines f ts =
+  List.map (function
+      | Line l -> Line (f l)
+      | Block b -> Block (map_lines f b)) ts
+
+(** [replace_all ~sub ~by s] replaces every occurrence of [sub] in [s] *)
+let replace_all ~sub ~by s =
+  let n = String.length sub in
+  let len = String.length s in
+  let b = Buffer.create len in
+  let rec loop i =
+    if i > len - n then Buffer.add_string b (String.sub s i (len - i))
+    else if String.sub s i n = sub then begin
+      Buffer.add_string b by;
+      loop (i + n)
+    end else begin
+      Buffer.add_char b s.[i];
+      loop (i + 1)
+    end
+  in
+  loop 0;
+  Buffer.contents b
+
+(** [contains ~sub s] is true if [sub] occurs in [s] *)
+let contains ~sub s =
+  let n = String.length sub in
+  let len = String.length s in
+  let rec loop i = i <= len - n && (String.sub s i n = sub || loop (i + 1)) in
+  loop 0
+
+let starts_with ~prefix s =
+  String.length s >= String.length prefix
+  && String.sub s 0 (String.length prefix) = prefix
+
+(** [lines ts] is every line of [ts], in any block *)
+let rec lines ts =
+  List.concat (List.map (function Line l -> [l] | Block b -> lines b) ts)
+
+(** [checked name pass ts] is [pass ts], failing if it is [ts] unchanged *)
+let checked name pass ts =
+  let result = pass ts in
+  if result = ts then
+    failwith (Printf.sprintf
+                "Pyrewrite.%s: nothing to rewrite, has the output of \
+                 Pythongen changed?" name);
+  result
+
+(** The server dispatcher formats the parameters of every call and prints
+    a backtrace for every failure. Let the logging module do the formatting
+    so that it only happens when the records are actually emitted. The
+    backtrace is logged at error level, as it was always printed. *)
+let lazy_logging =
+  checked "lazy_logging" @@ rewrite (function
+      | Line {|logging.debug("method = %s params = %s" % (method, repr(params)))|} :: rest ->
+        Some ([Line {|logging.debug("method = %s params = %r", method, params)|}], rest)
+      | Line {|logging.info("caught %s" % e)|} :: Line "traceback.print_exc()" :: rest ->
+        Some ([ Line {|logging.info("caught %s", e)|}
+              ; Line {|logging.error("backtrace", exc_info=True)|}
+              ], rest)
+      | Line {|logging.debug("returning %s" % (repr(e.failure())))|} :: rest ->
+        Some ([Line {|logging.debug("returning %r", e.failure())|}], rest)
+      | _ -> None)
+
+(** Encode and decode through xapi.codec, which uses an accelerated JSON
+    library when one is installed *)
+let codec =
+  checked "codec" @@ map_lines (fun l ->
+      l
+      |> replace_all ~sub:"json.loads(" ~by:"xapi.codec.loads("
+      |> replace_all ~sub:"json.dumps(" ~by:"xapi.codec.dumps(")
+
+(** Implementations may return an iterator (e.g. a generator) for a list
+    result. The dispatcher then checks the elements lazily, one at a time,
+    and the commandline writes the JSON array out as it is produced, so
+    memory use does not depend on the length of the list. *)
+let streaming_lists =
+  let is_print_results = function
+    | "print xapi.codec.dumps(results)"
+    | "print(xapi.codec.dumps(results))" -> true
+    | _ -> false
+  in
+  (* [loop_variable "for tmp_1 in results:"] is [Some "tmp_1"] *)
+  let loop_variable l =
+    let prefix = "for " and suffix = " in results:" in
+    let n = String.length l
+    and p = String.length prefix
+    and s = String.length suffix in
+    if n > p + s
+    && String.sub l 0 p = prefix
+    && String.sub l (n - s) s = suffix
+    then Some (String.sub l p (n - p - s))
+    else None
+  in
+  checked "streaming_lists" @@ rewrite (function
+      | Line l :: rest when is_print_results l ->
+        Some ([ Line "xapi.codec.dump(results, sys.stdout)"
+              ; Line {|sys.stdout.write("\n")|}
+              ], rest)
+      | (Line "if not isinstance(results, list):" as check) :: Block raise_
+        :: (Line for_results as loop) :: Block body :: rest ->
+        begin match loop_variable for_results with
+          | None -> None
+          | Some v ->
+            Some ([ check
+                  ; Block [ Line "if not xapi.is_iterator(results):"
+                          ; Block raise_
+                          ; Line "def _checked_results(results):"
+                          ; Block [ loop; Block (body @ [Line ("yield " ^ v)]) ]
+                          ; Line "return _checked_results(results)"
+                          ]
+                  ; loop
+                  ; Block body
+                  ], rest)
+        end
+      | _ -> None)
+
+(** Move a top-level [import m] to just before each statement which uses
+    [m], so that the module is only loaded on the code paths which need it;
+    for example argparse is not needed in --json mode. A statement which
+    continues a compound one (e.g. elif) cannot be preceded by an import,
+    so if [m] is used in one the import is left where it is, and the pass
+    fails as it has nothing else to rewrite. *)
+let import_on_use m =
+  checked ("import_on_use " ^ m) @@ fun ts ->
+  let import = "import " ^ m in
+  let uses l = l <> import && contains ~sub:(m ^ ".") l in
+  let continuation l =
+    List.exists (fun prefix -> starts_with ~prefix l)
+      ["elif "; "else:"; "except"; "finally:"]
+  in
+  if not (List.mem (Line import) ts)
+  || List.exists (fun l -> uses l && continuation l) (lines ts)
+  then ts
+  else
+    ts
+    |> List.filter (fun t -> t <> Line import)
+    |> rewrite (function
+        | Line l :: rest when uses l -> Some ([Line import; Line l], rest)
+        | _ -> None)
+
+let all ts =
+  ts
+  |> lazy_logging
+  |> codec
+  |> streaming_lists
+  |> import_on_use "argparse"
+  |> import_on_use "json"
@@ -0,0 +1,82 @@
+(* Splits the python generated for an API into several modules, so that a
+   plugin script only compiles and runs the parts of the API it uses:
+
+   - <api>_errors: the declared exceptions, imported by all the others
+   - <api>_<interface>: the server dispatcher, skeleton and commandline
+     classes of one interface
+   - <api>_stubs: the test implementations and the test server
+   - <api>: re-exports everything except the stubs, and holds the server
+     dispatcher which demultiplexes calls to all the interfaces *)
+
+open Pythongen
+
+type part =
+  | Errors
+  | Interface of string
+  | Stubs
+  | Facade
+
+let module_name api = function
+  | Errors -> api ^ "_errors"
+  | Interface i -> api ^ "_" ^ String.lowercase_ascii i
+  | Stubs -> api ^ "_stubs"
+  | Facade -> api
+
+(** [class_name (Line "class SR_skeleton:")] is [Some "SR_skeleton"] *)
+let class_name = function
+  | Line l when Pyrewrite.starts_with ~prefix:"class " l ->
+    let n = String.length l in
+    let rec stop i =
+      if i >= n || l.[i] = '(' || l.[i] = ':' then i else stop (i + 1)
+    in
+    Some (String.sub l 6 (stop 6 - 6))
+  | _ -> None
+
+let part_of ~api ~interfaces name =
+  let of_interface suffixes =
+    List.find_opt
+      (fun i -> List.exists (fun s -> name = i ^ s) suffixes) interfaces
+  in
+  if name = api ^ "_server_dispatcher" then Facade
+  else if name = api ^ "_server_test" then Stubs
+  else match of_interface ["_server_dispatcher"; "_skeleton"; "_commandline"] with
+    | Some i -> Interface i
+    | None ->
+      if of_interface ["_test"] <> None then Stubs else Errors
+
+(** Groups top-level statements with the block that follows them *)
+let rec statements = function
+  | (Line _ as l) :: (Block _ as b) :: rest -> [l; b] :: statements rest
+  | t :: rest -> [t] :: statements rest
+  | [] -> []
+
+(** [split ~api ~interfaces ts] is the list of (module name, contents) *)
+let split ~api ~interfaces ts =
+  let rec header = function
+    | t :: rest when class_name t = None ->
+      let h, body = header rest in
+      t :: h, body
+    | body -> [], body
+  in
+  let header, body = header ts in
+  let part_of_statement s =
+    match class_name (List.hd s) with
+    | Some name -> part_of ~api ~interfaces name
+    | None -> Errors
+  in
+  let body = statements body in
+  let contents part =
+    List.concat (List.filter (fun s -> part_of_statement s = part) body)
+  in
+  let import part =
+    Line (Printf.sprintf "from .%s import *" (module_name api part))
+  in
+  let interfaces = List.map (fun i -> Interface i) interfaces in
+  let make part imports = module_name api part, header @ imports @ contents part in
+  [ make Errors [] ]
+  @ List.map (fun i -> make i [import Errors]) interfaces
+  @ [ make Facade (import Errors :: List.map import interfaces)
+    ; make Stubs
+        (import Errors :: List.map import interfaces
+         @ [ Line (Printf.sprintf "from .%s import %s_server_dispatcher" api api) ])
+    ]
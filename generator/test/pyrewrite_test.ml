@@ -0,0 +1,143 @@
+(** Checks the passes of Pyrewrite on statements as Pythongen produces
+    them, and that each pass fails when there is nothing for it to
+    rewrite. *)
+
+open Pythongen
+
+let ts = Alcotest.testable (Fmt.of_to_string string_of_ts) (=)
+
+let fails name pass =
+  Alcotest.check_raises "nothing to rewrite"
+    (Failure (Printf.sprintf
+                "Pyrewrite.%s: nothing to rewrite, has the output of \
+                 Pythongen changed?" name))
+    (fun () -> ignore (pass [Line "pass"; Block [Line "pass"]]))
+
+let lazy_logging () =
+  Alcotest.check ts "rewritten"
+    [ Line "def _dispatch(self, method, params):"
+    ; Block
+        [ Line "try:"
+        ; Block
+            [ Line {|logging.debug("method = %s params = %r", method, params)|}
+            ; Line "return self.SR._dispatch(method, params)"
+            ]
+        ; Line "except Exception as e:"
+        ; Block
+            [ Line {|logging.info("caught %s", e)|}
+            ; Line {|logging.error("backtrace", exc_info=True)|}
+            ; Line "try:"
+            ; Block
+                [ Line {|logging.debug("returning %r", e.failure())|}
+                ; Line "return e.failure()"
+                ]
+            ]
+        ]
+    ]
+    (Pyrewrite.lazy_logging
+       [ Line "def _dispatch(self, method, params):"
+       ; Block
+           [ Line "try:"
+           ; Block
+               [ Line {|logging.debug("method = %s params = %s" % (method, repr(params)))|}
+               ; Line "return self.SR._dispatch(method, params)"
+               ]
+           ; Line "except Exception as e:"
+           ; Block
+               [ Line {|logging.info("caught %s" % e)|}
+               ; Line "traceback.print_exc()"
+               ; Line "try:"
+               ; Block
+                   [ Line {|logging.debug("returning %s" % (repr(e.failure())))|}
+                   ; Line "return e.failure()"
+                   ]
+               ]
+           ]
+       ]);
+  fails "lazy_logging" Pyrewrite.lazy_logging
+
+let codec () =
+  Alcotest.check ts "rewritten"
+    [ Line "args = xapi.codec.loads(s)"
+    ; Block [Line "print(xapi.codec.dumps(xapi.codec.loads(r)))"]
+    ]
+    (Pyrewrite.codec
+       [ Line "args = json.loads(s)"
+       ; Block [Line "print(json.dumps(json.loads(r)))"]
+       ]);
+  fails "codec" Pyrewrite.codec
+
+let streaming_lists () =
+  let raise_ = [Line {|raise TypeError("list", repr(results))|}] in
+  let body = [Line "check(tmp_1)"] in
+  Alcotest.check ts "rewritten"
+    [ Line "results = self.implementation.ls(args)"
+    ; Line "if not isinstance(results, list):"
+    ; Block
+        [ Line "if not xapi.is_iterator(results):"
+        ; Block raise_
+        ; Line "def _checked_results(results):"
+        ; Block
+            [ Line "for tmp_1 in results:"
+            ; Block (body @ [Line "yield tmp_1"])
+            ]
+        ; Line "return _checked_results(results)"
+        ]
+    ; Line "for tmp_1 in results:"
+    ; Block body
+    ; Line "xapi.codec.dump(results, sys.stdout)"
+    ; Line {|sys.stdout.write("\n")|}
+    ]
+    (Pyrewrite.streaming_lists
+       [ Line "results = self.implementation.ls(args)"
+       ; Line "if not isinstance(results, list):"
+       ; Block raise_
+       ; Line "for tmp_1 in results:"
+       ; Block body
+       ; Line "print(xapi.codec.dumps(results))"
+       ]);
+  fails "streaming_lists" Pyrewrite.streaming_lists
+
+let import_on_use () =
+  Alcotest.check ts "rewritten"
+    [ Line "import sys"
+    ; Line "def main():"
+    ; Block
+        [ Line "import argparse"
+        ; Line "parser = argparse.ArgumentParser()"
+        ; Line "if sys.argv:"
+        ; Block
+            [ Line "import argparse"
+            ; Line "parser = argparse.ArgumentParser()"
+            ]
+        ]
+    ]
+    (Pyrewrite.import_on_use "argparse"
+       [ Line "import argparse"
+       ; Line "import sys"
+       ; Line "def main():"
+       ; Block
+           [ Line "parser = argparse.ArgumentParser()"
+           ; Line "if sys.argv:"
+           ; Block [Line "parser = argparse.ArgumentParser()"]
+           ]
+       ]);
+  fails "import_on_use argparse" (Pyrewrite.import_on_use "argparse");
+  (* The import cannot be moved before an elif *)
+  fails "import_on_use argparse" (fun _ ->
+      Pyrewrite.import_on_use "argparse"
+        [ Line "import argparse"
+        ; Line "if x:"
+        ; Block [Line "pass"]
+        ; Line "elif argparse.SUPPRESS:"
+        ; Block [Line "pass"]
+        ])
+
+let () = Alcotest.run "pyrewrite"
+    [ "passes",
+      [ "lazy_logging", `Quick, lazy_logging
+      ; "codec", `Quick, codec
+      ; "streaming_lists", `Quick, streaming_lists
+      ; "import_on_use", `Quick, import_on_use
+      ]
+    ]
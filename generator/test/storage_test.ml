@@ -80,10 +80,23 @@ let check_response_parser =
     let ls () =
       Alcotest.(check (array Cmp.volume)) "Sr.ls return value" [|test_volume|] (Sr.ls "" "")
     in
+    let ls_changes () =
+      let changes = Sr.ls_changes "" "" "" in
+      let open Xapi_storage.Control in
+      Alcotest.(check string) "Sr.ls_changes token" "1b4e28ba:4096" changes.token;
+      Alcotest.(check bool) "Sr.ls_changes full" false changes.full;
+      Alcotest.(check (list Cmp.volume)) "Sr.ls_changes changed" [test_volume] changes.changed;
+      Alcotest.(check (list string)) "Sr.ls_changes destroyed" ["destroyed_key"] changes.destroyed
+    in
+    let reclaim () =
+      Alcotest.(check string) "Sr.reclaim return value" "test_task" (Sr.reclaim "" "")
+    in
 
     [ "SR.attach", `Quick, attach
     ; "SR.detach", `Quick, detach
     ; "SR.ls", `Quick, ls
+    ; "SR.ls_changes", `Quick, ls_changes
+    ; "SR.reclaim", `Quick, reclaim
     ]
   in
 
@@ -102,14 +115,47 @@ let check_response_parser =
     let destroy () =
       Alcotest.(check unit) "Volume.destroy" () (Volume.destroy "" "" "")
     in
+    let reclaim () =
+      Alcotest.(check string) "Volume.reclaim return value" "test_task" (Volume.reclaim "" "" "")
+    in
+    let export_stream () =
+      Alcotest.(check string) "Volume.export_stream return value" "test_task"
+        (Volume.export_stream "" "" "" "" "")
+    in
+    let import_stream () =
+      Alcotest.(check string) "Volume.import_stream return value" "test_task"
+        (Volume.import_stream "" "" "" "" "")
+    in
     [ "Volume.create", `Quick, create
     ; "Volume.clone", `Quick, clone
     ; "Volume.snapshot", `Quick, snapshot
     ; "Volume.destroy", `Quick, destroy
+    ; "Volume.reclaim", `Quick, reclaim
+    ; "Volume.export_stream", `Quick, export_stream
+    ; "Volume.import_stream", `Quick, import_stream
     ]
   in
 
-  sr @ volume
+  let datapath =
+    let module Datapath = Xapi_storage.Data.Datapath(Idl.Exn.GenClient(R)) in
+
+    let attach_batch () =
+      let open Xapi_storage.Data in
+      let paths =
+        Datapath.attach_batch "" ["uri1"; "uri2"] ""
+        |> List.map (fun backend ->
+            match backend.implementations with
+            | [BlockDevice device] -> device.path
+            | _ -> Alcotest.fail "Datapath.attach_batch implementations")
+      in
+      Alcotest.(check (list string)) "Datapath.attach_batch return value"
+        ["/dev/loop0"; "/dev/loop1"] paths
+    in
+    [ "Datapath.attach_batch", `Quick, attach_batch
+    ]
+  in
+
+  sr @ volume @ datapath
 
 let unimplemented _ = failwith "unimplemented"
 
@@ -128,6 +174,11 @@ let sr_server () =
       Alcotest.(check string) "Sr.ls dbg" "OpaqueRef:fbd1e3ed-ba49-3b9a-c04c-1ba3077d0029" dbg;
       Alcotest.(check string) "Sr.ls sr" "65a478f3-066a-71e6-339e-025d8ae4e992" sr;
       [||]);
+  Sr.ls_changes (fun dbg sr token ->
+      Alcotest.(check string) "Sr.ls_changes dbg" "OpaqueRef:0c1e6ad2-9a86-4bb7-ad20-3a6b8d0e4f1a" dbg;
+      Alcotest.(check string) "Sr.ls_changes sr" "65a478f3-066a-71e6-339e-025d8ae4e992" sr;
+      Alcotest.(check string) "Sr.ls_changes token" "1b4e28ba:4096" token;
+      Xapi_storage.Control.{token="1b4e28ba:8192"; full=false; changed=[]; destroyed=[]});
 
   Sr.probe unimplemented;
   Sr.create unimplemented;
@@ -135,6 +186,7 @@ let sr_server () =
   Sr.stat unimplemented;
   Sr.set_name unimplemented;
   Sr.set_description unimplemented;
+  Sr.reclaim unimplemented;
 
   Idl.Exn.server Sr.implementation
 
@@ -166,6 +218,9 @@ let volume_server () =
   Volume.disable_cbt unimplemented;
   Volume.data_destroy unimplemented;
   Volume.list_changed_blocks unimplemented;
+  Volume.reclaim unimplemented;
+  Volume.export_stream unimplemented;
+  Volume.import_stream unimplemented;
 
   Idl.Exn.server Volume.implementation
 
@@ -180,9 +235,11 @@ let check_request_parser =
   let sr =
     let detach () = call sr_server "SR.detach" |> ignore in
     let ls () = call sr_server "SR.ls" |> ignore in
+    let ls_changes () = call sr_server "SR.ls_changes" |> ignore in
 
     [ "SR.detach", `Quick, detach
     ; "SR.ls", `Quick, ls
+    ; "SR.ls_changes", `Quick, ls_changes
     ]
   in
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+"""
+Compares the JSON libraries supported by xapi.codec on the payloads of the
+rpc-light fixtures and on a large synthetic SR.ls result.
+
+usage: codec_bench.py [--volumes N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from xapi import codec  # noqa: E402
+
+RPC_LIGHT = os.path.join(HERE, '..', '..', 'rpc-light')
+
+
+def _value(node):
+    """Converts an XML-RPC <value> element, tolerating the untyped values
+    and true/false booleans used by the fixtures"""
+    children = list(node)
+    if not children:
+        return node.text or ''
+    typed = children[0]
+    if typed.tag == 'struct':
+        return dict((member.find('name').text, _value(member.find('value')))
+                    for member in typed.findall('member'))
+    if typed.tag == 'array':
+        return [_value(v) for v in typed.find('data').findall('value')]
+    if typed.tag == 'boolean':
+        return typed.text.strip() in ('1', 'true')
+    if typed.tag in ('int', 'i4', 'i8'):
+        return int(typed.text)
+    if typed.tag == 'double':
+        return float(typed.text)
+    return typed.text or ''
+
+
+def fixture_payloads():
+    """Returns (name, payload) for every rpc-light request and response"""
+    payloads = []
+    for call in sorted(os.listdir(RPC_LIGHT)):
+        for kind in sorted(os.listdir(os.path.join(RPC_LIGHT, call))):
+            root = ET.parse(os.path.join(RPC_LIGHT, call, kind)).getroot()
+            values = [_value(p.find('value')) for p in root.iter('param')]
+            payloads.append(('%s/%s' % (call, kind), values))
+    return payloads
+
+
+def synthetic_ls(volumes):
+    """Returns an SR.ls result holding [volumes] volumes"""
+    result = []
+    for i in range(volumes):
+        key = '%08x-0000-4000-8000-%012x' % (i, i)
+        result.append({
+            'key': key,
+            'uuid': key,
+            'name': 'Volume %d' % i,
+            'description': 'Synthetic volume number %d' % i,
+            'read_write': True,
+            'sharable': False,
+            'virtual_size': 10737418240,
+            'physical_utilisation': 1073741824 + i,
+            'uri': ['loop+blkback:///srv/sr/%s?size=10737418240' % key],
+            'keys': {'vm': 'vm-%d' % (i % 100), 'tier': 'gold'},
+        })
+    return result
+
+
+def bench(payload, loads, dumps, repeat):
+    encoded = dumps(payload)
+    encode = min(timeit.repeat(lambda: dumps(payload), number=1,
+                               repeat=repeat))
+    decode = min(timeit.repeat(lambda: loads(encoded), number=1,
+                               repeat=repeat))
+    return encode, decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--volumes', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    backends = codec.available_backends()
+    print('default backend: %s' % codec.backend_name())
+    payloads = fixture_payloads()
+    payloads.append(('SR.ls x %d' % args.volumes,
+                     synthetic_ls(args.volumes)))
+
+    print('%-28s %-8s %12s %12s' % ('payload', 'backend', 'encode ms',
+                                    'decode ms'))
+    for name, payload in payloads:
+        for backend in backends:
+            loads, dumps = codec.load_backend(backend)
+            encode, decode = bench(payload, loads, dumps, args.repeat)
+            print('%-28s %-8s %12.3f %12.3f' % (name, backend, encode * 1e3,
+                                                decode * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""
+Measures the cost of importing the modules a storage script loads on every
+call, each in a fresh interpreter, and checks that the modules which are
+only needed off the common --json path are not loaded.
+
+usage: importtime.py [--repeat N] [--check] [MODULE ...]
+
+A MODULE ending in .py is a plugin script, relative to the python
+directory, which is imported from its own directory as the plugin's
+commandline entry points import it. With --check the exit code is 1 if
+any of the modules in DEFERRED was loaded. Under Python 3.7 or later the slowest imports, as reported by
+-X importtime, are listed as well.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+MODULES = [
+    'xapi.storage.log',
+    'xapi.storage.common',
+    'xapi.storage.api.volume_volume',
+    # The scripts behind every Volume and SR call of the simple-file plugin
+    'examples/volume/org.xen.xapi.storage.simple-file/volume.py',
+    'examples/volume/org.xen.xapi.storage.simple-file/sr.py',
+]
+
+# Modules which must only be imported when they are actually used
+DEFERRED = [
+    'argparse',
+    'ctypes.util',
+    'hashlib',
+    'json',
+    'logging.handlers',
+    'multiprocessing',
+    'socket',
+    'ssl',
+    'subprocess',
+    'tempfile',
+    'urllib',
+    'uuid',
+    'zlib',
+    'Queue',
+    'queue',
+    # A Volume call needs neither the SR interface nor the test stubs
+    'xapi.storage.api.volume_sr',
+    'xapi.storage.api.volume_stubs',
+]
+
+# Run in the child: time the imports, then report the time taken and every
+# module which was loaded
+CHILD = '''
+import os, sys, time
+start = time.time()
+for name in sys.argv[1:]:
+    if name.endswith('.py'):
+        sys.path.insert(0, os.path.dirname(name))
+        name = os.path.basename(name)[:-len('.py')]
+    __import__(name)
+elapsed = time.time() - start
+sys.stdout.write('%f\\n' % elapsed)
+sys.stdout.write('\\n'.join(sorted(sys.modules)) + '\\n')
+'''
+
+
+def run(modules, flags=()):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT] + [p for p in [env.get('PYTHONPATH')] if p])
+    modules = [os.path.join(ROOT, name) if name.endswith('.py') else name
+               for name in modules]
+    cmd = [sys.executable] + list(flags) + ['-c', CHILD] + list(modules)
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    stdout, stderr = proc.communicate()
+    if proc.returncode != 0:
+        sys.stderr.write(stderr)
+        raise SystemExit('importing %s failed' % ' '.join(modules))
+    lines = stdout.splitlines()
+    return float(lines[0]), set(lines[1:]), stderr
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def slowest_imports(modules, count=10):
+    """Returns the [count] imports with the highest self time, as reported
+    by -X importtime"""
+    _, _, stderr = run(modules, ['-X', 'importtime'])
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            timings.append((int(fields[0]), fields[2].strip()))
+        except ValueError:
+            continue
+    return sorted(timings, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--check', action='store_true',
+                        help='Fail if a deferred module is loaded')
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    args = parser.parse_args()
+
+    baseline = set()
+    times = []
+    loaded = set()
+    for _ in range(args.repeat):
+        _, baseline, _ = run([])
+        elapsed, loaded, _ = run(args.modules)
+        times.append(elapsed)
+
+    print('%-28s %10.2f ms' % ('import (median)', median(times) * 1e3))
+    print('%-28s %10d' % ('modules loaded', len(loaded - baseline)))
+
+    if sys.version_info >= (3, 7):
+        print('slowest imports (self us):')
+        for self_us, name in slowest_imports(args.modules):
+            print('  %-26s %10d' % (name, self_us))
+
+    deferred = sorted((loaded - baseline) & set(DEFERRED))
+    if deferred:
+        print('loaded deferred modules: %s' % ', '.join(deferred))
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
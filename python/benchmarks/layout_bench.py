@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+"""
+Compares the flat and sharded layouts of a file-based SR (see
+xapi.storage.layout) as the number of volumes grows: the cost of looking
+up a volume and reading its metadata, of creating a volume's files and of
+listing every volume. Empty volume files are created in a scratch
+directory, which should be on the filesystem of interest.
+
+With --drop-caches (as root) the dentry and inode caches are dropped
+before the lookups are timed, as after a reboot or on a host whose cache
+is busy with other work, which is when large directories hurt most.
+
+usage: layout_bench.py [--volumes N,N,...] [--lookups N] [--drop-caches]
+                       [--dir DIR]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from xapi.storage import layout  # noqa: E402
+
+
+def create_volume(sr_path, key):
+    path = layout.new_volume_path(sr_path, key)
+    open(path, 'w').close()
+    with open(path + '.inf', 'w') as f:
+        json.dump({'name': key, 'description': '', 'size': 0}, f)
+
+
+def drop_caches():
+    os.system('sync')
+    with open('/proc/sys/vm/drop_caches', 'w') as f:
+        f.write('2\n')
+
+
+def bench(parent, sharded, count, lookups, cold):
+    sr_path = tempfile.mkdtemp(dir=parent)
+    try:
+        if sharded:
+            layout.set_sharded(sr_path)
+        keys = [str(uuid.uuid4()) for _ in range(count)]
+        start = time.time()
+        for key in keys:
+            create_volume(sr_path, key)
+        create = (time.time() - start) / count
+
+        sample = random.sample(keys, min(lookups, count))
+        if cold:
+            drop_caches()
+        start = time.time()
+        for key in sample:
+            with open(layout.volume_path(sr_path, key) + '.inf') as f:
+                json.load(f)
+        lookup = (time.time() - start) / len(sample)
+
+        if cold:
+            drop_caches()
+        start = time.time()
+        listed = sum(1 for _ in layout.volumes(sr_path))
+        listing = time.time() - start
+        assert listed == count
+        return create, lookup, listing
+    finally:
+        shutil.rmtree(sr_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--volumes', default='1000,10000,100000',
+                        help='The SR sizes to try, separated by commas')
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--drop-caches', action='store_true')
+    parser.add_argument('--dir', default=None,
+                        help='Where to create the scratch SRs')
+    args = parser.parse_args()
+
+    print('%8s %-8s %14s %14s %12s' % ('volumes', 'layout', 'create (us)',
+                                       'lookup (us)', 'ls (ms)'))
+    for count in [int(n) for n in args.volumes.split(',')]:
+        for sharded in (False, True):
+            create, lookup, listing = bench(args.dir, sharded, count,
+                                            args.lookups, args.drop_caches)
+            print('%8d %-8s %14.1f %14.1f %12.1f' % (
+                count, 'sharded' if sharded else 'flat', create * 1e6,
+                lookup * 1e6, listing * 1e3))
+
+
+if __name__ == '__main__':
+    main()
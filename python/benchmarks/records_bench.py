@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""
+Compares holding volumes as dicts with holding them as the __slots__
+record classes generated from the IDL: the memory used by the containers
+themselves, and the cost of constructing and converting them.
+
+usage: records_bench.py [--volumes N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from xapi.storage.api.records import Volume  # noqa: E402
+
+
+def volume_dict(i):
+    return {
+        'key': 'volume-%d' % i,
+        'uuid': None,
+        'name': 'name',
+        'description': 'description',
+        'read_write': True,
+        'sharable': False,
+        'virtual_size': 1 << 30,
+        'physical_utilisation': 1 << 20,
+        'uri': ['loop+blkback:///srs/volume-%d' % i],
+        'keys': {},
+    }
+
+
+def timed(f, *args):
+    start = time.time()
+    result = f(*args)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--volumes', type=int, default=100000)
+    args = parser.parse_args()
+
+    dicts = [volume_dict(i) for i in range(args.volumes)]
+    records, construct = timed(lambda: [Volume.from_dict(d) for d in dicts])
+    _, convert = timed(lambda: [r.to_dict() for r in records])
+
+    dict_bytes = sum(sys.getsizeof(d) for d in dicts)
+    record_bytes = sum(sys.getsizeof(r) for r in records)
+    print('%d volumes' % args.volumes)
+    print('%-24s %10.1f MiB' % ('dict containers', dict_bytes / 2.0 ** 20))
+    print('%-24s %10.1f MiB' % ('record containers',
+                                record_bytes / 2.0 ** 20))
+    print('%-24s %10.1f ms' % ('from_dict (validating)', construct * 1e3))
+    print('%-24s %10.1f ms' % ('to_dict', convert * 1e3))
+
+
+if __name__ == '__main__':
+    main()
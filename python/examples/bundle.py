@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""
+Builds one self-contained executable bundle per plugin: a zip archive,
+runnable by the python interpreter, holding the precompiled plugin modules
+and the xapi package. Install a bundle by hardlinking each command name
+(e.g. Volume.create) to it, as install.sh --bundle does.
+
+Run this with the interpreter which will run the plugins, as the bytecode
+is specific to the interpreter version. The archives are reproducible:
+entries are sorted and carry fixed timestamps.
+
+usage: bundle.py [--xapi DIR] [--output DIR] [PLUGIN_DIR ...]
+"""
+
+import argparse
+import marshal
+import os
+import struct
+import subprocess
+import sys
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PLUGINS = [
+    os.path.join('volume', 'org.xen.xapi.storage.simple-file'),
+    os.path.join('volume', 'org.xen.xapi.storage.qcow2-file'),
+    os.path.join('datapath', 'loop+blkback'),
+    os.path.join('datapath', 'qcow2+nbd'),
+    os.path.join('datapath', 'cache+nbd'),
+]
+
+SHEBANG = b'#!/usr/bin/env python\n'
+
+# The earliest timestamp a zip file can record
+EPOCH = (1980, 1, 1, 0, 0, 0)
+
+MAIN = '''\
+# Runs the plugin command named by the basename of argv[0], which is a
+# hardlink to this bundle. Generated by bundle.py.
+import os
+import runpy
+import sys
+
+COMMANDS = {commands!r}
+
+
+def main():
+    module = COMMANDS.get(os.path.basename(sys.argv[0]))
+    if module is None:
+        for name in sorted(COMMANDS):
+            print(name)
+        return
+    # Leave sys.argv alone: the plugin dispatches on argv[0]
+    runpy.run_module(module, run_name='__main__', alter_sys=False)
+
+
+main()
+'''
+
+
+def pyc_header():
+    """Returns a .pyc header for the running interpreter. The source
+    timestamp is zero: the bundle holds no sources for it to be checked
+    against."""
+    try:
+        from importlib.util import MAGIC_NUMBER as magic
+    except ImportError:
+        import imp
+        magic = imp.get_magic()
+    if sys.version_info >= (3, 7):
+        # flags, mtime, source size
+        return magic + struct.pack('<III', 0, 0, 0)
+    if sys.version_info >= (3, 3):
+        return magic + struct.pack('<II', 0, 0)
+    return magic + struct.pack('<I', 0)
+
+
+def sources(root, prefix=''):
+    """Returns the sorted (path, archive name) of the .py files below
+    [root]"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                found.append((path, prefix + name))
+    return found
+
+
+def commands(plugin_dir, xapi_dir):
+    """Returns {command: module} for the plugin scripts in [plugin_dir].
+    Each script lists the commands it implements when it is run under a
+    name which is not one of them."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [plugin_dir, os.path.dirname(xapi_dir)])
+    result = {}
+    for filename in sorted(os.listdir(plugin_dir)):
+        if not filename.endswith('.py'):
+            continue
+        path = os.path.join(plugin_dir, filename)
+        with open(path) as f:
+            if '__main__' not in f.read():
+                continue
+        output = subprocess.check_output(
+            [sys.executable, path], env=env, universal_newlines=True)
+        for name in output.split():
+            result[name] = filename[:-3]
+    return result
+
+
+def entry(name):
+    info = zipfile.ZipInfo(name, EPOCH)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def build(plugin_dir, xapi_dir, output):
+    header = pyc_header()
+    bundle_name = os.path.basename(plugin_dir)
+    modules = sources(plugin_dir) + sources(xapi_dir, 'xapi/')
+    with open(output, 'wb') as f:
+        f.write(SHEBANG)
+        with zipfile.ZipFile(f, 'w') as archive:
+            main = MAIN.format(commands=commands(plugin_dir, xapi_dir))
+            archive.writestr(entry('__main__.py'), main)
+            for path, name in modules:
+                with open(path) as source:
+                    code = compile(source.read(), bundle_name + '/' + name,
+                                   'exec', 0, True)
+                archive.writestr(entry(name[:-3] + '.pyc'),
+                                 header + marshal.dumps(code))
+    os.chmod(output, 0o755)
+    return len(modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--xapi', default=os.path.join(HERE, '..', 'xapi'),
+                        help='The xapi package to include, with the '
+                        'generated xapi.storage.api.v5 bindings')
+    parser.add_argument('--output', default=os.path.join(HERE, 'bundles'),
+                        help='Where to write <type>/<plugin>.pyz')
+    parser.add_argument('plugins', nargs='*',
+                        default=[os.path.join(HERE, p) for p in PLUGINS])
+    args = parser.parse_args()
+
+    xapi_dir = os.path.abspath(args.xapi)
+    for plugin_dir in args.plugins:
+        plugin_dir = os.path.abspath(plugin_dir)
+        kind = os.path.basename(os.path.dirname(plugin_dir))
+        directory = os.path.join(args.output, kind)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        output = os.path.join(directory,
+                              os.path.basename(plugin_dir) + '.pyz')
+        count = build(plugin_dir, xapi_dir, output)
+        print('%s: %d modules' % (output, count))
+
+
+if __name__ == '__main__':
+    main()
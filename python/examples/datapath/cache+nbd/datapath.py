@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#
+# Copyright (C) Citrix Systems Inc.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation; version 2.1 only.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import fcntl
+import os
+import sys
+import time
+import urlparse
+
+import xapi.storage.api.v5.datapath_datapath
+from xapi.storage.api.v5.volume_errors import Volume_does_not_exist
+from xapi.storage import log, nbd, readcache
+
+
+class Implementation(xapi.storage.api.v5.datapath_datapath.Datapath_skeleton):
+    """
+    Serves each attached volume file from an NBD server running in a
+    background process (see xapi.storage.nbd), reading it through a
+    copy-on-read cache in the local directory given by the cache_dir
+    query parameter of the URI (see xapi.storage.readcache)
+    """
+
+    def activate(self, dbg, uri, domain):
+        pass
+
+    def attach(self, dbg, uri, domain):
+        parsed_url = urlparse.urlparse(uri)
+        query = urlparse.parse_qs(parsed_url.query)
+
+        file_path = os.path.realpath(parsed_url.path)
+        if not os.path.exists(file_path):
+            raise Volume_does_not_exist(file_path)
+
+        if not nbd.control(dbg, file_path, 'ping'):
+            read_only = query.get('read_only', ['false'])[0] == 'true'
+            cache_dir = query['cache_dir'][0]
+            budget = int(query.get('cache_size',
+                                   [readcache.DEFAULT_BUDGET])[0])
+
+            def open_image(path, read_only):
+                return readcache.CachedFile(dbg, path, cache_dir, budget,
+                                            read_only)
+
+            # As for a loop device, wait for the volume plugin to finish
+            # writing to the file, and keep it from starting again until
+            # the server holds the file
+            start = time.time()
+            with open(file_path, 'r') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+                log.debug('%s: waited %.3fs for writes to %s to finish',
+                          dbg, time.time() - start, file_path)
+                # Started unless another attach has started it meanwhile
+                nbd.start(dbg, file_path, read_only, open_image)
+
+        return {"implementations": [
+            [
+                'Nbd',
+                {
+                    'uri': nbd.uri(file_path)
+                }
+            ]
+        ]}
+
+    def deactivate(self, dbg, uri, domain):
+        pass
+
+    def detach(self, dbg, uri, domain):
+        parsed_url = urlparse.urlparse(uri)
+
+        file_path = os.path.realpath(parsed_url.path)
+
+        nbd.control(dbg, file_path, 'stop')
+
+    def open(self, dbg, uri, domain):
+        pass
+
+    def close(self, dbg, uri):
+        pass
+
+
+if __name__ == "__main__":
+    log.log_call_argv()
+    cmd = xapi.storage.api.v5.datapath_datapath.Datapath_commandline(Implementation())
+    base = os.path.basename(sys.argv[0])
+
+    base_class, op = base.split('.')
+
+    if base_class == 'Datapath':
+        op = op.lower()
+        fn = getattr(cmd, op, None)
+        fn()
+    else:
+        cmds = ['Datapath.{}'.format(x) for x in dir(cmd) if not x.startswith('_')]
+        for name in cmds:
+            print name
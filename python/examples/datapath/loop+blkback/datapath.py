@@ -15,13 +15,17 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
+import errno
+import fcntl
 import os
 import sys
+import time
 import urlparse
 
-import xapi.storage.api.v5.datapath
-from xapi.storage.common import call
-from xapi.storage import log
+import xapi.storage.api.v5.datapath_datapath
+from xapi.storage.api.v5.volume_errors import Volume_does_not_exist
+from xapi.storage.common import call, run_in_background
+from xapi.storage import log, loop, pagecache
 
 class Loop(object):
     """An active loop device"""
@@ -52,7 +56,7 @@ class Loop(object):
         return None
 
 
-class Implementation(xapi.storage.api.v5.datapath.Datapath_skeleton):
+class Implementation(xapi.storage.api.v5.datapath_datapath.Datapath_skeleton):
     """
     Datapath implementation
     """
@@ -60,40 +64,114 @@ class Implementation(xapi.storage.api.v5.datapath.Datapath_skeleton):
         path = os.path.realpath(path)
 
     def activate(self, dbg, uri, domain):
-        pass
+        self.activate_batch(dbg, [uri], domain)
+
+    def activate_batch(self, dbg, uris, domain):
+        # A volume whose URI has a prewarm_budget is pre-warmed from its
+        # boot profile for at most that many seconds, counted from the
+        # start of the call, so the budget is shared by the batch
+        start = time.time()
+        for uri in uris:
+            parsed_url = urlparse.urlparse(uri)
+            query = urlparse.parse_qs(parsed_url.query)
+            if 'prewarm_budget' not in query:
+                continue
+            budget = float(query['prewarm_budget'][0])
+            file_path = os.path.realpath(parsed_url.path)
+            ranges = pagecache.load_profile(file_path)
+            if ranges is None:
+                # Record what this boot reads, for the next one
+                run_in_background(dbg, pagecache.capture_profile, dbg,
+                                  file_path,
+                                  lambda: bool(loop.find(file_path)))
+                continue
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                requested = pagecache.prewarm(fd, ranges, start + budget)
+            finally:
+                os.close(fd)
+            log.debug('%s: pre-warmed %d of %d bytes of %s in %.3fs',
+                      dbg, requested, sum(length for _, length in ranges),
+                      file_path, time.time() - start)
 
     def attach(self, dbg, uri, domain):
-        parsed_url = urlparse.urlparse(uri)
-        query = urlparse.parse_qs(parsed_url.query)
-
-        file_path = os.path.realpath(parsed_url.path)
-
-        cmd = ['losetup', '-f', file_path]
-        if 'size' in query:
-            cmd.extend(['--sizelimit', query['size'][0]])
-        call(dbg, cmd)
-
-        loop = Loop.from_path(dbg, file_path)
-
-        return {"implementations": [
-            [
-                'XenDisk',
-                {
-                    'backend_type': 'vbd',
-                    'params': loop.block_device(),
-                    'extra': {}
-                }
-            ],
-            [
-                'BlockDevice',
-                {
-                    'path': loop.block_device()
-                }
-            ]
-        ]}
+        return self.attach_batch(dbg, [uri], domain)[0]
+
+    def attach_batch(self, dbg, uris, domain):
+        # Scan the loop devices once for all the volumes, and attach
+        # devices with ioctls rather than a losetup process per volume
+        attached = loop.backing_files()
+        backends = []
+        for uri in uris:
+            parsed_url = urlparse.urlparse(uri)
+            query = urlparse.parse_qs(parsed_url.query)
+
+            file_path = os.path.realpath(parsed_url.path)
+
+            devices = attached.get(file_path)
+            if devices:
+                # Already attached
+                device = devices[0]
+            else:
+                device = self._attach_file(dbg, file_path, query)
+                attached[file_path] = [device]
+
+            backends.append({"implementations": [
+                [
+                    'XenDisk',
+                    {
+                        'backend_type': 'vbd',
+                        'params': device,
+                        'extra': {}
+                    }
+                ],
+                [
+                    'BlockDevice',
+                    {
+                        'path': device
+                    }
+                ]
+            ]})
+        return backends
+
+    def _attach_file(self, dbg, file_path, query):
+        # The volume plugin holds an exclusive flock on the file while it
+        # is writing to it behind the datapath's back, e.g. zeroing it or
+        # punching holes in it. Hold it shared until the loop device
+        # exists, after which the volume plugin leaves the file alone.
+        start = time.time()
+        with open(file_path, 'r') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            log.debug('%s: waited %.3fs for writes to %s to finish',
+                      dbg, time.time() - start, file_path)
+
+            size_limit = None
+            if 'size' in query:
+                size_limit = int(query['size'][0])
+            return loop.attach(dbg, file_path, size_limit)
 
     def deactivate(self, dbg, uri, domain):
-        pass
+        self._drop_cache(dbg, uri)
+
+    def _drop_cache(self, dbg, uri):
+        # The guest has stopped using the disk, so its pages in the dom0
+        # page cache would only take memory from the disks still in use
+        file_path = os.path.realpath(urlparse.urlparse(uri).path)
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return
+        try:
+            if log.is_debug_enabled():
+                resident = pagecache.resident_bytes(fd, os.fstat(fd).st_size)
+            pagecache.drop(fd)
+            if log.is_debug_enabled():
+                log.debug('%s: dropped %d cached bytes of %s',
+                          dbg, resident, file_path)
+        finally:
+            os.close(fd)
 
     def detach(self, dbg, uri, domain):
         parsed_url = urlparse.urlparse(uri)
@@ -101,21 +179,21 @@ class Implementation(xapi.storage.api.v5.datapath.Datapath_skeleton):
         file_path = os.path.realpath(parsed_url.path)
 
         if not(os.path.exists(file_path)):
-            raise xapi.storage.api.volume.Volume_does_not_exist(file_path)
+            raise Volume_does_not_exist(file_path)
 
-        loop = Loop.from_path(dbg, file_path)
-        loop.destroy(dbg)
+        loop_device = Loop.from_path(dbg, file_path)
+        loop_device.destroy(dbg)
 
     def open(self, dbg, uri, domain):
         pass
 
     def close(self, dbg, uri):
-        pass
+        self._drop_cache(dbg, uri)
 
 
 if __name__ == "__main__":
     log.log_call_argv()
-    cmd = xapi.storage.api.v5.datapath.Datapath_commandline(Implementation())
+    cmd = xapi.storage.api.v5.datapath_datapath.Datapath_commandline(Implementation())
     base = os.path.basename(sys.argv[0])
 
     base_class, op = base.split('.')
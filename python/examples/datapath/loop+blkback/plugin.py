@@ -18,11 +18,41 @@
 import os
 import sys
 
-import xapi.storage.api.v5.plugin
-from xapi.storage import log
+import xapi.storage.api.v5.plugin_plugin
+from xapi.storage import log, loop, pagecache
 
 
-class Implementation(xapi.storage.api.v5.plugin.Plugin_skeleton):
+def residency():
+    """Returns a line for each file attached to a loop device, with the
+    amount of it in the dom0 page cache"""
+    lines = []
+    for file_path, devices in sorted(loop.backing_files().items()):
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError as e:
+            lines.append('{} {}: {}'.format(' '.join(devices), file_path,
+                                            e.strerror))
+            continue
+        try:
+            size = os.fstat(fd).st_size
+            resident = pagecache.resident_bytes(fd, size)
+        finally:
+            os.close(fd)
+        lines.append('{} {}: {} of {} bytes cached ({:.1f}%)'.format(
+            ' '.join(devices), file_path, resident, size,
+            100.0 * resident / size if size else 0.0))
+    return lines
+
+
+class Implementation(xapi.storage.api.v5.plugin_plugin.Plugin_skeleton):
+
+    def diagnostics(self, dbg):
+        lines = residency()
+        if not lines:
+            return "No volumes attached"
+        return "Page cache residency of attached volumes:\n" + \
+            "\n".join(lines)
+
     def query(self, dbg):
         return {
             "plugin": "loop+blkback",
@@ -41,7 +71,7 @@ class Implementation(xapi.storage.api.v5.plugin.Plugin_skeleton):
 
 if __name__ == "__main__":
     log.log_call_argv()
-    cmd = xapi.storage.api.v5.plugin.Plugin_commandline(Implementation())
+    cmd = xapi.storage.api.v5.plugin_plugin.Plugin_commandline(Implementation())
     base = os.path.basename(sys.argv[0])
 
     base_class, op = base.split('.')
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+# Copyright (C) Citrix Systems Inc.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation; version 2.1 only.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import sys
+import urlparse
+
+import xapi.storage.api.v5.datapath_datapath
+from xapi.storage.api.v5.volume_errors import Volume_does_not_exist
+from xapi.storage import log, nbd
+from xapi.storage.lock import volume_locked
+
+# The suffix of the images of the qcow2-file volume plugin, whose volume
+# keys are the rest of their names
+IMAGE_SUFFIX = '.qcow2'
+
+
+class Implementation(xapi.storage.api.v5.datapath_datapath.Datapath_skeleton):
+    """
+    Serves each attached qcow2 image from an NBD server running in a
+    background process (see xapi.storage.nbd)
+    """
+
+    def activate(self, dbg, uri, domain):
+        pass
+
+    def attach(self, dbg, uri, domain):
+        parsed_url = urlparse.urlparse(uri)
+        query = urlparse.parse_qs(parsed_url.query)
+
+        file_path = os.path.realpath(parsed_url.path)
+        if not os.path.exists(file_path):
+            raise Volume_does_not_exist(file_path)
+
+        read_only = query.get('read_only', ['false'])[0] == 'true'
+        # The volume plugin holds the volume lock while it renames the
+        # image, suspending the server if there is one, so the server must
+        # not be opening the image meanwhile
+        sr_path, name = os.path.split(file_path)
+        with volume_locked(dbg, sr_path, name[:-len(IMAGE_SUFFIX)]):
+            nbd.start(dbg, file_path, read_only)
+
+        return {"implementations": [
+            [
+                'Nbd',
+                {
+                    'uri': nbd.uri(file_path)
+                }
+            ]
+        ]}
+
+    def deactivate(self, dbg, uri, domain):
+        pass
+
+    def detach(self, dbg, uri, domain):
+        parsed_url = urlparse.urlparse(uri)
+
+        file_path = os.path.realpath(parsed_url.path)
+
+        nbd.control(dbg, file_path, 'stop')
+
+    def open(self, dbg, uri, domain):
+        pass
+
+    def close(self, dbg, uri):
+        pass
+
+
+if __name__ == "__main__":
+    log.log_call_argv()
+    cmd = xapi.storage.api.v5.datapath_datapath.Datapath_commandline(Implementation())
+    base = os.path.basename(sys.argv[0])
+
+    base_class, op = base.split('.')
+
+    if base_class == 'Datapath':
+        op = op.lower()
+        fn = getattr(cmd, op, None)
+        fn()
+    else:
+        cmds = ['Datapath.{}'.format(x) for x in dir(cmd) if not x.startswith('_')]
+        for name in cmds:
+            print name
@@ -1,5 +1,30 @@
 #!/bin/bash
 
+# ./install.sh --bundle [DIR] installs the bundles built by bundle.py
+# (default DIR: bundles) instead of the individual .py files
+if [ "$1" = "--bundle" ]
+then
+    BUNDLES=${2:-bundles}
+    for bundle in $BUNDLES/*/*.pyz
+    do
+        TYPE=`basename \`dirname $bundle\``
+        NAME=`basename $bundle .pyz`
+        DIR=/usr/libexec/xapi-storage-script/$TYPE/$NAME
+
+        mkdir -p $DIR
+        cp $bundle $DIR/$NAME.pyz
+        (
+            cd $DIR
+            # Running the bundle under its own name lists its commands
+            for cmd in `./$NAME.pyz`
+            do
+                ln -f $NAME.pyz $cmd
+            done
+        )
+    done
+    exit 0
+fi
+
 FILES=`find {datapath,volume} -type f -name \*.py`
 
 
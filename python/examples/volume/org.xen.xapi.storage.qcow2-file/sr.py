@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#
+# Copyright (C) Citrix Systems Inc.
+#
+# This program is free software; you can redistribute it and/or modify 
+# it under the terms of the GNU Lesser General Public License as published 
+# by the Free Software Foundation; version 2.1 only.
+#
+# This program is distributed in the hope that it will be useful, 
+# but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the 
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import os
+import sys
+import urlparse
+
+import xapi.storage.api.v5.volume_sr
+from xapi.storage import file_sr, log
+from xapi.storage.lock import sr_locked
+from xapi.storage.api.v5.volume_errors import SR_does_not_exist
+from xapi.storage.api.v5.volume_sr import SR_skeleton
+
+import volume
+
+class Implementation(SR_skeleton):
+
+    def probe(self, dbg, configuration):
+        """
+        [probe configuration]: can be used iteratively to narrow down configurations
+        to use with SR.create, or to find existing SRs on the backing storage
+        """
+        # The only configuration required for this SR type is a path
+        # to a mounted filesystem
+        return []
+
+    def create(self, dbg, uuid, configuration, name, description):
+        """
+        [create uuid configuration name description]: creates a fresh SR
+        """
+
+        # Some simple validation
+        sr_path = configuration['path']
+        if not os.path.exists(sr_path) or not os.path.isdir(sr_path):
+            raise SR_does_not_exist(sr_path)
+
+        return file_sr.configure(configuration, uuid, name, description)
+
+    def attach(self, dbg, configuration):
+        """
+        [attach configuration]: attaches the SR to the local host. Once an SR is
+        attached then volumes may be manipulated.
+        """
+        return file_sr.sr_uri(configuration)
+
+    def detach(self, dbg, sr):
+        """
+        [detach sr]: detaches the SR, clearing up any associated resources.
+        Once the SR is detached then volumes may not be manipulated.
+        """
+        # No action required to detach
+        pass
+
+    def destroy(self, dbg, sr):
+        """
+        [destroy sr]: destroys the [sr] and deletes any volumes associated
+        with it. Note that an SR must be attached to be destroyed; otherwise
+        Sr_not_attached is thrown.
+        """
+        # No action required to destroy, but wait for any operations in
+        # progress on the SR's volumes to finish
+        with sr_locked(dbg, urlparse.urlparse(sr).path, exclusive=True):
+            pass
+
+    def stat(self, dbg, sr):
+        """
+        [stat sr] returns summary metadata associated with [sr]. Note this
+        call does not return details of sub-volumes, see SR.ls.
+        """
+        # Hidden images are merged into their child, or deleted, in the
+        # background
+        hidden, _ = volume.Implementation().hidden(urlparse.urlparse(sr).path)
+        health = None
+        if hidden:
+            health = ['Healthy',
+                      '{} hidden images pending coalesce'.format(len(hidden))]
+        return file_sr.stat(sr, health)
+
+    def set_name(self, dbg, sr, new_name):
+        """
+        [set_name sr new_name] changes the name of [sr]
+        """
+        # This won't work with separate persistent storage, database
+        # or datafile in SR storage
+        pass
+
+    def set_description(self, dbg, sr, new_description):
+        """
+        [set_description sr new_description] changes the description of [sr]
+        """
+        # This won't work with separate persistent storage, database
+        # or datafile in SR storage
+        pass
+
+    def ls(self, dbg, sr):
+        """
+        [ls sr] returns a list of volumes contained within an attached SR.
+        """
+        vol = volume.Implementation()
+        return vol.ls(dbg, sr)
+
+
+if __name__ == "__main__":
+    log.log_call_argv()
+    cmd = xapi.storage.api.v5.volume_sr.SR_commandline(Implementation())
+    base = os.path.basename(sys.argv[0])
+
+    base_class, op = base.split('.')
+
+    if base_class == 'SR':
+        op = op.lower()
+        fn = getattr(cmd, op, None)
+        log.debug('Calling fn %s', fn)
+        assert(fn)
+        fn()
+    else:
+        cmds = ['SR.{}'.format(x) for x in dir(cmd) if not x.startswith('_')]
+        for name in cmds:
+            print name
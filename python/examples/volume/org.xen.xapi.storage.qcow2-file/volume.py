@@ -0,0 +1,468 @@
+#!/usr/bin/env python
+#
+# Copyright (C) Citrix Systems Inc.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation; version 2.1 only.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+import errno
+import fcntl
+import glob
+import os
+import sys
+import urlparse
+
+# uuid and urllib pull in ctypes.util, subprocess and socket, which most
+# calls do not need, so they are imported where they are used
+
+import xapi
+import xapi.codec
+import xapi.storage.api.v5.volume_volume
+from xapi.storage.api.v5.records import Volume
+from xapi.storage import log, nbd, qcow2
+from xapi.storage.common import run_in_background
+from xapi.storage.lock import sr_locked, volume_locked
+
+IMAGE_SUFFIX = '.qcow2'
+
+# The file whose flock is held by the process coalescing the SR's images
+COALESCE_LOCK = '.coalesce'
+
+# The suffix of the file, beside a new backing image, naming the volume
+# whose image it was until the snapshot or clone which made it finishes
+OVERLAY_SUFFIX = '.overlay'
+
+
+def new_key():
+    import uuid
+    return str(uuid.uuid4())
+
+
+class Implementation(xapi.storage.api.v5.volume_volume.Volume_skeleton):
+    """
+    Each volume is a qcow2 image <key>.qcow2 with its metadata in
+    <key>.inf. Snapshots and clones turn the image into the backing image
+    of new, empty images. An image without a .inf file is hidden: it is
+    only there as the backing image of others, and is merged into its
+    only remaining child, or deleted when it has none, by coalesce.
+    Coalesce holds the volume lock of a hidden image, so it leaves alone
+    the new backing images of snapshots and clones in progress.
+    """
+
+    def parse_sr(self, sr_uri):
+        parsed_url = urlparse.urlparse(sr_uri)
+        config = urlparse.parse_qs(parsed_url.query)
+        return parsed_url, config
+
+    def image_path(self, sr_path, key):
+        return os.path.join(sr_path, key + IMAGE_SUFFIX)
+
+    def read_meta(self, sr_path, key):
+        with open(os.path.join(sr_path, key + '.inf'), 'r') as json_f:
+            return xapi.codec.loads(json_f.read())
+
+    def write_meta(self, sr_path, key, meta):
+        # Replace the metadata with a rename, so that readers and a crash
+        # only ever see the old or the new version
+        path = os.path.join(sr_path, key + '.inf')
+        with open(path + '.tmp', 'w') as json_f:
+            json_f.write(xapi.codec.dumps(meta))
+            json_f.flush()
+            os.fsync(json_f.fileno())
+        os.rename(path + '.tmp', path)
+
+    def volume_uris(self, sr_path, key, read_write):
+        import urllib
+        query = urllib.urlencode({} if read_write else {'read_only': 'true'})
+        return [urlparse.urlunparse(
+            ('qcow2+nbd', None, self.image_path(sr_path, key),
+             None, query, None))]
+
+    def _stat_volume(self, sr_path, key):
+        meta = self.read_meta(sr_path, key)
+        path = self.image_path(sr_path, key)
+        return Volume(
+            uuid=key,
+            key=key,
+            name=meta['name'],
+            description=meta['description'],
+            read_write=meta['read_write'],
+            virtual_size=qcow2.virtual_size(path),
+            physical_utilisation=os.stat(path).st_blocks * 512,
+            uri=self.volume_uris(sr_path, key, meta['read_write']),
+            keys=meta.get('keys', {}),
+            sharable=False)
+
+    def _new_volume(self, sr_path, key, name, description, read_write):
+        self.write_meta(sr_path, key, {
+            'name': name,
+            'description': description,
+            'read_write': read_write
+        })
+        return self._stat_volume(sr_path, key)
+
+    def create(self, dbg, sr, name, description, size, sharable):
+        """
+        [create sr name description size] creates a new volume in [sr] with
+        [name] and [description]. The volume will have size >= [size] i.e. it
+        is always permissable for an implementation to round-up the volume to
+        the nearest convenient block size
+        """
+        # No support for shareable mulit-access volumes in this SR
+        assert(not sharable)
+
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        key = new_key()
+
+        with volume_locked(dbg, sr_path, key):
+            qcow2.create(self.image_path(sr_path, key), size)
+            return self._new_volume(sr_path, key, name, description, True)
+
+    def destroy(self, dbg, sr, key):
+        """
+        [destroy sr volume] removes [volume] from [sr]
+        """
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+
+        with volume_locked(dbg, sr_path, key):
+            # The image is now hidden. It is deleted, or merged into its
+            # child if it is the backing image of another, by coalesce.
+            os.unlink(os.path.join(sr_path, key + '.inf'))
+
+        run_in_background(dbg, self.coalesce, dbg, sr_path)
+
+    def overlay_marker(self, sr_path, key):
+        return os.path.join(sr_path, key + OVERLAY_SUFFIX)
+
+    def _overlay(self, dbg, sr_path, key, new_keys):
+        """Renames the image of the writable volume [key] to the first of
+        [new_keys], then creates an empty image backed by it for [key] and
+        for each of the rest of [new_keys]. An NBD server serving the volume
+        is suspended meanwhile, and then carries on with the new image.
+        The caller holds the volume locks of [key] and [new_keys], and
+        removes the overlay marker of the first of [new_keys] once its
+        metadata is written."""
+        path = self.image_path(sr_path, key)
+        base = self.image_path(sr_path, new_keys[0])
+        # Until the marker is removed coalesce puts the image back if this
+        # process dies, rather than deleting it as unused
+        marker = self.overlay_marker(sr_path, new_keys[0])
+        with open(marker, 'w') as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            served = nbd.control(dbg, path, 'suspend')
+            try:
+                os.rename(path, base)
+                try:
+                    qcow2.create(path, None, backing=base)
+                except Exception:
+                    os.rename(base, path)
+                    raise
+            finally:
+                if served:
+                    nbd.control(dbg, path, 'resume')
+        except Exception:
+            os.unlink(marker)
+            raise
+        for new_key in new_keys[1:]:
+            qcow2.create(self.image_path(sr_path, new_key), None,
+                         backing=base)
+
+    def snapshot(self, dbg, sr, key):
+        """
+        [snapshot sr volume] creates a new volue which is a  snapshot of
+        [volume] in [sr]. Snapshots should never be written to; they are
+        intended for backup/restore only.
+        """
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        snapshot_key = new_key()
+
+        with volume_locked(dbg, sr_path, key):
+            meta = self.read_meta(sr_path, key)
+            with volume_locked(dbg, sr_path, snapshot_key):
+                if meta['read_write']:
+                    # The current image becomes the snapshot
+                    self._overlay(dbg, sr_path, key, [snapshot_key])
+                else:
+                    qcow2.create(self.image_path(sr_path, snapshot_key), None,
+                                 backing=self.image_path(sr_path, key))
+                snapshot = self._new_volume(sr_path, snapshot_key,
+                                            meta['name'], meta['description'],
+                                            False)
+                if meta['read_write']:
+                    os.unlink(self.overlay_marker(sr_path, snapshot_key))
+                return snapshot
+
+    def clone(self, dbg, sr, key):
+        """
+        [clone sr volume] creates a new volume which is a writable clone of
+        [volume] in [sr].
+        """
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        clone_key = new_key()
+
+        with volume_locked(dbg, sr_path, key):
+            meta = self.read_meta(sr_path, key)
+            with volume_locked(dbg, sr_path, clone_key):
+                if meta['read_write']:
+                    # Both the volume and the clone are backed by a hidden
+                    # image of the current contents
+                    base_key = new_key()
+                    with volume_locked(dbg, sr_path, base_key):
+                        self._overlay(dbg, sr_path, key,
+                                      [base_key, clone_key])
+                        clone = self._new_volume(sr_path, clone_key,
+                                                 meta['name'],
+                                                 meta['description'], True)
+                        os.unlink(self.overlay_marker(sr_path, base_key))
+                        return clone
+                qcow2.create(self.image_path(sr_path, clone_key), None,
+                             backing=self.image_path(sr_path, key))
+                return self._new_volume(sr_path, clone_key, meta['name'],
+                                        meta['description'], True)
+
+    def stat(self, dbg, sr, key):
+        """
+        [stat sr volume] returns metadata associated with [volume].
+        """
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        with volume_locked(dbg, sr_path, key):
+            return self._stat_volume(sr_path, key)
+
+    def _update_meta(self, dbg, sr, key, update):
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        with volume_locked(dbg, sr_path, key):
+            meta = self.read_meta(sr_path, key)
+            update(meta)
+            self.write_meta(sr_path, key, meta)
+
+    def set_name(self, dbg, sr, key, new_name):
+        """
+        [set_name sr key new_name] changes the name of [volume]
+        """
+        self._update_meta(dbg, sr, key,
+                          lambda meta: meta.update(name=new_name))
+
+    def set_description(self, dbg, sr, key, new_description):
+        """
+        [set_description sr key new_name] changes the description of [volume]
+        """
+        self._update_meta(dbg, sr, key,
+                          lambda meta: meta.update(description=new_description))
+
+    def set(self, dbg, sr, key, k, v):
+        """
+        [set sr volume key value] associates [key] with [value] in the
+        metadata of [volume] Note these keys and values are not interpreted
+        by the plugin; they are intended for the higher-level software only.
+        """
+        self._update_meta(dbg, sr, key,
+                          lambda meta: meta.setdefault('keys', {}).update({k: v}))
+
+    def unset(self, dbg, sr, key, k):
+        """
+        [unset sr volume key] removes [key] and any value associated with it
+        from the metadata of [volume]
+        """
+        self._update_meta(dbg, sr, key,
+                          lambda meta: meta.get('keys', {}).pop(k, None))
+
+    def resize(self, dbg, sr, key, new_size):
+        """
+        [resize sr volume new_size] enlarges [volume] to be at least
+        [new_size].
+        """
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        path = self.image_path(sr_path, key)
+
+        with volume_locked(dbg, sr_path, key):
+            meta = self.read_meta(sr_path, key)
+            old_size = qcow2.virtual_size(path)
+            if new_size < old_size or not meta['read_write']:
+                raise xapi.XenAPIException("SR_BACKEND_FAILURE_79",
+                                           ["VDI Invalid size",
+                                            "shrinking not allowed"])
+            if new_size == old_size:
+                return
+            # The NBD server reopens the image with the new size, which
+            # clients see when they reconnect
+            served = nbd.control(dbg, path, 'suspend')
+            try:
+                image = qcow2.Image(path)
+                try:
+                    image.resize(new_size)
+                finally:
+                    image.close()
+            except qcow2.Qcow2Error as e:
+                raise xapi.XenAPIException("SR_BACKEND_FAILURE_79",
+                                           ["VDI Invalid size", str(e)])
+            finally:
+                if served:
+                    nbd.control(dbg, path, 'resume')
+
+    def ls(self, dbg, sr):
+        """
+        [ls sr] lists the volumes from [sr]
+        """
+        parsed_url = urlparse.urlparse(sr)
+        sr_path = parsed_url.path
+        with sr_locked(dbg, sr_path):
+            for inf in glob.iglob(os.path.join(sr_path, '*.inf')):
+                yield self._stat_volume(sr_path, os.path.basename(inf[:-4]))
+
+    def hidden(self, sr_path):
+        """Returns the keys of the hidden images in the SR, and a dict of
+        the keys of the images backed by each image"""
+        keys = [os.path.basename(path)[:-len(IMAGE_SUFFIX)]
+                for path in glob.glob(os.path.join(sr_path,
+                                                   '*' + IMAGE_SUFFIX))]
+        children = dict((key, []) for key in keys)
+        for key in keys:
+            try:
+                backing = qcow2.backing_file(self.image_path(sr_path, key))
+            except (IOError, OSError):
+                # Deleted since the listing
+                continue
+            if backing is not None:
+                backing_key = os.path.basename(backing)[:-len(IMAGE_SUFFIX)]
+                children.setdefault(backing_key, []).append(key)
+        hidden = [key for key in keys
+                  if not os.path.exists(os.path.join(sr_path, key + '.inf'))]
+        return hidden, children
+
+    def coalesce(self, dbg, sr_path):
+        """Deletes the hidden images which back no other image, and merges
+        those backing a single image into that image, until there are none
+        left. Returns straight away if another process is coalescing, as it
+        will pick up any new hidden images."""
+        fd = os.open(os.path.join(sr_path, COALESCE_LOCK),
+                     os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+                return
+            with sr_locked(dbg, sr_path):
+                while self._coalesce_once(dbg, sr_path):
+                    pass
+        finally:
+            os.close(fd)
+
+    def _coalesce_once(self, dbg, sr_path):
+        hidden, _ = self.hidden(sr_path)
+        progress = False
+        for key in hidden:
+            path = self.image_path(sr_path, key)
+            try:
+                with volume_locked(dbg, sr_path, key):
+                    if self._coalesce_image(dbg, sr_path, key):
+                        progress = True
+            except (IOError, OSError, qcow2.Qcow2Error):
+                log.error('%s: cannot coalesce %s, leaving it for later',
+                          dbg, path, exc_info=True)
+        return progress
+
+    def _coalesce_image(self, dbg, sr_path, key):
+        """Deletes the hidden image [key], or merges it into its only child.
+        Called with the volume lock of [key] held, so the snapshot or clone
+        which made the image, if any, has finished or died. Returns True if
+        the image is gone."""
+        path = self.image_path(sr_path, key)
+        if os.path.exists(self.overlay_marker(sr_path, key)):
+            self._recover_overlay(dbg, sr_path, key)
+        # The listing may be out of date
+        hidden, children = self.hidden(sr_path)
+        if key not in hidden:
+            return False
+        if not children.get(key):
+            log.debug('%s: deleting unused image %s', dbg, path)
+            os.unlink(path)
+            return True
+        if len(children[key]) == 1:
+            return self.coalesce_into(dbg, sr_path, key, children[key][0])
+        return False
+
+    def _recover_overlay(self, dbg, sr_path, key):
+        """Finishes, or undoes, the overlay which made the image [key] when
+        the process doing it died"""
+        marker = self.overlay_marker(sr_path, key)
+        with open(marker, 'r') as f:
+            volume_key = f.read()
+        volume_path = self.image_path(sr_path, volume_key)
+        with volume_locked(dbg, sr_path, volume_key):
+            if not os.path.exists(volume_path):
+                # Renamed, but the volume's new image was not created
+                log.info('%s: restoring the image of volume %s from %s',
+                         dbg, volume_key, self.image_path(sr_path, key))
+                os.rename(self.image_path(sr_path, key), volume_path)
+        os.unlink(marker)
+
+    def coalesce_into(self, dbg, sr_path, key, child):
+        """Copies into the image [child] the clusters of its backing image
+        [key] which it does not have, then makes the backing image of [key]
+        its backing image and deletes [key]. This is done by the NBD server
+        if [child] is being served, so that the copying is interleaved with
+        the guest's I/O. The caller holds the volume lock of [key]. Returns
+        True if [key] was merged."""
+        path = self.image_path(sr_path, key)
+        child_path = self.image_path(sr_path, child)
+        with volume_locked(dbg, sr_path, child):
+            # A volume may have been created from [key], or [child] have
+            # been snapshotted, before the lock was acquired
+            hidden, children = self.hidden(sr_path)
+            if key not in hidden or children.get(key) != [child]:
+                return False
+            log.debug('%s: coalescing %s into %s', dbg, path, child_path)
+            if not nbd.control(dbg, child_path, 'coalesce'):
+                image = qcow2.Image(child_path)
+                try:
+                    for cluster in range(image.clusters()):
+                        image.pull(cluster)
+                    image.flush()
+                    grandparent = image.backing.backing
+                    image.set_backing(grandparent.path
+                                      if grandparent is not None else None)
+                finally:
+                    image.close()
+            os.unlink(path)
+        return True
+
+
+if __name__ == "__main__":
+    log.log_call_argv()
+    cmd = xapi.storage.api.v5.volume_volume.Volume_commandline(Implementation())
+    base = os.path.basename(sys.argv[0])
+
+    base_class, op = base.split('.')
+
+    if base_class == 'Volume':
+        op = op.lower()
+        fn = getattr(cmd, op, None)
+        log.debug('Calling fn %s', fn)
+        assert(fn)
+        fn()
+    else:
+        cmds = ['Volume.{}'.format(x) for x in dir(cmd) if not x.startswith('_')]
+        for name in cmds:
+            print name
@@ -18,18 +18,34 @@
 import os
 import sys
 
-import xapi.storage.api.v5.plugin
+import xapi.storage.api.v5.plugin_plugin
 from xapi.storage import log
 
 
-class Implementation(xapi.storage.api.v5.plugin.Plugin_skeleton):
+class Implementation(xapi.storage.api.v5.plugin_plugin.Plugin_skeleton):
 
     def diagnostics(self, dbg):
         return "No diagnostic data available"
 
     def query(self, dbg):
 
-        config = {'path': 'Folder path for SR'}
+        config = {
+            'path': 'Folder path for SR',
+            'provisioning': ('How volume files are allocated: sparse '
+                             '(the default), preallocated or zeroed'),
+            'prewarm_budget': ('Seconds Datapath.activate may spend reading '
+                               'the blocks a volume read when it last '
+                               'booted into the page cache (default: none)'),
+            'read_cache': ('Local directory in which to cache the blocks '
+                           'read from volumes, for an SR on slow shared '
+                           'storage (default: none)'),
+            'read_cache_size': ('Maximum bytes of the read_cache directory '
+                                'to use (default: 16GiB)'),
+            'pool_sizes': ('Sizes in bytes, separated by commas, of spare '
+                           'volumes to provision in advance so that '
+                           'Volume.create is quick (default: none)'),
+            'pool_depth': 'Spare volumes to keep of each size (default: 4)'
+        }
 
         return {
             "plugin": "simple-file",
@@ -43,6 +59,8 @@ class Implementation(xapi.storage.api.v5.plugin.Plugin_skeleton):
                 "SR_ATTACH",
                 "SR_DETACH",
                 "SR_CREATE",
+                "SR_LS_CHANGES",
+                "SR_RECLAIM",
                 "VDI_CREATE",
                 "VDI_DESTROY",
                 "VDI_ATTACH",
@@ -51,14 +69,20 @@ class Implementation(xapi.storage.api.v5.plugin.Plugin_skeleton):
                 "VDI_DEACTIVATE",
                 "VDI_UPDATE",
                 "VDI_RESIZE",
-                "THIN_PROVISIONING"],
+                "VDI_RECLAIM",
+                "VDI_EXPORT_STREAM",
+                "VDI_IMPORT_STREAM",
+                "THIN_PROVISIONING",
+                "PROVISIONING_SPARSE",
+                "PROVISIONING_PREALLOCATED",
+                "PROVISIONING_ZEROED"],
             "configuration": config,
             "required_cluster_stack": []
         }
 
 if __name__ == "__main__":
     log.log_call_argv()
-    cmd = xapi.storage.api.v5.plugin.Plugin_commandline(Implementation())
+    cmd = xapi.storage.api.v5.plugin_plugin.Plugin_commandline(Implementation())
     base = os.path.basename(sys.argv[0])
 
     base_class, op = base.split('.')
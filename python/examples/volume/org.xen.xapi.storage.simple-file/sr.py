@@ -15,19 +15,64 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
+import errno
 import os
 import sys
-import urllib
 import urlparse
 
-import xapi.storage.api.v5.volume
+import xapi.codec
+import xapi.storage.api.v5.volume_sr
 from xapi import InternalError
+from xapi.storage import file_sr
+from xapi.storage import layout
 from xapi.storage import log
-from xapi.storage.common import call
-from xapi.storage.api.v5.volume import SR_skeleton, SR_does_not_exist
+from xapi.storage import metacache
+from xapi.storage import probe
+from xapi.storage import tasks
+from xapi.storage.common import call, run_in_background
+from xapi.storage.lock import sr_locked
+from xapi.storage.trash import Trash
+from xapi.storage.volume_pool import VolumePool
+from xapi.storage.api.v5.volume_errors import SR_does_not_exist
+from xapi.storage.api.v5.volume_sr import SR_skeleton
 
 import volume
 
+PLUGIN = 'simple-file'
+
+# The file in the SR directory recording the configuration returned by
+# SR.create, by which SR.probe recognises an SR
+SR_FILE = '.sr.json'
+
+
+def read_sr_file(sr_path):
+    """Returns the configuration of the SR in [sr_path], or None"""
+    try:
+        with open(os.path.join(sr_path, SR_FILE)) as f:
+            sr_file = xapi.codec.loads(f.read())
+    except IOError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return None
+    if sr_file.get('plugin') != PLUGIN:
+        return None
+    return sr_file['configuration']
+
+
+def local_mounts():
+    """Returns (mount point, device, filesystem type) for the filesystems
+    mounted from block devices"""
+    mounts = []
+    with open('/proc/mounts') as f:
+        for line in f:
+            device, mount_point, fstype = line.split()[:3]
+            if device.startswith('/dev/'):
+                # Spaces and the like are octal escaped
+                mount_point = mount_point.decode('string_escape')
+                mounts.append((mount_point, device, fstype))
+    return mounts
+
+
 class Implementation(SR_skeleton):
 
     def probe(self, dbg, configuration):
@@ -35,8 +80,70 @@ class Implementation(SR_skeleton):
         [probe configuration]: can be used iteratively to narrow down configurations
         to use with SR.create, or to find existing SRs on the backing storage
         """
-        # The only configuration required for this SR type is a path
-        # to a mounted filesystem
+        # The only configuration required for this SR type is a path to a
+        # directory on a mounted filesystem. Given a path, look for SRs in
+        # it and its subdirectories; otherwise offer the local filesystems
+        # and look for SRs at the top of them.
+        path = configuration.get('path')
+        return probe.probe(
+            dbg, PLUGIN, configuration,
+            lambda: self.probe_candidates(dbg, path),
+            lambda candidate: self.probe_directory(dbg, candidate,
+                                                   configuration))
+
+    def probe_candidates(self, dbg, path):
+        if path is not None:
+            if not os.path.isdir(path):
+                return []
+            directories = [(path, {})]
+        else:
+            directories = [(mount_point, {'device': device,
+                                          'filesystem': fstype})
+                           for mount_point, device, fstype in local_mounts()]
+        candidates = []
+        for directory, extra_info in directories:
+            candidates.append((directory, extra_info, True))
+            try:
+                if read_sr_file(directory) is not None:
+                    # The subdirectories of an SR are its own
+                    continue
+                names = sorted(os.listdir(directory))
+            except Exception:
+                # e.g. unmounted since it was listed, or a corrupt SR file,
+                # which only spoils this directory's results
+                log.info('%s: cannot list %s', dbg, directory, exc_info=True)
+                continue
+            for name in names:
+                subdirectory = os.path.join(directory, name)
+                if not name.startswith('.') and os.path.isdir(subdirectory):
+                    candidates.append((subdirectory, extra_info, False))
+        return candidates
+
+    def probe_directory(self, dbg, candidate, configuration):
+        """Returns a probe result for the SR in the directory, if there is
+        one. If not, a directory the caller named or a local filesystem is
+        returned as somewhere to create an SR."""
+        directory, extra_info, offer = candidate
+        sr_configuration = read_sr_file(directory)
+        if sr_configuration is not None:
+            # The filesystem may be mounted somewhere else now
+            sr_configuration['path'] = directory
+            sr = file_sr.sr_uri(sr_configuration)
+            return [{
+                'configuration': sr_configuration,
+                'complete': True,
+                'sr': self.stat(dbg, sr),
+                'extra_info': extra_info
+            }]
+        if offer:
+            result_configuration = dict(configuration)
+            result_configuration['path'] = directory
+            return [{
+                'configuration': result_configuration,
+                'complete': True,
+                'sr': None,
+                'extra_info': extra_info
+            }]
         return []
 
     def create(self, dbg, uuid, configuration, name, description):
@@ -49,12 +156,19 @@ class Implementation(SR_skeleton):
         if not os.path.exists(sr_path) or not os.path.isdir(sr_path):
             raise SR_does_not_exist(sr_path)
 
-        # Add extra parameters back to the configuration as simple
-        # storage. Could also go into a database or data file in the
-        # SR storage
-        configuration['uuid'] = uuid
-        configuration['name'] = name
-        configuration['description'] = description
+        file_sr.configure(configuration, uuid, name, description)
+
+        # New SRs keep their volumes in subdirectories, so that they can
+        # hold many volumes
+        layout.set_sharded(sr_path)
+
+        # Record the configuration for SR.probe
+        tmp_path = os.path.join(sr_path, SR_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(xapi.codec.dumps(
+                {'plugin': PLUGIN, 'configuration': configuration}))
+        os.rename(tmp_path, os.path.join(sr_path, SR_FILE))
+        probe.invalidate(PLUGIN)
         return configuration
 
     def attach(self, dbg, configuration):
@@ -62,24 +176,18 @@ class Implementation(SR_skeleton):
         [attach configuration]: attaches the SR to the local host. Once an SR is
         attached then volumes may be manipulated.
         """
-        # As a simple "stateless" implementation, encode all the
-        # configuration into the URI returned. This is passed back
-        # into volume interface APIs and the stat and ls operations.
-        return urlparse.urlunparse((
-            'file',
-            '',
-            configuration['path'],
-            '',
-            urllib.urlencode(configuration, True),
-            None))
+        sr = file_sr.sr_uri(configuration)
+        vol = volume.Implementation()
+        parsed_url, config = vol.parse_sr(sr)
+        vol.refill_pool(dbg, parsed_url.path, config)
+        return sr
 
     def detach(self, dbg, sr):
         """
         [detach sr]: detaches the SR, clearing up any associated resources.
         Once the SR is detached then volumes may not be manipulated.
         """
-        # No action required to detach
-        pass
+        metacache.forget(urlparse.urlparse(sr).path)
 
     def destroy(self, dbg, sr):
         """
@@ -87,36 +195,33 @@ class Implementation(SR_skeleton):
         with it. Note that an SR must be attached to be destroyed; otherwise
         Sr_not_attached is thrown.
         """
-        # No action required to destroy
-        pass
+        # Wait for any operations in progress on the SR's volumes to finish,
+        # then stop SR.probe finding the SR
+        sr_path = urlparse.urlparse(sr).path
+        with sr_locked(dbg, sr_path, exclusive=True):
+            try:
+                os.unlink(os.path.join(sr_path, SR_FILE))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+            # The spare volumes are not volumes of the SR
+            trash = Trash(sr_path)
+            VolumePool(sr_path).drain(trash)
+        metacache.forget(sr_path)
+        probe.invalidate(PLUGIN)
+        run_in_background(dbg, trash.reclaim, dbg)
 
     def stat(self, dbg, sr):
         """
         [stat sr] returns summary metadata associated with [sr]. Note this
         call does not return details of sub-volumes, see SR.ls.
         """
-        parsed_url = urlparse.urlparse(sr)
-        config = urlparse.parse_qs(parsed_url.query)
-
-        description = (config['description'][0]
-                       if 'description' in config
-                       else "")
-
-        # Read the free and total space in the path
-        statvfs = os.statvfs(parsed_url.path)
-        psize = statvfs.f_blocks * statvfs.f_frsize
-        fsize = statvfs.f_bfree * statvfs.f_frsize
-
-        return {
-            "sr": sr,
-            "name": config['name'][0],
-            "uuid": config['uuid'][0],
-            "description": description,
-            "free_space": fsize,
-            "total_space": psize,
-            "datasources": [],
-            "clustered": False,
-            "health": ['Healthy', '']}
+        # The space of destroyed volumes is freed in the background
+        pending = Trash(urlparse.urlparse(sr).path).pending()
+        health = None
+        if pending:
+            health = ['Healthy', '{} bytes pending reclaim'.format(pending)]
+        return file_sr.stat(sr, health)
 
     def set_name(self, dbg, sr, new_name):
         """
@@ -141,10 +246,31 @@ class Implementation(SR_skeleton):
         vol = volume.Implementation()
         return vol.ls(dbg, sr)
 
+    def ls_changes(self, dbg, sr, token):
+        """
+        [ls_changes sr token] returns the volumes which were created,
+        modified or destroyed in an attached SR since [token] was returned
+        by a previous call, together with a new token.
+        """
+        vol = volume.Implementation()
+        return vol.ls_changes(dbg, sr, token)
+
+    def reclaim(self, dbg, sr):
+        """
+        [reclaim sr] starts freeing the space allocated to zero-filled
+        blocks in every volume of an attached SR, and returns the task doing
+        so.
+        """
+        vol = volume.Implementation()
+        keys = [v.key for v in vol.ls(dbg, sr)]
+        parsed_url, config = vol.parse_sr(sr)
+        return tasks.start(dbg, vol.reclaim_volumes, dbg, parsed_url.path,
+                           config, keys)
+
 
 if __name__ == "__main__":
     log.log_call_argv()
-    cmd = xapi.storage.api.v5.volume.SR_commandline(Implementation())
+    cmd = xapi.storage.api.v5.volume_sr.SR_commandline(Implementation())
     base = os.path.basename(sys.argv[0])
 
     base_class, op = base.split('.')
@@ -152,7 +278,7 @@ if __name__ == "__main__":
     if base_class == 'SR':
         op = op.lower()
         fn = getattr(cmd, op, None)
-        log.debug('Calling fn {}'.format(fn))
+        log.debug('Calling fn %s', fn)
         assert(fn)
         fn()
     else:
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#
+# Copyright (C) Citrix Systems Inc.
+#
+# This program is free software; you can redistribute it and/or modify 
+# it under the terms of the GNU Lesser General Public License as published 
+# by the Free Software Foundation; version 2.1 only.
+#
+# This program is distributed in the hope that it will be useful, 
+# but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the 
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+
+import os
+import sys
+
+import xapi.storage.api.v5.task_task
+from xapi.storage import log, tasks
+
+
+class Implementation(xapi.storage.api.v5.task_task.Task_skeleton):
+    """
+    Tracks the tasks started by Volume.reclaim, SR.reclaim,
+    Volume.export_stream and Volume.import_stream, which run in background
+    processes recording their state in files (see xapi.storage.tasks)
+    """
+
+    def stat(self, dbg, id):
+        """
+        [stat task_id] returns the status of the task
+        """
+        return tasks.stat(id)
+
+    def cancel(self, dbg, id):
+        """
+        [cancel task_id] asks the task to stop, and returns immediately
+        """
+        tasks.cancel(id)
+
+    def destroy(self, dbg, id):
+        """
+        [destroy task_id] removes all traces of a task which has finished
+        """
+        tasks.destroy(id)
+
+    def ls(self, dbg):
+        """
+        [ls] returns the ids of all the tasks
+        """
+        return tasks.ls()
+
+
+if __name__ == "__main__":
+    log.log_call_argv()
+    cmd = xapi.storage.api.v5.task_task.Task_commandline(Implementation())
+    base = os.path.basename(sys.argv[0])
+
+    base_class, op = base.split('.')
+
+    if base_class == 'Task':
+        op = op.lower()
+        fn = getattr(cmd, op, None)
+        log.debug('Calling fn %s', fn)
+        assert(fn)
+        fn()
+    else:
+        cmds = ['Task.{}'.format(x) for x in dir(cmd) if not x.startswith('_')]
+        for name in cmds:
+            print name
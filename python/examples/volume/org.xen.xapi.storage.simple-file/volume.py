@@ -15,43 +15,183 @@
 # along with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
-import glob
-import json
+import errno
+import fcntl
 import os
 import sys
-import uuid
-import urllib
+import time
 import urlparse
 
-import xapi.storage.api.v5.volume
-from xapi.storage import log
-
-
-class Implementation(xapi.storage.api.v5.volume.Volume_skeleton):
+# uuid and urllib pull in ctypes.util, subprocess and socket, which most
+# calls do not need, so they are imported where they are used
+
+import xapi.codec
+import xapi.storage.api.v5.volume_volume
+from xapi.storage.api.v5.records import Volume
+from xapi.storage import layout, log, loop, metacache, pagecache, \
+    readcache, tasks
+from xapi.storage.common import run_in_background
+from xapi.storage.changes import ChangeJournal, DESTROYED
+from xapi.storage.libc import fallocate
+from xapi.storage.lock import journal_lock, sr_locked, volume_locked
+from xapi.storage.sparsify import punch_zeros
+from xapi.storage.trash import Trash
+from xapi.storage.volume_pool import VolumePool
+
+# Provisioning modes for volume data files:
+# - sparse: blocks are allocated by the filesystem on first write
+# - preallocated: blocks are allocated by create, so first writes do not
+#   wait for allocation
+# - zeroed: preallocated, then overwritten with zeros in the background so
+#   that first writes do not wait for the filesystem to convert the
+#   preallocated (unwritten) extents either
+SPARSE = 'sparse'
+PREALLOCATED = 'preallocated'
+ZEROED = 'zeroed'
+PROVISIONING_MODES = [SPARSE, PREALLOCATED, ZEROED]
+
+# The SR configuration key, and the volume key overriding it, which select
+# the provisioning mode
+PROVISIONING = 'provisioning'
+
+# The SR configuration key giving the seconds Datapath.activate may spend
+# pre-warming the page cache from a volume's boot profile. It is passed to
+# the datapath in the volume URI.
+PREWARM_BUDGET = 'prewarm_budget'
+
+# The SR configuration keys giving a local directory in which to cache
+# the volume files, for an SR on slow shared storage, and the size budget
+# of the cache. Volumes are then attached by the cache+nbd datapath
+# instead of loop+blkback.
+READ_CACHE = 'read_cache'
+READ_CACHE_SIZE = 'read_cache_size'
+
+# The SR configuration keys giving the sizes, in bytes and separated by
+# commas, of the spare volumes to keep provisioned in advance so that
+# Volume.create is quick, and how many of each size to keep
+POOL_SIZES = 'pool_sizes'
+POOL_DEPTH = 'pool_depth'
+DEFAULT_POOL_DEPTH = 4
+
+ZERO_CHUNK = 1024 * 1024
+
+# Volume.reclaim and SR.reclaim scan a volume RECLAIM_CHUNK bytes at a time,
+# so Datapath.attach waits for at most one chunk, and save their position
+# every RECLAIM_CHECKPOINT bytes so that an interrupted scan can resume
+RECLAIM_CHUNK = 64 * 1024 * 1024
+RECLAIM_CHECKPOINT = 1024 * 1024 * 1024
+
+# The maximum rate, in bytes per second, at which volumes are read when
+# reclaiming space
+RECLAIM_RATE = 256 * 1024 * 1024
+
+# The formats of Volume.export_stream and Volume.import_stream, as in
+# xapi.storage.stream, which is only imported by the tasks
+STREAM_FORMATS = ['sparse', 'raw']
+
+# The suffix of the file a stream is imported into, beside the volume's
+IMPORT_SUFFIX = '.import'
+
+
+class Implementation(xapi.storage.api.v5.volume_volume.Volume_skeleton):
 
     def parse_sr(self, sr_uri):
         parsed_url = urlparse.urlparse(sr_uri)
         config = urlparse.parse_qs(parsed_url.query)
         return parsed_url, config
 
-    def create_volume_data(self, name, description, size, uris, uuid):
-        return {
-            'uuid': uuid,
-            'key': uuid,
-            'name': name,
-            'description': description,
-            'read_write': True,
-            'virtual_size': size,
-            'physical_utilisation': size,
-            'uri': uris,
-            'keys': {},
-            'sharable': False
-        }
+    def journal(self, sr_path):
+        """Returns the journal of volume changes in the SR, see
+        SR.ls_changes"""
+        return ChangeJournal(os.path.join(sr_path, '.changes'),
+                             journal_lock(sr_path))
 
-    def volume_uris(self, sr_path, name, size):
-        query = urllib.urlencode({'size': size}, True)
+    def read_meta(self, file_path):
+        with open(file_path + '.inf', 'r') as json_f:
+            return xapi.codec.loads(json_f.read())
+
+    def write_meta(self, file_path, meta):
+        # Replace the metadata with a rename, so that readers and a crash
+        # only ever see the old or the new version
+        tmp_path = file_path + '.inf.tmp'
+        with open(tmp_path, 'w') as json_f:
+            json_f.write(xapi.codec.dumps(meta))
+            json_f.flush()
+            os.fsync(json_f.fileno())
+        os.rename(tmp_path, file_path + '.inf')
+
+    def provisioning_mode(self, config, keys=None):
+        """Returns the provisioning mode selected by the volume [keys], or
+        failing that by the SR [config], or sparse"""
+        if keys and PROVISIONING in keys:
+            mode = keys[PROVISIONING]
+        else:
+            mode = config.get(PROVISIONING, [SPARSE])[0]
+        if mode not in PROVISIONING_MODES:
+            raise xapi.InternalError(
+                'Unknown provisioning mode {}, expected one of {}'.format(
+                    mode, ', '.join(PROVISIONING_MODES)))
+        return mode
+
+    def provision(self, dbg, file_path, offset, length, mode, zero=True):
+        """Allocates the blocks of the data file between [offset] and
+        [offset] + [length] as [mode] requires. The zeroing of a volume in
+        zeroed mode is started in the background unless [zero] is False."""
+        if mode == SPARSE or length <= 0:
+            return
+        fd = os.open(file_path, os.O_WRONLY)
+        try:
+            fallocate(fd, offset, length)
+            if mode == ZEROED and zero:
+                # The background process inherits the flock, which
+                # Datapath.attach waits for, so that the volume is not used
+                # until the zeros have been written
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                run_in_background(dbg, self.zero, dbg, file_path, fd,
+                                  offset, length)
+        finally:
+            os.close(fd)
+
+    def zero(self, dbg, file_path, fd, offset, length):
+        start = time.time()
+        zeros = '\0' * ZERO_CHUNK
+        end = offset + length
+        os.lseek(fd, offset, os.SEEK_SET)
+        while offset < end:
+            offset += os.write(fd, zeros[:end - offset])
+        os.fdatasync(fd)
+        log.debug('%s: zeroed %d bytes of %s in %.1fs',
+                  dbg, length, file_path, time.time() - start)
+
+    def create_volume_data(self, name, description, size, uris, uuid,
+                           physical_utilisation, keys):
+        return Volume(
+            uuid=uuid,
+            key=uuid,
+            name=name,
+            description=description,
+            read_write=True,
+            virtual_size=size,
+            physical_utilisation=physical_utilisation,
+            uri=uris,
+            keys=keys,
+            sharable=False)
+
+    def volume_uris(self, file_path, size, config):
+        query = {'size': size}
+        if READ_CACHE in config:
+            scheme = 'cache+nbd'
+            query['cache_dir'] = config[READ_CACHE][0]
+            if READ_CACHE_SIZE in config:
+                query['cache_size'] = config[READ_CACHE_SIZE][0]
+        else:
+            scheme = 'loop+blkback'
+            if PREWARM_BUDGET in config:
+                query[PREWARM_BUDGET] = config[PREWARM_BUDGET][0]
+        import urllib
+        query = urllib.urlencode(query, True)
         return [urlparse.urlunparse(
-            ('loop+blkback', None, os.path.join(sr_path, name),
+            (scheme, None, file_path,
              None, query, None))]
 
     def create(self, dbg, sr, name, description, size, sharable):
@@ -66,24 +206,75 @@ class Implementation(xapi.storage.api.v5.volume.Volume_skeleton):
 
         parsed_url, config = self.parse_sr(sr)
 
-        volume_uuid = str(uuid.uuid4())
-        file_path = os.path.join(parsed_url.path, volume_uuid)
-
-        with open(file_path, 'w') as f:
-            os.ftruncate(f.fileno(), size)
+        mode = self.provisioning_mode(config)
+
+        # Claim a spare volume of at most the size, which was provisioned
+        # in advance, if there is one
+        claimed = None
+        if POOL_SIZES in config:
+            claimed = VolumePool(parsed_url.path).claim(
+                mode, size,
+                lambda key: layout.new_volume_path(parsed_url.path, key))
+        if claimed is None:
+            import uuid
+            volume_uuid = str(uuid.uuid4())
+            provisioned = 0
+        else:
+            volume_uuid, provisioned = claimed
+        file_path = layout.new_volume_path(parsed_url.path, volume_uuid)
+
+        with volume_locked(dbg, parsed_url.path, volume_uuid):
+            with open(file_path, 'a') as f:
+                os.ftruncate(f.fileno(), size)
+            try:
+                self.provision(dbg, file_path, provisioned,
+                               size - provisioned, mode)
+            except OSError:
+                os.unlink(file_path)
+                raise
 
-        with open(file_path + '.inf', 'w') as json_f:
             meta = {
                 'name': name,
                 'description': description,
                 'size': size
             }
-            json.dump(meta, json_f)
+            self.write_meta(file_path, meta)
+
+            self.journal(parsed_url.path).record(dbg, volume_uuid)
+
+        self.refill_pool(dbg, parsed_url.path, config)
 
         return self.create_volume_data(
             name, description,
-            size, self.volume_uris(parsed_url.path, name, size),
-            volume_uuid)
+            size, self.volume_uris(file_path, size, config),
+            volume_uuid, os.stat(file_path).st_blocks * 512, {})
+
+    def refill_pool(self, dbg, sr_path, config):
+        """Starts creating spare volumes in the background if the SR
+        [config] asks for more than there are"""
+        if POOL_SIZES not in config:
+            return
+        mode = self.provisioning_mode(config)
+        sizes = [int(size) for size in config[POOL_SIZES][0].split(',')]
+        depth = int(config.get(POOL_DEPTH, [DEFAULT_POOL_DEPTH])[0])
+        pool = VolumePool(sr_path)
+        if pool.wanted(mode, sizes, depth):
+            run_in_background(dbg, pool.refill, dbg, mode, sizes, depth,
+                              lambda path, size: self.make_spare(
+                                  dbg, path, size, mode))
+
+    def make_spare(self, dbg, file_path, size, mode):
+        """Creates a spare volume file, fully provisioned in [mode]"""
+        with open(file_path, 'w') as f:
+            os.ftruncate(f.fileno(), size)
+        self.provision(dbg, file_path, 0, size, mode, zero=False)
+        if mode == ZEROED:
+            # Already in the background, and not yet visible to anyone
+            fd = os.open(file_path, os.O_WRONLY)
+            try:
+                self.zero(dbg, file_path, fd, 0, size)
+            finally:
+                os.close(fd)
 
     def destroy(self, dbg, sr, key):
         """
@@ -91,23 +282,58 @@ class Implementation(xapi.storage.api.v5.volume.Volume_skeleton):
         """
         parsed_url, config = self.parse_sr(sr)
 
-        file_path = os.path.join(parsed_url.path, key)
-
-        os.unlink(file_path + '.inf')
-        os.unlink(file_path)
-
-    def _stat_volume(self, sr_path, volume_id):
-        file_path = os.path.join(sr_path, volume_id)
-
-        with open(file_path + '.inf', 'r') as json_f:
-            meta = json.load(json_f)
+        trash = Trash(parsed_url.path)
+
+        with volume_locked(dbg, parsed_url.path, key):
+            # Looked up under the lock, as the SR may be being migrated to
+            # the sharded layout
+            file_path = layout.volume_path(parsed_url.path, key)
+            # Freeing the space of a large file can take a long time, so
+            # leave it to a background process. The data file goes first,
+            # so that a destroy which fails part way can be retried rather
+            # than leaving the data file behind without its metadata.
+            try:
+                trash.put(file_path, key)
+            except OSError as e:
+                # Already moved by an interrupted destroy
+                if e.errno != errno.ENOENT:
+                    raise
+            os.unlink(file_path + '.inf')
+            try:
+                # Left by an interrupted Volume.import_stream
+                trash.put(file_path + IMPORT_SUFFIX, key + IMPORT_SUFFIX)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+            try:
+                os.unlink(pagecache.profile_path(file_path))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+            if READ_CACHE in config:
+                readcache.discard(config[READ_CACHE][0], file_path)
+
+            self.journal(parsed_url.path).record(dbg, key, DESTROYED)
+
+        run_in_background(dbg, trash.reclaim, dbg)
+
+    def _stat_volume(self, dbg, sr_path, volume_id, config, file_path=None):
+        cache = metacache.for_sr(dbg, sr_path, self.read_meta)
+        if cache is not None:
+            file_path, meta = cache.get(dbg, volume_id)
+        else:
+            if file_path is None:
+                file_path = layout.volume_path(sr_path, volume_id)
+            meta = self.read_meta(file_path)
 
         return self.create_volume_data(
             meta['name'],
             meta['description'],
             meta['size'],
-            self.volume_uris(sr_path, volume_id, meta['size']),
-            volume_id)
+            self.volume_uris(file_path, meta['size'], config),
+            volume_id,
+            os.stat(file_path).st_blocks * 512,
+            meta.get('keys', {}))
 
     def stat(self, dbg, sr, key):
         """
@@ -115,7 +341,8 @@ class Implementation(xapi.storage.api.v5.volume.Volume_skeleton):
         """
         parsed_url, config = self.parse_sr(sr)
         sr_path = parsed_url.path
-        return self._stat_volume(sr_path, key)
+        with volume_locked(dbg, sr_path, key):
+            return self._stat_volume(dbg, sr_path, key, config)
 
     def set_name(self, dbg, sr, key, new_name):
         """
@@ -123,15 +350,13 @@ class Implementation(xapi.storage.api.v5.volume.Volume_skeleton):
         """
         parsed_url, config = self.parse_sr(sr)
 
-        file_path = os.path.join(parsed_url.path, key)
-
-        with open(file_path + '.inf', 'r') as json_f:
-            meta = json.load(json_f)
+        with volume_locked(dbg, parsed_url.path, key):
+            file_path = layout.volume_path(parsed_url.path, key)
+            meta = self.read_meta(file_path)
             meta['name'] = new_name
+            self.write_meta(file_path, meta)
 
-        with open(file_path + '.inf', 'w') as json_f:
-            # Note this is not crash consistent, use temp file
-            json.dump(meta, json_f)
+            self.journal(parsed_url.path).record(dbg, key)
 
     def set_description(self, dbg, sr, key, new_description):
         """
@@ -139,64 +364,406 @@ class Implementation(xapi.storage.api.v5.volume.Volume_skeleton):
         """
         parsed_url, config = self.parse_sr(sr)
 
-        file_path = os.path.join(parsed_url.path, key)
-
-        with open(file_path + '.inf', 'r') as json_f:
-            meta = json.load(json_f)
+        with volume_locked(dbg, parsed_url.path, key):
+            file_path = layout.volume_path(parsed_url.path, key)
+            meta = self.read_meta(file_path)
             meta['description'] = new_description
+            self.write_meta(file_path, meta)
 
-        with open(file_path + '.inf', 'w') as json_f:
-            # Note this is not crash consistent, use temp file
-            json.dump(meta, json_f)
+            self.journal(parsed_url.path).record(dbg, key)
 
     def set(self, dbg, sr, key, k, v):
         """
         [set sr volume key value] associates [key] with [value] in the
         metadata of [volume] Note these keys and values are not interpreted
         by the plugin; they are intended for the higher-level software only.
+
+        The exception is the 'provisioning' key, which sets the provisioning
+        mode of [volume]. Setting it to preallocated or zeroed allocates
+        any blocks of the volume which are not allocated yet. These are not
+        zeroed, as that could overwrite data already in the volume.
         """
-        pass
+        parsed_url, config = self.parse_sr(sr)
 
-    def resize(self, dbg, sr, key, new_size):
+        with volume_locked(dbg, parsed_url.path, key):
+            file_path = layout.volume_path(parsed_url.path, key)
+            meta = self.read_meta(file_path)
+            keys = meta.setdefault('keys', {})
+            if k == PROVISIONING:
+                mode = self.provisioning_mode(config, {k: v})
+                self.provision(dbg, file_path, 0, meta['size'], mode,
+                               zero=False)
+            keys[k] = v
+            self.write_meta(file_path, meta)
+
+            self.journal(parsed_url.path).record(dbg, key)
+
+    def unset(self, dbg, sr, key, k):
         """
-        [resize sr volume new_size] enlarges [volume] to be at least
-        [new_size].
+        [unset sr volume key] removes [key] and any value associated with it
+        from the metadata of [volume]
         """
         parsed_url, config = self.parse_sr(sr)
 
-        file_path = os.path.join(parsed_url.path, key)
+        with volume_locked(dbg, parsed_url.path, key):
+            file_path = layout.volume_path(parsed_url.path, key)
+            meta = self.read_meta(file_path)
+            if k in meta.get('keys', {}):
+                del meta['keys'][k]
+                self.write_meta(file_path, meta)
 
-        with open(file_path + '.inf', 'r') as json_f:
-            meta = json.load(json_f)
-
-        if new_size < meta['size']:
-            raise xapi.XenAPIException("SR_BACKEND_FAILURE_79",
-                                       ["VDI Invalid size",
-                                        "shrinking not allowed"])
+                self.journal(parsed_url.path).record(dbg, key)
 
-        with open(file_path, 'w') as f:
-            os.ftruncate(f.fileno(), new_size)
+    def resize(self, dbg, sr, key, new_size):
+        """
+        [resize sr volume new_size] enlarges [volume] to be at least
+        [new_size].
+        """
+        parsed_url, config = self.parse_sr(sr)
 
-        meta['size'] = new_size
-        with open(file_path + '.inf', 'w') as json_f:
-            # Note this is not crash consistent, use temp file
-            json.dump(meta, json_f)
+        with volume_locked(dbg, parsed_url.path, key):
+            file_path = layout.volume_path(parsed_url.path, key)
+            meta = self.read_meta(file_path)
+            old_size = meta['size']
+
+            if new_size < old_size:
+                raise xapi.XenAPIException("SR_BACKEND_FAILURE_79",
+                                           ["VDI Invalid size",
+                                            "shrinking not allowed"])
+            if new_size == old_size:
+                return
+
+            mode = self.provisioning_mode(config, meta.get('keys'))
+            # Grow the file in place, keeping its contents
+            fd = os.open(file_path, os.O_WRONLY)
+            try:
+                os.ftruncate(fd, new_size)
+                if mode != SPARSE:
+                    fallocate(fd, old_size, new_size - old_size)
+                if mode == ZEROED:
+                    # An attached loop device does not expose the new blocks
+                    # until its capacity is refreshed below, so they can be
+                    # zeroed without racing writes from the guest
+                    self.zero(dbg, file_path, fd, old_size,
+                              new_size - old_size)
+            finally:
+                os.close(fd)
+
+            meta['size'] = new_size
+            self.write_meta(file_path, meta)
+
+            self.journal(parsed_url.path).record(dbg, key)
+
+            # Grow any loop device attached by the loop+blkback datapath,
+            # whose size limit is the size in the volume URI
+            for device in loop.find(file_path):
+                loop.set_capacity(dbg, device, new_size)
+
+    def reclaim(self, dbg, sr, key):
+        """
+        [reclaim sr volume] starts freeing the space allocated to the
+        zero-filled blocks of [volume] and returns the task doing so
+        """
+        parsed_url, config = self.parse_sr(sr)
+        # Fail now if the volume does not exist
+        meta = self.read_meta(layout.volume_path(parsed_url.path, key))
+        mode = self.provisioning_mode(config, meta.get('keys'))
+        if mode != SPARSE:
+            raise xapi.InternalError(
+                'Volume {} is {}, only sparse volumes can be reclaimed'.format(
+                    key, mode))
+        return tasks.start(dbg, self.reclaim_volumes, dbg, parsed_url.path,
+                           config, [key])
+
+    def save_reclaim_offset(self, dbg, sr_path, key, offset):
+        """Records how far the volume [key] has been scanned, or that the
+        scan is complete if [offset] is None"""
+        with volume_locked(dbg, sr_path, key):
+            file_path = layout.volume_path(sr_path, key)
+            if not os.path.exists(file_path + '.inf'):
+                # Destroyed
+                return
+            meta = self.read_meta(file_path)
+            if offset is None:
+                meta.pop('reclaim_offset', None)
+            else:
+                meta['reclaim_offset'] = offset
+            self.write_meta(file_path, meta)
+            self.journal(sr_path).record(dbg, key)
+
+    def reclaim_volumes(self, task, dbg, sr_path, config, keys):
+        """Punches holes in the zero-filled blocks of the sparse volumes
+        [keys] of the SR with [config], as the task [task]. A scan resumes
+        where the last one stopped."""
+        volumes = []
+        for key in keys:
+            try:
+                meta = self.read_meta(layout.volume_path(sr_path, key))
+            except IOError:
+                log.debug('%s: volume %s destroyed, not reclaiming',
+                          dbg, key)
+                continue
+            # Punching holes in a preallocated volume would undo its
+            # preallocation
+            mode = self.provisioning_mode(config, meta.get('keys'))
+            if mode != SPARSE:
+                log.debug('%s: volume %s is %s, not reclaiming',
+                          dbg, key, mode)
+                continue
+            volumes.append((key, meta))
+        total = float(sum(meta['size'] for _, meta in volumes)) or 1.0
+        done = 0
+        read = 0
+        start = time.time()
+        for key, meta in volumes:
+            file_path = layout.volume_path(sr_path, key)
+            offset = meta.get('reclaim_offset', 0)
+            done += offset
+            punched = 0
+            try:
+                fd = os.open(file_path, os.O_RDWR)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                # Destroyed since the scan started
+                continue
+            try:
+                while offset < meta['size']:
+                    task.check_cancelled()
+                    end = min(offset + RECLAIM_CHUNK, meta['size'])
+                    # A hole punched in a block while the guest is writing
+                    # it could lose the write, so only volumes which are not
+                    # attached are reclaimed. Datapath.attach holds the flock
+                    # shared until the loop device exists.
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except IOError:
+                        log.info('%s: %s is busy, not reclaiming', dbg, key)
+                        break
+                    try:
+                        if loop.find(file_path):
+                            log.info('%s: %s is attached, not reclaiming',
+                                     dbg, key)
+                            break
+                        chunk_read, chunk_punched = punch_zeros(
+                            fd, offset, end)
+                    finally:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    read += chunk_read
+                    punched += chunk_punched
+                    done += end - offset
+                    offset = end
+                    if offset % RECLAIM_CHECKPOINT == 0:
+                        self.save_reclaim_offset(dbg, sr_path, key, offset)
+                    task.progress(done / total)
+                    # Sleep until the average rate is back within the limit
+                    delay = read / float(RECLAIM_RATE) - (time.time() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+            finally:
+                os.close(fd)
+                # Also when cancelled, so that the next scan resumes here
+                complete = offset >= meta['size']
+                self.save_reclaim_offset(dbg, sr_path, key,
+                                         None if complete else offset)
+            log.debug('%s: reclaimed %d bytes from %s%s', dbg, punched, key,
+                      '' if complete else ' before stopping')
+
+    def check_stream_format(self, stream_format):
+        if stream_format not in STREAM_FORMATS:
+            raise xapi.InternalError(
+                'Unknown stream format {}, expected one of {}'.format(
+                    stream_format, ', '.join(STREAM_FORMATS)))
+
+    def export_stream(self, dbg, sr, key, path, stream_format):
+        """
+        [export_stream sr volume path stream_format] starts writing the
+        contents of [volume] to [path] and returns the task doing so
+        """
+        parsed_url, config = self.parse_sr(sr)
+        self.check_stream_format(stream_format)
+        # Fail now if the volume does not exist
+        self.read_meta(layout.volume_path(parsed_url.path, key))
+        return tasks.start(dbg, self.export_volume, dbg, parsed_url.path,
+                           key, path, stream_format)
+
+    def export_volume(self, task, dbg, sr_path, key, path, stream_format):
+        """Writes the volume [key] to [path] as the task [task]"""
+        from xapi.storage import stream
+        with volume_locked(dbg, sr_path, key):
+            file_path = layout.volume_path(sr_path, key)
+            size = self.read_meta(file_path)['size']
+            fd = os.open(file_path, os.O_RDONLY)
+        try:
+            # Held shared, as by a datapath, so that Volume.reclaim and
+            # Volume.import_stream leave the file alone until it is read
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            out_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                             0o600)
+            try:
+                def progress(offset):
+                    task.check_cancelled()
+                    task.progress(offset / float(size or 1))
+                data_bytes, stream_bytes = stream.export_stream(
+                    fd, out_fd, size, stream_format, progress=progress)
+                if os.path.isfile(path):
+                    os.fsync(out_fd)
+            finally:
+                os.close(out_fd)
+        finally:
+            os.close(fd)
+        log.debug('%s: exported %d bytes of data from %s as %d bytes of %s '
+                  'stream', dbg, data_bytes, key, stream_bytes,
+                  stream_format)
+
+    def import_stream(self, dbg, sr, key, path, stream_format):
+        """
+        [import_stream sr volume path stream_format] starts replacing the
+        contents of [volume] with the stream read from [path] and returns
+        the task doing so
+        """
+        parsed_url, config = self.parse_sr(sr)
+        self.check_stream_format(stream_format)
+        # Fail now if the volume does not exist
+        self.read_meta(layout.volume_path(parsed_url.path, key))
+        return tasks.start(dbg, self.import_volume, dbg, parsed_url.path,
+                           config, key, path, stream_format)
+
+    def import_volume(self, task, dbg, sr_path, config, key, path,
+                      stream_format):
+        """Replaces the contents of the volume [key] with the stream read
+        from [path], as the task [task]. The stream is written to a new
+        file beside the volume's, which is renamed over it once the whole
+        stream has been read, so a cancelled or failed import leaves the
+        volume as it was."""
+        from xapi.storage import stream
+        with volume_locked(dbg, sr_path, key):
+            file_path = layout.volume_path(sr_path, key)
+            meta = self.read_meta(file_path)
+            fd = os.open(file_path, os.O_RDONLY)
+        tmp_path = file_path + IMPORT_SUFFIX
+        try:
+            # Held until the new file is in place, so that Datapath.attach
+            # waits for it and then opens the new file. A datapath which
+            # already has the file open holds the flock shared, or has a
+            # loop device on it.
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError:
+                raise xapi.InternalError(
+                    'Volume {} is in use'.format(key))
+            if loop.find(file_path):
+                raise xapi.InternalError(
+                    'Volume {} is attached'.format(key))
+            # Left by an import which was interrupted, if it exists
+            tmp_fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC,
+                             os.fstat(fd).st_mode & 0o777)
+            try:
+                os.ftruncate(tmp_fd, meta['size'])
+                in_fd = os.open(path, os.O_RDONLY)
+                try:
+                    def progress(offset):
+                        task.check_cancelled()
+                        task.progress(offset / float(meta['size'] or 1))
+                    data_bytes, stream_bytes = stream.import_stream(
+                        in_fd, tmp_fd, meta['size'], stream_format,
+                        progress=progress)
+                finally:
+                    os.close(in_fd)
+                # The stream left holes where it holds zeros
+                mode = self.provisioning_mode(config, meta.get('keys'))
+                self.provision(dbg, tmp_path, 0, meta['size'], mode,
+                               zero=False)
+                os.fsync(tmp_fd)
+            finally:
+                os.close(tmp_fd)
+            with volume_locked(dbg, sr_path, key):
+                if not os.path.exists(file_path + '.inf'):
+                    raise xapi.InternalError(
+                        'Volume {} was destroyed during the import'.format(
+                            key))
+                os.rename(tmp_path, file_path)
+                # Its physical utilisation has changed
+                self.journal(sr_path).record(dbg, key)
+        finally:
+            # Only left if the import failed
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            os.close(fd)
+        log.debug('%s: imported %d bytes of data into %s from %d bytes of '
+                  '%s stream', dbg, data_bytes, key, stream_bytes,
+                  stream_format)
 
     def ls(self, dbg, sr):
         """
         [ls sr] lists the volumes from [sr]
         """
-        parsed_url = urlparse.urlparse(sr)
+        parsed_url, config = self.parse_sr(sr)
         sr_path = parsed_url.path
-        files = glob.glob(os.path.join(sr_path, '*.inf'))
-        log.debug('files to list {}'.format(files))
-        return [self._stat_volume(
-            sr_path, os.path.basename(x[:-4])) for x in files]
+        log.debug('%s: listing volumes in %s', dbg, sr_path)
+        # Yield the volumes one at a time so they can be streamed out
+        # without holding the whole listing in memory. The SR lock is held
+        # until the listing is complete, so that the SR cannot be destroyed
+        # underneath it.
+        with sr_locked(dbg, sr_path):
+            cache = metacache.for_sr(dbg, sr_path, self.read_meta)
+            if cache is not None:
+                volumes = cache.volumes(dbg)
+            else:
+                volumes = layout.volumes(sr_path)
+            for key, file_path in volumes:
+                try:
+                    volume = self._stat_volume(dbg, sr_path, key, config,
+                                               file_path)
+                except (IOError, OSError) as e:
+                    if e.errno != errno.ENOENT:
+                        raise
+                    # Destroyed since the directory was listed
+                    continue
+                yield volume
+
+    def ls_changes(self, dbg, sr, token):
+        """
+        [ls_changes sr token] returns the volumes which were created,
+        modified or destroyed in [sr] since [token] was returned
+        """
+        parsed_url, config = self.parse_sr(sr)
+        sr_path = parsed_url.path
+        journal = self.journal(sr_path)
+        changes = journal.changes_since(token) if token else None
+        if changes is None:
+            log.debug('%s: token %r not recognised, listing %s in full',
+                      dbg, token, sr_path)
+            # Take the token before listing so that any change made while
+            # listing is returned again by the next call
+            new_token = journal.token(dbg)
+            return {
+                'token': new_token,
+                'full': True,
+                'changed': list(self.ls(dbg, sr)),
+                'destroyed': []
+            }
+        new_token, updated, destroyed = changes
+        changed = []
+        for key in updated:
+            try:
+                changed.append(self._stat_volume(dbg, sr_path, key, config))
+            except (IOError, OSError) as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                # Destroyed after the journal was read
+                destroyed.add(key)
+        return {
+            'token': new_token,
+            'full': False,
+            'changed': changed,
+            'destroyed': list(destroyed)
+        }
 
 
 if __name__ == "__main__":
     log.log_call_argv()
-    cmd = xapi.storage.api.v5.volume.Volume_commandline(Implementation())
+    cmd = xapi.storage.api.v5.volume_volume.Volume_commandline(Implementation())
     base = os.path.basename(sys.argv[0])
 
     base_class, op = base.split('.')
@@ -204,7 +771,7 @@ if __name__ == "__main__":
     if base_class == 'Volume':
         op = op.lower()
         fn = getattr(cmd, op, None)
-        log.debug('Calling fn {}'.format(fn))
+        log.debug('Calling fn %s', fn)
         assert(fn)
         fn()
     else:
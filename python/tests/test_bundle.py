@@ -0,0 +1,90 @@
+"""
+Tests of examples/bundle.py: building a bundle of a plugin and running its
+commands from the bundle.
+"""
+
+import imp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+bundle = imp.load_source('bundle', os.path.join(os.path.dirname(HERE),
+                                                'examples', 'bundle.py'))
+
+PLUGIN = '''\
+import os
+import sys
+
+import xapi
+
+if __name__ == "__main__":
+    base = os.path.basename(sys.argv[0])
+    if base == 'Plugin.Query':
+        print('query ' + xapi.NAME + ' ' + ' '.join(sys.argv[1:]))
+    else:
+        print('Plugin.Query')
+'''
+
+
+class BundleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.plugin_dir = os.path.join(self.dir, 'plugin')
+        self.xapi_dir = os.path.join(self.dir, 'xapi')
+        for directory in (self.plugin_dir, self.xapi_dir):
+            os.mkdir(directory)
+        self.write(os.path.join(self.plugin_dir, 'plugin.py'), PLUGIN)
+        # Not a command
+        self.write(os.path.join(self.plugin_dir, 'helper.py'), 'X = 1\n')
+        self.write(os.path.join(self.xapi_dir, '__init__.py'),
+                   "NAME = 'xapi'\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, path, contents):
+        with open(path, 'w') as f:
+            f.write(contents)
+
+    def build(self, name):
+        output = os.path.join(self.dir, name)
+        self.assertEqual(bundle.build(self.plugin_dir, self.xapi_dir, output),
+                         3)
+        return output
+
+    def run_as(self, output, command, *args):
+        link = os.path.join(self.dir, command)
+        os.link(output, link)
+        # Only what is in the bundle
+        env = dict(os.environ)
+        env.pop('PYTHONPATH', None)
+        return subprocess.check_output([sys.executable, link] + list(args),
+                                       env=env)
+
+    def test_build(self):
+        output = self.build('plugin.pyz')
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(sorted(archive.namelist()),
+                             ['__main__.py', 'helper.pyc', 'plugin.pyc',
+                              'xapi/__init__.pyc'])
+        # Reproducible
+        with open(output, 'rb') as f, open(self.build('again.pyz'),
+                                           'rb') as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_dispatch(self):
+        output = self.build('plugin.pyz')
+        self.assertEqual(self.run_as(output, 'Plugin.Query', 'dbg'),
+                         'query xapi dbg\n')
+        # Any other name lists the commands
+        self.assertEqual(self.run_as(output, 'other'), 'Plugin.Query\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
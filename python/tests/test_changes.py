@@ -0,0 +1,104 @@
+"""
+Tests of xapi.storage.changes: tokens and the changes since them, and
+starting a new journal once it is too large.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import changes
+from xapi.storage.changes import DESTROYED, ChangeJournal
+from xapi.storage.lock import journal_lock
+
+
+class ChangeJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.sr_path, '.changes')
+        self.journal = ChangeJournal(self.path, journal_lock(self.sr_path))
+
+    def tearDown(self):
+        shutil.rmtree(self.sr_path)
+
+    def test_no_changes(self):
+        token = self.journal.token('test')
+        self.assertEqual(self.journal.changes_since(token),
+                         (token, set(), set()))
+
+    def test_changes_since_token(self):
+        self.journal.record('test', 'a')
+        token = self.journal.token('test')
+        self.journal.record('test', 'b')
+        self.journal.record('test', 'c')
+        self.journal.record('test', 'b', DESTROYED)
+        self.journal.record('test', 'd', DESTROYED)
+        self.journal.record('test', 'd')
+        new_token, updated, destroyed = self.journal.changes_since(token)
+        self.assertEqual(updated, set(['c', 'd']))
+        self.assertEqual(destroyed, set(['b']))
+        self.assertEqual(new_token, self.journal.token('test'))
+        self.assertEqual(self.journal.changes_since(new_token),
+                         (new_token, set(), set()))
+
+    def test_ignores_partial_record(self):
+        token = self.journal.token('test')
+        self.journal.record('test', 'a')
+        # A record which is still being appended
+        with open(self.path, 'a') as f:
+            f.write('{"key": "b", "ch')
+        new_token, updated, _ = self.journal.changes_since(token)
+        self.assertEqual(updated, set(['a']))
+        with open(self.path, 'a') as f:
+            f.write('ange": "updated"}\n')
+        _, updated, _ = self.journal.changes_since(new_token)
+        self.assertEqual(updated, set(['b']))
+
+    def test_unrecognised_tokens(self):
+        self.journal.record('test', 'a')
+        generation, offset = self.journal.token('test').split(':')
+        for token in ['', 'nonsense', generation,
+                      '{}:x'.format(generation),
+                      'other:{}'.format(offset),
+                      # Inside the header, and beyond the end
+                      '{}:1'.format(generation),
+                      '{}:{}'.format(generation, int(offset) + 1)]:
+            self.assertIsNone(self.journal.changes_since(token), token)
+
+    def test_missing_journal(self):
+        token = self.journal.token('test')
+        os.unlink(self.path)
+        self.assertIsNone(self.journal.changes_since(token))
+
+    def test_rotation(self):
+        changes.MAX_JOURNAL_SIZE, saved = 200, changes.MAX_JOURNAL_SIZE
+        try:
+            token = self.journal.token('test')
+            for i in range(10):
+                self.journal.record('test', 'volume-%d' % i)
+        finally:
+            changes.MAX_JOURNAL_SIZE = saved
+        # The journal was started afresh, so the old token needs a full
+        # listing, and new tokens are for the new generation
+        self.assertLess(os.stat(self.path).st_size, 200)
+        self.assertIsNone(self.journal.changes_since(token))
+        new_token = self.journal.token('test')
+        self.assertNotEqual(new_token.split(':')[0], token.split(':')[0])
+        self.journal.record('test', 'a')
+        self.assertEqual(self.journal.changes_since(new_token)[1:],
+                         (set(['a']), set()))
+
+    def test_shared_journal(self):
+        # Another process started the journal first
+        other = ChangeJournal(self.path, journal_lock(self.sr_path))
+        token = other.token('test')
+        self.journal.record('test', 'a')
+        self.assertEqual(other.changes_since(token)[1:], (set(['a']), set()))
+        self.assertEqual([name for name in os.listdir(self.sr_path)
+                          if name.endswith('.tmp')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests of xapi.codec, and of the commandline bindings which write streamed
+listings with it.
+"""
+
+import json
+import StringIO
+import sys
+import unittest
+
+from xapi import codec
+from xapi.storage.api import volume_sr
+
+
+def volume(key):
+    return {
+        'key': key, 'uuid': None, 'name': key, 'description': '',
+        'read_write': True, 'virtual_size': 0L, 'physical_utilisation': 0L,
+        'uri': [], 'keys': {}
+    }
+
+
+class Failed(Exception):
+    pass
+
+
+class DumpTest(unittest.TestCase):
+
+    def test_iterator_is_an_array(self):
+        out = StringIO.StringIO()
+        codec.dump(iter([1, {'a': 2}]), out)
+        self.assertEqual(json.loads(out.getvalue()), [1, {'a': 2}])
+
+    def test_empty_iterator(self):
+        out = StringIO.StringIO()
+        codec.dump(iter([]), out)
+        self.assertEqual(json.loads(out.getvalue()), [])
+
+    def test_spills_to_disk(self):
+        out = StringIO.StringIO()
+        elements = ['x' * 1000] * (codec.SPOOL_SIZE // 1000 + 10)
+        codec.dump(iter(elements), out)
+        self.assertEqual(json.loads(out.getvalue()), elements)
+
+    def test_failing_iterator_writes_nothing(self):
+        def elements():
+            yield 1
+            raise Failed()
+        out = StringIO.StringIO()
+        self.assertRaises(Failed, codec.dump, elements(), out)
+        self.assertEqual(out.getvalue(), '')
+
+
+class LsImplementation(volume_sr.SR_skeleton):
+
+    def __init__(self, volumes):
+        self.volumes = volumes
+
+    def ls(self, dbg, sr):
+        for v in self.volumes:
+            if isinstance(v, Exception):
+                raise v
+            yield v
+
+
+class CommandlineLsTest(unittest.TestCase):
+    """SR.ls --json must write either the whole listing or the error
+    alone, which is what xapi can parse"""
+
+    def call_ls(self, volumes):
+        argv, stdin, stdout = sys.argv, sys.stdin, sys.stdout
+        sys.argv = ['SR.ls', '--json']
+        sys.stdin = StringIO.StringIO(
+            json.dumps({'dbg': 'test', 'sr': 'file:///sr'}) + '\n')
+        sys.stdout = StringIO.StringIO()
+        try:
+            try:
+                volume_sr.SR_commandline(LsImplementation(volumes)).ls()
+                code = 0
+            except SystemExit as e:
+                code = e.code
+            return code, sys.stdout.getvalue()
+        finally:
+            sys.argv, sys.stdin, sys.stdout = argv, stdin, stdout
+
+    def test_success(self):
+        code, out = self.call_ls([volume('a'), volume('b')])
+        self.assertEqual(code, 0)
+        self.assertEqual([v['key'] for v in json.loads(out)], ['a', 'b'])
+
+    def test_implementation_fails_part_way(self):
+        code, out = self.call_ls([volume('a'), IOError(2, 'destroyed')])
+        self.assertEqual(code, 1)
+        error = json.loads(out)
+        self.assertEqual(error['code'], 'SR_BACKEND_FAILURE')
+        self.assertEqual(error['params'][0], 'IOError')
+
+    def test_invalid_record_part_way(self):
+        bad = volume('b')
+        bad['read_write'] = 'yes'
+        code, out = self.call_ls([volume('a'), bad])
+        self.assertEqual(code, 1)
+        self.assertIn('backtrace', json.loads(out))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests of xapi.storage.dedup: which blocks are shared, and volumes which are
+destroyed during a pass. The kernel's FIDEDUPERANGE is replaced by a fake,
+as the filesystem of the tests may not support it.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import dedup, layout
+
+BLOCK = dedup.BLOCK_SIZE
+
+
+class DedupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+        self.requests = []
+        self.saved = dedup.dedupe_range, dedup.volume_files, dedup.prune
+        dedup.dedupe_range = self.dedupe_range
+
+    def tearDown(self):
+        dedup.dedupe_range, dedup.volume_files, dedup.prune = self.saved
+        shutil.rmtree(self.sr_path)
+
+    def dedupe_range(self, src_fd, src_offset, length, dest_fd, dest_offset):
+        self.requests.append((os.fstat(src_fd).st_ino, src_offset,
+                              os.fstat(dest_fd).st_ino, dest_offset, length))
+        return length
+
+    def create(self, key, blocks):
+        path = layout.new_volume_path(self.sr_path, key)
+        with open(path, 'wb') as f:
+            for block in blocks:
+                f.write(block * BLOCK)
+        with open(path + '.inf', 'w') as f:
+            json.dump({'key': key}, f)
+        return path
+
+    def destroy_after_listing(self, path):
+        """Destroys the volume at [path] once dedup has looked at every
+        volume, which it does before pruning"""
+        prune = dedup.prune
+
+        def destroy(*args):
+            os.unlink(path)
+            prune(*args)
+        dedup.prune = destroy
+
+    def dedup(self):
+        return dedup.dedup('test', self.sr_path, processes=1)
+
+    def state(self):
+        return sorted(os.listdir(os.path.join(self.sr_path,
+                                              dedup.DEDUP_DIR)))
+
+    def test_shares_duplicates(self):
+        a = self.create('a', [b'x', b'y', b'\0'])
+        b = self.create('b', [b'z', b'x', b'y'])
+        hashed, shared = self.dedup()
+        self.assertEqual(hashed, 6 * BLOCK)
+        self.assertEqual(shared, 2 * BLOCK)
+        self.assertEqual(self.requests, [
+            (os.stat(a).st_ino, 0, os.stat(b).st_ino, BLOCK, 2 * BLOCK)])
+        self.assertEqual(self.state(), ['a', 'a.json', 'b', 'b.json'])
+
+        # Nothing has changed, so nothing is read or shared again
+        self.requests = []
+        self.assertEqual(self.dedup(), (0, 0))
+        self.assertEqual(self.requests, [])
+
+    def test_prunes_destroyed_volumes(self):
+        self.create('a', [b'x'])
+        b = self.create('b', [b'x'])
+        self.dedup()
+        os.unlink(b)
+        os.unlink(b + '.inf')
+        self.dedup()
+        self.assertEqual(self.state(), ['a', 'a.json'])
+
+    def test_skips_volume_destroyed_after_listing(self):
+        self.create('a', [b'x'])
+        self.create('b', [b'x'])
+        listing = list(layout.volumes(self.sr_path))
+        dedup.volume_files = lambda sr_path: sorted(
+            listing + [('c', os.path.join(self.sr_path, 'c'))])
+        self.assertEqual(self.dedup(), (2 * BLOCK, BLOCK))
+        self.assertEqual(self.state(), ['a', 'a.json', 'b', 'b.json'])
+
+    def test_skips_volume_destroyed_while_hashed(self):
+        self.create('a', [b'x'])
+        b = self.create('b', [b'x'])
+        self.destroy_after_listing(b)
+        self.assertEqual(self.dedup(), (BLOCK, 0))
+        self.assertEqual(self.state(), ['a', 'a.json'])
+
+    def test_skips_source_destroyed_while_shared(self):
+        a = self.create('a', [b'x'])
+        self.create('b', [b'x', b'y'])
+        self.create('c', [b'y'])
+        self.dedup()
+        self.create('c', [b'y', b'x'])
+        self.destroy_after_listing(a)
+        # Sharing c's x with the destroyed a is skipped, and its y with b
+        # is not
+        self.requests = []
+        self.assertEqual(self.dedup(), (2 * BLOCK, BLOCK))
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.state(),
+                         ['a', 'a.json', 'b', 'b.json', 'c', 'c.json'])
+
+    def test_limits_open_files(self):
+        dedup.MAX_OPEN_FILES, saved = 2, dedup.MAX_OPEN_FILES
+        try:
+            for key in 'abcd':
+                self.create(key, [b'x'])
+            files = dedup._OpenFiles()
+            volumes = [dedup.Volume(self.sr_path, key, path)
+                       for key, path in dedup.volume_files(self.sr_path)]
+            try:
+                fds = [files.get(volume) for volume in volumes]
+                self.assertEqual(list(files.fds.values()), fds[-2:])
+                # The most recently used file is kept open
+                files.get(volumes[2])
+                files.get(volumes[0])
+                self.assertEqual(list(files.fds),
+                                 [volumes[2].path, volumes[0].path])
+            finally:
+                files.close()
+            self.assertEqual(files.fds, {})
+        finally:
+            dedup.MAX_OPEN_FILES = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests of xapi.storage.layout: looking volumes up in both layouts and
+migrating a flat SR online.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import layout
+
+KEYS = ['0a5e6f3c-volume-%d' % i for i in range(3)] + ['ff00-volume']
+
+
+class LayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.sr_path)
+
+    def create(self, key, sharded):
+        path = (layout.new_volume_path(self.sr_path, key) if sharded
+                else os.path.join(self.sr_path, key))
+        with open(path, 'w') as f:
+            f.write(key)
+        with open(path + '.inf', 'w') as f:
+            json.dump({'name': key}, f)
+        with open(path + '.boot', 'w') as f:
+            f.write('profile')
+        return path
+
+    def listed(self):
+        return sorted(layout.volumes(self.sr_path))
+
+    def test_flat(self):
+        paths = [self.create(key, False) for key in KEYS]
+        self.assertFalse(layout.is_sharded(self.sr_path))
+        self.assertEqual(self.listed(), sorted(zip(KEYS, paths)))
+        for key, path in zip(KEYS, paths):
+            self.assertEqual(layout.volume_path(self.sr_path, key), path)
+
+    def test_sharded(self):
+        layout.set_sharded(self.sr_path)
+        paths = [self.create(key, True) for key in KEYS]
+        self.assertEqual(paths[0], os.path.join(self.sr_path, '0a', KEYS[0]))
+        self.assertEqual(self.listed(), sorted(zip(KEYS, paths)))
+        self.assertEqual(layout.volume_path(self.sr_path, KEYS[3]), paths[3])
+
+    def test_migrate(self):
+        for key in KEYS:
+            self.create(key, False)
+        self.assertEqual(layout.migrate('test', self.sr_path), (len(KEYS), 0))
+        self.assertTrue(layout.is_sharded(self.sr_path))
+        for key in KEYS:
+            path = layout.shard_path(self.sr_path, key)
+            self.assertEqual(layout.volume_path(self.sr_path, key), path)
+            with open(path) as f:
+                self.assertEqual(f.read(), key)
+            for suffix in layout.VOLUME_SUFFIXES:
+                self.assertTrue(os.path.exists(path + suffix))
+            self.assertFalse(os.path.exists(
+                os.path.join(self.sr_path, key)))
+        self.assertEqual([key for key, _ in self.listed()], sorted(KEYS))
+        # Nothing left to do
+        self.assertEqual(layout.migrate('test', self.sr_path), (0, 0))
+
+    def test_migrate_leaves_busy_volumes(self):
+        paths = [self.create(key, False) for key in KEYS]
+        # As held by a datapath which is opening the file
+        with open(paths[1]) as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            self.assertEqual(layout.migrate('test', self.sr_path),
+                             (len(KEYS) - 1, 1))
+            # Both layouts are listed and looked up during the migration
+            self.assertEqual(layout.volume_path(self.sr_path, KEYS[1]),
+                             paths[1])
+            self.assertEqual([key for key, _ in self.listed()], sorted(KEYS))
+        self.assertEqual(layout.migrate('test', self.sr_path), (1, 0))
+        self.assertEqual(layout.volume_path(self.sr_path, KEYS[1]),
+                         layout.shard_path(self.sr_path, KEYS[1]))
+
+    def test_migrate_skips_destroyed_volumes(self):
+        self.create(KEYS[0], False)
+        # Listed, but its data file is gone
+        with open(os.path.join(self.sr_path, KEYS[1] + '.inf'), 'w') as f:
+            json.dump({}, f)
+        self.assertEqual(layout.migrate('test', self.sr_path), (2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
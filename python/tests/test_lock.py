@@ -0,0 +1,94 @@
+"""
+Tests of xapi.storage.lock: which locks exclude each other between
+processes, and locks taken again by the process holding them.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import lock
+
+
+class LockTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        fd = lock._FDS.pop(os.path.join(self.sr_path, lock.LOCK_FILE), None)
+        if fd is not None:
+            os.close(fd)
+        shutil.rmtree(self.sr_path)
+
+    def available(self, take):
+        """Returns True if another process could take a lock with
+        take(timeout) while this one holds its locks"""
+        pid = os.fork()
+        if pid == 0:
+            status = 2
+            try:
+                lock.after_fork()
+                lock._FDS.clear()
+                try:
+                    take(0.05)
+                    status = 0
+                except lock.LockTimeout:
+                    status = 1
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertIn(os.WEXITSTATUS(status), (0, 1))
+        return os.WEXITSTATUS(status) == 0
+
+    def sr_lock(self, exclusive):
+        return lambda timeout: lock.sr_lock(self.sr_path).acquire(
+            'test', exclusive, timeout)
+
+    def volume_lock(self, key):
+        return lambda timeout: lock.volume_lock(self.sr_path, key).acquire(
+            'test', True, timeout)
+
+    def test_sr_lock(self):
+        with lock.sr_locked('test', self.sr_path):
+            self.assertTrue(self.available(self.sr_lock(False)))
+            self.assertFalse(self.available(self.sr_lock(True)))
+        with lock.sr_locked('test', self.sr_path, exclusive=True):
+            self.assertFalse(self.available(self.sr_lock(False)))
+        self.assertTrue(self.available(self.sr_lock(True)))
+
+    def test_volume_locks(self):
+        with lock.volume_locked('test', self.sr_path, 'a'):
+            self.assertFalse(self.available(self.volume_lock('a')))
+            self.assertTrue(self.available(self.volume_lock('b')))
+            # A volume operation does not stop other volume operations
+            self.assertTrue(self.available(self.sr_lock(False)))
+            self.assertFalse(self.available(self.sr_lock(True)))
+        self.assertTrue(self.available(self.volume_lock('a')))
+
+    def test_reentrant(self):
+        sr_lock = lock.sr_lock(self.sr_path)
+        with sr_lock.held('test', exclusive=False):
+            # Upgraded while held, and only released by the last release
+            with sr_lock.held('test', exclusive=True):
+                with sr_lock.held('test', exclusive=False):
+                    pass
+                self.assertFalse(self.available(self.sr_lock(False)))
+            self.assertFalse(self.available(self.sr_lock(False)))
+        self.assertTrue(self.available(self.sr_lock(True)))
+        self.assertEqual(lock._HELD, {})
+
+    def test_volume_offsets(self):
+        offsets = set(lock.volume_offset('volume-%d' % i)
+                      for i in range(100))
+        self.assertEqual(len(offsets), 100)
+        self.assertTrue(all(lock.JOURNAL_OFFSET < offset <
+                            2 + lock.VOLUME_SLOTS for offset in offsets))
+        # Every version of the plugin must lock the same byte for a key
+        self.assertEqual(lock.volume_offset('a'), 2 + 0xe8b7be43 %
+                         lock.VOLUME_SLOTS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Tests of xapi.storage.log: the flight recorder, and the queued logging mode
+across a fork.
+"""
+
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import unittest
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from xapi.storage import log
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def recorded():
+    return [log._FORMATTER.format(record)
+            for record in log._RECORDER.records()]
+
+
+class FlightRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = (list(log._LOGGER.handlers), list(log._HANDLERS),
+                      log._RECORDER, log._LOGGER.level, log.LOG_LEVEL)
+        self.handler = ListHandler()
+        for handler in list(log._LOGGER.handlers):
+            log._LOGGER.removeHandler(handler)
+        # As configured for SMAPIV3_LOG_LEVEL=WARNING
+        log.LOG_LEVEL = logging.WARNING
+        self.handler.setLevel(logging.WARNING)
+        log._HANDLERS[:] = [self.handler]
+        log._LOGGER.addHandler(self.handler)
+        log._LOGGER.addHandler(log._RecorderHandler(logging.DEBUG))
+        log._LOGGER.setLevel(logging.DEBUG)
+        log._RECORDER = log._FlightRecorder(2)
+
+    def tearDown(self):
+        for handler in list(log._LOGGER.handlers):
+            log._LOGGER.removeHandler(handler)
+        (handlers, log._HANDLERS[:], log._RECORDER, level,
+         log.LOG_LEVEL) = self.saved
+        for handler in handlers:
+            log._LOGGER.addHandler(handler)
+        log._LOGGER.setLevel(level)
+
+    def test_debug_is_disabled(self):
+        self.assertFalse(log.is_debug_enabled())
+
+    def test_records_until_failure(self):
+        log.debug('dropped')
+        log.debug('%s: kept %d', 'dbg', 1)
+        log.info('kept too')
+        log.warning('written')
+        self.assertEqual(self.handler.lines, ['WARNING written'])
+        self.assertEqual(recorded(), [
+            'SMAPIv3: [%d] - DEBUG - dbg: kept 1' % os.getpid(),
+            'SMAPIv3: [%d] - INFO - kept too' % os.getpid()])
+
+        log.flush_flight_recorder()
+        self.assertEqual(self.handler.lines[2:-1],
+                         ['DEBUG dbg: kept 1', 'INFO kept too'])
+        self.assertEqual(recorded(), [])
+
+    def test_records_the_logging_module(self):
+        # As the generated dispatchers log
+        logging.debug('method = %s params = %r', 'Volume.stat', {})
+        logging.warning('written')
+        self.assertEqual(self.handler.lines, ['WARNING written'])
+        self.assertEqual(recorded(), [
+            "SMAPIv3: [%d] - DEBUG - method = Volume.stat params = {}" %
+            os.getpid()])
+
+    def test_records_exceptions(self):
+        try:
+            raise ValueError('failed')
+        except ValueError:
+            log.debug('backtrace', exc_info=True)
+            logging.debug('backtrace', exc_info=True)
+        self.assertIn('ValueError: failed', recorded()[0])
+        self.assertIn('ValueError: failed', recorded()[1])
+
+
+class AsyncLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'log')
+        self.saved = (list(log._LOGGER.handlers), list(log._HANDLERS),
+                      log._LISTENER)
+        # Queue records to a file handler, as configure_logging does to
+        # the syslog handler when LOG_ASYNC is set
+        self.handler = logging.FileHandler(self.path)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.queue = queue.Queue()
+        log._LISTENER = log._QueueListener(self.queue, [self.handler])
+        log._LISTENER.start()
+        queue_handler = log._QueueHandler(self.queue)
+        for handler in log._HANDLERS:
+            log._LOGGER.removeHandler(handler)
+        log._HANDLERS[:] = [queue_handler]
+        log._LOGGER.addHandler(queue_handler)
+
+    def tearDown(self):
+        if log._LISTENER is not None:
+            log._LISTENER.stop()
+        for handler in list(log._LOGGER.handlers):
+            log._LOGGER.removeHandler(handler)
+        handlers, log._HANDLERS[:], log._LISTENER = self.saved
+        for handler in handlers:
+            log._LOGGER.addHandler(handler)
+        self.handler.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read().splitlines()
+
+    def test_parent_queues(self):
+        log.error('queued')
+        log._LISTENER.stop()
+        self.assertEqual(self.read(), ['queued'])
+
+    def test_child_writes_directly(self):
+        # Fork while another thread holds the lock of the queue, as the
+        # listener does while it waits for a record
+        with self.queue.mutex:
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    # A deadlock kills the child rather than the test run
+                    signal.alarm(5)
+                    log.after_fork()
+                    log.error('from the child')
+                    status = 0
+                finally:
+                    os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        self.assertEqual(self.read(), ['from the child'])
+        # The parent still queues its records
+        log.error('from the parent')
+        log._LISTENER.stop()
+        self.assertEqual(self.read(), ['from the child', 'from the parent'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+Tests of the loop+blkback datapath plugin, with the loop devices stubbed
+out.
+"""
+
+import imp
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import xapi.codec
+from xapi import TypeError as RpcTypeError
+from xapi.storage import loop, pagecache
+from xapi.storage.api import datapath_datapath
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLUGIN = os.path.join(os.path.dirname(HERE), 'examples', 'datapath',
+                      'loop+blkback')
+
+loop_datapath = imp.load_source('loop_blkback_datapath',
+                                os.path.join(PLUGIN, 'datapath.py'))
+
+
+class LoopBlkbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.attached = {}
+        self.scans = 0
+        self.saved = loop.backing_files, loop.attach
+        loop.backing_files = self.backing_files
+        loop.attach = self.attach
+        self.datapath = loop_datapath.Implementation()
+
+    def tearDown(self):
+        loop.backing_files, loop.attach = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def backing_files(self):
+        self.scans += 1
+        return dict((path, [device])
+                    for path, device in self.attached.items())
+
+    def attach(self, dbg, path, size_limit=None):
+        device = '/dev/loop%d' % len(self.attached)
+        self.attached[path] = device
+        return device
+
+    def volume(self, name):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write('data')
+        return path
+
+    def device(self, backend):
+        return dict(backend['implementations'])['BlockDevice']['path']
+
+    def test_attach_batch(self):
+        a, b = self.volume('a'), self.volume('b')
+        self.attach('test', a)
+        uris = ['file://' + b, 'file://' + a, 'file://' + b]
+        backends = self.datapath.attach_batch('test', uris, '0')
+        # The devices are scanned once, and each file is attached once
+        self.assertEqual(self.scans, 1)
+        self.assertEqual([self.device(backend) for backend in backends],
+                         ['/dev/loop1', '/dev/loop0', '/dev/loop1'])
+        # Attaching is idempotent
+        backend = self.datapath.attach('test', 'file://' + b, '0')
+        self.assertEqual(self.device(backend), '/dev/loop1')
+        self.assertEqual(len(self.attached), 2)
+
+    def test_activate_batch(self):
+        # Volumes without a prewarm_budget have nothing to do
+        self.datapath.activate_batch(
+            'test', ['file://' + self.volume('a'),
+                     'file://' + self.volume('b')], '0')
+
+
+class PrewarmTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.background = []
+        self.prewarmed = []
+        self.saved = loop_datapath.run_in_background, pagecache.prewarm
+        loop_datapath.run_in_background = (
+            lambda dbg, fn, *args: self.background.append((fn, args[1])))
+        pagecache.prewarm = self.prewarm
+        self.datapath = loop_datapath.Implementation()
+
+    def tearDown(self):
+        loop_datapath.run_in_background, pagecache.prewarm = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def prewarm(self, fd, ranges, deadline):
+        self.prewarmed.append((ranges, deadline))
+        return sum(length for _, length in ranges)
+
+    def volume(self, name, ranges=None):
+        path = os.path.join(self.tmp_dir, name)
+        open(path, 'w').close()
+        if ranges is not None:
+            with open(pagecache.profile_path(path), 'w') as f:
+                f.write(xapi.codec.dumps({'captured': time.time(),
+                                          'ranges': ranges}))
+        return path
+
+    def test_prewarm(self):
+        profiled = self.volume('profiled', [[0, 4096]])
+        unprofiled = self.volume('unprofiled')
+        start = time.time()
+        self.datapath.activate_batch('test', [
+            'file://' + profiled + '?prewarm_budget=5',
+            'file://' + unprofiled + '?prewarm_budget=5',
+            'file://' + self.volume('other', [[0, 4096]])], '0')
+        # The budget is counted from the start of the call
+        [(ranges, deadline)] = self.prewarmed
+        self.assertEqual(ranges, [[0, 4096]])
+        self.assertTrue(start + 5 <= deadline <= time.time() + 5)
+        # A profile is taken of the volume without one
+        self.assertEqual(self.background,
+                         [(pagecache.capture_profile, unprofiled)])
+
+
+class DropCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dropped = []
+        self.saved = pagecache.drop
+        pagecache.drop = lambda fd: self.dropped.append(os.fstat(fd).st_ino)
+        self.datapath = loop_datapath.Implementation()
+
+    def tearDown(self):
+        pagecache.drop = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def test_drop_cache(self):
+        path = os.path.join(self.tmp_dir, 'volume')
+        open(path, 'w').close()
+        inode = os.stat(path).st_ino
+        self.datapath.deactivate('test', 'file://' + path, '0')
+        self.datapath.close('test', 'file://' + path)
+        self.assertEqual(self.dropped, [inode, inode])
+        # A volume which has been destroyed has nothing to drop
+        os.unlink(path)
+        self.datapath.close('test', 'file://' + path)
+        self.assertEqual(len(self.dropped), 2)
+
+class BatchDispatchTest(unittest.TestCase):
+
+    class Implementation(datapath_datapath.Datapath_skeleton):
+
+        def attach_batch(self, dbg, uris, domain):
+            return [{'domain_uuid': domain,
+                     'implementation': ['Blkback', uri]} for uri in uris]
+
+    def setUp(self):
+        self.dispatcher = datapath_datapath.Datapath_server_dispatcher(
+            self.Implementation())
+
+    def test_attach_batch(self):
+        result = self.dispatcher._dispatch('Datapath.attach_batch', [
+            {'dbg': 'test', 'uris': ['a', 'b'], 'domain': '0'}])
+        self.assertEqual(result['Value'],
+                         [{'domain_uuid': '0',
+                           'implementation': ['Blkback', 'a']},
+                          {'domain_uuid': '0',
+                           'implementation': ['Blkback', 'b']}])
+        self.assertRaises(RpcTypeError, self.dispatcher.attach_batch,
+                          {'dbg': 'test', 'uris': 'a', 'domain': '0'})
+        self.assertRaises(RpcTypeError, self.dispatcher.attach_batch,
+                          {'dbg': 'test', 'uris': ['a', 1], 'domain': '0'})
+
+    def test_unimplemented(self):
+        self.assertRaises(datapath_datapath.Unimplemented,
+                          self.dispatcher.activate_batch,
+                          {'dbg': 'test', 'uris': ['a'], 'domain': '0'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests of xapi.storage.metacache: the cache seeing the changes made to the
+metadata files of an SR.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import metacache
+
+
+class MetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+        self.loaded = []
+        self.write('a', {'name': 'a'})
+        self.cache = metacache.MetadataCache('test', self.sr_path, self.load)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.sr_path)
+
+    def load(self, path):
+        self.loaded.append(os.path.basename(path))
+        with open(path + '.inf') as f:
+            return json.load(f)
+
+    def write(self, key, meta, directory=''):
+        # As the simple-file plugin does, with a rename
+        path = os.path.join(self.sr_path, directory, key)
+        with open(path + '.inf.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.rename(path + '.inf.tmp', path + '.inf')
+        return path
+
+    def test_reads_once(self):
+        path = os.path.join(self.sr_path, 'a')
+        self.assertEqual(self.cache.get('test', 'a'), (path, {'name': 'a'}))
+        self.assertEqual(self.cache.get('test', 'a'), (path, {'name': 'a'}))
+        self.assertEqual(self.loaded, ['a'])
+
+    def test_sees_changes(self):
+        self.cache.get('test', 'a')
+        self.write('a', {'name': 'renamed'})
+        self.assertEqual(self.cache.get('test', 'a')[1], {'name': 'renamed'})
+        self.write('b', {'name': 'b'})
+        self.assertEqual(sorted(key for key, _ in self.cache.volumes('test')),
+                         ['a', 'b'])
+        os.unlink(os.path.join(self.sr_path, 'a.inf'))
+        self.assertRaises(IOError, self.cache.get, 'test', 'a')
+        self.assertEqual([key for key, _ in self.cache.volumes('test')],
+                         ['b'])
+
+    def test_sees_new_shards(self):
+        os.mkdir(os.path.join(self.sr_path, 'c0'))
+        # Sync, so that the shard is watched before it is written to
+        self.cache.volumes('test')
+        path = self.write('c0ffee', {'name': 'c'}, 'c0')
+        self.assertEqual(self.cache.get('test', 'c0ffee'),
+                         (path, {'name': 'c'}))
+
+    def test_sees_moves_between_directories(self):
+        os.mkdir(os.path.join(self.sr_path, 'a0'))
+        self.cache.get('test', 'a')
+        # As layout.migrate moves a volume into its shard
+        os.rename(os.path.join(self.sr_path, 'a.inf'),
+                  os.path.join(self.sr_path, 'a0', 'a.inf'))
+        self.assertEqual(self.cache.get('test', 'a'),
+                         (os.path.join(self.sr_path, 'a0', 'a'),
+                          {'name': 'a'}))
+
+    def test_for_sr(self):
+        saved = metacache.ENABLED
+        metacache.ENABLED = False
+        try:
+            self.assertIsNone(metacache.for_sr('test', self.sr_path,
+                                               self.load))
+            metacache.enable()
+            cache = metacache.for_sr('test', self.sr_path, self.load)
+            self.assertIs(metacache.for_sr('test', self.sr_path, self.load),
+                          cache)
+            metacache.forget(self.sr_path)
+            self.assertIsNone(cache.fd)
+        finally:
+            metacache.ENABLED = saved
+
+
+if __name__ == '__main__':
+    unittest.main()
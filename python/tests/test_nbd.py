@@ -0,0 +1,180 @@
+"""
+Tests of xapi.storage.nbd: the handshake, requests and their errors, and
+starting servers.
+"""
+
+import errno
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import unittest
+
+from xapi.storage import nbd, qcow2
+
+SIZE = 1024 * 1024
+
+
+def send_option(sock, option, data=b''):
+    sock.sendall(struct.pack('>QII', nbd.IHAVEOPT, option, len(data)) + data)
+
+
+def recv_option_reply(sock):
+    magic, option, reply, length = struct.unpack(
+        '>QIII', nbd._recv_exact(sock, 20))
+    return option, reply, nbd._recv_exact(sock, length)
+
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'disk.qcow2')
+        qcow2.create(self.path, SIZE)
+        self.client, self.server_sock = socket.socketpair()
+
+    def tearDown(self):
+        self.client.close()
+        self.server_sock.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def server(self, read_only=False):
+        server = nbd.Server('test', self.path, read_only)
+        server.image = qcow2.Image(self.path, read_only=read_only)
+        self.addCleanup(server.image.close)
+        return server
+
+    def handshake(self, server):
+        # The client's side is sent first: the socket buffers it
+        self.client.sendall(struct.pack('>I', nbd.FLAG_NO_ZEROES))
+        send_option(self.client, 99)
+        send_option(self.client, nbd.OPT_GO, b'\0' * 6)
+        self.assertTrue(server.handshake(self.server_sock))
+        self.assertEqual(nbd._recv_exact(self.client, 18),
+                         nbd.NBDMAGIC + struct.pack(
+                             '>QH', nbd.IHAVEOPT,
+                             nbd.FLAG_FIXED_NEWSTYLE | nbd.FLAG_NO_ZEROES))
+        self.assertEqual(recv_option_reply(self.client),
+                         (99, nbd.REP_ERR_UNSUP, b''))
+        option, reply, data = recv_option_reply(self.client)
+        self.assertEqual((option, reply), (nbd.OPT_GO, nbd.REP_INFO))
+        return struct.unpack('>HQH', data)
+
+    def request(self, server, command, offset, length, payload=b''):
+        """Sends a request, and returns the error and data of the reply"""
+        self.client.sendall(nbd.REQUEST.pack(nbd.REQUEST_MAGIC, 0, command,
+                                             1234, offset, length) + payload)
+        self.assertTrue(server.request(self.server_sock))
+        magic, error, handle = nbd.REPLY.unpack(
+            nbd._recv_exact(self.client, nbd.REPLY.size))
+        self.assertEqual((magic, handle), (nbd.SIMPLE_REPLY_MAGIC, 1234))
+        if error or command != nbd.CMD_READ:
+            return error, b''
+        return error, nbd._recv_exact(self.client, length)
+
+    def test_handshake(self):
+        server = self.server()
+        info, size, flags = self.handshake(server)
+        self.assertEqual((info, size), (nbd.INFO_EXPORT, SIZE))
+        self.assertFalse(flags & nbd.FLAG_READ_ONLY)
+        self.assertTrue(flags & nbd.FLAG_SEND_FLUSH)
+        self.assertTrue(flags & nbd.FLAG_SEND_TRIM)
+        self.assertEqual(recv_option_reply(self.client),
+                         (nbd.OPT_GO, nbd.REP_ACK, b''))
+
+    def test_export_name(self):
+        server = self.server(read_only=True)
+        self.client.sendall(struct.pack('>I', 0))
+        send_option(self.client, nbd.OPT_EXPORT_NAME, b'disk.qcow2')
+        self.assertTrue(server.handshake(self.server_sock))
+        nbd._recv_exact(self.client, 18)
+        size, flags = struct.unpack('>QH', nbd._recv_exact(self.client, 10))
+        self.assertEqual(size, SIZE)
+        self.assertTrue(flags & nbd.FLAG_READ_ONLY)
+        # Without FLAG_NO_ZEROES
+        self.assertEqual(nbd._recv_exact(self.client, 124), b'\0' * 124)
+
+    def test_abort(self):
+        self.client.sendall(struct.pack('>I', nbd.FLAG_NO_ZEROES))
+        send_option(self.client, nbd.OPT_ABORT)
+        self.assertFalse(self.server().handshake(self.server_sock))
+
+    def test_requests(self):
+        server = self.server()
+        self.assertEqual(self.request(server, nbd.CMD_WRITE, 100, 4, b'data'),
+                         (0, b''))
+        self.assertEqual(self.request(server, nbd.CMD_READ, 98, 8),
+                         (0, b'\0\0data\0\0'))
+        self.assertEqual(self.request(server, nbd.CMD_FLUSH, 0, 0), (0, b''))
+        self.assertEqual(self.request(server, nbd.CMD_TRIM, 0, SIZE),
+                         (0, b''))
+        self.assertEqual(self.request(server, nbd.CMD_READ, 100, 4),
+                         (0, b'data'))
+        # Disconnecting flushes
+        self.client.sendall(nbd.REQUEST.pack(nbd.REQUEST_MAGIC, 0,
+                                             nbd.CMD_DISC, 0, 0, 0))
+        self.assertFalse(server.request(self.server_sock))
+
+    def test_errors(self):
+        server = self.server()
+        self.assertEqual(self.request(server, nbd.CMD_READ, SIZE - 1, 2),
+                         (nbd.EINVAL, b''))
+        self.assertEqual(self.request(server, nbd.CMD_WRITE, SIZE - 1, 2,
+                                      b'xy'), (nbd.ENOSPC, b''))
+        self.assertEqual(self.request(server, nbd.CMD_TRIM, SIZE, 1),
+                         (nbd.EINVAL, b''))
+        self.assertEqual(self.request(server, 99, 0, 0), (nbd.EINVAL, b''))
+
+        def fail(offset, length):
+            raise IOError(errno.ENOSPC, 'full')
+        server.image.read = fail
+        self.assertEqual(self.request(server, nbd.CMD_READ, 0, 1),
+                         (nbd.ENOSPC, b''))
+
+        def broken(offset, length):
+            raise qcow2.Qcow2Error('broken')
+        server.image.read = broken
+        self.assertEqual(self.request(server, nbd.CMD_READ, 0, 1),
+                         (nbd.EIO, b''))
+
+    def test_read_only(self):
+        server = self.server(read_only=True)
+        self.assertEqual(self.request(server, nbd.CMD_WRITE, 0, 1, b'x'),
+                         (nbd.EPERM, b''))
+        self.assertEqual(self.request(server, nbd.CMD_TRIM, 0, 1),
+                         (nbd.EPERM, b''))
+        self.assertEqual(self.request(server, nbd.CMD_READ, 0, 1),
+                         (0, b'\0'))
+
+
+class StartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved = nbd.RUN_DIR
+        nbd.RUN_DIR = os.path.join(self.tmp_dir, 'run')
+        self.path = os.path.join(self.tmp_dir, 'disk.qcow2')
+        qcow2.create(self.path, SIZE)
+
+    def tearDown(self):
+        nbd.control('test', self.path, 'stop')
+        nbd.RUN_DIR = self.saved
+        shutil.rmtree(self.tmp_dir)
+
+    def test_start(self):
+        self.assertFalse(nbd.control('test', self.path, 'ping'))
+        nbd.start('test', self.path)
+        self.assertTrue(nbd.control('test', self.path, 'ping'))
+        listening = os.stat(nbd.socket_path(self.path)).st_ino
+        # The running server is kept
+        nbd.start('test', self.path)
+        self.assertEqual(os.stat(nbd.socket_path(self.path)).st_ino,
+                         listening)
+        self.assertTrue(nbd.control('test', self.path, 'suspend'))
+        self.assertTrue(nbd.control('test', self.path, 'resume'))
+        self.assertRaises(IOError, nbd.control, 'test', self.path, 'what')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tests of xapi.storage.pagecache: page cache residency, pre-warming and
+boot profiles, with the residency and advice system calls stubbed out.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import xapi.codec
+from xapi.storage import pagecache
+from xapi.storage.libc import PAGE_SIZE, POSIX_FADV_DONTNEED, \
+    POSIX_FADV_WILLNEED
+
+
+class PageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'volume')
+        with open(self.path, 'w') as f:
+            f.truncate(16 * PAGE_SIZE)
+        # The pages in the page cache, and the advice given
+        self.resident = bytearray(16)
+        self.advice = []
+        self.saved = pagecache.mincore, pagecache.fadvise
+        pagecache.mincore = self.mincore
+        pagecache.fadvise = (lambda fd, offset, length, advice:
+                             self.advice.append((offset, length, advice)))
+
+    def tearDown(self):
+        pagecache.mincore, pagecache.fadvise = self.saved
+        shutil.rmtree(self.dir)
+
+    def mincore(self, fd, offset, length):
+        first = offset // PAGE_SIZE
+        return self.resident[first:first + (length + PAGE_SIZE - 1) //
+                             PAGE_SIZE]
+
+    def cache(self, *pages):
+        for page in pages:
+            self.resident[page] = 1
+
+
+class ResidencyTest(PageCacheTest):
+
+    def test_resident_ranges(self):
+        self.cache(0, 1, 4, 15)
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self.assertEqual(
+                pagecache.resident_ranges(fd, 16 * PAGE_SIZE),
+                [[0, 2 * PAGE_SIZE], [4 * PAGE_SIZE, PAGE_SIZE],
+                 [15 * PAGE_SIZE, PAGE_SIZE]])
+            # Gaps of up to two pages are merged
+            self.assertEqual(
+                pagecache.resident_ranges(fd, 16 * PAGE_SIZE, 2 * PAGE_SIZE),
+                [[0, 5 * PAGE_SIZE], [15 * PAGE_SIZE, PAGE_SIZE]])
+            # The last page is cut at the end of the file
+            self.assertEqual(
+                pagecache.resident_ranges(fd, 15 * PAGE_SIZE + 1)[-1],
+                [15 * PAGE_SIZE, 1])
+            self.assertEqual(pagecache.resident_bytes(fd, 16 * PAGE_SIZE),
+                             4 * PAGE_SIZE)
+        finally:
+            os.close(fd)
+
+    def test_drop(self):
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            pagecache.drop(fd)
+        finally:
+            os.close(fd)
+        # The whole file
+        self.assertEqual(self.advice, [(0, 0, POSIX_FADV_DONTNEED)])
+
+
+class PrewarmTest(PageCacheTest):
+
+    def setUp(self):
+        PageCacheTest.setUp(self)
+        self.saved_step = pagecache.PREWARM_STEP
+        pagecache.PREWARM_STEP = 2 * PAGE_SIZE
+
+    def tearDown(self):
+        pagecache.PREWARM_STEP = self.saved_step
+        PageCacheTest.tearDown(self)
+
+    def test_prewarm(self):
+        ranges = [[0, 3 * PAGE_SIZE], [8 * PAGE_SIZE, PAGE_SIZE]]
+        self.assertEqual(pagecache.prewarm(0, ranges, time.time() + 60),
+                         4 * PAGE_SIZE)
+        self.assertEqual(self.advice, [
+            (0, 2 * PAGE_SIZE, POSIX_FADV_WILLNEED),
+            (2 * PAGE_SIZE, PAGE_SIZE, POSIX_FADV_WILLNEED),
+            (8 * PAGE_SIZE, PAGE_SIZE, POSIX_FADV_WILLNEED)])
+
+    def test_deadline(self):
+        self.assertEqual(pagecache.prewarm(0, [[0, PAGE_SIZE]], time.time()),
+                         0)
+        self.assertEqual(self.advice, [])
+
+
+class ProfileTest(PageCacheTest):
+
+    def write_profile(self, contents):
+        with open(pagecache.profile_path(self.path), 'w') as f:
+            f.write(contents)
+
+    def test_capture_and_load(self):
+        self.assertIsNone(pagecache.load_profile(self.path))
+        # Not taken once the volume is detached
+        pagecache.capture_profile('test', self.path, lambda: False, 0)
+        self.assertIsNone(pagecache.load_profile(self.path))
+        self.cache(2, 3)
+        pagecache.capture_profile('test', self.path, lambda: True, 0)
+        self.assertEqual(pagecache.load_profile(self.path),
+                         [[2 * PAGE_SIZE, 2 * PAGE_SIZE]])
+
+    def test_unusable_profiles(self):
+        self.write_profile('not json')
+        self.assertIsNone(pagecache.load_profile(self.path))
+        self.write_profile(xapi.codec.dumps({
+            'captured': time.time() - pagecache.PROFILE_MAX_AGE - 1,
+            'ranges': [[0, PAGE_SIZE]]}))
+        self.assertIsNone(pagecache.load_profile(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests of xapi.storage.probe: inspecting candidates, errors for a single
+candidate, and caching the results.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from xapi.storage import probe
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'examples', 'volume',
+                                'org.xen.xapi.storage.simple-file'))
+
+import sr as simple_sr  # noqa: E402
+
+
+class ProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = probe.CACHE_DIR
+        probe.CACHE_DIR = tempfile.mkdtemp()
+        self.inspected = []
+
+    def tearDown(self):
+        shutil.rmtree(probe.CACHE_DIR)
+        probe.CACHE_DIR = self.saved
+
+    def inspect(self, location):
+        self.inspected.append(location)
+        if location == 'gone':
+            raise OSError(2, 'No such file or directory')
+        if location == 'broken':
+            raise ValueError('broken')
+        return [location.upper()]
+
+    def probe(self, configuration, candidates, ttl=probe.TTL):
+        return probe.probe('test', 'plugin', configuration,
+                           lambda: candidates, self.inspect, ttl)
+
+    def test_errors_only_lose_their_candidate(self):
+        self.assertEqual(self.probe({}, ['a', 'gone', 'broken', 'b']),
+                         ['A', 'B'])
+        self.assertEqual(sorted(self.inspected), ['a', 'b', 'broken', 'gone'])
+        self.assertEqual(self.probe({}, []), ['A', 'B'])
+
+    def test_cache(self):
+        self.assertEqual(self.probe({'path': '/a'}, ['a']), ['A'])
+        # Cached, for each configuration
+        self.assertEqual(self.probe({'path': '/a'}, ['b']), ['A'])
+        self.assertEqual(self.probe({'path': '/b'}, ['b']), ['B'])
+        self.assertEqual(self.inspected, ['a', 'b'])
+        # Expired
+        self.assertEqual(self.probe({'path': '/a'}, ['c'], ttl=0), ['C'])
+        # Forgotten
+        probe.invalidate('plugin')
+        self.assertEqual(self.probe({'path': '/b'}, ['d']), ['D'])
+        self.assertEqual(os.listdir(probe.CACHE_DIR), [
+            os.path.basename(probe._cache_path('plugin', {'path': '/b'}))])
+
+
+class SimpleFileProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = probe.CACHE_DIR
+        self.dir = tempfile.mkdtemp()
+        probe.CACHE_DIR = os.path.join(self.dir, 'probe')
+        self.sr = simple_sr.Implementation()
+
+    def tearDown(self):
+        probe.CACHE_DIR = self.saved
+        shutil.rmtree(self.dir)
+
+    def directory(self, name):
+        path = os.path.join(self.dir, name)
+        os.mkdir(path)
+        return path
+
+    def test_probe(self):
+        sr_path = self.directory('sr')
+        self.sr.create('test', 'uuid', {'path': sr_path}, 'name', 'desc')
+        other = self.directory('other')
+        results = self.sr.probe('test', {'path': self.dir})
+        self.assertEqual(
+            [(r['configuration']['path'], r['sr'] is not None)
+             for r in results],
+            [(self.dir, False), (sr_path, True)])
+        self.assertEqual(results[1]['sr']['uuid'], 'uuid')
+        self.assertEqual(self.sr.probe_candidates('test', other),
+                         [(other, {}, True)])
+
+    def test_unreadable_candidates(self):
+        sr_path = self.directory('sr')
+        with open(os.path.join(sr_path, simple_sr.SR_FILE), 'w') as f:
+            f.write('not json')
+        # The directory itself is still offered
+        self.assertEqual(self.sr.probe_candidates('test', sr_path),
+                         [(sr_path, {}, True)])
+        self.assertEqual(self.sr.probe('test', {'path': sr_path}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Tests of xapi.storage.qcow2: reading and writing images, zero and
+unallocated clusters, backing images and resizing.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import qcow2
+from xapi.storage.qcow2 import COPIED, ZERO
+
+CLUSTER = 1 << qcow2.CLUSTER_BITS
+SIZE = 4 * CLUSTER
+
+
+class Qcow2Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name + '.qcow2')
+
+    def open(self, name, **kwargs):
+        image = qcow2.Image(self.path(name), **kwargs)
+        self.addCleanup(image.close)
+        return image
+
+    def test_round_trip(self):
+        qcow2.create(self.path('a'), SIZE)
+        self.assertEqual(qcow2.virtual_size(self.path('a')), SIZE)
+        self.assertIsNone(qcow2.backing_file(self.path('a')))
+        image = self.open('a')
+        # Unallocated clusters read as zeros
+        self.assertEqual(image.read(0, SIZE), b'\0' * SIZE)
+        self.assertFalse(image.is_allocated(1))
+        # Across a cluster boundary
+        image.write(CLUSTER - 2, b'abcd')
+        self.assertEqual(image.read(CLUSTER - 3, 6), b'\0abcd\0')
+        self.assertTrue(image.is_allocated(0))
+        self.assertTrue(image.is_allocated(1))
+        self.assertFalse(image.is_allocated(2))
+        image.write(CLUSTER, b'x')
+        image.close()
+        image = self.open('a', read_only=True)
+        self.assertEqual(image.read(CLUSTER - 3, 6), b'\0abxd\0')
+        self.assertRaises(IOError, image.write, 0, b'x')
+
+    def test_write_beyond_the_end(self):
+        qcow2.create(self.path('a'), SIZE)
+        image = self.open('a')
+        self.assertRaises(IOError, image.write, SIZE - 1, b'xy')
+        self.assertEqual(image.read(SIZE - 1, 2), b'\0\0')
+
+    def test_zero_clusters(self):
+        qcow2.create(self.path('a'), SIZE)
+        image = self.open('a')
+        image.write(0, b'x' * CLUSTER)
+        host = image._lookup(0) & qcow2.OFFSET_MASK
+        # As qemu-img leaves a cluster which was zeroed: still allocated,
+        # but with stale contents
+        image._set_l2_entry(0, host | COPIED | ZERO)
+        self.assertTrue(image.is_allocated(0))
+        self.assertEqual(image.read(0, CLUSTER), b'\0' * CLUSTER)
+        image.write(2, b'y')
+        self.assertEqual(image.read(0, CLUSTER),
+                         b'\0\0y' + b'\0' * (CLUSTER - 3))
+        # The preallocated cluster is reused, without the flag
+        self.assertEqual(image._lookup(0), host | COPIED)
+        # A zero cluster without a host cluster
+        image._set_l2_entry(1, ZERO)
+        image.write(CLUSTER + 1, b'z')
+        self.assertEqual(image.read(CLUSTER, 3), b'\0z\0')
+        self.assertFalse(image._lookup(1) & ZERO)
+
+    def test_backing(self):
+        qcow2.create(self.path('base'), SIZE)
+        base = self.open('base')
+        base.write(0, b'base' * (CLUSTER // 2))
+        base.close()
+        qcow2.create(self.path('top'), None, backing=self.path('base'))
+        self.assertEqual(qcow2.virtual_size(self.path('top')), SIZE)
+        self.assertEqual(qcow2.backing_file(self.path('top')),
+                         self.path('base'))
+        top = self.open('top')
+        self.assertEqual(top.chain(), [self.path('top'), self.path('base')])
+        self.assertFalse(top.is_allocated(0))
+        self.assertEqual(top.read(0, 8), b'basebase')
+        # Copy on write: the rest of the cluster comes from the backing
+        top.write(4, b'top!')
+        self.assertTrue(top.is_allocated(0))
+        self.assertEqual(top.read(0, 12), b'basetop!base')
+        self.assertEqual(self.open('base', read_only=True).read(0, 8),
+                         b'basebase')
+        # A zero cluster hides the backing image
+        top._set_l2_entry(1, ZERO)
+        self.assertEqual(top.read(CLUSTER, 4), b'\0' * 4)
+        self.assertEqual(top.read(2 * CLUSTER, 4), b'\0' * 4)
+
+    def test_pull_and_set_backing(self):
+        qcow2.create(self.path('base'), SIZE)
+        base = self.open('base')
+        base.write(CLUSTER, b'b' * CLUSTER)
+        base.close()
+        qcow2.create(self.path('top'), None, backing=self.path('base'))
+        top = self.open('top')
+        top.write(0, b't')
+        self.assertFalse(top.pull(0))
+        self.assertFalse(top.pull(2))
+        self.assertTrue(top.pull(1))
+        self.assertFalse(top.pull(1))
+        top.set_backing(None)
+        self.assertIsNone(qcow2.backing_file(self.path('top')))
+        os.unlink(self.path('base'))
+        top.close()
+        top = self.open('top')
+        self.assertEqual(top.read(0, 2), b't\0')
+        self.assertEqual(top.read(CLUSTER, CLUSTER), b'b' * CLUSTER)
+
+    def test_set_backing_twice(self):
+        for name in ('a', 'b', 'top'):
+            qcow2.create(self.path(name), SIZE)
+        top = self.open('top')
+        top.set_backing(self.path('a'))
+        top.set_backing(self.path('b'))
+        self.assertEqual(qcow2.backing_file(self.path('top')), self.path('b'))
+        self.assertRaises(qcow2.Qcow2Error, self.open('b').set_backing,
+                          self.path('top'))
+
+    def test_resize(self):
+        qcow2.create(self.path('a'), SIZE)
+        image = self.open('a')
+        self.assertRaises(qcow2.Qcow2Error, image.resize, SIZE - 1)
+        image.resize(2 * SIZE)
+        image.write(2 * SIZE - 1, b'x')
+        image.close()
+        self.assertEqual(qcow2.virtual_size(self.path('a')), 2 * SIZE)
+        self.assertEqual(self.open('a').read(2 * SIZE - 2, 2), b'\0x')
+
+    def test_not_an_image(self):
+        with open(self.path('a'), 'wb') as f:
+            f.write(b'\0' * CLUSTER)
+        self.assertRaises(qcow2.Qcow2Error, qcow2.Image, self.path('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests of the qcow2-file volume plugin: snapshots, clones, destroying
+volumes and coalescing the hidden images left behind.
+"""
+
+import imp
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import nbd, qcow2
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLUGIN = os.path.join(os.path.dirname(HERE), 'examples', 'volume',
+                      'org.xen.xapi.storage.qcow2-file')
+
+# The plugin's modules have the same names as the simple-file plugin's
+qcow2_volume = imp.load_source('qcow2_file_volume',
+                               os.path.join(PLUGIN, 'volume.py'))
+
+M = 1024 * 1024
+
+
+class Qcow2FileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+        self.sr = 'file://' + self.sr_path
+        self.volume = qcow2_volume.Implementation()
+        # No NBD servers are running
+        self.saved = nbd.RUN_DIR, qcow2_volume.run_in_background
+        nbd.RUN_DIR = os.path.join(self.sr_path, 'nbd')
+        qcow2_volume.run_in_background = lambda dbg, fn, *args: fn(*args)
+
+    def tearDown(self):
+        nbd.RUN_DIR, qcow2_volume.run_in_background = self.saved
+        shutil.rmtree(self.sr_path)
+
+    def create(self, data):
+        key = self.volume.create('test', self.sr, 'name', 'description',
+                                 M, False).key
+        self.write(key, 0, data)
+        return key
+
+    def write(self, key, offset, data):
+        image = qcow2.Image(self.volume.image_path(self.sr_path, key))
+        try:
+            image.write(offset, data)
+        finally:
+            image.close()
+
+    def read(self, key, length=4):
+        image = qcow2.Image(self.volume.image_path(self.sr_path, key),
+                            read_only=True)
+        try:
+            return image.read(0, length)
+        finally:
+            image.close()
+
+    def backing_key(self, key):
+        backing = qcow2.backing_file(self.volume.image_path(self.sr_path,
+                                                            key))
+        return os.path.basename(backing)[:-len('.qcow2')] if backing else None
+
+    def images(self):
+        return sorted(name[:-len('.qcow2')]
+                      for name in os.listdir(self.sr_path)
+                      if name.endswith('.qcow2'))
+
+    def test_snapshot(self):
+        key = self.create(b'old!')
+        snapshot = self.volume.snapshot('test', self.sr, key)
+        self.assertFalse(snapshot.read_write)
+        self.assertEqual(self.backing_key(key), snapshot.key)
+        self.write(key, 0, b'new!')
+        self.assertEqual(self.read(key), b'new!')
+        self.assertEqual(self.read(snapshot.key), b'old!')
+        self.assertEqual(self.volume.hidden(self.sr_path)[0], [])
+        self.assertFalse(os.path.exists(
+            self.volume.overlay_marker(self.sr_path, snapshot.key)))
+        # A snapshot of the snapshot is backed by it
+        again = self.volume.snapshot('test', self.sr, snapshot.key)
+        self.assertEqual(self.backing_key(again.key), snapshot.key)
+        self.assertEqual(self.read(again.key), b'old!')
+
+    def test_destroy_and_coalesce(self):
+        key = self.create(b'old!')
+        snapshot = self.volume.snapshot('test', self.sr, key).key
+        self.write(key, M // 2, b'new!')
+        # The snapshot is merged into the volume
+        self.volume.destroy('test', self.sr, snapshot)
+        self.assertEqual(self.images(), [key])
+        self.assertIsNone(self.backing_key(key))
+        self.assertEqual(self.read(key), b'old!')
+        self.volume.destroy('test', self.sr, key)
+        self.assertEqual(self.images(), [])
+
+    def test_clone(self):
+        key = self.create(b'old!')
+        clone = self.volume.clone('test', self.sr, key)
+        self.assertTrue(clone.read_write)
+        base = self.backing_key(key)
+        self.assertEqual(self.backing_key(clone.key), base)
+        hidden, children = self.volume.hidden(self.sr_path)
+        self.assertEqual(hidden, [base])
+        self.assertEqual(sorted(children[base]), sorted([key, clone.key]))
+        self.write(clone.key, 0, b'new!')
+        self.assertEqual(self.read(key), b'old!')
+        # The base image has two children, so it stays
+        self.volume.coalesce('test', self.sr_path)
+        self.assertEqual(self.images(), sorted([base, key, clone.key]))
+        self.volume.destroy('test', self.sr, key)
+        self.assertEqual(self.images(), [clone.key])
+        self.assertEqual(self.read(clone.key), b'new!')
+        self.assertEqual(self.volume.hidden(self.sr_path)[0], [])
+
+    def test_recovers_an_interrupted_overlay(self):
+        key = self.create(b'data')
+        path = self.volume.image_path(self.sr_path, key)
+        # As left by a process which died after renaming the image
+        os.rename(path, self.volume.image_path(self.sr_path, 'base'))
+        with open(self.volume.overlay_marker(self.sr_path, 'base'), 'w') as f:
+            f.write(key)
+        self.volume.coalesce('test', self.sr_path)
+        self.assertEqual(self.images(), [key])
+        self.assertEqual(self.read(key), b'data')
+        self.assertEqual(sorted(os.listdir(self.sr_path)),
+                         sorted(['.coalesce', '.lock', key + '.inf',
+                                 key + '.qcow2']))
+
+    def test_finishes_an_interrupted_snapshot(self):
+        key = self.create(b'data')
+        path = self.volume.image_path(self.sr_path, key)
+        # As left by a process which died before writing the snapshot's
+        # metadata
+        os.rename(path, self.volume.image_path(self.sr_path, 'snapshot'))
+        qcow2.create(path, None,
+                     backing=self.volume.image_path(self.sr_path, 'snapshot'))
+        with open(self.volume.overlay_marker(self.sr_path, 'snapshot'),
+                  'w') as f:
+            f.write(key)
+        self.volume.coalesce('test', self.sr_path)
+        self.assertEqual(self.images(), [key])
+        self.assertEqual(self.read(key), b'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
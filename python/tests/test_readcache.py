@@ -0,0 +1,129 @@
+"""
+Tests of xapi.storage.readcache: reads and writes through the cache, the
+budget, and discarding a cache which no longer matches its file.
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import readcache
+from xapi.storage.readcache import BLOCK_SIZE, CachedFile
+
+
+class ReadCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.path = os.path.join(self.tmp_dir, 'volume')
+        self.contents = b''.join(chr(ord('a') + i).encode('ascii') *
+                                 BLOCK_SIZE for i in range(4))
+        with open(self.path, 'wb') as f:
+            f.write(self.contents)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def open(self, **kwargs):
+        cached = CachedFile('test', self.path, self.cache_dir, **kwargs)
+        self.addCleanup(cached.close)
+        return cached
+
+    def overwrite(self, offset, data):
+        """Writes to the file behind the cache's back"""
+        with open(self.path, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+
+    def test_reads_through_the_cache(self):
+        cached = self.open()
+        self.assertEqual(cached.read(BLOCK_SIZE - 1, 2), b'ab')
+        self.assertEqual(sorted(cached.lru), [0, 1])
+        self.overwrite(0, b'z')
+        # Served from the cache
+        self.assertEqual(cached.read(0, 1), b'a')
+        self.assertEqual(cached.read(3 * BLOCK_SIZE, 1), b'd')
+        self.assertRaises(IOError, cached.read, 4 * BLOCK_SIZE - 1, 2)
+
+    def test_writes_through_the_cache(self):
+        cached = self.open()
+        cached.read(0, 1)
+        cached.write(BLOCK_SIZE - 1, b'xy')
+        self.assertEqual(cached.read(BLOCK_SIZE - 1, 2), b'xy')
+        with open(self.path, 'rb') as f:
+            f.seek(BLOCK_SIZE - 1)
+            self.assertEqual(f.read(2), b'xy')
+
+    def test_kept_across_opens(self):
+        cached = self.open()
+        cached.read(0, 2 * BLOCK_SIZE)
+        cached.write(0, b'x')
+        cached.close()
+        self.assertEqual(sorted(self.open().lru), [0, 1])
+
+    def test_discarded_if_the_file_changed(self):
+        cached = self.open()
+        cached.read(0, 1)
+        cached.close()
+        os.utime(self.path, (0, 0))
+        cached = self.open()
+        self.assertEqual(len(cached.lru), 0)
+        self.assertEqual(cached.read(0, 1), b'a')
+
+    def test_discarded_after_a_crash(self):
+        cached = self.open()
+        cached.read(0, 1)
+        cached.flush()
+        cached.write(0, b'x')
+        # Exit without closing, as a crashed process would
+        for fd in (cached.fd, cached.data_fd, cached.map_fd):
+            os.close(fd)
+        cached.lru = None
+        cached.fd = cached.data_fd = cached.map_fd = None
+        self.assertEqual(len(self.open().lru), 0)
+
+    def test_budget(self):
+        cached = self.open(budget=2 * BLOCK_SIZE)
+        self.assertEqual(cached.read(0, 3 * BLOCK_SIZE), self.contents[
+            :3 * BLOCK_SIZE])
+        # The least recently used block was evicted
+        self.assertEqual(list(cached.lru), [1, 2])
+        self.assertEqual(cached.read(0, 1), b'a')
+        self.assertEqual(list(cached.lru), [2, 0])
+
+    def test_evicts_other_caches(self):
+        other_path = os.path.join(self.tmp_dir, 'other')
+        shutil.copy(self.path, other_path)
+        other = CachedFile('test', other_path, self.cache_dir)
+        other.read(0, 2 * BLOCK_SIZE)
+        other.close()
+        cached = self.open(budget=2 * BLOCK_SIZE)
+        cached.read(0, 2 * BLOCK_SIZE)
+        self.assertEqual(sorted(cached.lru), [0, 1])
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted(
+            readcache.cache_name(self.path) + suffix
+            for suffix in ('.data', '.map')))
+
+    def test_in_use(self):
+        self.open()
+        with self.assertRaises(IOError) as raised:
+            CachedFile('test', self.path, self.cache_dir)
+        self.assertEqual(raised.exception.errno, errno.EBUSY)
+
+    def test_read_only(self):
+        cached = self.open(read_only=True)
+        self.assertEqual(cached.read(0, 1), b'a')
+        self.assertRaises(IOError, cached.write, 0, b'x')
+
+    def test_discard(self):
+        self.open().close()
+        readcache.discard(self.cache_dir, self.path)
+        readcache.discard(self.cache_dir, self.path)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests of the record classes generated for the IDL structs, and of the
+xapi.Record base class.
+"""
+
+import unittest
+
+import xapi
+from xapi import TypeError as RpcTypeError
+from xapi import codec
+from xapi.storage.api.records import ProbeResult, SrStat, Volume
+
+
+def volume_dict(**fields):
+    d = {
+        'key': 'key', 'uuid': None, 'name': 'name', 'description': '',
+        'read_write': True, 'sharable': False, 'virtual_size': 1024L,
+        'physical_utilisation': 0L, 'uri': ['file:///key'], 'keys': {}
+    }
+    d.update(fields)
+    return d
+
+
+def sr_stat_dict():
+    return {
+        'sr': 'file:///sr', 'name': 'name', 'uuid': 'uuid',
+        'description': '', 'free_space': 0L, 'total_space': 0L,
+        'datasources': [], 'clustered': False, 'health': ['Healthy', '']
+    }
+
+
+class RecordTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        d = volume_dict(keys={'a': 'b'})
+        v = Volume.from_dict(d)
+        self.assertEqual(v.to_dict(), d)
+        self.assertEqual(Volume.from_dict(v.to_dict()), v)
+        self.assertNotEqual(Volume.from_dict(volume_dict(name='other')), v)
+        # Read as a dict
+        self.assertEqual(v['name'], 'name')
+        self.assertTrue('keys' in v)
+        self.assertFalse('other' in v)
+        self.assertRaises(KeyError, lambda: v['other'])
+        self.assertEqual(v.get('other', 1), 1)
+        # No dict to add fields to
+        self.assertRaises(AttributeError, setattr, v, 'other', 1)
+
+    def test_missing_fields_are_none(self):
+        d = volume_dict()
+        del d['uuid']
+        self.assertIsNone(Volume.from_dict(d).uuid)
+        del d['name']
+        self.assertRaises(RpcTypeError, Volume.from_dict, d)
+
+    def test_validation(self):
+        for field, value in [('key', 1), ('read_write', 'yes'),
+                             ('virtual_size', 'big'), ('uri', 'file:///'),
+                             ('uri', [1]), ('keys', {'a': 1})]:
+            self.assertRaises(RpcTypeError, Volume.from_dict,
+                              volume_dict(**{field: value}))
+        d = sr_stat_dict()
+        d['health'] = ['Unwell', '']
+        self.assertRaises(RpcTypeError, SrStat.from_dict, d)
+
+    def test_nested(self):
+        # A nested record may be given in its dict form
+        result = ProbeResult({}, True, sr_stat_dict(), {})
+        self.assertTrue(isinstance(result.sr, SrStat))
+        self.assertEqual(result.to_dict()['sr'], sr_stat_dict())
+        self.assertIsNone(ProbeResult({}, False, None, {}).sr)
+        self.assertRaises(RpcTypeError, ProbeResult, {}, True, 'sr', {})
+
+    def test_output(self):
+        v = Volume.from_dict(volume_dict())
+        self.assertEqual(xapi.success([v])['Value'], [volume_dict()])
+        self.assertEqual(codec.loads(codec.dumps([v])), [volume_dict()])
+
+
+if __name__ == '__main__':
+    unittest.main()
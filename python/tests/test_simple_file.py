@@ -0,0 +1,236 @@
+"""
+Tests of the simple-file volume plugin, run against an SR in a temporary
+directory.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import xapi
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'examples', 'volume',
+                                'org.xen.xapi.storage.simple-file'))
+
+import sr as simple_sr  # noqa: E402
+import volume as simple_volume  # noqa: E402
+from xapi.storage import tasks  # noqa: E402
+
+M = 1024 * 1024
+
+
+class Task(object):
+    """Stands in for xapi.storage.tasks.Task, cancelling itself after
+    [cancel_after] checks"""
+
+    def __init__(self, cancel_after=None):
+        self.cancel_after = cancel_after
+        self.checks = 0
+
+    def check_cancelled(self):
+        self.checks += 1
+        if self.cancel_after is not None and self.checks > self.cancel_after:
+            raise tasks.Cancelled()
+
+    def progress(self, fraction):
+        pass
+
+
+class SimpleFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sr_path = os.path.join(self.dir, 'sr')
+        os.mkdir(self.sr_path)
+        configuration = simple_sr.Implementation().create(
+            'test', 'uuid', {'path': self.sr_path}, 'name', 'description')
+        self.sr = simple_sr.Implementation().attach('test', configuration)
+        self.volume = simple_volume.Implementation()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def create(self, size, data=None):
+        v = self.volume.create('test', self.sr, 'name', 'description', size,
+                               False)
+        path = self.file_path(v.key)
+        if data is not None:
+            with open(path, 'r+b') as f:
+                for offset, chunk in data:
+                    f.seek(offset)
+                    f.write(chunk)
+        return v.key
+
+    def file_path(self, key):
+        return simple_volume.layout.volume_path(self.sr_path, key)
+
+    def read(self, key):
+        with open(self.file_path(key), 'rb') as f:
+            return f.read()
+
+
+class StreamTest(SimpleFileTest):
+
+    def setUp(self):
+        SimpleFileTest.setUp(self)
+        self.source = self.create(16 * M, [(M, os.urandom(2 * M)),
+                                           (10 * M, b'tail')])
+        self.target = self.create(16 * M, [(0, b'old contents' * M)])
+        self.stream = os.path.join(self.dir, 'stream')
+        self.volume.export_volume(Task(), 'test', self.sr_path, self.source,
+                                  self.stream, 'sparse')
+
+    def import_(self, task):
+        self.volume.import_volume(task, 'test', self.sr_path, {},
+                                  self.target, self.stream, 'sparse')
+
+    def test_round_trip(self):
+        self.import_(Task())
+        self.assertEqual(self.read(self.target), self.read(self.source))
+        self.assertFalse(os.path.exists(
+            self.file_path(self.target) + simple_volume.IMPORT_SUFFIX))
+
+    def test_cancelled_import_leaves_the_volume(self):
+        before = self.read(self.target)
+        self.assertRaises(tasks.Cancelled, self.import_, Task(cancel_after=1))
+        self.assertEqual(self.read(self.target), before)
+        self.assertFalse(os.path.exists(
+            self.file_path(self.target) + simple_volume.IMPORT_SUFFIX))
+
+    def test_truncated_import_leaves_the_volume(self):
+        before = self.read(self.target)
+        with open(self.stream, 'r+b') as f:
+            f.truncate(os.path.getsize(self.stream) - 1000)
+        self.assertRaises(IOError, self.import_, Task())
+        self.assertEqual(self.read(self.target), before)
+
+    def test_unknown_format(self):
+        self.assertRaises(Exception, self.volume.import_stream, 'test',
+                          self.sr, self.target, self.stream, 'vhd')
+
+
+class LsTest(SimpleFileTest):
+
+    def test_volumes_destroyed_while_listing(self):
+        kept = self.create(M)
+        gone = self.create(M)
+        token = self.volume.ls_changes('test', self.sr, '')['token']
+        self.volume.set_name('test', self.sr, gone, 'renamed')
+        # As if destroyed between reading its metadata and its data file
+        os.unlink(self.file_path(gone))
+        self.assertEqual([v.key for v in self.volume.ls('test', self.sr)],
+                         [kept])
+        changes = self.volume.ls_changes('test', self.sr, token)
+        self.assertFalse(changes['full'])
+        self.assertEqual(changes['changed'], [])
+        self.assertEqual(changes['destroyed'], [gone])
+
+class DestroyTest(SimpleFileTest):
+
+    def setUp(self):
+        SimpleFileTest.setUp(self)
+        # The trash is not emptied
+        self.saved = simple_volume.run_in_background
+        simple_volume.run_in_background = lambda dbg, fn, *args: None
+
+    def tearDown(self):
+        simple_volume.run_in_background = self.saved
+        SimpleFileTest.tearDown(self)
+
+    def trash(self):
+        return sorted(os.listdir(os.path.join(self.sr_path, '.trash')))
+
+    def test_destroy(self):
+        key = self.create(M)
+        self.volume.destroy('test', self.sr, key)
+        self.assertEqual(self.trash(), [key])
+        self.assertFalse(os.path.exists(self.file_path(key) + '.inf'))
+        self.assertEqual(list(self.volume.ls('test', self.sr)), [])
+
+    def test_interrupted_destroy(self):
+        key = self.create(M)
+        failing = self.create(M)
+        # The trash cannot be created, so nothing is destroyed
+        trash_dir = os.path.join(self.sr_path, '.trash')
+        with open(trash_dir, 'w'):
+            pass
+        self.assertRaises(OSError, self.volume.destroy, 'test', self.sr,
+                          failing)
+        self.assertEqual(sorted(v.key for v in self.volume.ls('test',
+                                                              self.sr)),
+                         sorted([key, failing]))
+        os.unlink(trash_dir)
+        # As left by a destroy interrupted after moving the data file
+        os.mkdir(trash_dir)
+        os.rename(self.file_path(key), os.path.join(trash_dir, key))
+        self.volume.destroy('test', self.sr, key)
+        self.assertFalse(os.path.exists(self.file_path(key) + '.inf'))
+
+class ResizeTest(SimpleFileTest):
+
+    def setUp(self):
+        SimpleFileTest.setUp(self)
+        # The loop devices attached to the volume, and those resized
+        self.devices = []
+        self.resized = []
+        self.saved = simple_volume.loop.find, simple_volume.loop.set_capacity
+        simple_volume.loop.find = lambda path: self.devices
+        simple_volume.loop.set_capacity = (
+            lambda dbg, device, size_limit=None:
+            self.resized.append((device, size_limit)))
+
+    def tearDown(self):
+        simple_volume.loop.find, simple_volume.loop.set_capacity = self.saved
+        SimpleFileTest.tearDown(self)
+
+    def test_grows_in_place(self):
+        key = self.create(M, [(M - 4, b'data')])
+        inode = os.stat(self.file_path(key)).st_ino
+        self.volume.resize('test', self.sr, key, 2 * M)
+        self.assertEqual(os.stat(self.file_path(key)).st_ino, inode)
+        self.assertEqual(self.read(key), b'\0' * (M - 4) + b'data' +
+                         b'\0' * M)
+        self.assertEqual(self.volume.stat('test', self.sr, key).virtual_size,
+                         2 * M)
+        self.assertEqual(self.resized, [])
+        self.assertRaises(xapi.XenAPIException, self.volume.resize, 'test',
+                          self.sr, key, M)
+
+    def test_preallocates(self):
+        key = self.create(M)
+        self.volume.set('test', self.sr, key, simple_volume.PROVISIONING,
+                        simple_volume.PREALLOCATED)
+        self.volume.resize('test', self.sr, key, 4 * M)
+        self.assertGreaterEqual(
+            os.stat(self.file_path(key)).st_blocks * 512, 4 * M)
+
+    def test_resizes_attached_loop_devices(self):
+        key = self.create(M)
+        self.devices = ['/dev/loop7']
+        self.volume.resize('test', self.sr, key, 2 * M)
+        self.assertEqual(self.resized, [('/dev/loop7', 2 * M)])
+
+class ReclaimTest(SimpleFileTest):
+
+    def allocated(self, key):
+        return os.stat(self.file_path(key)).st_blocks * 512
+
+    def test_only_sparse_volumes_are_reclaimed(self):
+        sparse = self.create(M, [(0, b'\0' * M)])
+        preallocated = self.create(M, [(0, b'\0' * M)])
+        self.volume.set('test', self.sr, preallocated,
+                        simple_volume.PROVISIONING,
+                        simple_volume.PREALLOCATED)
+        self.assertRaises(xapi.InternalError, self.volume.reclaim, 'test',
+                          self.sr, preallocated)
+        config = self.volume.parse_sr(self.sr)[1]
+        self.volume.reclaim_volumes(Task(), 'test', self.sr_path, config,
+                                    [sparse, preallocated])
+        self.assertEqual(self.allocated(sparse), 0)
+        self.assertGreaterEqual(self.allocated(preallocated), M)
+
+if __name__ == '__main__':
+    unittest.main()
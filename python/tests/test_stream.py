@@ -0,0 +1,138 @@
+"""
+Tests of xapi.storage.stream: round trips in both formats, and streams
+which are truncated, corrupt or cancelled part way through.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import stream
+
+M = 1024 * 1024
+
+
+class Cancelled(Exception):
+    pass
+
+
+class StreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.size = 64 * M + 4321
+        self.source = self.path('source')
+        with open(self.source, 'wb') as f:
+            f.truncate(self.size)
+            f.seek(3 * M + 17)
+            f.write(os.urandom(M))
+            f.seek(20 * M)
+            f.write(b'text ' * 100000)
+            # Allocated, but only zeros
+            f.seek(40 * M)
+            f.write(b'\0' * 4 * M)
+            f.seek(self.size - 10)
+            f.write(b'0123456789')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def export(self, stream_format, name='stream'):
+        fd = os.open(self.source, os.O_RDONLY)
+        out_fd = os.open(self.path(name), os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            return stream.export_stream(fd, out_fd, self.size, stream_format,
+                                        threads=2)
+        finally:
+            os.close(fd)
+            os.close(out_fd)
+
+    def import_(self, stream_format, name='stream', progress=None):
+        """Imports the stream [name] over a file of junk and returns its
+        path"""
+        target = self.path('target')
+        with open(target, 'wb') as f:
+            f.write(b'junk' * (self.size // 4))
+            f.truncate(self.size)
+        in_fd = os.open(self.path(name), os.O_RDONLY)
+        fd = os.open(target, os.O_RDWR)
+        try:
+            stream.import_stream(in_fd, fd, self.size, stream_format,
+                                 threads=2, progress=progress)
+        finally:
+            os.close(in_fd)
+            os.close(fd)
+        return target
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_sparse_round_trip(self):
+        data_bytes, stream_bytes = self.export(stream.SPARSE)
+        # The zero chunks are left out, and the text compresses
+        # Two chunks of random data, one of text and the tail
+        self.assertEqual(data_bytes, 3 * M + self.size % M)
+        self.assertTrue(stream_bytes < 2 * M)
+        self.assertEqual(os.path.getsize(self.path('stream')), stream_bytes)
+        target = self.import_(stream.SPARSE)
+        self.assertEqual(self.read(target), self.read(self.source))
+        # The junk was replaced by holes
+        self.assertTrue(os.stat(target).st_blocks * 512 < 8 * M)
+
+    def test_raw_round_trip(self):
+        self.export(stream.RAW)
+        self.assertEqual(self.read(self.path('stream')),
+                         self.read(self.source))
+        target = self.import_(stream.RAW)
+        self.assertEqual(self.read(target), self.read(self.source))
+
+    def test_truncated(self):
+        self.export(stream.SPARSE)
+        with open(self.path('stream'), 'r+b') as f:
+            f.truncate(os.path.getsize(self.path('stream')) - 100)
+        with self.assertRaises(IOError) as cm:
+            self.import_(stream.SPARSE)
+        self.assertIn('truncated', str(cm.exception))
+
+    def test_no_end_marker(self):
+        self.export(stream.SPARSE)
+        with open(self.path('stream'), 'r+b') as f:
+            f.truncate(os.path.getsize(self.path('stream')) -
+                       stream.EXTENT.size)
+        self.assertRaises(IOError, self.import_, stream.SPARSE)
+
+    def test_corrupt(self):
+        self.export(stream.SPARSE)
+        with open(self.path('stream'), 'r+b') as f:
+            f.seek(stream.HEADER.size + stream.EXTENT.size + 10)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(chr(ord(byte) ^ 0xff))
+        with self.assertRaises(IOError) as cm:
+            self.import_(stream.SPARSE)
+        self.assertIn('corrupt', str(cm.exception))
+
+    def test_too_large(self):
+        self.export(stream.SPARSE)
+        self.size -= M
+        self.assertRaises(IOError, self.import_, stream.SPARSE)
+
+    def test_cancelled(self):
+        self.export(stream.SPARSE)
+        calls = []
+
+        def progress(offset):
+            calls.append(offset)
+            if len(calls) == 2:
+                raise Cancelled()
+        self.assertRaises(Cancelled, self.import_, stream.SPARSE,
+                          progress=progress)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests of xapi.storage.tasks: running tasks in background processes,
+cancelling and destroying them.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import xapi
+from xapi.storage import tasks
+
+
+def wait(task_id, timeout=10.0):
+    """Returns the task [task_id] once it has finished"""
+    deadline = time.time() + timeout
+    while True:
+        task = tasks.stat(task_id)
+        if not tasks.is_pending(task) or time.time() > deadline:
+            return task
+        time.sleep(0.01)
+
+
+def succeed(task, marker):
+    task.progress(0.5)
+
+
+def fail(task):
+    raise ValueError('failed')
+
+
+def die(task):
+    os._exit(1)
+
+
+def wait_for_cancel(task):
+    deadline = time.time() + 10.0
+    while time.time() < deadline:
+        task.check_cancelled()
+        time.sleep(0.01)
+
+
+class TasksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = tasks.TASK_DIR
+        tasks.TASK_DIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(tasks.TASK_DIR)
+        tasks.TASK_DIR = self.saved
+
+    def test_completed(self):
+        task_id = tasks.start('test', succeed, 'marker')
+        self.assertEqual(tasks.ls(), [task_id])
+        task = wait(task_id)
+        self.assertEqual(task['id'], task_id)
+        self.assertEqual(task['debug_info'], 'test')
+        self.assertEqual(task['state'][0], 'Completed')
+        self.assertEqual(task['state'][1]['result'], ['UnitResult', None])
+        tasks.destroy(task_id)
+        self.assertEqual(tasks.ls(), [])
+        self.assertRaises(xapi.InternalError, tasks.stat, task_id)
+
+    def test_failed(self):
+        task = wait(tasks.start('test', fail))
+        self.assertEqual(task['state'], ['Failed', 'failed'])
+
+    def test_cancelled(self):
+        task_id = tasks.start('test', wait_for_cancel)
+        self.assertRaises(xapi.InternalError, tasks.destroy, task_id)
+        tasks.cancel(task_id)
+        self.assertEqual(wait(task_id)['state'], ['Failed', 'Cancelled'])
+        # Cancelling a finished task does nothing
+        tasks.cancel(task_id)
+        tasks.destroy(task_id)
+        self.assertEqual(tasks.ls(), [])
+
+    def test_process_exited(self):
+        task_id = tasks.start('test', die)
+        state = wait(task_id)['state']
+        self.assertEqual(state[0], 'Failed')
+        self.assertTrue(state[1].startswith('Task process'))
+        self.assertNotIn('pid', tasks.stat(task_id))
+        tasks.destroy(task_id)
+
+    def test_invalid_id(self):
+        for task_id in ('../x', '', 'a/b'):
+            self.assertRaises(xapi.InternalError, tasks.stat, task_id)
+            self.assertRaises(xapi.InternalError, tasks.destroy, task_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
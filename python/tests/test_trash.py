@@ -0,0 +1,75 @@
+"""
+Tests of xapi.storage.trash: moving files into the trash and reclaiming
+their space.
+"""
+
+import fcntl
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage import trash
+from xapi.storage.trash import Trash
+
+M = 1024 * 1024
+
+
+class TrashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+        self.trash = Trash(self.sr_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.sr_path)
+
+    def create(self, name, size):
+        path = os.path.join(self.sr_path, name)
+        with open(path, 'wb') as f:
+            for _ in range(size // M):
+                f.write(b'x' * M)
+        return path
+
+    def test_put_and_reclaim(self):
+        self.assertEqual(self.trash.pending(), 0)
+        self.trash.reclaim('test')
+        self.trash.put(self.create('a', 2 * M), 'a')
+        self.trash.put(self.create('b', 1 * M), 'b')
+        self.assertEqual(os.listdir(self.sr_path), [trash.TRASH_DIR])
+        self.assertGreaterEqual(self.trash.pending(), 3 * M)
+        self.trash.reclaim('test')
+        self.assertEqual(os.listdir(self.trash.path), [])
+        self.assertEqual(self.trash.pending(), 0)
+
+    def test_reclaims_in_chunks(self):
+        saved = trash.RECLAIM_CHUNK
+        trash.RECLAIM_CHUNK = M
+        truncations = []
+        ftruncate = os.ftruncate
+
+        def record(fd, size):
+            truncations.append(size)
+            ftruncate(fd, size)
+        os.ftruncate = record
+        try:
+            self.trash.put(self.create('a', 4 * M), 'a')
+            self.trash.reclaim('test')
+        finally:
+            os.ftruncate = ftruncate
+            trash.RECLAIM_CHUNK = saved
+        self.assertEqual(truncations, [3 * M, 2 * M, M, 0])
+
+    def test_one_reclaimer(self):
+        self.trash.put(self.create('a', M), 'a')
+        fd = os.open(self.trash.path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self.trash.reclaim('test')
+            self.assertEqual(os.listdir(self.trash.path), ['a'])
+        finally:
+            os.close(fd)
+
+
+if __name__ == '__main__':
+    unittest.main()
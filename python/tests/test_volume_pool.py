@@ -0,0 +1,89 @@
+"""
+Tests of xapi.storage.volume_pool: refilling the pool and claiming spares.
+"""
+
+import fcntl
+import os
+import shutil
+import tempfile
+import unittest
+
+from xapi.storage.trash import Trash
+from xapi.storage.volume_pool import VolumePool
+
+M = 1024 * 1024
+
+
+def make(path, size):
+    with open(path, 'w') as f:
+        os.ftruncate(f.fileno(), size)
+
+
+class VolumePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sr_path = tempfile.mkdtemp()
+        self.pool = VolumePool(self.sr_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.sr_path)
+
+    def destination(self, key):
+        return os.path.join(self.sr_path, key)
+
+    def test_refill(self):
+        self.assertTrue(self.pool.wanted('sparse', [M, 2 * M], 2))
+        self.pool.refill('test', 'sparse', [M, 2 * M], 2, make)
+        self.assertFalse(self.pool.wanted('sparse', [M, 2 * M], 2))
+        self.assertTrue(self.pool.wanted('zeroed', [M], 1))
+        self.assertEqual([name.split('.')[:2]
+                          for name in sorted(os.listdir(self.pool.path))],
+                         [['sparse', str(M)]] * 2 +
+                         [['sparse', str(2 * M)]] * 2)
+
+    def test_claim(self):
+        self.assertIsNone(self.pool.claim('sparse', M, self.destination))
+        self.pool.refill('test', 'sparse', [M, 2 * M], 1, make)
+        # The largest spare which is no larger than the size
+        key, size = self.pool.claim('sparse', 3 * M, self.destination)
+        self.assertEqual(size, 2 * M)
+        self.assertEqual(os.stat(self.destination(key)).st_size, 2 * M)
+        self.assertIsNone(self.pool.claim('sparse', M - 1, self.destination))
+        self.assertIsNone(self.pool.claim('zeroed', M, self.destination))
+        key, size = self.pool.claim('sparse', 3 * M, self.destination)
+        self.assertEqual(size, M)
+        self.assertEqual(os.listdir(self.pool.path), [])
+
+    def test_failed_refill(self):
+        def fail(path, size):
+            make(path, size)
+            raise IOError('failed')
+        self.assertRaises(IOError, self.pool.refill, 'test', 'sparse', [M],
+                          1, fail)
+        self.assertEqual(os.listdir(self.pool.path), [])
+        # Temporary files left by a refiller which died are removed
+        make(os.path.join(self.pool.path, 'sparse.1.x.tmp'), 1)
+        self.pool.refill('test', 'sparse', [M], 1, make)
+        self.assertEqual(len(os.listdir(self.pool.path)), 1)
+        self.assertIsNotNone(self.pool.claim('sparse', M, self.destination))
+
+    def test_one_refiller(self):
+        os.mkdir(self.pool.path)
+        fd = os.open(self.pool.path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self.pool.refill('test', 'sparse', [M], 1, make)
+            self.assertEqual(os.listdir(self.pool.path), [])
+        finally:
+            os.close(fd)
+
+    def test_drain(self):
+        self.pool.drain(Trash(self.sr_path))
+        self.pool.refill('test', 'sparse', [M], 2, make)
+        self.pool.drain(Trash(self.sr_path))
+        self.assertEqual(os.listdir(self.pool.path), [])
+        self.assertEqual(len(os.listdir(Trash(self.sr_path).path)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,18 +25,88 @@ ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
 SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+# Only the modules needed on every call are imported here: argparse and
+# traceback are imported where they are used, as the common --json path
+# needs neither
 import sys
-import traceback
-import json
-import argparse
+from xapi import codec
+
+
+def is_iterator(x):
+    """Returns True if [x] is an iterator (e.g. a generator) rather than a
+    container. Implementations may return iterators for list results."""
+    return hasattr(x, 'next') or hasattr(x, '__next__')
 
 
 def success(result):
+    if is_iterator(result):
+        result = list(result)
+    if isinstance(result, Record):
+        result = result.to_dict()
+    elif isinstance(result, list):
+        result = [x.to_dict() if isinstance(x, Record) else x for x in result]
     return {"Status": "Success", "Value": result}
 
 
+class Record(object):
+    """Base class of the generated record classes, which hold the values of
+    an IDL struct in __slots__ rather than in a dict. Fields can also be
+    read as items so that a record can be used wherever the dict form is
+    expected."""
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in self.__slots__
+
+    def __eq__(self, other):
+        return (type(self) is type(other)
+                and all(getattr(self, n) == getattr(other, n)
+                        for n in self.__slots__))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % (n, getattr(self, n)) for n in self.__slots__))
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        """Returns the dict form of the record, as sent on the wire"""
+        d = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, Record):
+                value = value.to_dict()
+            d[name] = value
+        return d
+
+    # Objects with a toDict method are encoded by ujson
+    toDict = to_dict
+
+    @classmethod
+    def from_dict(cls, d):
+        """Constructs a record from its dict form, checking the types of
+        the fields. Missing fields are taken to be None."""
+        return cls(**dict((name, d.get(name)) for name in cls.__slots__))
+
+
 def handle_exception(e, code=None, params=None):
+    import traceback
     s = sys.exc_info()
+    # Write out the debug context of the failure if xapi.storage.log is in
+    # use (it imports this module so cannot be imported from here)
+    log = sys.modules.get('xapi.storage.log')
+    if log is not None:
+        log.flush_flight_recorder()
     files = []
     lines = []
     for slot in traceback.extract_tb(s[2]):
@@ -58,7 +128,7 @@ def handle_exception(e, code=None, params=None):
         "params": params,
         "backtrace": backtrace,
     }
-    print >>sys.stdout, json.dumps(results)
+    print >>sys.stdout, codec.dumps(results)
     sys.exit(1)
 
 
@@ -139,13 +209,27 @@ def is_long(x):
         return False
 
 
-class ListAction(argparse.Action):
+_LIST_ACTION = None
+
+
+def ListAction(**kwargs):
+    """argparse action which collects KEY VALUE pairs into a dict. argparse
+    accepts any callable as an action, so the Action subclass is only
+    defined once arguments are actually parsed."""
+    global _LIST_ACTION
+    if _LIST_ACTION is None:
+        import argparse
+
+        class _ListAction(argparse.Action):
 
-    def __call__(self, parser, namespace, values, option_string=None):
-        k = values[0]
-        v = values[1]
-        if ((hasattr(namespace, self.dest)
-             and getattr(namespace, self.dest) is not None)):
-            getattr(namespace, self.dest)[k] = v
-        else:
-            setattr(namespace, self.dest, {k: v})
+            def __call__(self, parser, namespace, values,
+                         option_string=None):
+                k = values[0]
+                v = values[1]
+                if ((hasattr(namespace, self.dest)
+                     and getattr(namespace, self.dest) is not None)):
+                    getattr(namespace, self.dest)[k] = v
+                else:
+                    setattr(namespace, self.dest, {k: v})
+        _LIST_ACTION = _ListAction
+    return _LIST_ACTION(**kwargs)
@@ -0,0 +1,480 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+from .datapath_errors import *
+class Datapath_server_dispatcher:
+    """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+    def __init__(self, impl):
+        """impl is a proxy object whose methods contain the implementation"""
+        self._impl = impl
+    def open(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        if not('persistent' in args):
+            raise UnmarshalException('argument missing', 'persistent', '')
+        persistent = args["persistent"]
+        if not isinstance(persistent, bool):
+            raise (TypeError("bool", repr(persistent)))
+        results = self._impl.open(dbg, uri, persistent)
+        return results
+    def attach(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        if not('domain' in args):
+            raise UnmarshalException('argument missing', 'domain', '')
+        domain = args["domain"]
+        if not isinstance(domain, str) and not isinstance(domain, unicode):
+            raise (TypeError("string", repr(domain)))
+        results = self._impl.attach(dbg, uri, domain)
+        if not isinstance(results['domain_uuid'], str) and not isinstance(results['domain_uuid'], unicode):
+            raise (TypeError("string", repr(results['domain_uuid'])))
+        if results['implementation'][0] == 'Blkback':
+            if not isinstance(results['implementation'][1], str) and not isinstance(results['implementation'][1], unicode):
+                raise (TypeError("string", repr(results['implementation'][1])))
+        elif results['implementation'][0] == 'Tapdisk3':
+            if not isinstance(results['implementation'][1], str) and not isinstance(results['implementation'][1], unicode):
+                raise (TypeError("string", repr(results['implementation'][1])))
+        elif results['implementation'][0] == 'Qdisk':
+            if not isinstance(results['implementation'][1], str) and not isinstance(results['implementation'][1], unicode):
+                raise (TypeError("string", repr(results['implementation'][1])))
+        return results
+    def attach_batch(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uris' in args):
+            raise UnmarshalException('argument missing', 'uris', '')
+        uris = args["uris"]
+        if not isinstance(uris, list):
+            raise (TypeError("string list", repr(uris)))
+        for tmp_1 in uris:
+            if not isinstance(tmp_1, str) and not isinstance(tmp_1, unicode):
+                raise (TypeError("string", repr(tmp_1)))
+        if not('domain' in args):
+            raise UnmarshalException('argument missing', 'domain', '')
+        domain = args["domain"]
+        if not isinstance(domain, str) and not isinstance(domain, unicode):
+            raise (TypeError("string", repr(domain)))
+        results = self._impl.attach_batch(dbg, uris, domain)
+        if not isinstance(results, list):
+            raise (TypeError("backend list", repr(results)))
+        for tmp_2 in results:
+            if not isinstance(tmp_2['domain_uuid'], str) and not isinstance(tmp_2['domain_uuid'], unicode):
+                raise (TypeError("string", repr(tmp_2['domain_uuid'])))
+        if tmp_2['implementation'][0] == 'Blkback':
+            if not isinstance(tmp_2['implementation'][1], str) and not isinstance(tmp_2['implementation'][1], unicode):
+                raise (TypeError("string", repr(tmp_2['implementation'][1])))
+        elif tmp_2['implementation'][0] == 'Tapdisk3':
+            if not isinstance(tmp_2['implementation'][1], str) and not isinstance(tmp_2['implementation'][1], unicode):
+                raise (TypeError("string", repr(tmp_2['implementation'][1])))
+        elif tmp_2['implementation'][0] == 'Qdisk':
+            if not isinstance(tmp_2['implementation'][1], str) and not isinstance(tmp_2['implementation'][1], unicode):
+                raise (TypeError("string", repr(tmp_2['implementation'][1])))
+        return results
+    def activate(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        if not('domain' in args):
+            raise UnmarshalException('argument missing', 'domain', '')
+        domain = args["domain"]
+        if not isinstance(domain, str) and not isinstance(domain, unicode):
+            raise (TypeError("string", repr(domain)))
+        results = self._impl.activate(dbg, uri, domain)
+        return results
+    def activate_batch(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uris' in args):
+            raise UnmarshalException('argument missing', 'uris', '')
+        uris = args["uris"]
+        if not isinstance(uris, list):
+            raise (TypeError("string list", repr(uris)))
+        for tmp_1 in uris:
+            if not isinstance(tmp_1, str) and not isinstance(tmp_1, unicode):
+                raise (TypeError("string", repr(tmp_1)))
+        if not('domain' in args):
+            raise UnmarshalException('argument missing', 'domain', '')
+        domain = args["domain"]
+        if not isinstance(domain, str) and not isinstance(domain, unicode):
+            raise (TypeError("string", repr(domain)))
+        results = self._impl.activate_batch(dbg, uris, domain)
+        return results
+    def deactivate(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        if not('domain' in args):
+            raise UnmarshalException('argument missing', 'domain', '')
+        domain = args["domain"]
+        if not isinstance(domain, str) and not isinstance(domain, unicode):
+            raise (TypeError("string", repr(domain)))
+        results = self._impl.deactivate(dbg, uri, domain)
+        return results
+    def detach(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        if not('domain' in args):
+            raise UnmarshalException('argument missing', 'domain', '')
+        domain = args["domain"]
+        if not isinstance(domain, str) and not isinstance(domain, unicode):
+            raise (TypeError("string", repr(domain)))
+        results = self._impl.detach(dbg, uri, domain)
+        return results
+    def close(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        results = self._impl.close(dbg, uri)
+        return results
+    def _dispatch(self, method, params):
+        """type check inputs, call implementation, type check outputs and return"""
+        args = params[0]
+        if method == "Datapath.open":
+            return success(self.open(args))
+        elif method == "Datapath.attach":
+            return success(self.attach(args))
+        elif method == "Datapath.attach_batch":
+            return success(self.attach_batch(args))
+        elif method == "Datapath.activate":
+            return success(self.activate(args))
+        elif method == "Datapath.activate_batch":
+            return success(self.activate_batch(args))
+        elif method == "Datapath.deactivate":
+            return success(self.deactivate(args))
+        elif method == "Datapath.detach":
+            return success(self.detach(args))
+        elif method == "Datapath.close":
+            return success(self.close(args))
+class Datapath_skeleton:
+    """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+    def __init__(self):
+        pass
+    def open(self, dbg, uri, persistent):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.open")
+    def attach(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.attach")
+    def attach_batch(self, dbg, uris, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.attach_batch")
+    def activate(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.activate")
+    def activate_batch(self, dbg, uris, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.activate_batch")
+    def deactivate(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.deactivate")
+    def detach(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.detach")
+    def close(self, dbg, uri):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        raise Unimplemented("Datapath.close")
+class Datapath_commandline():
+    """Parse command-line arguments and call an implementation."""
+    def __init__(self, impl):
+        self.impl = impl
+        self.dispatcher = Datapath_server_dispatcher(self.impl)
+    def _parse_open(self):
+        """[open uri persistent] is called before a disk is attached to a VM. If persistent is true then care should be taken to persist all writes to the disk. If persistent is false then the implementation should configure a temporary location for writes so they can be thrown away on [close]."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[open uri persistent] is called before a disk is attached to a VM. If persistent is true then care should be taken to persist all writes to the disk. If persistent is false then the implementation should configure a temporary location for writes so they can be thrown away on [close].')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='A URI which represents how to access the volume disk data.')
+        parser.add_argument('--persistent', action='store_true', help='True means the disk data is persistent and should be preserved when the datapath is closed i.e. when a VM is shutdown or rebooted. False means the data should be thrown away when the VM is shutdown or rebooted.')
+        return vars(parser.parse_args())
+    def _parse_attach(self):
+        """[attach uri domain] prepares a connection between the storage named by [uri] and the Xen domain with id [domain]. The return value is the information needed by the Xen toolstack to setup the shared-memory blkfront protocol. Note that the same volume may be simultaneously attached to multiple hosts for example over a migrate. If an implementation needs to perform an explicit handover, then it should implement [activate] and [deactivate]. This function is idempotent."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[attach uri domain] prepares a connection between the storage named by [uri] and the Xen domain with id [domain]. The return value is the information needed by the Xen toolstack to setup the shared-memory blkfront protocol. Note that the same volume may be simultaneously attached to multiple hosts for example over a migrate. If an implementation needs to perform an explicit handover, then it should implement [activate] and [deactivate]. This function is idempotent.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='A URI which represents how to access the volume disk data.')
+        parser.add_argument('domain', action='store', help='An opaque string which represents the Xen domain.')
+        return vars(parser.parse_args())
+    def _parse_attach_batch(self):
+        """[attach_batch uris domain] does what [attach uri domain] does for each of [uris], which are typically all the disks of a VM, and returns their backends in the same order. This allows an implementation to share the work of attaching the disks, for example by scanning the host's devices once rather than once per disk. This function is idempotent."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[attach_batch uris domain] does what [attach uri domain] does for each of [uris], which are typically all the disks of a VM, and returns their backends in the same order. This allows an implementation to share the work of attaching the disks, for example by scanning the host\'s devices once rather than once per disk. This function is idempotent.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uris', action='store', nargs='+', help='URIs which represent how to access the disk data of several volumes.')
+        parser.add_argument('domain', action='store', help='An opaque string which represents the Xen domain.')
+        return vars(parser.parse_args())
+    def _parse_activate(self):
+        """[activate uri domain] is called just before a VM needs to read or write its disk. This is an opportunity for an implementation which needs to perform an explicit volume handover to do it. This function is called in the migration downtime window so delays here will be noticeable to users and should be minimised. This function is idempotent."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[activate uri domain] is called just before a VM needs to read or write its disk. This is an opportunity for an implementation which needs to perform an explicit volume handover to do it. This function is called in the migration downtime window so delays here will be noticeable to users and should be minimised. This function is idempotent.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='A URI which represents how to access the volume disk data.')
+        parser.add_argument('domain', action='store', help='An opaque string which represents the Xen domain.')
+        return vars(parser.parse_args())
+    def _parse_activate_batch(self):
+        """[activate_batch uris domain] does what [activate uri domain] does for each of [uris]. This function is called in the migration downtime window, so activating the disks of a VM together saves the overhead of one call per disk. This function is idempotent."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[activate_batch uris domain] does what [activate uri domain] does for each of [uris]. This function is called in the migration downtime window, so activating the disks of a VM together saves the overhead of one call per disk. This function is idempotent.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uris', action='store', nargs='+', help='URIs which represent how to access the disk data of several volumes.')
+        parser.add_argument('domain', action='store', help='An opaque string which represents the Xen domain.')
+        return vars(parser.parse_args())
+    def _parse_deactivate(self):
+        """[deactivate uri domain] is called as soon as a VM has finished reading or writing its disk. This is an opportunity for an implementation which needs to perform an explicit volume handover to do it. This function is called in the migration downtime window so delays here will be noticeable to users and should be minimised. This function is idempotent."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[deactivate uri domain] is called as soon as a VM has finished reading or writing its disk. This is an opportunity for an implementation which needs to perform an explicit volume handover to do it. This function is called in the migration downtime window so delays here will be noticeable to users and should be minimised. This function is idempotent.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='A URI which represents how to access the volume disk data.')
+        parser.add_argument('domain', action='store', help='An opaque string which represents the Xen domain.')
+        return vars(parser.parse_args())
+    def _parse_detach(self):
+        """[detach uri domain] is called sometime after a VM has finished reading or writing its disk. This is an opportunity to clean up any resources associated with the disk. This function is called outside the migration downtime window so can be slow without affecting users. This function is idempotent. This function should never fail. If an implementation is unable to perform some cleanup right away then it should queue the action internally. Any error result represents a bug in the implementation."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[detach uri domain] is called sometime after a VM has finished reading or writing its disk. This is an opportunity to clean up any resources associated with the disk. This function is called outside the migration downtime window so can be slow without affecting users. This function is idempotent. This function should never fail. If an implementation is unable to perform some cleanup right away then it should queue the action internally. Any error result represents a bug in the implementation.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='A URI which represents how to access the volume disk data.')
+        parser.add_argument('domain', action='store', help='An opaque string which represents the Xen domain.')
+        return vars(parser.parse_args())
+    def _parse_close(self):
+        """[close uri] is called after a disk is detached and a VM shutdown. This is an opportunity to throw away writes if the disk is not persistent."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[close uri] is called after a disk is detached and a VM shutdown. This is an opportunity to throw away writes if the disk is not persistent.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='A URI which represents how to access the volume disk data.')
+        return vars(parser.parse_args())
+    def open(self):
+        use_json = False
+        try:
+            request = self._parse_open()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.open(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def attach(self):
+        use_json = False
+        try:
+            request = self._parse_attach()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.attach(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def attach_batch(self):
+        use_json = False
+        try:
+            request = self._parse_attach_batch()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.attach_batch(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def activate(self):
+        use_json = False
+        try:
+            request = self._parse_activate()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.activate(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def activate_batch(self):
+        use_json = False
+        try:
+            request = self._parse_activate_batch()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.activate_batch(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def deactivate(self):
+        use_json = False
+        try:
+            request = self._parse_deactivate()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.deactivate(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def detach(self):
+        use_json = False
+        try:
+            request = self._parse_detach()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.detach(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def close(self):
+        use_json = False
+        try:
+            request = self._parse_close()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.close(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
\ No newline at end of file
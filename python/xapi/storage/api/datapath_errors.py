@@ -0,0 +1,11 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+class Unimplemented(Rpc_light_failure):
+    def __init__(self, arg_0):
+        Rpc_light_failure.__init__(self, "Unimplemented", [ arg_0 ])
+        if not isinstance(arg_0, str) and not isinstance(arg_0, unicode):
+            raise (TypeError("string", repr(arg_0)))
+        self.arg_0 = arg_0
\ No newline at end of file
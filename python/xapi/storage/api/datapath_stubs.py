@@ -0,0 +1,50 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+from .datapath_errors import *
+from .datapath_datapath import *
+from .datapath import datapath_server_dispatcher
+class Datapath_test:
+    """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+    def __init__(self):
+        pass
+    def open(self, dbg, uri, persistent):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        return result
+    def attach(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        result["backend"] = { "domain_uuid": "string", "implementation": None }
+        return result
+    def attach_batch(self, dbg, uris, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        result["backends"] = [ { "domain_uuid": "string", "implementation": None }, { "domain_uuid": "string", "implementation": None } ]
+        return result
+    def activate(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        return result
+    def activate_batch(self, dbg, uris, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        return result
+    def deactivate(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        return result
+    def detach(self, dbg, uri, domain):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        return result
+    def close(self, dbg, uri):
+        """Xapi will call the functions here on VM start/shutdown/suspend/resume/migrate. Every function is idempotent. Every function takes a domain parameter which allows the implementation to track how many domains are currently using the volume."""
+        result = {}
+        return result
+class datapath_server_test(datapath_server_dispatcher):
+    """Create a server which will respond to all calls, returning arbitrary values. This is intended as a marshal/unmarshal test."""
+    def __init__(self):
+        datapath_server_dispatcher.__init__(self, Datapath_server_dispatcher(Datapath_test()))
\ No newline at end of file
@@ -0,0 +1,31 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+from .plugin_errors import *
+from .plugin_plugin import *
+from .plugin import plugin_server_dispatcher
+class Plugin_test:
+    """Discover properties of this implementation. Every implementation  must support the query interface or it will not be recognised as  a storage plugin by xapi."""
+    def __init__(self):
+        pass
+    def query(self, dbg):
+        """Discover properties of this implementation. Every implementation  must support the query interface or it will not be recognised as  a storage plugin by xapi."""
+        result = {}
+        result["query_result"] = { "plugin": "string", "name": "string", "description": "string", "vendor": "string", "copyright": "string", "version": "string", "required_api_version": "string", "features": [ "string", "string" ], "configuration": { "string": "string" }, "required_cluster_stack": [ "string", "string" ] }
+        return result
+    def ls(self, dbg):
+        """Discover properties of this implementation. Every implementation  must support the query interface or it will not be recognised as  a storage plugin by xapi."""
+        result = {}
+        result["srs"] = [ "string", "string" ]
+        return result
+    def diagnostics(self, dbg):
+        """Discover properties of this implementation. Every implementation  must support the query interface or it will not be recognised as  a storage plugin by xapi."""
+        result = {}
+        result["diagnostics"] = "string"
+        return result
+class plugin_server_test(plugin_server_dispatcher):
+    """Create a server which will respond to all calls, returning arbitrary values. This is intended as a marshal/unmarshal test."""
+    def __init__(self):
+        plugin_server_dispatcher.__init__(self, Plugin_server_dispatcher(Plugin_test()))
\ No newline at end of file
@@ -0,0 +1,134 @@
+from xapi import Record, TypeError, is_long
+class Volume(Record):
+    """A set of properties associated with a volume. These properties can change dynamically and can be queried by the Volume.stat call."""
+    __slots__ = ('key', 'uuid', 'name', 'description', 'read_write', 'sharable', 'virtual_size', 'physical_utilisation', 'uri', 'keys',)
+    def __init__(self, key, uuid, name, description, read_write, sharable, virtual_size, physical_utilisation, uri, keys):
+        if not(isinstance(key, str) or isinstance(key, unicode)):
+            raise (TypeError("string", repr(key)))
+        if uuid is not None:
+            if not(isinstance(uuid, str) or isinstance(uuid, unicode)):
+                raise (TypeError("string", repr(uuid)))
+        if not(isinstance(name, str) or isinstance(name, unicode)):
+            raise (TypeError("string", repr(name)))
+        if not(isinstance(description, str) or isinstance(description, unicode)):
+            raise (TypeError("string", repr(description)))
+        if not(isinstance(read_write, bool)):
+            raise (TypeError("bool", repr(read_write)))
+        if not(isinstance(sharable, bool)):
+            raise (TypeError("bool", repr(sharable)))
+        if not(is_long(virtual_size)):
+            raise (TypeError("int64", repr(virtual_size)))
+        if not(is_long(physical_utilisation)):
+            raise (TypeError("int64", repr(physical_utilisation)))
+        if not isinstance(uri, list):
+            raise (TypeError("list", repr(uri)))
+        for tmp_1 in uri:
+            if not(isinstance(tmp_1, str) or isinstance(tmp_1, unicode)):
+                raise (TypeError("string", repr(tmp_1)))
+        if not isinstance(keys, dict):
+            raise (TypeError("dict", repr(keys)))
+        for tmp_2, tmp_3 in keys.items():
+            if not(isinstance(tmp_2, str) or isinstance(tmp_2, unicode)):
+                raise (TypeError("string", repr(tmp_2)))
+            if not(isinstance(tmp_3, str) or isinstance(tmp_3, unicode)):
+                raise (TypeError("string", repr(tmp_3)))
+        self.key = key
+        self.uuid = uuid
+        self.name = name
+        self.description = description
+        self.read_write = read_write
+        self.sharable = sharable
+        self.virtual_size = virtual_size
+        self.physical_utilisation = physical_utilisation
+        self.uri = uri
+        self.keys = keys
+class SrStat(Record):
+    """A set of high-level properties associated with an SR. These properties can change dynamically and can be queried by a SR.stat call."""
+    __slots__ = ('sr', 'name', 'uuid', 'description', 'free_space', 'total_space', 'datasources', 'clustered', 'health',)
+    def __init__(self, sr, name, uuid, description, free_space, total_space, datasources, clustered, health):
+        if not(isinstance(sr, str) or isinstance(sr, unicode)):
+            raise (TypeError("string", repr(sr)))
+        if not(isinstance(name, str) or isinstance(name, unicode)):
+            raise (TypeError("string", repr(name)))
+        if uuid is not None:
+            if not(isinstance(uuid, str) or isinstance(uuid, unicode)):
+                raise (TypeError("string", repr(uuid)))
+        if not(isinstance(description, str) or isinstance(description, unicode)):
+            raise (TypeError("string", repr(description)))
+        if not(is_long(free_space)):
+            raise (TypeError("int64", repr(free_space)))
+        if not(is_long(total_space)):
+            raise (TypeError("int64", repr(total_space)))
+        if not isinstance(datasources, list):
+            raise (TypeError("list", repr(datasources)))
+        for tmp_4 in datasources:
+            if not(isinstance(tmp_4, str) or isinstance(tmp_4, unicode)):
+                raise (TypeError("string", repr(tmp_4)))
+        if not(isinstance(clustered, bool)):
+            raise (TypeError("bool", repr(clustered)))
+        if not isinstance(health, (list, tuple)) or health[0] not in ('Healthy', 'Recovering',):
+            raise (TypeError("health", repr(health)))
+        self.sr = sr
+        self.name = name
+        self.uuid = uuid
+        self.description = description
+        self.free_space = free_space
+        self.total_space = total_space
+        self.datasources = datasources
+        self.clustered = clustered
+        self.health = health
+class ProbeResult(Record):
+    """A set of properties that describe one result element of SR.probe. Result elements and properties can change dynamically based on changes to the the SR.probe input-parameters or the target."""
+    __slots__ = ('configuration', 'complete', 'sr', 'extra_info',)
+    def __init__(self, configuration, complete, sr, extra_info):
+        if not isinstance(configuration, dict):
+            raise (TypeError("dict", repr(configuration)))
+        for tmp_5, tmp_6 in configuration.items():
+            if not(isinstance(tmp_5, str) or isinstance(tmp_5, unicode)):
+                raise (TypeError("string", repr(tmp_5)))
+            if not(isinstance(tmp_6, str) or isinstance(tmp_6, unicode)):
+                raise (TypeError("string", repr(tmp_6)))
+        if not(isinstance(complete, bool)):
+            raise (TypeError("bool", repr(complete)))
+        if isinstance(sr, dict):
+            sr = SrStat.from_dict(sr)
+        if sr is not None:
+            if not isinstance(sr, SrStat):
+                raise (TypeError("sr_stat", repr(sr)))
+        if not isinstance(extra_info, dict):
+            raise (TypeError("dict", repr(extra_info)))
+        for tmp_7, tmp_8 in extra_info.items():
+            if not(isinstance(tmp_7, str) or isinstance(tmp_7, unicode)):
+                raise (TypeError("string", repr(tmp_7)))
+            if not(isinstance(tmp_8, str) or isinstance(tmp_8, unicode)):
+                raise (TypeError("string", repr(tmp_8)))
+        self.configuration = configuration
+        self.complete = complete
+        self.sr = sr
+        self.extra_info = extra_info
+class ChangedBlocks(Record):
+    __slots__ = ('granularity', 'bitmap',)
+    def __init__(self, granularity, bitmap):
+        if not(is_long(granularity)):
+            raise (TypeError("int", repr(granularity)))
+        if not(isinstance(bitmap, str) or isinstance(bitmap, unicode)):
+            raise (TypeError("string", repr(bitmap)))
+        self.granularity = granularity
+        self.bitmap = bitmap
+class Blocklist(Record):
+    """List of blocks for copying."""
+    __slots__ = ('blocksize', 'ranges',)
+    def __init__(self, blocksize, ranges):
+        if not(is_long(blocksize)):
+            raise (TypeError("int", repr(blocksize)))
+        if not isinstance(ranges, list):
+            raise (TypeError("list", repr(ranges)))
+        for tmp_9 in ranges:
+            if not isinstance(tmp_9, (list, tuple)) or len(tmp_9) != 2:
+                raise (TypeError("pair", repr(tmp_9)))
+            if not(is_long(tmp_9[0])):
+                raise (TypeError("int64", repr(tmp_9[0])))
+            if not(is_long(tmp_9[1])):
+                raise (TypeError("int64", repr(tmp_9[1])))
+        self.blocksize = blocksize
+        self.ranges = ranges
@@ -0,0 +1,35 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+class Sr_not_attached(Rpc_light_failure):
+    def __init__(self, arg_0):
+        Rpc_light_failure.__init__(self, "Sr_not_attached", [ arg_0 ])
+        if not isinstance(arg_0, str) and not isinstance(arg_0, unicode):
+            raise (TypeError("string", repr(arg_0)))
+        self.arg_0 = arg_0
+class SR_does_not_exist(Rpc_light_failure):
+    def __init__(self, arg_0):
+        Rpc_light_failure.__init__(self, "SR_does_not_exist", [ arg_0 ])
+        if not isinstance(arg_0, str) and not isinstance(arg_0, unicode):
+            raise (TypeError("string", repr(arg_0)))
+        self.arg_0 = arg_0
+class Volume_does_not_exist(Rpc_light_failure):
+    def __init__(self, arg_0):
+        Rpc_light_failure.__init__(self, "Volume_does_not_exist", [ arg_0 ])
+        if not isinstance(arg_0, str) and not isinstance(arg_0, unicode):
+            raise (TypeError("string", repr(arg_0)))
+        self.arg_0 = arg_0
+class Unimplemented(Rpc_light_failure):
+    def __init__(self, arg_0):
+        Rpc_light_failure.__init__(self, "Unimplemented", [ arg_0 ])
+        if not isinstance(arg_0, str) and not isinstance(arg_0, unicode):
+            raise (TypeError("string", repr(arg_0)))
+        self.arg_0 = arg_0
+class Cancelled(Rpc_light_failure):
+    def __init__(self, arg_0):
+        Rpc_light_failure.__init__(self, "Cancelled", [ arg_0 ])
+        if not isinstance(arg_0, str) and not isinstance(arg_0, unicode):
+            raise (TypeError("string", repr(arg_0)))
+        self.arg_0 = arg_0
\ No newline at end of file
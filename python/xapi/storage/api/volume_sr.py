@@ -0,0 +1,755 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+from .volume_errors import *
+class SR_server_dispatcher:
+    """Operations which act on Storage Repositories"""
+    def __init__(self, impl):
+        """impl is a proxy object whose methods contain the implementation"""
+        self._impl = impl
+    def probe(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        results = self._impl.probe(dbg, uri)
+        if not isinstance(results['srs'], list):
+            raise (TypeError("7 list", repr(results['srs'])))
+        for tmp_13 in results['srs']:
+            if not isinstance(tmp_13['sr'], str) and not isinstance(tmp_13['sr'], unicode):
+                raise (TypeError("string", repr(tmp_13['sr'])))
+            if not isinstance(tmp_13['name'], str) and not isinstance(tmp_13['name'], unicode):
+                raise (TypeError("string", repr(tmp_13['name'])))
+            if not isinstance(tmp_13['description'], str) and not isinstance(tmp_13['description'], unicode):
+                raise (TypeError("string", repr(tmp_13['description'])))
+            if not(is_long(tmp_13['free_space'])):
+                raise (TypeError("int64", repr(tmp_13['free_space'])))
+            if not(is_long(tmp_13['total_space'])):
+                raise (TypeError("int64", repr(tmp_13['total_space'])))
+            if not isinstance(tmp_13['datasources'], list):
+                raise (TypeError("string list", repr(tmp_13['datasources'])))
+            for tmp_14 in tmp_13['datasources']:
+                if not isinstance(tmp_14, str) and not isinstance(tmp_14, unicode):
+                    raise (TypeError("string", repr(tmp_14)))
+            if not isinstance(tmp_13['clustered'], bool):
+                raise (TypeError("bool", repr(tmp_13['clustered'])))
+            if tmp_13['health'][0] == 'Healthy':
+                if not isinstance(tmp_13['health'][1], str) and not isinstance(tmp_13['health'][1], unicode):
+                    raise (TypeError("string", repr(tmp_13['health'][1])))
+            elif tmp_13['health'][0] == 'Recovering':
+                if not isinstance(tmp_13['health'][1], str) and not isinstance(tmp_13['health'][1], unicode):
+                    raise (TypeError("string", repr(tmp_13['health'][1])))
+        if not isinstance(results['uris'], list):
+            raise (TypeError("string list", repr(results['uris'])))
+        for tmp_15 in results['uris']:
+            if not isinstance(tmp_15, str) and not isinstance(tmp_15, unicode):
+                raise (TypeError("string", repr(tmp_15)))
+        return results
+    def create(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        if not('name' in args):
+            raise UnmarshalException('argument missing', 'name', '')
+        name = args["name"]
+        if not isinstance(name, str) and not isinstance(name, unicode):
+            raise (TypeError("string", repr(name)))
+        if not('description' in args):
+            raise UnmarshalException('argument missing', 'description', '')
+        description = args["description"]
+        if not isinstance(description, str) and not isinstance(description, unicode):
+            raise (TypeError("string", repr(description)))
+        if not('configuration' in args):
+            raise UnmarshalException('argument missing', 'configuration', '')
+        configuration = args["configuration"]
+        if not isinstance(configuration, dict):
+            raise (TypeError("(string * string) list", repr(configuration)))
+        for tmp_16 in configuration.keys():
+            if not isinstance(tmp_16, str) and not isinstance(tmp_16, unicode):
+                raise (TypeError("string", repr(tmp_16)))
+        for tmp_16 in configuration.values():
+            if not isinstance(tmp_16, str) and not isinstance(tmp_16, unicode):
+                raise (TypeError("string", repr(tmp_16)))
+        results = self._impl.create(dbg, uri, name, description, configuration)
+        return results
+    def attach(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('uri' in args):
+            raise UnmarshalException('argument missing', 'uri', '')
+        uri = args["uri"]
+        if not isinstance(uri, str) and not isinstance(uri, unicode):
+            raise (TypeError("string", repr(uri)))
+        results = self._impl.attach(dbg, uri)
+        if not isinstance(results, str) and not isinstance(results, unicode):
+            raise (TypeError("string", repr(results)))
+        return results
+    def detach(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        results = self._impl.detach(dbg, sr)
+        return results
+    def destroy(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        results = self._impl.destroy(dbg, sr)
+        return results
+    def stat(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        results = self._impl.stat(dbg, sr)
+        if not isinstance(results['sr'], str) and not isinstance(results['sr'], unicode):
+            raise (TypeError("string", repr(results['sr'])))
+        if not isinstance(results['name'], str) and not isinstance(results['name'], unicode):
+            raise (TypeError("string", repr(results['name'])))
+        if not isinstance(results['description'], str) and not isinstance(results['description'], unicode):
+            raise (TypeError("string", repr(results['description'])))
+        if not(is_long(results['free_space'])):
+            raise (TypeError("int64", repr(results['free_space'])))
+        if not(is_long(results['total_space'])):
+            raise (TypeError("int64", repr(results['total_space'])))
+        if not isinstance(results['datasources'], list):
+            raise (TypeError("string list", repr(results['datasources'])))
+        for tmp_17 in results['datasources']:
+            if not isinstance(tmp_17, str) and not isinstance(tmp_17, unicode):
+                raise (TypeError("string", repr(tmp_17)))
+        if not isinstance(results['clustered'], bool):
+            raise (TypeError("bool", repr(results['clustered'])))
+        if results['health'][0] == 'Healthy':
+            if not isinstance(results['health'][1], str) and not isinstance(results['health'][1], unicode):
+                raise (TypeError("string", repr(results['health'][1])))
+        elif results['health'][0] == 'Recovering':
+            if not isinstance(results['health'][1], str) and not isinstance(results['health'][1], unicode):
+                raise (TypeError("string", repr(results['health'][1])))
+        return results
+    def set_name(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('new_name' in args):
+            raise UnmarshalException('argument missing', 'new_name', '')
+        new_name = args["new_name"]
+        if not isinstance(new_name, str) and not isinstance(new_name, unicode):
+            raise (TypeError("string", repr(new_name)))
+        results = self._impl.set_name(dbg, sr, new_name)
+        return results
+    def set_description(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('new_description' in args):
+            raise UnmarshalException('argument missing', 'new_description', '')
+        new_description = args["new_description"]
+        if not isinstance(new_description, str) and not isinstance(new_description, unicode):
+            raise (TypeError("string", repr(new_description)))
+        results = self._impl.set_description(dbg, sr, new_description)
+        return results
+    def ls(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        results = self._impl.ls(dbg, sr)
+        if not isinstance(results, list):
+            if not xapi.is_iterator(results):
+                raise (TypeError("8 list", repr(results)))
+            def _checked_results(results):
+                for tmp_18 in results:
+                    if not isinstance(tmp_18['key'], str) and not isinstance(tmp_18['key'], unicode):
+                        raise (TypeError("string", repr(tmp_18['key'])))
+                    if tmp_18['uuid'] is not None:
+                        if not isinstance(tmp_18['uuid'], str) and not isinstance(tmp_18['uuid'], unicode):
+                            raise (TypeError("string", repr(tmp_18['uuid'])))
+                    if not isinstance(tmp_18['name'], str) and not isinstance(tmp_18['name'], unicode):
+                        raise (TypeError("string", repr(tmp_18['name'])))
+                    if not isinstance(tmp_18['description'], str) and not isinstance(tmp_18['description'], unicode):
+                        raise (TypeError("string", repr(tmp_18['description'])))
+                    if not isinstance(tmp_18['read_write'], bool):
+                        raise (TypeError("bool", repr(tmp_18['read_write'])))
+                    if not(is_long(tmp_18['virtual_size'])):
+                        raise (TypeError("int64", repr(tmp_18['virtual_size'])))
+                    if not(is_long(tmp_18['physical_utilisation'])):
+                        raise (TypeError("int64", repr(tmp_18['physical_utilisation'])))
+                    if not isinstance(tmp_18['uri'], list):
+                        raise (TypeError("string list", repr(tmp_18['uri'])))
+                    for tmp_19 in tmp_18['uri']:
+                        if not isinstance(tmp_19, str) and not isinstance(tmp_19, unicode):
+                            raise (TypeError("string", repr(tmp_19)))
+                    if not isinstance(tmp_18['keys'], dict):
+                        raise (TypeError("(string * string) list", repr(tmp_18['keys'])))
+                    for tmp_20 in tmp_18['keys'].keys():
+                        if not isinstance(tmp_20, str) and not isinstance(tmp_20, unicode):
+                            raise (TypeError("string", repr(tmp_20)))
+                    for tmp_20 in tmp_18['keys'].values():
+                        if not isinstance(tmp_20, str) and not isinstance(tmp_20, unicode):
+                            raise (TypeError("string", repr(tmp_20)))
+                    yield tmp_18
+            return _checked_results(results)
+        for tmp_18 in results:
+            if not isinstance(tmp_18['key'], str) and not isinstance(tmp_18['key'], unicode):
+                raise (TypeError("string", repr(tmp_18['key'])))
+            if tmp_18['uuid'] is not None:
+                if not isinstance(tmp_18['uuid'], str) and not isinstance(tmp_18['uuid'], unicode):
+                    raise (TypeError("string", repr(tmp_18['uuid'])))
+            if not isinstance(tmp_18['name'], str) and not isinstance(tmp_18['name'], unicode):
+                raise (TypeError("string", repr(tmp_18['name'])))
+            if not isinstance(tmp_18['description'], str) and not isinstance(tmp_18['description'], unicode):
+                raise (TypeError("string", repr(tmp_18['description'])))
+            if not isinstance(tmp_18['read_write'], bool):
+                raise (TypeError("bool", repr(tmp_18['read_write'])))
+            if not(is_long(tmp_18['virtual_size'])):
+                raise (TypeError("int64", repr(tmp_18['virtual_size'])))
+            if not(is_long(tmp_18['physical_utilisation'])):
+                raise (TypeError("int64", repr(tmp_18['physical_utilisation'])))
+            if not isinstance(tmp_18['uri'], list):
+                raise (TypeError("string list", repr(tmp_18['uri'])))
+            for tmp_19 in tmp_18['uri']:
+                if not isinstance(tmp_19, str) and not isinstance(tmp_19, unicode):
+                    raise (TypeError("string", repr(tmp_19)))
+            if not isinstance(tmp_18['keys'], dict):
+                raise (TypeError("(string * string) list", repr(tmp_18['keys'])))
+            for tmp_20 in tmp_18['keys'].keys():
+                if not isinstance(tmp_20, str) and not isinstance(tmp_20, unicode):
+                    raise (TypeError("string", repr(tmp_20)))
+            for tmp_20 in tmp_18['keys'].values():
+                if not isinstance(tmp_20, str) and not isinstance(tmp_20, unicode):
+                    raise (TypeError("string", repr(tmp_20)))
+        return results
+    def ls_changes(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('token' in args):
+            raise UnmarshalException('argument missing', 'token', '')
+        token = args["token"]
+        if not isinstance(token, str) and not isinstance(token, unicode):
+            raise (TypeError("string", repr(token)))
+        results = self._impl.ls_changes(dbg, sr, token)
+        if not isinstance(results['token'], str) and not isinstance(results['token'], unicode):
+            raise (TypeError("string", repr(results['token'])))
+        if not isinstance(results['full'], bool):
+            raise (TypeError("bool", repr(results['full'])))
+        if not isinstance(results['changed'], list):
+            raise (TypeError("8 list", repr(results['changed'])))
+        for tmp_21 in results['changed']:
+            if not isinstance(tmp_21['key'], str) and not isinstance(tmp_21['key'], unicode):
+                raise (TypeError("string", repr(tmp_21['key'])))
+            if tmp_21['uuid'] is not None:
+                if not isinstance(tmp_21['uuid'], str) and not isinstance(tmp_21['uuid'], unicode):
+                    raise (TypeError("string", repr(tmp_21['uuid'])))
+            if not isinstance(tmp_21['name'], str) and not isinstance(tmp_21['name'], unicode):
+                raise (TypeError("string", repr(tmp_21['name'])))
+            if not isinstance(tmp_21['description'], str) and not isinstance(tmp_21['description'], unicode):
+                raise (TypeError("string", repr(tmp_21['description'])))
+            if not isinstance(tmp_21['read_write'], bool):
+                raise (TypeError("bool", repr(tmp_21['read_write'])))
+            if not(is_long(tmp_21['virtual_size'])):
+                raise (TypeError("int64", repr(tmp_21['virtual_size'])))
+            if not(is_long(tmp_21['physical_utilisation'])):
+                raise (TypeError("int64", repr(tmp_21['physical_utilisation'])))
+            if not isinstance(tmp_21['uri'], list):
+                raise (TypeError("string list", repr(tmp_21['uri'])))
+            for tmp_22 in tmp_21['uri']:
+                if not isinstance(tmp_22, str) and not isinstance(tmp_22, unicode):
+                    raise (TypeError("string", repr(tmp_22)))
+            if not isinstance(tmp_21['keys'], dict):
+                raise (TypeError("(string * string) list", repr(tmp_21['keys'])))
+            for tmp_23 in tmp_21['keys'].keys():
+                if not isinstance(tmp_23, str) and not isinstance(tmp_23, unicode):
+                    raise (TypeError("string", repr(tmp_23)))
+            for tmp_23 in tmp_21['keys'].values():
+                if not isinstance(tmp_23, str) and not isinstance(tmp_23, unicode):
+                    raise (TypeError("string", repr(tmp_23)))
+        if not isinstance(results['destroyed'], list):
+            raise (TypeError("string list", repr(results['destroyed'])))
+        for tmp_24 in results['destroyed']:
+            if not isinstance(tmp_24, str) and not isinstance(tmp_24, unicode):
+                raise (TypeError("string", repr(tmp_24)))
+        return results
+    def reclaim(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        results = self._impl.reclaim(dbg, sr)
+        if not isinstance(results, str) and not isinstance(results, unicode):
+            raise (TypeError("string", repr(results)))
+        return results
+    def _dispatch(self, method, params):
+        """type check inputs, call implementation, type check outputs and return"""
+        args = params[0]
+        if method == "SR.probe":
+            return success(self.probe(args))
+        elif method == "SR.create":
+            return success(self.create(args))
+        elif method == "SR.attach":
+            return success(self.attach(args))
+        elif method == "SR.detach":
+            return success(self.detach(args))
+        elif method == "SR.destroy":
+            return success(self.destroy(args))
+        elif method == "SR.stat":
+            return success(self.stat(args))
+        elif method == "SR.set_name":
+            return success(self.set_name(args))
+        elif method == "SR.set_description":
+            return success(self.set_description(args))
+        elif method == "SR.ls":
+            return success(self.ls(args))
+        elif method == "SR.ls_changes":
+            return success(self.ls_changes(args))
+        elif method == "SR.reclaim":
+            return success(self.reclaim(args))
+class SR_skeleton:
+    """Operations which act on Storage Repositories"""
+    def __init__(self):
+        pass
+    def probe(self, dbg, uri):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.probe")
+    def create(self, dbg, uri, name, description, configuration):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.create")
+    def attach(self, dbg, uri):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.attach")
+    def detach(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.detach")
+    def destroy(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.destroy")
+    def stat(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.stat")
+    def set_name(self, dbg, sr, new_name):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.set_name")
+    def set_description(self, dbg, sr, new_description):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.set_description")
+    def ls(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.ls")
+    def ls_changes(self, dbg, sr, token):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.ls_changes")
+    def reclaim(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        raise Unimplemented("SR.reclaim")
+class SR_commandline():
+    """Parse command-line arguments and call an implementation."""
+    def __init__(self, impl):
+        self.impl = impl
+        self.dispatcher = SR_server_dispatcher(self.impl)
+    def _parse_probe(self):
+        """[probe uri]: looks for existing SRs on the storage device"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[probe uri]: looks for existing SRs on the storage device')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='The Storage Repository URI')
+        return vars(parser.parse_args())
+    def _parse_create(self):
+        """[create uri name description configuration]: creates a fresh SR"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[create uri name description configuration]: creates a fresh SR')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='The Storage Repository URI')
+        parser.add_argument('name', action='store', help='Human-readable name for the SR')
+        parser.add_argument('description', action='store', help='Human-readable description for the SR')
+        parser.add_argument('--configuration', default={}, nargs=2, action=xapi.ListAction, help='Plugin-specific configuration which describes where and how to create the storage repository. This may include the physical block device name, a remote NFS server and path or an RBD storage pool.')
+        return vars(parser.parse_args())
+    def _parse_attach(self):
+        """[attach uri]: attaches the SR to the local host. Once an SR is attached then volumes may be manipulated."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[attach uri]: attaches the SR to the local host. Once an SR is attached then volumes may be manipulated.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('uri', action='store', help='The Storage Repository URI')
+        return vars(parser.parse_args())
+    def _parse_detach(self):
+        """[detach sr]: detaches the SR, clearing up any associated resources. Once the SR is detached then volumes may not be manipulated."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[detach sr]: detaches the SR, clearing up any associated resources. Once the SR is detached then volumes may not be manipulated.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        return vars(parser.parse_args())
+    def _parse_destroy(self):
+        """[destroy sr]: destroys the [sr] and deletes any volumes associated with it. Note that an SR must be attached to be destroyed; otherwise Sr_not_attached is thrown."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[destroy sr]: destroys the [sr] and deletes any volumes associated with it. Note that an SR must be attached to be destroyed; otherwise Sr_not_attached is thrown.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        return vars(parser.parse_args())
+    def _parse_stat(self):
+        """[stat sr] returns summary metadata associated with [sr]. Note this call does not return details of sub-volumes, see SR.ls."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[stat sr] returns summary metadata associated with [sr]. Note this call does not return details of sub-volumes, see SR.ls.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        return vars(parser.parse_args())
+    def _parse_set_name(self):
+        """[set_name sr new_name] changes the name of [sr]"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[set_name sr new_name] changes the name of [sr]')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('new_name', action='store', help='The new name of the SR')
+        return vars(parser.parse_args())
+    def _parse_set_description(self):
+        """[set_description sr new_description] changes the description of [sr]"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[set_description sr new_description] changes the description of [sr]')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('new_description', action='store', help='The new description for the SR')
+        return vars(parser.parse_args())
+    def _parse_ls(self):
+        """[ls sr] returns a list of volumes contained within an attached SR."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[ls sr] returns a list of volumes contained within an attached SR.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        return vars(parser.parse_args())
+    def _parse_ls_changes(self):
+        """[ls_changes sr token] returns the volumes which were created, modified or destroyed in an attached SR since [token] was returned by a previous call, together with a new token. This allows a caller which periodically rescans the SR to do work proportional to the number of changes rather than to the number of volumes. If the token is not recognised the plugin returns a full listing. This call should only be made if the plugin declares the SR_LS_CHANGES feature in the query response."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[ls_changes sr token] returns the volumes which were created, modified or destroyed in an attached SR since [token] was returned by a previous call, together with a new token. This allows a caller which periodically rescans the SR to do work proportional to the number of changes rather than to the number of volumes. If the token is not recognised the plugin returns a full listing. This call should only be made if the plugin declares the SR_LS_CHANGES feature in the query response.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('token', action='store', help='The token returned by the previous call to SR.ls_changes, or the empty string to request a full listing')
+        return vars(parser.parse_args())
+    def _parse_reclaim(self):
+        """[reclaim sr] starts freeing the space allocated to zero-filled blocks in every volume of an attached SR, as Volume.reclaim does for one volume, and returns the task doing so. This call should only be made if the plugin declares the SR_RECLAIM feature in the query response."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[reclaim sr] starts freeing the space allocated to zero-filled blocks in every volume of an attached SR, as Volume.reclaim does for one volume, and returns the task doing so. This call should only be made if the plugin declares the SR_RECLAIM feature in the query response.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        return vars(parser.parse_args())
+    def probe(self):
+        use_json = False
+        try:
+            request = self._parse_probe()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.probe(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def create(self):
+        use_json = False
+        try:
+            request = self._parse_create()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.create(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def attach(self):
+        use_json = False
+        try:
+            request = self._parse_attach()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.attach(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def detach(self):
+        use_json = False
+        try:
+            request = self._parse_detach()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.detach(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def destroy(self):
+        use_json = False
+        try:
+            request = self._parse_destroy()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.destroy(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def stat(self):
+        use_json = False
+        try:
+            request = self._parse_stat()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.stat(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def set_name(self):
+        use_json = False
+        try:
+            request = self._parse_set_name()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.set_name(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def set_description(self):
+        use_json = False
+        try:
+            request = self._parse_set_description()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.set_description(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def ls(self):
+        use_json = False
+        try:
+            request = self._parse_ls()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.ls(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def ls_changes(self):
+        use_json = False
+        try:
+            request = self._parse_ls_changes()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.ls_changes(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def reclaim(self):
+        use_json = False
+        try:
+            request = self._parse_reclaim()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.reclaim(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
\ No newline at end of file
@@ -0,0 +1,130 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+from .volume_errors import *
+from .volume_volume import *
+from .volume_sr import *
+from .volume import volume_server_dispatcher
+class Volume_test:
+    """Operations which operate on volumes (also known as Virtual Disk Images)"""
+    def __init__(self):
+        pass
+    def create(self, dbg, sr, name, description, size):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["volume"] = { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } }
+        return result
+    def snapshot(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["volume"] = { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } }
+        return result
+    def clone(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["volume"] = { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } }
+        return result
+    def destroy(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        return result
+    def set_name(self, dbg, sr, key, new_name):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        return result
+    def set_description(self, dbg, sr, key, new_description):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        return result
+    def set(self, dbg, sr, key, k, v):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        return result
+    def unset(self, dbg, sr, key, k):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        return result
+    def resize(self, dbg, sr, key, new_size):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        return result
+    def stat(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["volume"] = { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } }
+        return result
+    def reclaim(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["task"] = "string"
+        return result
+    def export_stream(self, dbg, sr, key, path, stream_format):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["task"] = "string"
+        return result
+    def import_stream(self, dbg, sr, key, path, stream_format):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        result = {}
+        result["task"] = "string"
+        return result
+class SR_test:
+    """Operations which act on Storage Repositories"""
+    def __init__(self):
+        pass
+    def probe(self, dbg, uri):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        result["result"] = { "srs": [ { "sr": "string", "name": "string", "description": "string", "free_space": 0L, "total_space": 0L, "datasources": [ "string", "string" ], "clustered": True, "health": None }, { "sr": "string", "name": "string", "description": "string", "free_space": 0L, "total_space": 0L, "datasources": [ "string", "string" ], "clustered": True, "health": None } ], "uris": [ "string", "string" ] }
+        return result
+    def create(self, dbg, uri, name, description, configuration):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        return result
+    def attach(self, dbg, uri):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        result["sr"] = "string"
+        return result
+    def detach(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        return result
+    def destroy(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        return result
+    def stat(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        result["sr"] = { "sr": "string", "name": "string", "description": "string", "free_space": 0L, "total_space": 0L, "datasources": [ "string", "string" ], "clustered": True, "health": None }
+        return result
+    def set_name(self, dbg, sr, new_name):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        return result
+    def set_description(self, dbg, sr, new_description):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        return result
+    def ls(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        result["volumes"] = [ { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } }, { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } } ]
+        return result
+    def ls_changes(self, dbg, sr, token):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        result["changes"] = { "token": "string", "full": True, "changed": [ { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } }, { "key": "string", "uuid": None, "name": "string", "description": "string", "read_write": True, "virtual_size": 0L, "physical_utilisation": 0L, "uri": [ "string", "string" ], "keys": { "string": "string" } } ], "destroyed": [ "string", "string" ] }
+        return result
+    def reclaim(self, dbg, sr):
+        """Operations which act on Storage Repositories"""
+        result = {}
+        result["task"] = "string"
+        return result
+class volume_server_test(volume_server_dispatcher):
+    """Create a server which will respond to all calls, returning arbitrary values. This is intended as a marshal/unmarshal test."""
+    def __init__(self):
+        volume_server_dispatcher.__init__(self, Volume_server_dispatcher(Volume_test()), SR_server_dispatcher(SR_test()))
\ No newline at end of file
@@ -0,0 +1,915 @@
+from xapi import success, Rpc_light_failure, InternalError, UnmarshalException, TypeError, is_long, UnknownMethod
+import xapi
+import sys
+import traceback
+import logging
+from .volume_errors import *
+class Volume_server_dispatcher:
+    """Operations which operate on volumes (also known as Virtual Disk Images)"""
+    def __init__(self, impl):
+        """impl is a proxy object whose methods contain the implementation"""
+        self._impl = impl
+    def create(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('name' in args):
+            raise UnmarshalException('argument missing', 'name', '')
+        name = args["name"]
+        if not isinstance(name, str) and not isinstance(name, unicode):
+            raise (TypeError("string", repr(name)))
+        if not('description' in args):
+            raise UnmarshalException('argument missing', 'description', '')
+        description = args["description"]
+        if not isinstance(description, str) and not isinstance(description, unicode):
+            raise (TypeError("string", repr(description)))
+        if not('size' in args):
+            raise UnmarshalException('argument missing', 'size', '')
+        size = args["size"]
+        if not(is_long(size)):
+            raise (TypeError("int64", repr(size)))
+        results = self._impl.create(dbg, sr, name, description, size)
+        if not isinstance(results['key'], str) and not isinstance(results['key'], unicode):
+            raise (TypeError("string", repr(results['key'])))
+        if results['uuid'] is not None:
+            if not isinstance(results['uuid'], str) and not isinstance(results['uuid'], unicode):
+                raise (TypeError("string", repr(results['uuid'])))
+        if not isinstance(results['name'], str) and not isinstance(results['name'], unicode):
+            raise (TypeError("string", repr(results['name'])))
+        if not isinstance(results['description'], str) and not isinstance(results['description'], unicode):
+            raise (TypeError("string", repr(results['description'])))
+        if not isinstance(results['read_write'], bool):
+            raise (TypeError("bool", repr(results['read_write'])))
+        if not(is_long(results['virtual_size'])):
+            raise (TypeError("int64", repr(results['virtual_size'])))
+        if not(is_long(results['physical_utilisation'])):
+            raise (TypeError("int64", repr(results['physical_utilisation'])))
+        if not isinstance(results['uri'], list):
+            raise (TypeError("string list", repr(results['uri'])))
+        for tmp_5 in results['uri']:
+            if not isinstance(tmp_5, str) and not isinstance(tmp_5, unicode):
+                raise (TypeError("string", repr(tmp_5)))
+        if not isinstance(results['keys'], dict):
+            raise (TypeError("(string * string) list", repr(results['keys'])))
+        for tmp_6 in results['keys'].keys():
+            if not isinstance(tmp_6, str) and not isinstance(tmp_6, unicode):
+                raise (TypeError("string", repr(tmp_6)))
+        for tmp_6 in results['keys'].values():
+            if not isinstance(tmp_6, str) and not isinstance(tmp_6, unicode):
+                raise (TypeError("string", repr(tmp_6)))
+        return results
+    def snapshot(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        results = self._impl.snapshot(dbg, sr, key)
+        if not isinstance(results['key'], str) and not isinstance(results['key'], unicode):
+            raise (TypeError("string", repr(results['key'])))
+        if results['uuid'] is not None:
+            if not isinstance(results['uuid'], str) and not isinstance(results['uuid'], unicode):
+                raise (TypeError("string", repr(results['uuid'])))
+        if not isinstance(results['name'], str) and not isinstance(results['name'], unicode):
+            raise (TypeError("string", repr(results['name'])))
+        if not isinstance(results['description'], str) and not isinstance(results['description'], unicode):
+            raise (TypeError("string", repr(results['description'])))
+        if not isinstance(results['read_write'], bool):
+            raise (TypeError("bool", repr(results['read_write'])))
+        if not(is_long(results['virtual_size'])):
+            raise (TypeError("int64", repr(results['virtual_size'])))
+        if not(is_long(results['physical_utilisation'])):
+            raise (TypeError("int64", repr(results['physical_utilisation'])))
+        if not isinstance(results['uri'], list):
+            raise (TypeError("string list", repr(results['uri'])))
+        for tmp_7 in results['uri']:
+            if not isinstance(tmp_7, str) and not isinstance(tmp_7, unicode):
+                raise (TypeError("string", repr(tmp_7)))
+        if not isinstance(results['keys'], dict):
+            raise (TypeError("(string * string) list", repr(results['keys'])))
+        for tmp_8 in results['keys'].keys():
+            if not isinstance(tmp_8, str) and not isinstance(tmp_8, unicode):
+                raise (TypeError("string", repr(tmp_8)))
+        for tmp_8 in results['keys'].values():
+            if not isinstance(tmp_8, str) and not isinstance(tmp_8, unicode):
+                raise (TypeError("string", repr(tmp_8)))
+        return results
+    def clone(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        results = self._impl.clone(dbg, sr, key)
+        if not isinstance(results['key'], str) and not isinstance(results['key'], unicode):
+            raise (TypeError("string", repr(results['key'])))
+        if results['uuid'] is not None:
+            if not isinstance(results['uuid'], str) and not isinstance(results['uuid'], unicode):
+                raise (TypeError("string", repr(results['uuid'])))
+        if not isinstance(results['name'], str) and not isinstance(results['name'], unicode):
+            raise (TypeError("string", repr(results['name'])))
+        if not isinstance(results['description'], str) and not isinstance(results['description'], unicode):
+            raise (TypeError("string", repr(results['description'])))
+        if not isinstance(results['read_write'], bool):
+            raise (TypeError("bool", repr(results['read_write'])))
+        if not(is_long(results['virtual_size'])):
+            raise (TypeError("int64", repr(results['virtual_size'])))
+        if not(is_long(results['physical_utilisation'])):
+            raise (TypeError("int64", repr(results['physical_utilisation'])))
+        if not isinstance(results['uri'], list):
+            raise (TypeError("string list", repr(results['uri'])))
+        for tmp_9 in results['uri']:
+            if not isinstance(tmp_9, str) and not isinstance(tmp_9, unicode):
+                raise (TypeError("string", repr(tmp_9)))
+        if not isinstance(results['keys'], dict):
+            raise (TypeError("(string * string) list", repr(results['keys'])))
+        for tmp_10 in results['keys'].keys():
+            if not isinstance(tmp_10, str) and not isinstance(tmp_10, unicode):
+                raise (TypeError("string", repr(tmp_10)))
+        for tmp_10 in results['keys'].values():
+            if not isinstance(tmp_10, str) and not isinstance(tmp_10, unicode):
+                raise (TypeError("string", repr(tmp_10)))
+        return results
+    def destroy(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        results = self._impl.destroy(dbg, sr, key)
+        return results
+    def set_name(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('new_name' in args):
+            raise UnmarshalException('argument missing', 'new_name', '')
+        new_name = args["new_name"]
+        if not isinstance(new_name, str) and not isinstance(new_name, unicode):
+            raise (TypeError("string", repr(new_name)))
+        results = self._impl.set_name(dbg, sr, key, new_name)
+        return results
+    def set_description(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('new_description' in args):
+            raise UnmarshalException('argument missing', 'new_description', '')
+        new_description = args["new_description"]
+        if not isinstance(new_description, str) and not isinstance(new_description, unicode):
+            raise (TypeError("string", repr(new_description)))
+        results = self._impl.set_description(dbg, sr, key, new_description)
+        return results
+    def set(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('k' in args):
+            raise UnmarshalException('argument missing', 'k', '')
+        k = args["k"]
+        if not isinstance(k, str) and not isinstance(k, unicode):
+            raise (TypeError("string", repr(k)))
+        if not('v' in args):
+            raise UnmarshalException('argument missing', 'v', '')
+        v = args["v"]
+        if not isinstance(v, str) and not isinstance(v, unicode):
+            raise (TypeError("string", repr(v)))
+        results = self._impl.set(dbg, sr, key, k, v)
+        return results
+    def unset(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('k' in args):
+            raise UnmarshalException('argument missing', 'k', '')
+        k = args["k"]
+        if not isinstance(k, str) and not isinstance(k, unicode):
+            raise (TypeError("string", repr(k)))
+        results = self._impl.unset(dbg, sr, key, k)
+        return results
+    def resize(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('new_size' in args):
+            raise UnmarshalException('argument missing', 'new_size', '')
+        new_size = args["new_size"]
+        if not(is_long(new_size)):
+            raise (TypeError("int64", repr(new_size)))
+        results = self._impl.resize(dbg, sr, key, new_size)
+        return results
+    def stat(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        results = self._impl.stat(dbg, sr, key)
+        if not isinstance(results['key'], str) and not isinstance(results['key'], unicode):
+            raise (TypeError("string", repr(results['key'])))
+        if results['uuid'] is not None:
+            if not isinstance(results['uuid'], str) and not isinstance(results['uuid'], unicode):
+                raise (TypeError("string", repr(results['uuid'])))
+        if not isinstance(results['name'], str) and not isinstance(results['name'], unicode):
+            raise (TypeError("string", repr(results['name'])))
+        if not isinstance(results['description'], str) and not isinstance(results['description'], unicode):
+            raise (TypeError("string", repr(results['description'])))
+        if not isinstance(results['read_write'], bool):
+            raise (TypeError("bool", repr(results['read_write'])))
+        if not(is_long(results['virtual_size'])):
+            raise (TypeError("int64", repr(results['virtual_size'])))
+        if not(is_long(results['physical_utilisation'])):
+            raise (TypeError("int64", repr(results['physical_utilisation'])))
+        if not isinstance(results['uri'], list):
+            raise (TypeError("string list", repr(results['uri'])))
+        for tmp_11 in results['uri']:
+            if not isinstance(tmp_11, str) and not isinstance(tmp_11, unicode):
+                raise (TypeError("string", repr(tmp_11)))
+        if not isinstance(results['keys'], dict):
+            raise (TypeError("(string * string) list", repr(results['keys'])))
+        for tmp_12 in results['keys'].keys():
+            if not isinstance(tmp_12, str) and not isinstance(tmp_12, unicode):
+                raise (TypeError("string", repr(tmp_12)))
+        for tmp_12 in results['keys'].values():
+            if not isinstance(tmp_12, str) and not isinstance(tmp_12, unicode):
+                raise (TypeError("string", repr(tmp_12)))
+        return results
+    def reclaim(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        results = self._impl.reclaim(dbg, sr, key)
+        if not isinstance(results, str) and not isinstance(results, unicode):
+            raise (TypeError("string", repr(results)))
+        return results
+    def export_stream(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('path' in args):
+            raise UnmarshalException('argument missing', 'path', '')
+        path = args["path"]
+        if not isinstance(path, str) and not isinstance(path, unicode):
+            raise (TypeError("string", repr(path)))
+        if not('stream_format' in args):
+            raise UnmarshalException('argument missing', 'stream_format', '')
+        stream_format = args["stream_format"]
+        if not isinstance(stream_format, str) and not isinstance(stream_format, unicode):
+            raise (TypeError("string", repr(stream_format)))
+        results = self._impl.export_stream(dbg, sr, key, path, stream_format)
+        if not isinstance(results, str) and not isinstance(results, unicode):
+            raise (TypeError("string", repr(results)))
+        return results
+    def import_stream(self, args):
+        """type-check inputs, call implementation, type-check outputs and return"""
+        if not isinstance(args, dict):
+            raise (UnmarshalException('arguments', 'dict', repr(args)))
+        if not('dbg' in args):
+            raise UnmarshalException('argument missing', 'dbg', '')
+        dbg = args["dbg"]
+        if not isinstance(dbg, str) and not isinstance(dbg, unicode):
+            raise (TypeError("string", repr(dbg)))
+        if not('sr' in args):
+            raise UnmarshalException('argument missing', 'sr', '')
+        sr = args["sr"]
+        if not isinstance(sr, str) and not isinstance(sr, unicode):
+            raise (TypeError("string", repr(sr)))
+        if not('key' in args):
+            raise UnmarshalException('argument missing', 'key', '')
+        key = args["key"]
+        if not isinstance(key, str) and not isinstance(key, unicode):
+            raise (TypeError("string", repr(key)))
+        if not('path' in args):
+            raise UnmarshalException('argument missing', 'path', '')
+        path = args["path"]
+        if not isinstance(path, str) and not isinstance(path, unicode):
+            raise (TypeError("string", repr(path)))
+        if not('stream_format' in args):
+            raise UnmarshalException('argument missing', 'stream_format', '')
+        stream_format = args["stream_format"]
+        if not isinstance(stream_format, str) and not isinstance(stream_format, unicode):
+            raise (TypeError("string", repr(stream_format)))
+        results = self._impl.import_stream(dbg, sr, key, path, stream_format)
+        if not isinstance(results, str) and not isinstance(results, unicode):
+            raise (TypeError("string", repr(results)))
+        return results
+    def _dispatch(self, method, params):
+        """type check inputs, call implementation, type check outputs and return"""
+        args = params[0]
+        if method == "Volume.create":
+            return success(self.create(args))
+        elif method == "Volume.snapshot":
+            return success(self.snapshot(args))
+        elif method == "Volume.clone":
+            return success(self.clone(args))
+        elif method == "Volume.destroy":
+            return success(self.destroy(args))
+        elif method == "Volume.set_name":
+            return success(self.set_name(args))
+        elif method == "Volume.set_description":
+            return success(self.set_description(args))
+        elif method == "Volume.set":
+            return success(self.set(args))
+        elif method == "Volume.unset":
+            return success(self.unset(args))
+        elif method == "Volume.resize":
+            return success(self.resize(args))
+        elif method == "Volume.stat":
+            return success(self.stat(args))
+        elif method == "Volume.reclaim":
+            return success(self.reclaim(args))
+        elif method == "Volume.export_stream":
+            return success(self.export_stream(args))
+        elif method == "Volume.import_stream":
+            return success(self.import_stream(args))
+class Volume_skeleton:
+    """Operations which operate on volumes (also known as Virtual Disk Images)"""
+    def __init__(self):
+        pass
+    def create(self, dbg, sr, name, description, size):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.create")
+    def snapshot(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.snapshot")
+    def clone(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.clone")
+    def destroy(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.destroy")
+    def set_name(self, dbg, sr, key, new_name):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.set_name")
+    def set_description(self, dbg, sr, key, new_description):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.set_description")
+    def set(self, dbg, sr, key, k, v):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.set")
+    def unset(self, dbg, sr, key, k):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.unset")
+    def resize(self, dbg, sr, key, new_size):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.resize")
+    def stat(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.stat")
+    def reclaim(self, dbg, sr, key):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.reclaim")
+    def export_stream(self, dbg, sr, key, path, stream_format):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.export_stream")
+    def import_stream(self, dbg, sr, key, path, stream_format):
+        """Operations which operate on volumes (also known as Virtual Disk Images)"""
+        raise Unimplemented("Volume.import_stream")
+class Volume_commandline():
+    """Parse command-line arguments and call an implementation."""
+    def __init__(self, impl):
+        self.impl = impl
+        self.dispatcher = Volume_server_dispatcher(self.impl)
+    def _parse_create(self):
+        """[create sr name description size] creates a new volume in [sr] with [name] and [description]. The volume will have size >= [size] i.e. it is always permissable for an implementation to round-up the volume to the nearest convenient block size"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[create sr name description size] creates a new volume in [sr] with [name] and [description]. The volume will have size >= [size] i.e. it is always permissable for an implementation to round-up the volume to the nearest convenient block size')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('name', action='store', help='A human-readable name to associate with the new disk. This name is intended to be short, to be a good summary of the disk.')
+        parser.add_argument('description', action='store', help='A human-readable description to associate with the new disk. This can be arbitrarily long, up to the general string size limit.')
+        parser.add_argument('size', action='store', help='A minimum size (in bytes) for the disk. Depending on the characteristics of the implementation this may be rounded up to (for example) the nearest convenient block size. The created disk will not be smaller than this size.')
+        return vars(parser.parse_args())
+    def _parse_snapshot(self):
+        """[snapshot sr volume] creates a new volue which is a  snapshot of [volume] in [sr]. Snapshots should never be written to; they are intended for backup/restore only. Note the name and description are copied but any extra metadata associated by [set] is not copied."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[snapshot sr volume] creates a new volue which is a  snapshot of [volume] in [sr]. Snapshots should never be written to; they are intended for backup/restore only. Note the name and description are copied but any extra metadata associated by [set] is not copied.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        return vars(parser.parse_args())
+    def _parse_clone(self):
+        """[clone sr volume] creates a new volume which is a writable clone of [volume] in [sr]. Note the name and description are copied but any extra metadata associated by [set] is not copied."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[clone sr volume] creates a new volume which is a writable clone of [volume] in [sr]. Note the name and description are copied but any extra metadata associated by [set] is not copied.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        return vars(parser.parse_args())
+    def _parse_destroy(self):
+        """[destroy sr volume] removes [volume] from [sr]"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[destroy sr volume] removes [volume] from [sr]')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        return vars(parser.parse_args())
+    def _parse_set_name(self):
+        """[set_name sr volume new_name] changes the name of [volume]"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[set_name sr volume new_name] changes the name of [volume]')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('new_name', action='store', help='New name')
+        return vars(parser.parse_args())
+    def _parse_set_description(self):
+        """[set_description sr volume new_description] changes the description of [volume]"""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[set_description sr volume new_description] changes the description of [volume]')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('new_description', action='store', help='New description')
+        return vars(parser.parse_args())
+    def _parse_set(self):
+        """[set sr volume key value] associates [key] with [value] in the metadata of [volume] Note these keys and values are not interpreted by the plugin; they are intended for the higher-level software only."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[set sr volume key value] associates [key] with [value] in the metadata of [volume] Note these keys and values are not interpreted by the plugin; they are intended for the higher-level software only.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('k', action='store', help='Key')
+        parser.add_argument('v', action='store', help='Value')
+        return vars(parser.parse_args())
+    def _parse_unset(self):
+        """[unset sr volume key] removes [key] and any value associated with it from the metadata of [volume] Note these keys and values are not interpreted by the plugin; they are intended for the higher-level software only."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[unset sr volume key] removes [key] and any value associated with it from the metadata of [volume] Note these keys and values are not interpreted by the plugin; they are intended for the higher-level software only.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('k', action='store', help='Key')
+        return vars(parser.parse_args())
+    def _parse_resize(self):
+        """[resize sr volume new_size] enlarges [volume] to be at least [new_size]."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[resize sr volume new_size] enlarges [volume] to be at least [new_size].')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('new_size', action='store', help='New disk size')
+        return vars(parser.parse_args())
+    def _parse_stat(self):
+        """[stat sr volume] returns metadata associated with [volume]."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[stat sr volume] returns metadata associated with [volume].')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        return vars(parser.parse_args())
+    def _parse_reclaim(self):
+        """[reclaim sr volume] starts freeing the space allocated to the blocks of [volume] which hold only zeros, for example because the guest has zeroed or discarded them, and returns the task doing so. The contents of the volume are not changed. This call should only be made if the plugin declares the VDI_RECLAIM feature in the query response."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[reclaim sr volume] starts freeing the space allocated to the blocks of [volume] which hold only zeros, for example because the guest has zeroed or discarded them, and returns the task doing so. The contents of the volume are not changed. This call should only be made if the plugin declares the VDI_RECLAIM feature in the query response.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        return vars(parser.parse_args())
+    def _parse_export_stream(self):
+        """[export_stream sr volume path stream_format] starts writing the contents of [volume] to [path] as a stream in [stream_format], and returns the task doing so. [path] is created if it does not exist. This call should only be made if the plugin declares the VDI_EXPORT_STREAM feature in the query response."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[export_stream sr volume path stream_format] starts writing the contents of [volume] to [path] as a stream in [stream_format], and returns the task doing so. [path] is created if it does not exist. This call should only be made if the plugin declares the VDI_EXPORT_STREAM feature in the query response.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('path', action='store', help='A local file or named pipe holding the stream')
+        parser.add_argument('stream_format', action='store', help='The format of the stream: sparse, which holds only the blocks of the volume which are not zero, compressed, or raw, which holds the whole virtual size')
+        return vars(parser.parse_args())
+    def _parse_import_stream(self):
+        """[import_stream sr volume path stream_format] starts replacing the contents of [volume] with those of the stream in [stream_format] read from [path], and returns the task doing so. The volume must be at least as large as the stream and must not be attached. This call should only be made if the plugin declares the VDI_IMPORT_STREAM feature in the query response."""
+        # in --json mode we don't have any other arguments
+        if ('--json' in sys.argv or '-j' in sys.argv):
+            jsondict = xapi.codec.loads(sys.stdin.readline(),)
+            jsondict['json'] = True
+            return jsondict
+        import argparse
+        parser = argparse.ArgumentParser(description='[import_stream sr volume path stream_format] starts replacing the contents of [volume] with those of the stream in [stream_format] read from [path], and returns the task doing so. The volume must be at least as large as the stream and must not be attached. This call should only be made if the plugin declares the VDI_IMPORT_STREAM feature in the query response.')
+        parser.add_argument('-j', '--json', action='store_const', const=True, default=False, help='Read json from stdin, print json to stdout', required=False)
+        parser.add_argument('dbg', action='store', help='Debug context from the caller')
+        parser.add_argument('sr', action='store', help='The Storage Repository')
+        parser.add_argument('key', action='store', help='The volume key')
+        parser.add_argument('path', action='store', help='A local file or named pipe holding the stream')
+        parser.add_argument('stream_format', action='store', help='The format of the stream: sparse, which holds only the blocks of the volume which are not zero, compressed, or raw, which holds the whole virtual size')
+        return vars(parser.parse_args())
+    def create(self):
+        use_json = False
+        try:
+            request = self._parse_create()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.create(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def snapshot(self):
+        use_json = False
+        try:
+            request = self._parse_snapshot()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.snapshot(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def clone(self):
+        use_json = False
+        try:
+            request = self._parse_clone()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.clone(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def destroy(self):
+        use_json = False
+        try:
+            request = self._parse_destroy()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.destroy(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def set_name(self):
+        use_json = False
+        try:
+            request = self._parse_set_name()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.set_name(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def set_description(self):
+        use_json = False
+        try:
+            request = self._parse_set_description()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.set_description(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def set(self):
+        use_json = False
+        try:
+            request = self._parse_set()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.set(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def unset(self):
+        use_json = False
+        try:
+            request = self._parse_unset()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.unset(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def resize(self):
+        use_json = False
+        try:
+            request = self._parse_resize()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.resize(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def stat(self):
+        use_json = False
+        try:
+            request = self._parse_stat()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.stat(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def reclaim(self):
+        use_json = False
+        try:
+            request = self._parse_reclaim()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.reclaim(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def export_stream(self):
+        use_json = False
+        try:
+            request = self._parse_export_stream()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.export_stream(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
+    def import_stream(self):
+        use_json = False
+        try:
+            request = self._parse_import_stream()
+            use_json = 'json' in request and request['json']
+            results = self.dispatcher.import_stream(request)
+            xapi.codec.dump(results, sys.stdout)
+            sys.stdout.write("\n")
+        except Exception, e:
+            if use_json:
+                xapi.handle_exception(e)
+            else:
+                traceback.print_exc()
+                raise e
\ No newline at end of file
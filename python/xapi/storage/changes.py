@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+"""
+An append-only journal of the volumes changed in an SR, used to answer
+SR.ls_changes.
+
+Each line of the journal is a JSON record naming a volume key and
+whether it was updated or destroyed. The first line records a random
+generation which is replaced whenever the journal is started afresh, so
+that tokens issued against an older journal are recognised as stale.
+A token is "<generation>:<offset>" where offset is the journal size at
+the time the token was issued.
+"""
+
+import errno
+import os
+
+import xapi.codec
+from xapi.storage import log
+
+UPDATED = 'updated'
+DESTROYED = 'destroyed'
+
+# Start a new journal once it grows beyond this size. Callers holding a
+# token for the old journal will receive a full listing on their next call.
+MAX_JOURNAL_SIZE = 4 * 1024 * 1024
+
+
+class ChangeJournal(object):
+    """The change journal stored at [path]"""
+
+    def __init__(self, path, lock=None):
+        self.path = path
+        # Records are appended holding [lock] shared and a new journal is
+        # started holding it exclusive, so that no record is appended to a
+        # journal which has just been replaced
+        self.lock = lock
+
+    def _generation(self, dbg):
+        """Returns the generation of the journal, creating it if needed"""
+        try:
+            with open(self.path, 'r') as journal:
+                return xapi.codec.loads(journal.readline())['generation']
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        return self._start(dbg)
+
+    def _start(self, dbg, replace=False):
+        # uuid pulls in ctypes.util and subprocess, so it is only imported
+        # when a journal is started
+        import uuid
+        generation = uuid.uuid4().hex[:8]
+        # Write the header to a temporary file and move it into place, so
+        # a concurrent reader never sees a journal without a header
+        tmp_path = '{}.{}.tmp'.format(self.path, generation)
+        with open(tmp_path, 'w') as journal:
+            journal.write(xapi.codec.dumps({'generation': generation}) + '\n')
+        try:
+            if replace:
+                os.rename(tmp_path, self.path)
+            else:
+                # Another process may have created the journal first
+                try:
+                    os.link(tmp_path, self.path)
+                except OSError as e:
+                    if e.errno != errno.EEXIST:
+                        raise
+                    return self._generation(dbg)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        log.debug('%s: started change journal %s generation %s',
+                  dbg, self.path, generation)
+        return generation
+
+    def record(self, dbg, key, change=UPDATED):
+        """Appends a record that the volume [key] has been changed"""
+        self._generation(dbg)
+        line = xapi.codec.dumps({'key': key, 'change': change}) + '\n'
+        # A single write to a file opened with O_APPEND is atomic with
+        # respect to other appenders
+        if self.lock is not None:
+            self.lock.acquire(dbg, exclusive=False)
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, line)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+        if size > MAX_JOURNAL_SIZE:
+            self._rotate(dbg)
+
+    def _rotate(self, dbg):
+        if self.lock is None:
+            self._start(dbg, replace=True)
+            return
+        with self.lock.held(dbg, exclusive=True):
+            # Another process may have started a new journal while we
+            # waited for the lock
+            if os.stat(self.path).st_size > MAX_JOURNAL_SIZE:
+                self._start(dbg, replace=True)
+
+    def token(self, dbg):
+        """Returns a token for the current end of the journal"""
+        generation = self._generation(dbg)
+        return '{}:{}'.format(generation, os.stat(self.path).st_size)
+
+    def changes_since(self, token):
+        """Returns (new_token, updated, destroyed) where updated and
+        destroyed are the sets of keys changed since [token], or None if
+        the token is not recognised and a full listing is needed."""
+        try:
+            generation, offset = token.split(':')
+            offset = int(offset)
+        except ValueError:
+            return None
+        try:
+            journal = open(self.path, 'r')
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return None
+        with journal:
+            header = xapi.codec.loads(journal.readline())
+            if header['generation'] != generation or offset < journal.tell():
+                return None
+            journal.seek(0, os.SEEK_END)
+            if offset > journal.tell():
+                return None
+            journal.seek(offset)
+            updated = set()
+            destroyed = set()
+            while True:
+                line = journal.readline()
+                # Stop at a record which is still being appended
+                if not line.endswith('\n'):
+                    break
+                offset += len(line)
+                change = xapi.codec.loads(line)
+                if change['change'] == DESTROYED:
+                    updated.discard(change['key'])
+                    destroyed.add(change['key'])
+                else:
+                    destroyed.discard(change['key'])
+                    updated.add(change['key'])
+        return '{}:{}'.format(generation, offset), updated, destroyed
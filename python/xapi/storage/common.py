@@ -2,7 +2,6 @@
 
 from xapi.storage import log
 import xapi
-import subprocess
 
 
 # [call dbg cmd_args] executes [cmd_args]
@@ -11,7 +10,8 @@ import subprocess
 
 
 def call(dbg, cmd_args, error=True, simple=True, expRc=0):
-    log.debug('{}: Running cmd {}'.format(dbg, cmd_args))
+    import subprocess
+    log.debug('%s: Running cmd %s', dbg, cmd_args)
     proc = subprocess.Popen(
         cmd_args,
         stdout=subprocess.PIPE,
@@ -19,10 +19,46 @@ def call(dbg, cmd_args, error=True, simple=True, expRc=0):
         close_fds=True)
     stdout, stderr = proc.communicate()
     if error and proc.returncode != expRc:
-        log.error('{}: {} exitted with code {}: {}'.format(
-            dbg, " ".join(cmd_args), proc.returncode, stderr))
+        log.error('%s: %s exitted with code %s: %s',
+                  dbg, " ".join(cmd_args), proc.returncode, stderr)
         raise xapi.InternalError('{} exitted with non-zero code {}: {}'.format(
             " ".join(cmd_args), proc.returncode, stderr))
     if simple:
         return stdout
     return stdout, stderr, proc.returncode
+
+
+# [run_in_background dbg fn args] runs [fn args] in a daemon process and
+# returns without waiting for it. The daemon is detached from the caller's
+# session and standard streams, so that a plugin script can exit while the
+# work carries on. File descriptors are inherited, along with any flock()
+# locks held through them.
+
+
+def run_in_background(dbg, fn, *args):
+    import os
+    pid = os.fork()
+    if pid != 0:
+        # Reap the intermediate child, which exits straight away
+        os.waitpid(pid, 0)
+        return
+    status = 1
+    try:
+        os.setsid()
+        if os.fork() != 0:
+            os._exit(0)
+        from xapi.storage import lock
+        lock.after_fork()
+        log.after_fork()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        log.debug('%s: running %s in background process %d',
+                  dbg, fn.__name__, os.getpid())
+        fn(*args)
+        status = 0
+    except Exception:
+        log.error('%s: background %s failed', dbg, fn.__name__,
+                  exc_info=True)
+    finally:
+        os._exit(status)
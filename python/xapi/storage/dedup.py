@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+
+"""
+Shares identical blocks between the volume files of a file-based SR, such
+as the simple-file example, using the FIDEDUPERANGE ioctl of filesystems
+which support it (e.g. XFS with reflink, btrfs).
+
+The allocated, non-zero blocks of every volume are hashed by a pool of
+processes. Blocks with equal hashes are handed to the kernel, which
+compares their contents before sharing them, so a hash collision cannot
+corrupt data and the volumes may be in use.
+
+The hashes are kept in a .dedup directory in the SR. A volume whose file
+is unchanged since the last run is not read again, and only the blocks of
+new or changed volumes are deduplicated against the rest.
+
+usage: python -m xapi.storage.dedup [--processes N] SR_PATH
+"""
+
+import argparse
+import collections
+import ctypes
+import errno
+import fcntl
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from xapi.storage import layout, log
+from xapi.storage.lock import sr_locked
+from xapi.storage.sparsify import data_regions
+
+DEDUP_DIR = '.dedup'
+
+# The unit of deduplication. It must be a multiple of the filesystem block
+# size; smaller blocks find more duplicates but need a larger index.
+BLOCK_SIZE = 128 * 1024
+
+# Each worker process hashes this much of a volume at a time
+SEGMENT_SIZE = 256 * 1024 * 1024
+
+# Filesystems limit the length of a single dedupe request
+MAX_DEDUPE_LENGTH = 16 * 1024 * 1024
+
+# The most volume files kept open at once while sharing blocks
+MAX_OPEN_FILES = 64
+
+DIGEST_SIZE = hashlib.sha1().digest_size
+
+# The digest recorded for a block which is a hole or holds only zeros, and
+# so is never shared
+NO_DIGEST = b'\0' * DIGEST_SIZE
+
+_ZEROS = b'\0' * BLOCK_SIZE
+
+# From linux/fs.h
+FIDEDUPERANGE = 0xC0189436
+FILE_DEDUPE_RANGE_SAME = 0
+FILE_DEDUPE_RANGE_DIFFERS = 1
+
+
+class FileDedupeRangeInfo(ctypes.Structure):
+    """struct file_dedupe_range_info"""
+    _fields_ = [
+        ('dest_fd', ctypes.c_int64),
+        ('dest_offset', ctypes.c_uint64),
+        ('bytes_deduped', ctypes.c_uint64),
+        ('status', ctypes.c_int32),
+        ('reserved', ctypes.c_uint32),
+    ]
+
+
+class FileDedupeRange(ctypes.Structure):
+    """struct file_dedupe_range with a single destination"""
+    _fields_ = [
+        ('src_offset', ctypes.c_uint64),
+        ('src_length', ctypes.c_uint64),
+        ('dest_count', ctypes.c_uint16),
+        ('reserved1', ctypes.c_uint16),
+        ('reserved2', ctypes.c_uint32),
+        ('info', FileDedupeRangeInfo),
+    ]
+
+
+def dedupe_range(src_fd, src_offset, length, dest_fd, dest_offset):
+    """Shares [length] bytes of the file open as [dest_fd] at [dest_offset]
+    with the file open as [src_fd] at [src_offset] if the contents are the
+    same. Returns the number of bytes shared, which is 0 if the contents
+    differ. Raises IOError with EOPNOTSUPP or EINVAL if the filesystem does
+    not support it."""
+    request = FileDedupeRange(
+        src_offset=src_offset, src_length=length, dest_count=1,
+        info=FileDedupeRangeInfo(dest_fd=dest_fd, dest_offset=dest_offset))
+    fcntl.ioctl(src_fd, FIDEDUPERANGE, request, True)
+    if request.info.status < 0:
+        raise IOError(-request.info.status, os.strerror(-request.info.status))
+    if request.info.status == FILE_DEDUPE_RANGE_DIFFERS:
+        return 0
+    return request.info.bytes_deduped
+
+
+def hash_segment(args):
+    """Returns the digests of the BLOCK_SIZE blocks of the file at [path]
+    between [start] and [end], concatenated. Run in a worker process."""
+    path, start, end = args
+    count = (end - start + BLOCK_SIZE - 1) // BLOCK_SIZE
+    digests = [NO_DIGEST] * count
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        for data, hole in data_regions(fd, start, end):
+            first = (data - start) // BLOCK_SIZE
+            last = (hole - start + BLOCK_SIZE - 1) // BLOCK_SIZE
+            os.lseek(fd, start + first * BLOCK_SIZE, os.SEEK_SET)
+            for i in range(first, last):
+                block = os.read(fd, BLOCK_SIZE)
+                # A partial block at the end of the file is never shared
+                if len(block) == BLOCK_SIZE and block != _ZEROS:
+                    digests[i] = hashlib.sha1(block).digest()
+    finally:
+        os.close(fd)
+    return b''.join(digests)
+
+
+class Volume(object):
+    """A volume file in the SR and the digests of its blocks"""
+
+    def __init__(self, sr_path, key, path):
+        self.key = key
+        self.path = path
+        self.state_path = os.path.join(sr_path, DEDUP_DIR, key)
+        st = os.stat(self.path)
+        self.identity = [st.st_ino, st.st_size, st.st_mtime]
+        self.size = st.st_size
+        self.digests = None
+        self.changed = True
+
+    def load(self):
+        """Loads the digests saved by the last run, if the file has not
+        changed since"""
+        try:
+            with open(self.state_path + '.json') as f:
+                state = json.load(f)
+            if state['identity'] != self.identity or \
+                    state['block_size'] != BLOCK_SIZE:
+                return
+            with open(self.state_path, 'rb') as f:
+                self.digests = f.read()
+            self.changed = False
+        except (IOError, ValueError, KeyError):
+            pass
+
+    def save(self):
+        # The identity is saved after the file has been deduplicated, which
+        # changes its mtime
+        st = os.stat(self.path)
+        self.identity = [st.st_ino, st.st_size, st.st_mtime]
+        with open(self.state_path, 'wb') as f:
+            f.write(self.digests)
+        with open(self.state_path + '.json', 'w') as f:
+            json.dump({'identity': self.identity,
+                       'block_size': BLOCK_SIZE}, f)
+
+    def segments(self):
+        return [(self.path, start, min(start + SEGMENT_SIZE, self.size))
+                for start in range(0, self.size, SEGMENT_SIZE)]
+
+    def digest(self, block):
+        return self.digests[block * DIGEST_SIZE:(block + 1) * DIGEST_SIZE]
+
+    def blocks(self):
+        return len(self.digests) // DIGEST_SIZE
+
+
+def volume_files(sr_path):
+    """Returns (key, path) of the volume files of the SR, in key order"""
+    return sorted(layout.volumes(sr_path))
+
+
+def prune(dbg, sr_path, keys):
+    """Removes the saved digests of the volumes which are not in [keys],
+    i.e. which have been destroyed since they were saved"""
+    dedup_dir = os.path.join(sr_path, DEDUP_DIR)
+    for name in os.listdir(dedup_dir):
+        key = name[:-len('.json')] if name.endswith('.json') else name
+        if key in keys:
+            continue
+        try:
+            os.unlink(os.path.join(dedup_dir, name))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        log.debug('%s: removed %s of destroyed volume %s', dbg, name, key)
+
+
+class _OpenFiles(object):
+    """The volume files open for sharing blocks, of which only the
+    MAX_OPEN_FILES most recently used are kept open"""
+
+    def __init__(self):
+        self.fds = collections.OrderedDict()
+
+    def get(self, volume):
+        """Returns a descriptor of the file of [volume], or None if it has
+        been destroyed"""
+        fd = self.fds.pop(volume.path, None)
+        if fd is None:
+            try:
+                fd = os.open(volume.path, os.O_RDWR)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                return None
+            if len(self.fds) >= MAX_OPEN_FILES:
+                os.close(self.fds.popitem(last=False)[1])
+        self.fds[volume.path] = fd
+        return fd
+
+    def close(self):
+        while self.fds:
+            os.close(self.fds.popitem()[1])
+
+
+def dedup(dbg, sr_path, processes=None):
+    """Deduplicates the volumes of the SR at [sr_path]. Returns
+    (bytes hashed, bytes shared)."""
+    try:
+        os.mkdir(os.path.join(sr_path, DEDUP_DIR))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    volumes = []
+    for key, path in volume_files(sr_path):
+        try:
+            volume = Volume(sr_path, key, path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            log.debug('%s: skipping volume %s, destroyed since the listing',
+                      dbg, key)
+            continue
+        volume.load()
+        volumes.append(volume)
+    prune(dbg, sr_path, set(volume.key for volume in volumes))
+
+    # Hash the new and changed volumes
+    hashed = 0
+    pool = multiprocessing.Pool(processes)
+    try:
+        for volume in [v for v in volumes if v.changed]:
+            try:
+                volume.digests = b''.join(
+                    pool.map(hash_segment, volume.segments()))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                log.debug('%s: skipping volume %s, destroyed while it was '
+                          'hashed', dbg, volume.key)
+                volumes.remove(volume)
+                continue
+            hashed += volume.size
+    finally:
+        pool.close()
+        pool.join()
+    changed = [v for v in volumes if v.changed]
+    log.debug('%s: hashed %d of %d volumes (%d bytes)',
+              dbg, len(changed), len(volumes), hashed)
+
+    # The first occurrence of each digest in the unchanged volumes, then in
+    # the changed volumes, is the source its duplicates are shared with
+    index = {}
+    for volume in sorted(volumes, key=lambda v: v.changed):
+        for block in range(volume.blocks()):
+            digest = volume.digest(block)
+            if digest != NO_DIGEST and digest not in index:
+                index[digest] = (volume, block)
+
+    shared = 0
+    files = _OpenFiles()
+    try:
+        for volume in changed:
+            volume_shared = _share(files, volume, index)
+            if volume_shared is None:
+                log.debug('%s: skipping volume %s, destroyed while it was '
+                          'deduplicated', dbg, volume.key)
+                continue
+            shared += volume_shared
+    finally:
+        files.close()
+    return hashed, shared
+
+
+def _share(files, volume, index):
+    """Shares the blocks of [volume] with their duplicates in [index] and
+    saves its digests. Returns the bytes shared, or None if the volume has
+    been destroyed."""
+    shared = 0
+    for (source, src_block, dest_block, count) in _runs(volume, index):
+        # Look the destination up for each run, as opening sources may
+        # have closed it
+        dest_fd = files.get(volume)
+        if dest_fd is None:
+            return None
+        src_fd = files.get(source)
+        if src_fd is None:
+            # A destroyed source is shared with nothing more
+            continue
+        shared += _dedupe(src_fd, src_block, dest_fd, dest_block, count)
+    try:
+        volume.save()
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return None
+    return shared
+
+
+def _runs(volume, index):
+    """Yields (source, source block, block, count) for the runs of blocks
+    of [volume] which have a duplicate at consecutive blocks of [source].
+    Duplicates within [volume] are shared a block at a time, as the ranges
+    of a request must not overlap."""
+    run = None
+    for block in range(volume.blocks()):
+        source = index.get(volume.digest(block))
+        if source is None or source == (volume, block):
+            src = None
+        else:
+            src = source
+        if run is not None and src is not None and \
+                src[0] is run[0] and src[0] is not volume and \
+                src[1] == run[1] + run[3] and \
+                block == run[2] + run[3]:
+            run[3] += 1
+            continue
+        if run is not None:
+            yield tuple(run)
+            run = None
+        if src is not None:
+            run = [src[0], src[1], block, 1]
+    if run is not None:
+        yield tuple(run)
+
+
+def _dedupe(src_fd, src_block, dest_fd, dest_block, count):
+    shared = 0
+    offset = 0
+    length = count * BLOCK_SIZE
+    while offset < length:
+        step = min(MAX_DEDUPE_LENGTH, length - offset)
+        shared += dedupe_range(src_fd, src_block * BLOCK_SIZE + offset, step,
+                               dest_fd, dest_block * BLOCK_SIZE + offset)
+        offset += step
+    return shared
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Hashing processes (default: one per CPU)')
+    parser.add_argument('sr_path', help='The directory holding the SR')
+    args = parser.parse_args()
+
+    dbg = 'dedup'
+    before = os.statvfs(args.sr_path)
+    start = time.time()
+    # Hold the SR lock shared, so that the SR is not destroyed meanwhile
+    with sr_locked(dbg, args.sr_path):
+        try:
+            hashed, shared = dedup(dbg, args.sr_path, args.processes)
+        except IOError as e:
+            if e.errno in (errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY):
+                sys.exit('{}: the filesystem does not support '
+                         'FIDEDUPERANGE'.format(args.sr_path))
+            raise
+    after = os.statvfs(args.sr_path)
+    reclaimed = (after.f_bfree - before.f_bfree) * after.f_frsize
+    print('hashed %d bytes, shared %d bytes, reclaimed %d bytes in %.1fs' %
+          (hashed, shared, reclaimed, time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
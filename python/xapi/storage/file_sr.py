@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""
+Shared by the example SR plugins which keep their volumes as files in a
+directory of a mounted filesystem, such as simple-file and qcow2-file.
+
+As a simple "stateless" implementation, such an SR encodes all of its
+configuration into the URI returned by SR.attach. This is passed back into
+the volume interface APIs and the SR stat and ls operations.
+"""
+
+import os
+import urlparse
+
+# urllib pulls in socket, which most calls do not need, so it is imported
+# where it is used
+
+
+def sr_uri(configuration):
+    """Returns the URI of the SR with [configuration]"""
+    import urllib
+    return urlparse.urlunparse((
+        'file',
+        '',
+        configuration['path'],
+        '',
+        urllib.urlencode(configuration, True),
+        None))
+
+
+def configure(configuration, uuid, name, description):
+    """Adds the parameters of SR.create to its [configuration], and returns
+    it"""
+    # Add extra parameters back to the configuration as simple
+    # storage. Could also go into a database or data file in the
+    # SR storage
+    configuration['uuid'] = uuid
+    configuration['name'] = name
+    configuration['description'] = description
+    return configuration
+
+
+def stat(sr, health=None):
+    """Returns the result of SR.stat for the SR with URI [sr], with the
+    [health] given as a [state, reason] pair, or healthy"""
+    parsed_url = urlparse.urlparse(sr)
+    config = urlparse.parse_qs(parsed_url.query)
+
+    description = (config['description'][0]
+                   if 'description' in config
+                   else "")
+
+    # Read the free and total space in the path
+    statvfs = os.statvfs(parsed_url.path)
+    psize = statvfs.f_blocks * statvfs.f_frsize
+    fsize = statvfs.f_bfree * statvfs.f_frsize
+
+    return {
+        "sr": sr,
+        "name": config['name'][0],
+        "uuid": config['uuid'][0],
+        "description": description,
+        "free_space": fsize,
+        "total_space": psize,
+        "datasources": [],
+        "clustered": False,
+        "health": health or ['Healthy', '']}
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+"""
+Where the files of the volumes of a file-based SR, such as the
+simple-file example, are kept in the SR directory.
+
+In the flat layout the files of volume <key> are <key> and <key>.inf at
+the top of the SR. In the sharded layout they are in one of 256
+subdirectories named after the first two characters of the key,
+<k0k1>/<key>, so that with UUID keys a million volumes make a few
+thousand entries per directory. A second level would make listing the
+SR slower, as it would have up to 65536 directories to read
+(see benchmarks/layout_bench.py).
+
+An SR created by SR.create is sharded, which is recorded by LAYOUT_FILE.
+An older, flat SR is migrated online by
+
+  usage: python -m xapi.storage.layout SR_PATH
+
+which marks the SR sharded and then moves its volumes one at a time, so
+volumes are found at their sharded path first and at their flat path
+otherwise. A volume whose file is in use, e.g. attached by a datapath, is
+left where it is, as its URI names the file; running the migration again
+later moves it.
+"""
+
+import errno
+import fcntl
+import glob
+import os
+import sys
+import time
+
+from xapi.storage import log, loop
+from xapi.storage.lock import sr_locked
+
+LAYOUT_FILE = '.layout'
+
+SHARDED = 'sharded'
+
+# The files of a volume other than its data file, by suffix. The metadata
+# is moved last.
+VOLUME_SUFFIXES = ['.boot', '.inf']
+
+
+def is_sharded(sr_path):
+    return os.path.exists(os.path.join(sr_path, LAYOUT_FILE))
+
+
+def set_sharded(sr_path):
+    """Records that new volumes of the SR at [sr_path] are sharded"""
+    tmp_path = os.path.join(sr_path, LAYOUT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(SHARDED + '\n')
+    os.rename(tmp_path, os.path.join(sr_path, LAYOUT_FILE))
+
+
+def shard_path(sr_path, key):
+    return os.path.join(sr_path, key[0:2], key)
+
+
+def volume_path(sr_path, key):
+    """Returns the path of the data file of the volume [key] in the SR at
+    [sr_path], which may not exist"""
+    if is_sharded(sr_path):
+        path = shard_path(sr_path, key)
+        # Volume.destroy moves the data file before removing the metadata
+        if os.path.lexists(path) or os.path.lexists(path + '.inf'):
+            return path
+    # Flat, or not migrated yet
+    return os.path.join(sr_path, key)
+
+
+def new_volume_path(sr_path, key):
+    """Returns the path at which to create the data file of the new volume
+    [key] in the SR at [sr_path], creating its directory"""
+    if not is_sharded(sr_path):
+        return os.path.join(sr_path, key)
+    path = shard_path(sr_path, key)
+    try:
+        os.makedirs(os.path.dirname(path))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    return path
+
+
+def volumes(sr_path):
+    """Yields (key, data file path) for the volumes, that is the files with
+    metadata, of the SR at [sr_path]"""
+    patterns = [os.path.join(sr_path, '*.inf')]
+    if is_sharded(sr_path):
+        # The shard directories have no dot files, like .trash
+        patterns.append(os.path.join(sr_path, '??', '*.inf'))
+    for pattern in patterns:
+        for inf in glob.iglob(pattern):
+            path = inf[:-len('.inf')]
+            yield os.path.basename(path), path
+
+
+def _move(dbg, sr_path, key):
+    """Moves the files of the flat volume [key] to their sharded path.
+    Returns False if the volume is in use."""
+    path = os.path.join(sr_path, key)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        # Destroyed since the listing
+        return True
+    try:
+        # As for Volume.reclaim: the datapaths hold the flock shared while
+        # they open the file, and a loop device keeps it open
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except IOError:
+            return False
+        if loop.find(path):
+            return False
+        new_path = new_volume_path(sr_path, key)
+        os.rename(path, new_path)
+        for suffix in VOLUME_SUFFIXES:
+            try:
+                os.rename(path + suffix, new_path + suffix)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+    finally:
+        os.close(fd)
+    log.debug('%s: moved volume %s to %s', dbg, key, new_path)
+    return True
+
+
+def migrate(dbg, sr_path):
+    """Makes the SR at [sr_path] sharded and moves its flat volumes.
+    Returns (moved, left) counts of the volumes which were flat."""
+    with sr_locked(dbg, sr_path):
+        set_sharded(sr_path)
+    keys = [os.path.basename(inf)[:-len('.inf')]
+            for inf in glob.glob(os.path.join(sr_path, '*.inf'))]
+    moved = 0
+    left = 0
+    for key in keys:
+        # Exclusive, so that no operation or listing sees a volume half
+        # moved; taken per volume so that the SR stays usable
+        with sr_locked(dbg, sr_path, exclusive=True):
+            if _move(dbg, sr_path, key):
+                moved += 1
+            else:
+                log.info('%s: %s is in use, not moving it', dbg, key)
+                left += 1
+    return moved, left
+
+
+def main():
+    # Only the migration needs it, not the plugins which import this module
+    import argparse
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sr_path', help='The directory holding the SR')
+    args = parser.parse_args()
+
+    start = time.time()
+    moved, left = migrate('layout', args.sr_path)
+    print('moved %d volumes in %.1fs' % (moved, time.time() - start))
+    if left:
+        sys.exit('%d volumes are in use and were not moved; run again '
+                 'once they are detached' % left)
+
+
+if __name__ == '__main__':
+    main()
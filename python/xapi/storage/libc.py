@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+"""
+ctypes bindings for the libc calls which the os module does not provide
+under Python 2. The library is loaded on first use.
+"""
+
+import ctypes
+import os
+
+# Modes for fallocate, from linux/falloc.h
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+
+# Advice for posix_fadvise
+POSIX_FADV_WILLNEED = 3
+POSIX_FADV_DONTNEED = 4
+
+# lseek whence values for finding the allocated regions of a file, which
+# the os module only defines from Python 3.3
+SEEK_DATA = 3
+SEEK_HOLE = 4
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# From sys/inotify.h
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+PROT_READ = 0x1
+MAP_SHARED = 0x01
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+_libc = None
+
+
+def _lib():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL('libc.so.6', use_errno=True)
+        libc.fallocate64.argtypes = [
+            ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+        libc.fallocate64.restype = ctypes.c_int
+        libc.posix_fadvise64.argtypes = [
+            ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_int]
+        libc.posix_fadvise64.restype = ctypes.c_int
+        libc.mmap64.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+            ctypes.c_int, ctypes.c_int64]
+        libc.mmap64.restype = ctypes.c_void_p
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.munmap.restype = ctypes.c_int
+        libc.mincore.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_ubyte)]
+        libc.mincore.restype = ctypes.c_int
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+        _libc = libc
+    return _libc
+
+
+def _check(result):
+    if result != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def fallocate(fd, offset, length, mode=0):
+    """Allocates the blocks of the file open as [fd] between [offset] and
+    [offset] + [length], extending the file unless [mode] includes
+    FALLOC_FL_KEEP_SIZE. Raises OSError, with errno EOPNOTSUPP if the
+    filesystem does not support it."""
+    _check(_lib().fallocate64(fd, mode, offset, length))
+
+
+def fadvise(fd, offset, length, advice):
+    """Advises the kernel how the file open as [fd] will be accessed
+    between [offset] and [offset] + [length], or to the end of the file if
+    [length] is 0"""
+    # posix_fadvise returns the error rather than setting errno
+    result = _lib().posix_fadvise64(fd, offset, length, advice)
+    if result != 0:
+        raise OSError(result, os.strerror(result))
+
+
+def mincore(fd, offset, length):
+    """Returns a bytearray with a byte for each page of the file open as
+    [fd] between [offset], which must be a multiple of PAGE_SIZE, and
+    [offset] + [length]. The low bit of a byte is set if the page is in the
+    page cache."""
+    pages = (length + PAGE_SIZE - 1) // PAGE_SIZE
+    if pages == 0:
+        return bytearray()
+    lib = _lib()
+    address = lib.mmap64(None, length, PROT_READ, MAP_SHARED, fd, offset)
+    if address == MAP_FAILED:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    try:
+        vector = (ctypes.c_ubyte * pages)()
+        _check(lib.mincore(address, length, vector))
+        return bytearray(vector)
+    finally:
+        lib.munmap(address, length)
+
+
+def inotify_init(flags=0):
+    """Returns a new inotify file descriptor"""
+    fd = _lib().inotify_init1(flags)
+    if fd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return fd
+
+
+def inotify_add_watch(fd, path, mask):
+    """Watches [path] for the events in [mask] on the inotify file
+    descriptor [fd], and returns the watch descriptor"""
+    if not isinstance(path, bytes):
+        path = path.encode('utf-8')
+    wd = _lib().inotify_add_watch(fd, path, mask)
+    if wd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), path)
+    return wd
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""
+Shared and exclusive locks on an SR and exclusive locks on its volumes, so
+that independent operations on the same SR can run concurrently.
+
+The locks are fcntl byte-range locks on a single lock file in the SR:
+byte 0 is the SR lock, byte 1 guards the SR's change journal (see
+xapi.storage.changes) and each volume key hashes to one of VOLUME_SLOTS
+bytes after those. Two keys may share a byte, which only costs some
+unnecessary serialisation. fcntl locks belong to the process, so they
+exclude other processes but not other threads of the same process, and
+they are released if the process dies.
+
+A volume operation holds the SR lock shared and its volume lock
+exclusive; an operation on the whole SR holds the SR lock exclusive.
+"""
+
+import contextlib
+import fcntl
+import os
+import binascii
+import time
+
+import xapi
+from xapi.storage import log
+
+LOCK_FILE = '.lock'
+SR_OFFSET = 0
+JOURNAL_OFFSET = 1
+VOLUME_SLOTS = 1 << 20
+
+# Acquisitions which wait longer than this (in seconds) are logged as
+# warnings rather than debug records
+SLOW_WAIT = 1.0
+
+# When a timeout is given the lock is polled, backing off up to this
+# interval (in seconds)
+MAX_POLL_INTERVAL = 0.1
+
+# Closing any descriptor of a file drops all of the locks the process holds
+# on it, so each lock file is opened once and kept open
+_FDS = {}
+
+# (path, offset) -> [exclusive, count] for the locks held by this process.
+# A slot may be locked again while it is held, e.g. by two volumes whose
+# keys share a slot; it is only unlocked by the last release.
+_HELD = {}
+
+
+class LockTimeout(xapi.InternalError):
+
+    def __init__(self, name, timeout):
+        xapi.InternalError.__init__(
+            self, "Timed out after %ss waiting for lock on %s" %
+            (timeout, name))
+
+
+def _fd(path):
+    fd = _FDS.get(path)
+    if fd is None:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        _FDS[path] = fd
+    return fd
+
+
+def volume_offset(key):
+    """Returns the offset of the byte locked for the volume [key]"""
+    # The same CRC-32 as zlib's, without loading zlib
+    crc = binascii.crc32(key.encode('utf-8')) & 0xffffffff
+    return 2 + crc % VOLUME_SLOTS
+
+
+class Lock(object):
+    """The lock on byte [offset] of the lock file at [path]"""
+
+    def __init__(self, path, offset, name):
+        self.path = path
+        self.offset = offset
+        self.name = name
+
+    def acquire(self, dbg, exclusive=True, timeout=None):
+        """Acquires the lock, waiting at most [timeout] seconds if it is
+        given, otherwise for as long as it takes. Raises LockTimeout."""
+        held = _HELD.get((self.path, self.offset))
+        if held is not None and (held[0] or not exclusive):
+            held[1] += 1
+            return
+
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fd = _fd(self.path)
+        start = time.time()
+        if timeout is None:
+            fcntl.lockf(fd, mode, 1, self.offset, os.SEEK_SET)
+        else:
+            interval = 0.001
+            while True:
+                try:
+                    fcntl.lockf(fd, mode | fcntl.LOCK_NB, 1, self.offset,
+                                os.SEEK_SET)
+                    break
+                except IOError:
+                    if time.time() - start >= timeout:
+                        log.error('%s: timed out after %ss waiting for %s '
+                                  'lock on %s', dbg, timeout,
+                                  'exclusive' if exclusive else 'shared',
+                                  self.name)
+                        raise LockTimeout(self.name, timeout)
+                time.sleep(interval)
+                interval = min(interval * 2, MAX_POLL_INTERVAL)
+        waited = time.time() - start
+
+        if held is None:
+            _HELD[(self.path, self.offset)] = [exclusive, 1]
+        else:
+            # Upgraded from shared
+            held[0] = True
+            held[1] += 1
+        report = log.warning if waited >= SLOW_WAIT else log.debug
+        report('%s: acquired %s lock on %s after waiting %.3fs', dbg,
+               'exclusive' if exclusive else 'shared', self.name, waited)
+
+    def release(self):
+        held = _HELD[(self.path, self.offset)]
+        held[1] -= 1
+        if held[1] == 0:
+            del _HELD[(self.path, self.offset)]
+            fcntl.lockf(_fd(self.path), fcntl.LOCK_UN, 1, self.offset,
+                        os.SEEK_SET)
+
+    @contextlib.contextmanager
+    def held(self, dbg, exclusive=True, timeout=None):
+        self.acquire(dbg, exclusive, timeout)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+def after_fork():
+    """Called in a forked child, which does not inherit the locks its
+    parent held"""
+    _HELD.clear()
+
+
+def sr_lock(sr_path):
+    """Returns the lock on the SR stored in the directory [sr_path]"""
+    return Lock(os.path.join(sr_path, LOCK_FILE), SR_OFFSET,
+                'SR ' + sr_path)
+
+
+def journal_lock(sr_path):
+    """Returns the lock on the change journal of the SR at [sr_path]"""
+    return Lock(os.path.join(sr_path, LOCK_FILE), JOURNAL_OFFSET,
+                'change journal of ' + sr_path)
+
+
+def volume_lock(sr_path, key):
+    """Returns the lock on the volume [key] in the SR at [sr_path]"""
+    return Lock(os.path.join(sr_path, LOCK_FILE), volume_offset(key),
+                'volume %s in %s' % (key, sr_path))
+
+
+@contextlib.contextmanager
+def sr_locked(dbg, sr_path, exclusive=False, timeout=None):
+    """Holds the SR lock for the duration of a with statement: shared by
+    default, for operations on individual volumes, or exclusive"""
+    with sr_lock(sr_path).held(dbg, exclusive, timeout):
+        yield
+
+
+@contextlib.contextmanager
+def volume_locked(dbg, sr_path, key, timeout=None):
+    """Holds the SR lock shared and the lock on volume [key] exclusive for
+    the duration of a with statement"""
+    with sr_lock(sr_path).held(dbg, False, timeout):
+        with volume_lock(sr_path, key).held(dbg, True, timeout):
+            yield
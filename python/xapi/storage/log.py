@@ -1,45 +1,279 @@
+import atexit
+import collections
 import logging
-import logging.handlers
+import os
 import sys
 import xapi
 
 
-LOG_LEVEL = logging.DEBUG
+def _level_from_env(name, default):
+    level = logging.getLevelName(os.environ.get(name, '').upper())
+    if isinstance(level, int):
+        return level
+    return default
+
+
+def _int_from_env(name, default):
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _flag_from_env(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+# The level and logging mode can be set per deployment through the
+# environment of the storage script daemon, e.g. SMAPIV3_LOG_LEVEL=INFO
+LOG_LEVEL = _level_from_env('SMAPIV3_LOG_LEVEL', logging.DEBUG)
 # LOG to local2 which is currently mapped to /var/log/SMlog for SM
-LOG_SYSLOG_FACILITY = logging.handlers.SysLogHandler.LOG_LOCAL2
+LOG_SYSLOG_FACILITY = 'local2'
 LOG_TO_STDERR = False
+# Queue records to a background thread which performs the syslog writes,
+# so back-pressure on /dev/log does not add latency to storage calls
+LOG_ASYNC = _flag_from_env('SMAPIV3_LOG_ASYNC', False)
+# When LOG_LEVEL filters out debug and info calls, keep this many of the
+# most recent ones in memory and only write them out if the call fails
+LOG_RECORDER_SIZE = _int_from_env('SMAPIV3_LOG_RECORDER', 1000)
 
 
-def configure_logging():
-    _LOGGER.setLevel(LOG_LEVEL)
+class _SysLogHandler(logging.Handler):
+    """Connects to syslog when the first record is emitted rather than when
+    the handler is created, so that importing this module neither opens a
+    socket nor loads logging.handlers"""
+
+    def __init__(self, address, facility):
+        logging.Handler.__init__(self)
+        self.address = address
+        self.facility = facility
+        self._handler = None
+
+    def emit(self, record):
+        try:
+            if self._handler is None:
+                import logging.handlers
+                handler = logging.handlers.SysLogHandler(
+                    address=self.address, facility=self.facility)
+                handler.setFormatter(self.formatter)
+                self._handler = handler
+            self._handler.emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+        logging.Handler.close(self)
+
+
+class _QueueHandler(logging.Handler):
+    """Hands records over to a _QueueListener rather than emitting them"""
+
+    def __init__(self, record_queue):
+        logging.Handler.__init__(self)
+        self.queue = record_queue
+
+    def prepare(self, record):
+        # Merge the arguments and any traceback into the message now: the
+        # arguments may be mutated by the caller before the listener runs
+        message = self.format(record)
+        record.msg = message
+        record.message = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+class _QueueListener(object):
+    """Writes queued records to the real handlers on a background thread"""
+
+    _sentinel = None
+
+    def __init__(self, record_queue, handlers):
+        self.queue = record_queue
+        self.handlers = handlers
+        self._thread = None
+
+    def start(self):
+        import threading
+        self._thread = threading.Thread(target=self._monitor,
+                                        name='log-listener')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _monitor(self):
+        while True:
+            record = self.queue.get()
+            if record is self._sentinel:
+                break
+            # Records are filtered by level before they are queued
+            for handler in self.handlers:
+                handler.handle(record)
+
+    def stop(self):
+        """Flush any outstanding records and stop the background thread"""
+        if self._thread is not None:
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
 
-    formatter = logging.Formatter(
-        'SMAPIv3: [%(process)d] - %(levelname)s - %(message)s')
+class _FlightRecorder(object):
+    """Keeps the most recent debug and info calls below LOG_LEVEL in a ring
+    buffer, as (level, message, args, exc_info) tuples. Recording neither
+    makes a LogRecord nor formats the message, so it costs a small
+    fraction of logging the call; records are only made if the buffer is
+    ever written out."""
+
+    def __init__(self, capacity):
+        self.entries = collections.deque(maxlen=capacity)
+
+    def record(self, level, message, args, exc_info):
+        if exc_info and not isinstance(exc_info, tuple):
+            exc_info = sys.exc_info()
+        self.entries.append((level, message, args, exc_info or None))
+
+    def records(self):
+        return [_LOGGER.makeRecord(_LOGGER.name, level, '(recorded)', 0,
+                                   message, args, exc_info)
+                for level, message, args, exc_info in list(self.entries)]
+
+    def drain(self):
+        records = self.records()
+        self.entries.clear()
+        return records
+
+
+class _RecorderHandler(logging.Handler):
+    """Records in the flight recorder the records below LOG_LEVEL made by
+    code which logs through the logging module directly, such as the
+    generated dispatchers, rather than through this module"""
+
+    def emit(self, record):
+        if record.levelno < LOG_LEVEL and _RECORDER is not None:
+            self.acquire()
+            try:
+                _RECORDER.entries.append((record.levelno, record.msg,
+                                          record.args, record.exc_info))
+            finally:
+                self.release()
+
+
+def configure_logging():
+    global _LISTENER, _RECORDER
 
     handlers = []
 
     # Log to syslog
-    handlers.append(logging.handlers.SysLogHandler(
-        address='/dev/log',
-        facility=LOG_SYSLOG_FACILITY))
+    handlers.append(_SysLogHandler('/dev/log', LOG_SYSLOG_FACILITY))
 
     if LOG_TO_STDERR:
         # Write to stderr
         handlers.append(logging.StreamHandler(sys.stderr))
 
-    # Configure and add handlers
+    # Configure handlers
     for handler in handlers:
         handler.setLevel(LOG_LEVEL)
-        handler.setFormatter(formatter)
+        handler.setFormatter(_FORMATTER)
+
+    if LOG_ASYNC:
+        try:
+            import Queue as queue
+        except ImportError:
+            import queue
+        record_queue = queue.Queue()
+        _LISTENER = _QueueListener(record_queue, handlers)
+        _LISTENER.start()
+        atexit.register(_LISTENER.stop)
+        queue_handler = _QueueHandler(record_queue)
+        queue_handler.setLevel(LOG_LEVEL)
+        handlers = [queue_handler]
+
+    for handler in handlers:
+        _HANDLERS.append(handler)
         _LOGGER.addHandler(handler)
 
+    if LOG_RECORDER_SIZE > 0 and LOG_LEVEL > logging.DEBUG:
+        # debug and info record the calls which LOG_LEVEL filters out
+        # without making a LogRecord. Calls made through the logging
+        # module directly do make one, which the handlers above filter out
+        # and the recorder handler records.
+        _RECORDER = _FlightRecorder(LOG_RECORDER_SIZE)
+        _LOGGER.addHandler(_RecorderHandler(logging.DEBUG))
+        _LOGGER.setLevel(logging.DEBUG)
+    else:
+        _LOGGER.setLevel(LOG_LEVEL)
+
+
+def after_fork():
+    """Called in a forked child, in which the thread writing queued records
+    does not run. The queue may have been locked by another thread at the
+    fork, and the child exits without running atexit, so records are
+    written directly to the handlers from then on."""
+    global _LISTENER
+    if _LISTENER is None:
+        return
+    handlers = _LISTENER.handlers
+    _LISTENER = None
+    for handler in _HANDLERS:
+        _LOGGER.removeHandler(handler)
+    del _HANDLERS[:]
+    for handler in handlers:
+        # The listener thread may have been holding its lock
+        handler.createLock()
+        _HANDLERS.append(handler)
+        _LOGGER.addHandler(handler)
+
+
+def flush_flight_recorder():
+    """Writes out, and forgets, the debug records kept by the flight
+    recorder. This is called when a call fails so that the log contains
+    the full debug context of the failure."""
+    if _RECORDER is None:
+        return
+    records = _RECORDER.drain()
+    if not records:
+        return
+    warning("Flight recorder: replaying %d earlier debug records",
+            len(records))
+    for record in records:
+        # Handler.handle bypasses the level of the handler
+        for handler in _HANDLERS:
+            handler.handle(record)
+    warning("Flight recorder: end of replay")
+
+
+def is_debug_enabled():
+    """Returns True if debug records would be emitted, i.e. LOG_LEVEL is
+    DEBUG. Callers can use this to skip building expensive debug output
+    altogether, which the flight recorder then does not hold either."""
+    return LOG_LEVEL <= logging.DEBUG
+
 
 def debug(message, *args, **kwargs):
-    _LOGGER.debug(message, *args, **kwargs)
+    if LOG_LEVEL <= logging.DEBUG:
+        _LOGGER.debug(message, *args, **kwargs)
+    elif _RECORDER is not None:
+        _RECORDER.record(logging.DEBUG, message, args,
+                         kwargs.get('exc_info'))
 
 
 def info(message, *args, **kwargs):
-    _LOGGER.info(message, *args, **kwargs)
+    if LOG_LEVEL <= logging.INFO:
+        _LOGGER.info(message, *args, **kwargs)
+    elif _RECORDER is not None:
+        _RECORDER.record(logging.INFO, message, args, kwargs.get('exc_info'))
 
 
 def warning(message, *args, **kwargs):
@@ -55,12 +289,13 @@ def critical(message, *args, **kwargs):
 
 
 def log_call_argv():
-    info("called as: %s" % (sys.argv))
+    info("called as: %s", sys.argv)
 
 
 def handle_unhandled_exceptions(exception_type, exception_value,
                                 exception_traceback):
     if not issubclass(exception_type, KeyboardInterrupt):
+        flush_flight_recorder()
         if issubclass(exception_type, xapi.XenAPIException):
             info("Returned exception to XAPI", exc_info=(exception_type,
                                                          exception_value,
@@ -73,5 +308,10 @@ def handle_unhandled_exceptions(exception_type, exception_value,
 
 
 _LOGGER = logging.getLogger()
+_FORMATTER = logging.Formatter(
+    'SMAPIv3: [%(process)d] - %(levelname)s - %(message)s')
+_HANDLERS = []
+_LISTENER = None
+_RECORDER = None
 configure_logging()
 sys.excepthook = handle_unhandled_exceptions
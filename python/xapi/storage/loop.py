@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+"""
+Attaches loop devices to files, finds the loop devices backed by a file
+and updates their size in place, so that a file can be grown while it is
+attached. Devices are attached with ioctls rather than by running
+losetup, so attaching several files costs no more processes than one.
+"""
+
+import ctypes
+import errno
+import fcntl
+import glob
+import os
+
+from xapi.storage import log
+
+# From linux/loop.h
+LOOP_SET_FD = 0x4C00
+LOOP_CLR_FD = 0x4C01
+LOOP_SET_STATUS64 = 0x4C04
+LOOP_GET_STATUS64 = 0x4C05
+LOOP_SET_CAPACITY = 0x4C07
+LOOP_CTL_GET_FREE = 0x4C82
+LO_NAME_SIZE = 64
+
+
+class LoopInfo64(ctypes.Structure):
+    """struct loop_info64"""
+    _fields_ = [
+        ('lo_device', ctypes.c_uint64),
+        ('lo_inode', ctypes.c_uint64),
+        ('lo_rdevice', ctypes.c_uint64),
+        ('lo_offset', ctypes.c_uint64),
+        ('lo_sizelimit', ctypes.c_uint64),
+        ('lo_number', ctypes.c_uint32),
+        ('lo_encrypt_type', ctypes.c_uint32),
+        ('lo_encrypt_key_size', ctypes.c_uint32),
+        ('lo_flags', ctypes.c_uint32),
+        ('lo_file_name', ctypes.c_uint8 * 64),
+        ('lo_crypt_name', ctypes.c_uint8 * 64),
+        ('lo_encrypt_key', ctypes.c_uint8 * 32),
+        ('lo_init', ctypes.c_uint64 * 2),
+    ]
+
+
+def backing_files():
+    """Returns {backing file path: sorted loop device paths} for all the
+    attached loop devices, from a single scan of sysfs"""
+    devices = {}
+    for backing in glob.glob('/sys/block/loop*/loop/backing_file'):
+        try:
+            with open(backing) as f:
+                backing_file = f.read().strip()
+        except IOError:
+            # Detached since the glob
+            continue
+        name = backing.split(os.sep)[3]
+        devices.setdefault(backing_file, []).append(os.path.join('/dev', name))
+    for paths in devices.values():
+        paths.sort()
+    return devices
+
+
+def find(path):
+    """Returns the sorted paths of the loop devices backed by the file at
+    [path]"""
+    return backing_files().get(os.path.realpath(path), [])
+
+
+def attach(dbg, path, size_limit=None):
+    """Attaches a free loop device to the file at [path], limited to
+    [size_limit] bytes if given, and returns the path of the device"""
+    path = os.path.realpath(path)
+    file_fd = os.open(path, os.O_RDWR)
+    try:
+        control_fd = os.open('/dev/loop-control', os.O_RDWR)
+        try:
+            while True:
+                device = '/dev/loop{}'.format(
+                    fcntl.ioctl(control_fd, LOOP_CTL_GET_FREE))
+                fd = os.open(device, os.O_RDWR)
+                try:
+                    try:
+                        fcntl.ioctl(fd, LOOP_SET_FD, file_fd)
+                    except IOError as e:
+                        if e.errno != errno.EBUSY:
+                            raise
+                        # Taken by another process since it was found
+                        continue
+                    info = LoopInfo64()
+                    name = path[:LO_NAME_SIZE - 1]
+                    ctypes.memmove(info.lo_file_name, name, len(name))
+                    info.lo_sizelimit = size_limit or 0
+                    try:
+                        fcntl.ioctl(fd, LOOP_SET_STATUS64, info)
+                    except IOError:
+                        fcntl.ioctl(fd, LOOP_CLR_FD, 0)
+                        raise
+                finally:
+                    os.close(fd)
+                log.debug('%s: attached %s to %s, size limit %s',
+                          dbg, device, path, size_limit)
+                return device
+        finally:
+            os.close(control_fd)
+    finally:
+        os.close(file_fd)
+
+
+def set_capacity(dbg, device, size_limit=None):
+    """Makes the loop [device] pick up the current size of its backing file,
+    limited to [size_limit] bytes if given"""
+    fd = os.open(device, os.O_RDONLY)
+    try:
+        if size_limit is not None:
+            info = LoopInfo64()
+            fcntl.ioctl(fd, LOOP_GET_STATUS64, info, True)
+            info.lo_sizelimit = size_limit
+            fcntl.ioctl(fd, LOOP_SET_STATUS64, info)
+        fcntl.ioctl(fd, LOOP_SET_CAPACITY, 0)
+    finally:
+        os.close(fd)
+    log.debug('%s: refreshed capacity of %s, size limit %s',
+              dbg, device, size_limit)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+"""
+An in-memory cache of the metadata (.inf) files of the volumes of a
+file-based SR, such as the simple-file example, for processes which
+serve many calls, e.g. a daemon or a test harness importing the plugin.
+
+The cache watches the SR directory, and its shard directories (see
+xapi.storage.layout), with inotify. An event naming a metadata file
+marks the volume's entry stale, or removes it, and a stale entry is read
+again when it is next used. Every lookup first reads all the events
+queued, and the kernel queues an event before the call which caused it
+returns, so a lookup sees every change completed before it started, by
+any process on this host. If the event queue overflows, every entry is
+marked stale and the directories are scanned again.
+
+inotify does not report changes made by other hosts to a filesystem
+such as NFS, so the cache must not be used for an SR which other hosts
+write to.
+
+The cache is an opt-in experiment, off unless XAPI_STORAGE_METADATA_CACHE
+is set to 1 in the environment or enable() is called. xapi runs a plugin
+in a new process for every call, which would only pay for setting it up,
+and no process in this repository serves many calls yet.
+"""
+
+import errno
+import os
+import struct
+
+from xapi.storage import log
+from xapi.storage.libc import IN_CLOEXEC, IN_CLOSE_WRITE, IN_CREATE, \
+    IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_ISDIR, IN_MOVED_FROM, \
+    IN_MOVED_TO, IN_NONBLOCK, IN_ONLYDIR, IN_Q_OVERFLOW, inotify_add_watch, \
+    inotify_init
+
+ENABLED = os.environ.get('XAPI_STORAGE_METADATA_CACHE') == '1'
+
+# The events on an SR directory which change its volumes' metadata
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+
+# struct inotify_event, followed by a name of len bytes
+EVENT = struct.Struct('iIII')
+
+READ_SIZE = 64 * 1024
+
+INF_SUFFIX = '.inf'
+
+# sr_path -> MetadataCache
+_CACHES = {}
+
+
+def enable():
+    """Turns on caching in this process"""
+    global ENABLED
+    ENABLED = True
+
+
+def for_sr(dbg, sr_path, load):
+    """Returns the cache of the SR at [sr_path], whose entries are read by
+    load(data file path), or None if caching is off"""
+    if not ENABLED:
+        return None
+    cache = _CACHES.get(sr_path)
+    if cache is None:
+        cache = MetadataCache(dbg, sr_path, load)
+        _CACHES[sr_path] = cache
+    return cache
+
+
+def forget(sr_path):
+    """Drops the cache of the SR at [sr_path], e.g. when it is detached"""
+    cache = _CACHES.pop(sr_path, None)
+    if cache is not None:
+        cache.close()
+
+
+class MetadataCache(object):
+    """The metadata of the volumes of the SR at [sr_path], read by
+    load(data file path)"""
+
+    def __init__(self, dbg, sr_path, load):
+        self.sr_path = sr_path
+        self.load = load
+        # key -> [data file path, metadata or None if stale]
+        self.entries = {}
+        # watch descriptor -> directory
+        self.watches = {}
+        self.fd = inotify_init(IN_NONBLOCK | IN_CLOEXEC)
+        try:
+            self._rescan(dbg)
+        except:
+            self.close()
+            raise
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _watch(self, directory):
+        wd = inotify_add_watch(self.fd, directory, WATCH_MASK)
+        self.watches[wd] = directory
+
+    def _scan(self, directory):
+        """Adds entries for the metadata files in [directory]"""
+        try:
+            names = os.listdir(directory)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return
+        for name in names:
+            if name.endswith(INF_SUFFIX):
+                # Replaces any entry for the volume, which has been moved
+                # here from the path the entry has if there is one
+                key = name[:-len(INF_SUFFIX)]
+                self.entries[key] = [os.path.join(directory, key), None]
+
+    def _rescan(self, dbg):
+        """Watches and scans every directory of the SR. Watches are added
+        before scanning, so that no change is missed."""
+        self.entries = {}
+        self._watch(self.sr_path)
+        self._scan(self.sr_path)
+        for name in os.listdir(self.sr_path):
+            if self._is_shard(name):
+                self._add_shard(os.path.join(self.sr_path, name))
+        log.debug('%s: scanned the metadata of %d volumes in %s',
+                  dbg, len(self.entries), self.sr_path)
+
+    def _is_shard(self, name):
+        return len(name) == 2 and not name.startswith('.') and \
+            os.path.isdir(os.path.join(self.sr_path, name))
+
+    def _add_shard(self, directory):
+        try:
+            self._watch(directory)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return
+        self._scan(directory)
+
+    def sync(self, dbg):
+        """Applies the changes queued since the last call"""
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except OSError as e:
+                if e.errno != errno.EAGAIN:
+                    raise
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF):
+                    overflowed = True
+                elif not mask & IN_IGNORED:
+                    self._apply(wd, mask, name.decode('utf-8'))
+        if overflowed:
+            log.info('%s: lost track of the metadata changes in %s, '
+                     'rescanning', dbg, self.sr_path)
+            self.close()
+            self.watches = {}
+            self.fd = inotify_init(IN_NONBLOCK | IN_CLOEXEC)
+            self._rescan(dbg)
+
+    def _apply(self, wd, mask, name):
+        directory = self.watches.get(wd)
+        if directory is None:
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and \
+                    directory == self.sr_path and self._is_shard(name):
+                self._add_shard(os.path.join(directory, name))
+            return
+        if not name.endswith(INF_SUFFIX):
+            return
+        key = name[:-len(INF_SUFFIX)]
+        path = os.path.join(directory, key)
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            entry = self.entries.get(key)
+            # The entry may already be at its new path, when a volume is
+            # moved between directories
+            if entry is not None and entry[0] == path:
+                del self.entries[key]
+        elif mask & (IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO):
+            self.entries[key] = [path, None]
+
+    def volumes(self, dbg):
+        """Returns (key, data file path) for the volumes of the SR"""
+        self.sync(dbg)
+        return [(key, entry[0]) for key, entry in self.entries.items()]
+
+    def get(self, dbg, key):
+        """Returns (data file path, metadata) of the volume [key]. The
+        metadata must not be modified. Raises IOError with ENOENT if there
+        is no such volume."""
+        self.sync(dbg)
+        entry = self.entries.get(key)
+        if entry is None:
+            raise IOError(errno.ENOENT, 'no metadata for volume', key)
+        if entry[1] is None:
+            try:
+                entry[1] = self.load(entry[0])
+            except IOError as e:
+                if e.errno == errno.ENOENT:
+                    # Removed since the event was read
+                    self.entries.pop(key, None)
+                raise
+        return entry[0], entry[1]
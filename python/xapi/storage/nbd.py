@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+
+"""
+A user-space NBD server exporting a qcow2 image (see xapi.storage.qcow2)
+on a unix socket, so that qemu or nbd-client can use the disk. It can
+also export another kind of image with the same size, read, write, flush
+and close members, such as a cached file (see xapi.storage.readcache).
+
+The server is a single process handling its clients one request at a
+time. It also listens on a control socket, on which the volume plugin
+sends one-line commands between requests:
+
+  suspend   flush and close the image, and stop reading requests until
+            resumed, so that the image files can be renamed or replaced
+  resume    reopen the image and carry on
+  coalesce  copy into the image the clusters of its backing image which
+            it does not have, a few at a time between requests, then
+            make the backing image's own backing image its backing image
+            (qcow2 images only)
+  stop      flush the image and exit
+  ping      do nothing, to check that the server is running
+
+Each command is answered with a line "ok" or "error <message>" once it
+has completed.
+"""
+
+import errno
+import os
+import select
+import socket
+import struct
+import time
+
+import xapi
+from xapi.storage import log
+from xapi.storage.common import run_in_background
+from xapi.storage.lock import Lock
+from xapi.storage.qcow2 import Image, Qcow2Error
+
+RUN_DIR = os.environ.get('XAPI_STORAGE_NBD_DIR',
+                         '/var/run/nonpersistent/xapi-storage/nbd')
+
+# How long start waits for a new server to be ready, in seconds
+START_TIMEOUT = 10.0
+
+# The clusters copied by coalesce between requests
+COALESCE_STEP = 16
+
+# Handshake, from the NBD protocol specification
+NBDMAGIC = b'NBDMAGIC'
+IHAVEOPT = 0x49484156454F5054
+REPLY_MAGIC = 0x3e889045565a9
+FLAG_FIXED_NEWSTYLE = 1 << 0
+FLAG_NO_ZEROES = 1 << 1
+OPT_EXPORT_NAME = 1
+OPT_ABORT = 2
+OPT_INFO = 6
+OPT_GO = 7
+REP_ACK = 1
+REP_INFO = 3
+REP_ERR_UNSUP = (1 << 31) + 1
+INFO_EXPORT = 0
+
+# Transmission
+FLAG_HAS_FLAGS = 1 << 0
+FLAG_READ_ONLY = 1 << 1
+FLAG_SEND_FLUSH = 1 << 2
+FLAG_SEND_TRIM = 1 << 5
+REQUEST = struct.Struct('>IHHQQI')
+REQUEST_MAGIC = 0x25609513
+REPLY = struct.Struct('>IIQ')
+SIMPLE_REPLY_MAGIC = 0x67446698
+CMD_READ = 0
+CMD_WRITE = 1
+CMD_DISC = 2
+CMD_FLUSH = 3
+CMD_TRIM = 4
+
+# The errors a reply may carry. Their values are fixed by the protocol,
+# whatever the host's errno values are.
+EPERM = 1
+EIO = 5
+ENOMEM = 12
+EINVAL = 22
+ENOSPC = 28
+
+# The protocol error reported for each error of the image; any other is
+# reported as EIO
+ERRORS = {
+    errno.EPERM: EPERM,
+    errno.EACCES: EPERM,
+    errno.EROFS: EPERM,
+    errno.ENOMEM: ENOMEM,
+    errno.EINVAL: EINVAL,
+    errno.ENOSPC: ENOSPC,
+    errno.EDQUOT: ENOSPC,
+    errno.EFBIG: ENOSPC,
+}
+
+HANDSHAKE_TIMEOUT = 10
+
+
+def socket_path(image_path):
+    """Returns the path of the NBD socket of the server for the image at
+    [image_path]"""
+    return os.path.join(RUN_DIR, os.path.basename(image_path) + '.sock')
+
+
+def control_path(image_path):
+    return os.path.join(RUN_DIR, os.path.basename(image_path) + '.ctl')
+
+
+def lock_path(image_path):
+    return os.path.join(RUN_DIR, os.path.basename(image_path) + '.lock')
+
+
+def uri(image_path):
+    """Returns the NBD URI of the export of the image at [image_path]"""
+    return 'nbd:unix:{}:exportname={}'.format(
+        socket_path(image_path), os.path.basename(image_path))
+
+
+def control(dbg, image_path, command):
+    """Sends [command] to the server for the image at [image_path] and
+    waits for it to complete. Returns False if there is no server."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(control_path(image_path))
+        except socket.error as e:
+            if e.errno in (errno.ENOENT, errno.ECONNREFUSED):
+                return False
+            raise
+        log.debug('%s: sending %s to the NBD server for %s',
+                  dbg, command, image_path)
+        sock.sendall(command.encode('ascii') + b'\n')
+        reply = sock.makefile('rb').readline().decode('ascii').strip()
+    finally:
+        sock.close()
+    if reply != 'ok':
+        raise IOError(errno.EIO, 'NBD server for {}: {}: {}'.format(
+            image_path, command, reply or 'no reply'))
+    return True
+
+
+def _recv_exact(sock, length):
+    chunks = []
+    while length > 0:
+        chunk = sock.recv(min(length, 1024 * 1024))
+        if not chunk:
+            raise EOFError()
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b''.join(chunks)
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def _listen(path):
+    try:
+        os.unlink(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(8)
+    return sock
+
+
+class Server(object):
+    """Serves the image at [path], opened by
+    open_image(path, read_only=...), until it is sent stop"""
+
+    def __init__(self, dbg, path, read_only=False, open_image=Image):
+        self.dbg = dbg
+        self.path = path
+        self.read_only = read_only
+        self.open_image = open_image
+        self.image = None
+        self.clients = []
+        self.coalescing = None
+        self.running = True
+
+    def _flags(self):
+        flags = FLAG_HAS_FLAGS | FLAG_SEND_FLUSH | FLAG_SEND_TRIM
+        if self.read_only:
+            flags |= FLAG_READ_ONLY
+        return flags
+
+    def _option_reply(self, sock, option, reply, data=b''):
+        sock.sendall(struct.pack('>QIII', REPLY_MAGIC, option, reply,
+                                 len(data)) + data)
+
+    def handshake(self, sock):
+        """Negotiates an export with a new client. Returns True if the
+        client goes on to transmission."""
+        sock.settimeout(HANDSHAKE_TIMEOUT)
+        sock.sendall(NBDMAGIC + struct.pack(
+            '>QH', IHAVEOPT, FLAG_FIXED_NEWSTYLE | FLAG_NO_ZEROES))
+        client_flags, = struct.unpack('>I', _recv_exact(sock, 4))
+        while True:
+            magic, option, length = struct.unpack('>QII',
+                                                  _recv_exact(sock, 16))
+            if magic != IHAVEOPT:
+                return False
+            _recv_exact(sock, length)
+            if option == OPT_EXPORT_NAME:
+                reply = struct.pack('>QH', self.image.size, self._flags())
+                if not client_flags & FLAG_NO_ZEROES:
+                    reply += b'\0' * 124
+                sock.sendall(reply)
+                break
+            elif option in (OPT_INFO, OPT_GO):
+                self._option_reply(
+                    sock, option, REP_INFO,
+                    struct.pack('>HQH', INFO_EXPORT, self.image.size,
+                                self._flags()))
+                self._option_reply(sock, option, REP_ACK)
+                if option == OPT_GO:
+                    break
+            elif option == OPT_ABORT:
+                self._option_reply(sock, option, REP_ACK)
+                return False
+            else:
+                self._option_reply(sock, option, REP_ERR_UNSUP)
+        sock.settimeout(None)
+        return True
+
+    def request(self, sock):
+        """Handles one request from a client. Returns False when the client
+        has disconnected."""
+        magic, _, command, handle, offset, length = REQUEST.unpack(
+            _recv_exact(sock, REQUEST.size))
+        if magic != REQUEST_MAGIC:
+            return False
+        error = 0
+        data = b''
+        if command == CMD_WRITE:
+            payload = _recv_exact(sock, length)
+        in_bounds = offset + length <= self.image.size
+        try:
+            if command == CMD_READ:
+                if in_bounds:
+                    data = self.image.read(offset, length)
+                else:
+                    error = EINVAL
+            elif command in (CMD_WRITE, CMD_TRIM) and self.read_only:
+                error = EPERM
+            elif command == CMD_WRITE:
+                if in_bounds:
+                    self.image.write(offset, payload)
+                else:
+                    error = ENOSPC
+            elif command == CMD_TRIM:
+                # Only a hint, which the images do not use
+                if not in_bounds:
+                    error = EINVAL
+            elif command == CMD_FLUSH:
+                self.image.flush()
+            elif command == CMD_DISC:
+                self.image.flush()
+                return False
+            else:
+                error = EINVAL
+        except (IOError, OSError, Qcow2Error, MemoryError) as e:
+            log.error('%s: NBD request %d at %d for %s failed',
+                      self.dbg, command, offset, self.path, exc_info=True)
+            error = ERRORS.get(getattr(e, 'errno', None),
+                               ENOMEM if isinstance(e, MemoryError) else EIO)
+        sock.sendall(REPLY.pack(SIMPLE_REPLY_MAGIC, error, handle) +
+                     (b'' if error else data))
+        return True
+
+    def command(self, conn):
+        """Handles a command on the control socket"""
+        line = conn.makefile('rb').readline().decode('ascii').strip()
+        log.debug('%s: NBD server for %s received %s',
+                  self.dbg, self.path, line)
+        try:
+            if line == 'suspend':
+                if self.image is not None:
+                    self.image.flush()
+                    self.image.close()
+                    self.image = None
+            elif line == 'resume':
+                if self.image is None:
+                    self.image = self.open_image(self.path,
+                                                 read_only=self.read_only)
+            elif line == 'coalesce':
+                if getattr(self.image, 'backing', None) is None:
+                    raise IOError(errno.EINVAL, 'nothing to coalesce')
+                if self.read_only:
+                    raise IOError(errno.EROFS, 'image is read-only')
+                # Images further down the chain may have been coalesced
+                # since the chain was opened
+                self.image.flush()
+                self.image.close()
+                self.image = self.open_image(self.path, read_only=False)
+                # Replied to when done
+                self.coalescing = (conn, 0)
+                return
+            elif line == 'stop':
+                self.running = False
+            elif line == 'ping':
+                pass
+            else:
+                raise IOError(errno.EINVAL, 'unknown command')
+            conn.sendall(b'ok\n')
+        except Exception as e:
+            log.error('%s: NBD server for %s: %s failed',
+                      self.dbg, self.path, line, exc_info=True)
+            conn.sendall('error {}\n'.format(e).encode('ascii', 'replace'))
+        conn.close()
+
+    def coalesce_step(self):
+        conn, cluster = self.coalescing
+        try:
+            end = min(cluster + COALESCE_STEP, self.image.clusters())
+            for c in range(cluster, end):
+                self.image.pull(c)
+            if end < self.image.clusters():
+                self.coalescing = (conn, end)
+                return
+            self.image.flush()
+            grandparent = self.image.backing.backing
+            self.image.set_backing(
+                grandparent.path if grandparent is not None else None)
+            conn.sendall(b'ok\n')
+        except Exception as e:
+            log.error('%s: coalescing into %s failed',
+                      self.dbg, self.path, exc_info=True)
+            conn.sendall('error {}\n'.format(e).encode('ascii', 'replace'))
+        self.coalescing = None
+        conn.close()
+
+    def serve(self):
+        _makedirs(RUN_DIR)
+        self.image = self.open_image(self.path, read_only=self.read_only)
+        listener = _listen(socket_path(self.path))
+        # Listen for commands last: a successful connection tells the
+        # datapath plugin that the server is ready
+        controller = _listen(control_path(self.path))
+        log.info('%s: serving %s on %s', self.dbg, self.path,
+                 socket_path(self.path))
+        try:
+            while self.running:
+                readers = [listener, controller]
+                if self.image is not None:
+                    readers.extend(self.clients)
+                busy = self.coalescing is not None and \
+                    self.image is not None
+                readable, _, _ = select.select(
+                    readers, [], [], 0 if busy else None)
+                for sock in readable:
+                    if sock is controller:
+                        self.command(controller.accept()[0])
+                    elif sock is listener:
+                        self._accept(listener.accept()[0])
+                    elif self.image is not None:
+                        self._request(sock)
+                if self.coalescing is not None and self.image is not None:
+                    self.coalesce_step()
+        finally:
+            for path in (control_path(self.path), socket_path(self.path)):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            for sock in self.clients:
+                sock.close()
+            if self.image is not None:
+                self.image.flush()
+                self.image.close()
+        log.info('%s: stopped serving %s', self.dbg, self.path)
+
+    def _accept(self, sock):
+        if self.image is None:
+            # Suspended: the size may be about to change
+            sock.close()
+            return
+        try:
+            if self.handshake(sock):
+                self.clients.append(sock)
+                return
+        except (EOFError, socket.error, struct.error):
+            log.info('%s: NBD handshake for %s failed', self.dbg, self.path)
+        sock.close()
+
+    def _request(self, sock):
+        try:
+            if self.request(sock):
+                return
+        except (EOFError, socket.error):
+            pass
+        self.clients.remove(sock)
+        sock.close()
+
+
+def serve(dbg, path, read_only=False, open_image=Image):
+    """Serves the image at [path], opened by open_image(path,
+    read_only=...), until it is sent stop. Run this in a background
+    process."""
+    Server(dbg, path, read_only, open_image).serve()
+
+
+def start(dbg, path, read_only=False, open_image=Image):
+    """Starts serving the image at [path] in a background process, as
+    serve does, unless a server for it is running already, and waits for
+    the server to be ready. Starts are serialised, so that a second server
+    does not replace the sockets of the first."""
+    _makedirs(RUN_DIR)
+    with Lock(lock_path(path), 0, 'NBD server for ' + path).held(dbg):
+        if control(dbg, path, 'ping'):
+            return
+        run_in_background(dbg, serve, dbg, path, read_only, open_image)
+        start_time = time.time()
+        while not control(dbg, path, 'ping'):
+            if time.time() - start_time > START_TIMEOUT:
+                raise xapi.InternalError(
+                    'NBD server for {} did not start'.format(path))
+            time.sleep(0.1)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+"""
+Finds which parts of a volume file are in the dom0 page cache, asks the
+kernel to read parts of it in ahead of use, and drops its pages once the
+volume is no longer in use.
+
+A boot profile records the parts of a volume file which were read in the
+first BOOT_WINDOW seconds after the volume was activated, i.e. while its
+VM was booting. It is kept beside the file as <file>.boot, and the next
+activation can pre-warm the page cache from it, so that the boot does not
+read those blocks cold.
+
+The profile is taken from the page cache residency of the file (mincore)
+at the end of the window, which includes blocks read by the guest through
+a buffered loop device. It is only taken after an activation which did
+not pre-warm, as the pre-warmed blocks would be recorded whether the guest
+read them or not. A profile older than PROFILE_MAX_AGE is not used, so
+that it is taken again.
+"""
+
+import errno
+import os
+import time
+
+import xapi.codec
+from xapi.storage import log
+from xapi.storage.libc import (PAGE_SIZE, POSIX_FADV_DONTNEED,
+                               POSIX_FADV_WILLNEED, fadvise, mincore)
+
+PROFILE_SUFFIX = '.boot'
+
+# The seconds after activation whose reads make up a boot profile
+BOOT_WINDOW = 60
+
+PROFILE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Cached regions closer than this are recorded as one, as readahead would
+# read the gap anyway
+PROFILE_GAP = 256 * 1024
+
+# The residency of a file is read this much at a time, to bound the size
+# of the mapping and of the residency vector
+MINCORE_CHUNK = 1024 * 1024 * 1024
+
+# The pre-warm checks its deadline between requests of at most this size
+PREWARM_STEP = 8 * 1024 * 1024
+
+
+def resident_ranges(fd, size, gap=0):
+    """Returns the [offset, length] ranges of the file open as [fd], of
+    [size] bytes, which are in the page cache. Ranges less than [gap]
+    bytes apart are merged."""
+    ranges = []
+    for start in range(0, size, MINCORE_CHUNK):
+        length = min(MINCORE_CHUNK, size - start)
+        vector = mincore(fd, start, length)
+        page = 0
+        while page < len(vector):
+            if not vector[page] & 1:
+                page += 1
+                continue
+            first = page
+            while page < len(vector) and vector[page] & 1:
+                page += 1
+            offset = start + first * PAGE_SIZE
+            end = min(start + page * PAGE_SIZE, size)
+            if ranges and offset - sum(ranges[-1]) <= gap:
+                ranges[-1][1] = end - ranges[-1][0]
+            else:
+                ranges.append([offset, end - offset])
+    return ranges
+
+
+def prewarm(fd, ranges, deadline):
+    """Asks the kernel to read the [ranges] of the file open as [fd] into
+    the page cache, in order, until the time [deadline]. The reads happen
+    in the background. Returns the number of bytes requested."""
+    requested = 0
+    for offset, length in ranges:
+        end = offset + length
+        while offset < end:
+            if time.time() >= deadline:
+                return requested
+            step = min(PREWARM_STEP, end - offset)
+            fadvise(fd, offset, step, POSIX_FADV_WILLNEED)
+            requested += step
+            offset += step
+    return requested
+
+
+def resident_bytes(fd, size):
+    """Returns the number of bytes of the file open as [fd], of [size]
+    bytes, which are in the page cache"""
+    return sum(length for _, length in resident_ranges(fd, size))
+
+
+def drop(fd):
+    """Writes back the dirty pages of the file open as [fd] and drops all
+    its pages from the page cache. Dirty pages would be kept."""
+    os.fdatasync(fd)
+    fadvise(fd, 0, 0, POSIX_FADV_DONTNEED)
+
+
+def profile_path(file_path):
+    return file_path + PROFILE_SUFFIX
+
+
+def load_profile(file_path):
+    """Returns the ranges of the boot profile of the volume file at
+    [file_path], or None if there is no profile which is recent enough"""
+    try:
+        with open(profile_path(file_path)) as f:
+            profile = xapi.codec.loads(f.read())
+    except IOError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return None
+    except ValueError:
+        return None
+    if not 0 <= time.time() - profile.get('captured', 0) < PROFILE_MAX_AGE:
+        return None
+    return profile['ranges']
+
+
+def capture_profile(dbg, file_path, is_attached, window=BOOT_WINDOW):
+    """Waits [window] seconds, then records the boot profile of the volume
+    file at [file_path] if is_attached() says that the volume is still in
+    use. Run this in a background process."""
+    time.sleep(window)
+    if not is_attached():
+        log.debug('%s: %s detached before its boot profile was taken',
+                  dbg, file_path)
+        return
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        ranges = resident_ranges(fd, os.fstat(fd).st_size, PROFILE_GAP)
+    finally:
+        os.close(fd)
+    path = profile_path(file_path)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        f.write(xapi.codec.dumps({'captured': time.time(), 'ranges': ranges}))
+    os.rename(tmp_path, path)
+    log.debug('%s: recorded boot profile of %s: %d bytes in %d ranges',
+              dbg, file_path, sum(length for _, length in ranges),
+              len(ranges))
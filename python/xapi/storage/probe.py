@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""
+Discovery for SR.probe: inspects candidate locations for storage, such as
+directories or block devices, on a pool of threads, and caches the
+results for a short time.
+
+xapi calls SR.probe repeatedly while a user builds up a configuration,
+each time in a new process, so the results are cached in files in
+CACHE_DIR, keyed by the plugin and the configuration probed. SR.create
+and SR.destroy call invalidate so that the change is seen straight away.
+"""
+
+import errno
+import os
+import time
+
+import xapi.codec
+from xapi.storage import log
+
+CACHE_DIR = os.environ.get('XAPI_STORAGE_PROBE_DIR',
+                           '/var/run/nonpersistent/xapi-storage/probe')
+
+# How long, in seconds, the results of a probe are reused
+TTL = 10.0
+
+# The maximum number of candidates inspected at once
+WORKERS = 16
+
+
+def _cache_path(plugin, configuration):
+    # Only SR.probe needs these, and the plugin imports this module for
+    # every SR call
+    import hashlib
+    import json
+    key = json.dumps([plugin, configuration], sort_keys=True)
+    return os.path.join(
+        CACHE_DIR, '{}.{}.json'.format(
+            plugin, hashlib.sha1(key.encode('utf-8')).hexdigest()))
+
+
+def _load(path, ttl):
+    try:
+        with open(path) as f:
+            cached = xapi.codec.loads(f.read())
+    except (IOError, ValueError):
+        return None
+    if not 0 <= time.time() - cached['time'] < ttl:
+        return None
+    return cached['results']
+
+
+def _save(path, results):
+    try:
+        os.makedirs(CACHE_DIR)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        f.write(xapi.codec.dumps({'time': time.time(), 'results': results}))
+    os.rename(tmp_path, path)
+
+
+def probe(dbg, plugin, configuration, candidates, inspect, ttl=TTL):
+    """Returns the probe results of [plugin] for [configuration]. The
+    function [candidates] returns the locations to inspect, and
+    inspect(location) returns a list of probe results for a location; it
+    is called concurrently for different locations. Results less than
+    [ttl] seconds old are returned from the cache instead."""
+    path = _cache_path(plugin, configuration)
+    results = _load(path, ttl)
+    if results is not None:
+        log.debug('%s: returning cached probe results for %s',
+                  dbg, configuration)
+        return results
+
+    def inspect_safely(location):
+        # An error only loses the results for its location, rather than
+        # failing the whole probe
+        try:
+            return inspect(location)
+        except (IOError, OSError):
+            # e.g. removed or unmounted since it was listed
+            log.info('%s: cannot probe %s', dbg, location, exc_info=True)
+        except Exception:
+            log.error('%s: error probing %s', dbg, location, exc_info=True)
+        return []
+
+    start = time.time()
+    locations = candidates()
+    if locations:
+        # Threads rather than processes: the work is waiting for I/O
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(min(WORKERS, len(locations)))
+        try:
+            found = pool.map(inspect_safely, locations)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        found = []
+    results = [result for location in found for result in location]
+    log.debug('%s: probed %d locations in %.3fs, found %d results',
+              dbg, len(locations), time.time() - start, len(results))
+    _save(path, results)
+    return results
+
+
+def invalidate(plugin):
+    """Forgets the cached probe results of [plugin]"""
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return
+    for name in names:
+        if name.startswith(plugin + '.'):
+            try:
+                os.unlink(os.path.join(CACHE_DIR, name))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
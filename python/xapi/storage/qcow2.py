@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+
+"""
+Reads and writes a subset of the qcow2 image format: uncompressed,
+unencrypted images without internal snapshots, using 16-bit refcounts,
+optionally backed by a chain of other images. Images created here can be
+opened by qemu-img and qemu, and images they create within the subset can
+be opened here.
+
+A guest cluster which has not been written in an image is read from its
+backing image, or as zeros if it has none. The first write to such a
+cluster allocates a cluster at the end of the file, copying the rest of
+its contents from the backing image. So an image can be snapshotted in
+constant time by making it the backing file of a new, empty image.
+
+L2 tables are kept in an LRU cache of L2_CACHE_SIZE tables. Metadata
+changes are written through, data before the metadata which refers to it.
+"""
+
+import collections
+import errno
+import os
+import struct
+
+MAGIC = b'QFI\xfb'
+
+# Header fields, up to and including header_length, of a version 3 image
+HEADER = struct.Struct('>4sIQIIQIIQQIIQQQQII')
+V2_HEADER_LENGTH = 72
+
+BACKING_FILE_OFFSET_FIELD = 8
+SIZE_FIELD = 24
+L1_SIZE_FIELD = 36
+
+# Images are created with 64KiB clusters
+CLUSTER_BITS = 16
+REFCOUNT_ORDER = 4
+
+# Flags of L1 and L2 entries
+OFFSET_MASK = 0x00fffffffffffe00
+COPIED = 1 << 63
+COMPRESSED = 1 << 62
+ZERO = 1
+
+# Backing file names are stored in one of two slots in the first cluster,
+# so that the name can be replaced without overwriting the one in use
+BACKING_SLOTS = [512, 2048]
+MAX_BACKING_NAME = 1023
+
+# The number of L2 tables kept in memory per image: with 64KiB clusters
+# each table maps 512MiB of the disk
+L2_CACHE_SIZE = 64
+
+
+class Qcow2Error(Exception):
+    pass
+
+
+def _pread(fd, length, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    chunks = []
+    while length > 0:
+        chunk = os.read(fd, length)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        length -= len(chunk)
+    data = b''.join(chunks)
+    if length > 0:
+        # Beyond the end of the file
+        data += b'\0' * length
+    return data
+
+
+def _pwrite(fd, data, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def _div_round_up(n, d):
+    return (n + d - 1) // d
+
+
+def create(path, size, backing=None):
+    """Creates an image of [size] bytes at [path]. If [backing] is given it
+    is the path of the backing image, which is recorded relative to the
+    directory of [path] if it is in the same directory. A size of None
+    means the size of the backing image."""
+    cluster_size = 1 << CLUSTER_BITS
+    l2_entries = cluster_size // 8
+    backing_name = None
+    if backing is not None:
+        if os.path.dirname(os.path.abspath(backing)) == \
+                os.path.dirname(os.path.abspath(path)):
+            backing_name = os.path.basename(backing)
+        else:
+            backing_name = os.path.abspath(backing)
+        if len(backing_name) > MAX_BACKING_NAME:
+            raise Qcow2Error('Backing file name too long: ' + backing_name)
+        if size is None:
+            image = Image(backing, read_only=True)
+            size = image.size
+            image.close()
+
+    l1_size = max(1, _div_round_up(size, cluster_size * l2_entries))
+    l1_clusters = _div_round_up(l1_size * 8, cluster_size)
+    # header, refcount table, refcount block, L1 table
+    clusters = 3 + l1_clusters
+    if clusters > cluster_size // 2:
+        raise Qcow2Error('Image too large: %d bytes' % size)
+
+    header = HEADER.pack(
+        MAGIC, 3,
+        BACKING_SLOTS[0] if backing_name else 0,
+        len(backing_name) if backing_name else 0,
+        CLUSTER_BITS, size, 0, l1_size,
+        3 * cluster_size,               # l1_table_offset
+        1 * cluster_size,               # refcount_table_offset
+        1,                              # refcount_table_clusters
+        0, 0,                           # no snapshots
+        0, 0, 0,                        # no feature bits
+        REFCOUNT_ORDER, HEADER.size)
+    # An empty header extension area
+    header += b'\0' * 8
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        os.ftruncate(fd, clusters * cluster_size)
+        _pwrite(fd, header, 0)
+        if backing_name:
+            _pwrite(fd, backing_name.encode('utf-8'), BACKING_SLOTS[0])
+        _pwrite(fd, struct.pack('>Q', 2 * cluster_size), cluster_size)
+        _pwrite(fd, struct.pack('>%dH' % clusters, *([1] * clusters)),
+                2 * cluster_size)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Image(object):
+    """An open qcow2 image and its chain of backing images"""
+
+    def __init__(self, path, read_only=False, _chain=()):
+        self.path = os.path.abspath(path)
+        if self.path in _chain:
+            raise Qcow2Error('Backing chain loop at ' + self.path)
+        self.read_only = read_only
+        self.fd = os.open(path, os.O_RDONLY if read_only else os.O_RDWR)
+        self.backing = None
+        try:
+            self._load(_chain)
+        except Exception:
+            self.close()
+            raise
+
+    def _load(self, chain):
+        header = _pread(self.fd, HEADER.size, 0)
+        fields = HEADER.unpack(header)
+        (magic, self.version, backing_offset, backing_size,
+         self.cluster_bits, self.size, crypt_method, self.l1_size,
+         self.l1_offset, self.refcount_table_offset,
+         self.refcount_table_clusters, nb_snapshots, _, incompatible,
+         _, _, refcount_order, header_length) = fields
+        if magic != MAGIC or self.version not in (2, 3):
+            raise Qcow2Error('%s is not a qcow2 image' % self.path)
+        if self.version == 2:
+            refcount_order = 4
+            incompatible = 0
+            header_length = V2_HEADER_LENGTH
+        if crypt_method != 0 or incompatible != 0:
+            raise Qcow2Error('%s uses unsupported features' % self.path)
+        if not self.read_only and (nb_snapshots != 0 or refcount_order != 4):
+            raise Qcow2Error('%s can only be opened read-only' % self.path)
+
+        self.cluster_size = 1 << self.cluster_bits
+        self.l2_bits = self.cluster_bits - 3
+        self.l2_entries = 1 << self.l2_bits
+        self.refblock_entries = self.cluster_size // 2
+        self.backing_slot = backing_offset
+
+        self.l1 = list(struct.unpack(
+            '>%dQ' % self.l1_size,
+            _pread(self.fd, self.l1_size * 8, self.l1_offset)))
+        # The capacity of the clusters allocated to the L1 table
+        self.l1_capacity = (_div_round_up(self.l1_size * 8, self.cluster_size)
+                            * self.cluster_size // 8)
+        reftable_entries = self.refcount_table_clusters * self.cluster_size // 8
+        self.reftable = list(struct.unpack(
+            '>%dQ' % reftable_entries,
+            _pread(self.fd, reftable_entries * 8, self.refcount_table_offset)))
+        self.l2_cache = collections.OrderedDict()
+        end = os.fstat(self.fd).st_size
+        self.end = _div_round_up(end, self.cluster_size) * self.cluster_size
+
+        self.backing_name = None
+        if backing_offset:
+            self.backing_name = _pread(
+                self.fd, backing_size, backing_offset).decode('utf-8')
+            self.backing = Image(
+                os.path.join(os.path.dirname(self.path), self.backing_name),
+                read_only=True, _chain=chain + (self.path,))
+
+    def close(self):
+        if self.backing is not None:
+            self.backing.close()
+            self.backing = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def flush(self):
+        if not self.read_only:
+            os.fsync(self.fd)
+
+    def chain(self):
+        """Returns the paths of this image and its backing images"""
+        paths = []
+        image = self
+        while image is not None:
+            paths.append(image.path)
+            image = image.backing
+        return paths
+
+    # L1 and L2 tables
+
+    def _l2_table(self, l2_offset):
+        table = self.l2_cache.pop(l2_offset, None)
+        if table is None:
+            table = list(struct.unpack(
+                '>%dQ' % self.l2_entries,
+                _pread(self.fd, self.cluster_size, l2_offset)))
+            if len(self.l2_cache) >= L2_CACHE_SIZE:
+                self.l2_cache.popitem(last=False)
+        self.l2_cache[l2_offset] = table
+        return table
+
+    def _lookup(self, cluster):
+        """Returns the L2 entry of guest [cluster], or 0"""
+        l1_index = cluster >> self.l2_bits
+        if l1_index >= self.l1_size:
+            return 0
+        l2_offset = self.l1[l1_index] & OFFSET_MASK
+        if not l2_offset:
+            return 0
+        entry = self._l2_table(l2_offset)[cluster & (self.l2_entries - 1)]
+        if entry & COMPRESSED:
+            raise Qcow2Error('%s has compressed clusters' % self.path)
+        return entry
+
+    def is_allocated(self, cluster):
+        """Returns True if guest [cluster] is stored in this image, rather
+        than read from the backing image"""
+        entry = self._lookup(cluster)
+        return bool(entry & OFFSET_MASK) or \
+            bool(self.version >= 3 and entry & ZERO)
+
+    def _set_l2_entry(self, cluster, entry):
+        l1_index = cluster >> self.l2_bits
+        l2_offset = self.l1[l1_index] & OFFSET_MASK
+        if not l2_offset:
+            l2_offset = self._allocate(1)
+            _pwrite(self.fd, b'\0' * self.cluster_size, l2_offset)
+            self.l2_cache[l2_offset] = [0] * self.l2_entries
+            self.l1[l1_index] = l2_offset | COPIED
+            _pwrite(self.fd, struct.pack('>Q', self.l1[l1_index]),
+                    self.l1_offset + l1_index * 8)
+        l2_index = cluster & (self.l2_entries - 1)
+        self._l2_table(l2_offset)[l2_index] = entry
+        _pwrite(self.fd, struct.pack('>Q', entry), l2_offset + l2_index * 8)
+
+    # Cluster allocation
+
+    def _allocate(self, count):
+        offset = self.end
+        self.end += count * self.cluster_size
+        for i in range(count):
+            self._set_refcount((offset >> self.cluster_bits) + i, 1)
+        return offset
+
+    def _set_refcount(self, cluster, refcount):
+        reftable_index = cluster // self.refblock_entries
+        if reftable_index >= len(self.reftable):
+            raise Qcow2Error('%s: refcount table full' % self.path)
+        refblock = self.reftable[reftable_index]
+        if not refblock:
+            refblock = self.end
+            self.end += self.cluster_size
+            _pwrite(self.fd, b'\0' * self.cluster_size, refblock)
+            self.reftable[reftable_index] = refblock
+            _pwrite(self.fd, struct.pack('>Q', refblock),
+                    self.refcount_table_offset + reftable_index * 8)
+            self._set_refcount(refblock >> self.cluster_bits, 1)
+        _pwrite(self.fd, struct.pack('>H', refcount),
+                refblock + (cluster % self.refblock_entries) * 2)
+
+    # Guest I/O
+
+    def read(self, offset, length):
+        """Returns [length] bytes of the disk from [offset]"""
+        chunks = []
+        while length > 0:
+            cluster = offset >> self.cluster_bits
+            within = offset & (self.cluster_size - 1)
+            n = min(length, self.cluster_size - within)
+            chunks.append(self._read_cluster(cluster, within, n))
+            offset += n
+            length -= n
+        return b''.join(chunks)
+
+    def _read_cluster(self, cluster, within, n):
+        offset = (cluster << self.cluster_bits) + within
+        if offset >= self.size:
+            return b'\0' * n
+        entry = self._lookup(cluster)
+        # A zero cluster may still have a preallocated host cluster, whose
+        # contents are stale
+        if self.version >= 3 and entry & ZERO:
+            return b'\0' * n
+        host = entry & OFFSET_MASK
+        if host:
+            return _pread(self.fd, n, host + within)
+        if self.backing is None:
+            return b'\0' * n
+        return self.backing.read(offset, n)
+
+    def write(self, offset, data):
+        """Writes [data] to the disk at [offset]"""
+        if self.read_only:
+            raise IOError(errno.EROFS, 'Image is read-only', self.path)
+        if offset + len(data) > self.size:
+            raise IOError(errno.ENOSPC, 'Write beyond the end of the disk',
+                          self.path)
+        position = 0
+        while position < len(data):
+            cluster = offset >> self.cluster_bits
+            within = offset & (self.cluster_size - 1)
+            n = min(len(data) - position, self.cluster_size - within)
+            self._write_cluster(cluster, within, data[position:position + n])
+            offset += n
+            position += n
+
+    def _write_cluster(self, cluster, within, data):
+        entry = self._lookup(cluster)
+        host = entry & OFFSET_MASK
+        zero = self.version >= 3 and entry & ZERO
+        if host and entry & COPIED and not zero:
+            _pwrite(self.fd, data, host + within)
+            return
+        # Copy on write: the rest of the cluster comes from the backing
+        # image, or is zero
+        if len(data) < self.cluster_size:
+            old = self._read_cluster(cluster, 0, self.cluster_size)
+            data = old[:within] + data + old[within + len(data):]
+        if not (host and entry & COPIED):
+            host = self._allocate(1)
+        # The whole cluster is written before the ZERO flag is cleared
+        _pwrite(self.fd, data, host)
+        self._set_l2_entry(cluster, host | COPIED)
+
+    def pull(self, cluster):
+        """Copies guest [cluster] into this image from its backing image,
+        if it is stored in the backing image itself. Returns True if it was
+        copied."""
+        if self.backing is None or self.is_allocated(cluster) or \
+                not self.backing.is_allocated(cluster):
+            return False
+        data = self.backing.read(cluster << self.cluster_bits,
+                                 self.cluster_size)
+        host = self._allocate(1)
+        _pwrite(self.fd, data, host)
+        self._set_l2_entry(cluster, host | COPIED)
+        return True
+
+    def clusters(self):
+        return _div_round_up(self.size, self.cluster_size)
+
+    # Changes to the header
+
+    def set_backing(self, path):
+        """Makes the image at [path], or no image, the backing image. The
+        guest-visible contents must be the same either way, e.g. because
+        every cluster stored in the old backing image has been pulled."""
+        name = None
+        if path is not None:
+            name = os.path.relpath(path, os.path.dirname(self.path))
+            if name.startswith('..'):
+                name = os.path.abspath(path)
+        new_backing = None
+        if name is not None:
+            new_backing = Image(os.path.join(os.path.dirname(self.path), name),
+                                read_only=True, _chain=(self.path,))
+        slot = 0
+        if name is not None:
+            slot = BACKING_SLOTS[1] if self.backing_slot == BACKING_SLOTS[0] \
+                else BACKING_SLOTS[0]
+            _pwrite(self.fd, name.encode('utf-8'), slot)
+            self.flush()
+        # The offset and length are adjacent, so they change together
+        _pwrite(self.fd, struct.pack('>QI', slot, len(name) if name else 0),
+                BACKING_FILE_OFFSET_FIELD)
+        self.flush()
+        if self.backing is not None:
+            self.backing.close()
+        self.backing = new_backing
+        self.backing_name = name
+        self.backing_slot = slot
+
+    def resize(self, size):
+        """Grows the disk to [size] bytes"""
+        if size < self.size:
+            raise Qcow2Error('Shrinking is not supported')
+        l1_size = max(1, _div_round_up(
+            size, self.cluster_size * self.l2_entries))
+        if l1_size > self.l1_capacity:
+            raise Qcow2Error('%s cannot grow to %d bytes' % (self.path, size))
+        if l1_size > self.l1_size:
+            self.l1.extend([0] * (l1_size - self.l1_size))
+            _pwrite(self.fd, struct.pack('>I', l1_size), L1_SIZE_FIELD)
+            self.l1_size = l1_size
+        _pwrite(self.fd, struct.pack('>Q', size), SIZE_FIELD)
+        self.size = size
+        self.flush()
+
+
+def backing_file(path):
+    """Returns the absolute path of the backing image of the image at
+    [path], or None, without opening the backing chain"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        fields = HEADER.unpack(_pread(fd, HEADER.size, 0))
+        if fields[0] != MAGIC or not fields[2]:
+            return None
+        name = _pread(fd, fields[3], fields[2]).decode('utf-8')
+    finally:
+        os.close(fd)
+    return os.path.join(os.path.dirname(os.path.abspath(path)), name)
+
+
+def virtual_size(path):
+    """Returns the disk size of the image at [path]"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return HEADER.unpack(_pread(fd, HEADER.size, 0))[5]
+    finally:
+        os.close(fd)
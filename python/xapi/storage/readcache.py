@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+
+"""
+A copy-on-read cache, in a local directory, of volume files which live on
+slow or shared storage such as NFS.
+
+A volume file is read and written through a CachedFile. Reads are served
+from the cache where it has the blocks, and otherwise read from the file
+a block (BLOCK_SIZE) at a time and copied into the cache. Writes go to
+the file, and to the cache if it has the block, so the cache is never
+newer or older than the file.
+
+The cache of a file is a pair of files in the cache directory, named by a
+hash of the file's path: <hash>.data holds the cached blocks at their
+offsets in the file, as a sparse file, and <hash>.map a header and a
+bitmap of the blocks held. The header records the inode, size and mtime
+of the file when the cache was last closed, so a cache is discarded if
+the file has changed since, e.g. because it was written through another
+datapath or on another host. The bitmap is written on flush and close,
+after the blocks it marks; a bit is cleared on disk before its block is
+evicted. The first write marks the header dirty, so the cache of a file
+which was written by a process which then crashed is discarded too.
+
+All the caches in a directory share a size budget. Filling a block over
+the budget first evicts whole caches of files which are not being served,
+least recently used first, and then the least recently used blocks of
+the file's own cache. The order of use of blocks is not kept across
+opens.
+"""
+
+import collections
+import errno
+import fcntl
+import glob
+import os
+import struct
+
+from xapi.storage import log
+from xapi.storage.libc import FALLOC_FL_KEEP_SIZE, FALLOC_FL_PUNCH_HOLE, \
+    fallocate
+
+BLOCK_SIZE = 1024 * 1024
+
+# The size budget of a cache directory, if none is given
+DEFAULT_BUDGET = 16 * 1024 * 1024 * 1024
+
+MAGIC = b'XSRC'
+VERSION = 1
+
+# magic, version, block size, clean, file inode, file size, file mtime
+HEADER = struct.Struct('>4sIIIQQd')
+
+# The bitmap follows the header at this offset
+BITMAP_OFFSET = 4096
+
+# The space used by the other caches in the directory is measured again
+# after this many blocks have been filled
+RESAMPLE_FILLS = 256
+
+
+def _pread(fd, length, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    chunks = []
+    while length > 0:
+        chunk = os.read(fd, length)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b''.join(chunks)
+
+
+def _pwrite(fd, data, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def cache_name(path):
+    """Returns the name, without extension, of the cache of the file at
+    [path] in a cache directory"""
+    # Only the cache datapath needs hashlib, and the volume plugin imports
+    # this module for every call
+    import hashlib
+    return hashlib.sha1(
+        os.path.realpath(path).encode('utf-8')).hexdigest()
+
+
+def discard(cache_dir, path):
+    """Removes the cache of the file at [path] from [cache_dir], e.g. when
+    the file is deleted"""
+    name = os.path.join(cache_dir, cache_name(path))
+    for cache_path in (name + '.data', name + '.map'):
+        try:
+            os.unlink(cache_path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+
+def _identity(st):
+    return st.st_ino, st.st_size, st.st_mtime
+
+
+class CachedFile(object):
+    """Reads and writes the file at [path] through its cache in
+    [cache_dir], which holds at most [budget] bytes of cached blocks"""
+
+    def __init__(self, dbg, path, cache_dir, budget=DEFAULT_BUDGET,
+                 read_only=False):
+        self.dbg = dbg
+        self.path = path
+        self.cache_dir = cache_dir
+        self.budget = budget
+        self.read_only = read_only
+        self.fd = None
+        self.data_fd = None
+        self.map_fd = None
+        self.lru = None
+        self.fd = os.open(path, os.O_RDONLY if read_only else os.O_RDWR)
+        try:
+            # Held shared while the file is open, like an attached loop
+            # device, so that the volume plugin leaves the file alone
+            fcntl.flock(self.fd, fcntl.LOCK_SH)
+            self.size = os.fstat(self.fd).st_size
+            self.blocks = (self.size + BLOCK_SIZE - 1) // BLOCK_SIZE
+            self._open_cache()
+        except:
+            self.close()
+            raise
+
+    def _open_cache(self):
+        try:
+            os.makedirs(self.cache_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        name = os.path.join(self.cache_dir, cache_name(self.path))
+        self.data_path = name + '.data'
+        self.map_path = name + '.map'
+        self.map_fd = os.open(self.map_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # Held while the file is served, so that the cache is not
+            # evicted from under it
+            fcntl.flock(self.map_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except IOError as e:
+            if e.errno != errno.EWOULDBLOCK:
+                raise
+            raise IOError(errno.EBUSY,
+                          'cache of {} is in use'.format(self.path))
+        self.data_fd = os.open(self.data_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        self.bitmap = bytearray((self.blocks + 7) // 8)
+        header = _pread(self.map_fd, HEADER.size, 0)
+        if len(header) == HEADER.size:
+            magic, version, block_size, clean, ino, size, mtime = \
+                HEADER.unpack(header)
+            if (magic, version, block_size, clean) == \
+                    (MAGIC, VERSION, BLOCK_SIZE, 1) and \
+                    (ino, size, mtime) == _identity(os.fstat(self.fd)):
+                self.bitmap[:] = _pread(self.map_fd, len(self.bitmap),
+                                        BITMAP_OFFSET).ljust(
+                                            len(self.bitmap), b'\0')
+            else:
+                log.info('%s: %s changed since it was cached, discarding '
+                         'its cache', self.dbg, self.path)
+        if not any(self.bitmap):
+            # Free the blocks of a discarded cache
+            os.ftruncate(self.data_fd, 0)
+        os.ftruncate(self.data_fd, self.size)
+        self.lru = collections.OrderedDict(
+            (block, None) for block in range(self.blocks)
+            if self._cached(block))
+        self.dirty = False
+        self.fills = 0
+        self.others = self._others_usage()
+        # Marks this cache as recently used
+        os.utime(self.map_path, None)
+        log.debug('%s: opened the cache of %s in %s with %d blocks',
+                  self.dbg, self.path, self.cache_dir, len(self.lru))
+
+    def close(self):
+        if self.lru is not None:
+            self.flush()
+            self._write_header(clean=True)
+        for name in ('fd', 'data_fd', 'map_fd'):
+            fd = getattr(self, name)
+            if fd is not None:
+                os.close(fd)
+                setattr(self, name, None)
+        self.lru = None
+
+    def flush(self):
+        if not self.read_only:
+            os.fsync(self.fd)
+        # The bitmap must not mark blocks which are not on disk
+        os.fdatasync(self.data_fd)
+        _pwrite(self.map_fd, bytes(self.bitmap), BITMAP_OFFSET)
+        os.fdatasync(self.map_fd)
+
+    def _write_header(self, clean):
+        ino, size, mtime = _identity(os.fstat(self.fd))
+        _pwrite(self.map_fd, HEADER.pack(MAGIC, VERSION, BLOCK_SIZE,
+                                         1 if clean else 0, ino, size,
+                                         mtime), 0)
+        os.fdatasync(self.map_fd)
+
+    # The bitmap
+
+    def _cached(self, block):
+        return self.bitmap[block // 8] & (1 << (block % 8))
+
+    def _set_cached(self, block, cached):
+        if cached:
+            self.bitmap[block // 8] |= 1 << (block % 8)
+        else:
+            self.bitmap[block // 8] &= ~(1 << (block % 8)) & 0xff
+
+    # Eviction
+
+    def _others_usage(self):
+        """Returns the bytes used by the other caches in the directory"""
+        used = 0
+        for data_path in glob.glob(os.path.join(self.cache_dir, '*.data')):
+            if data_path == self.data_path:
+                continue
+            try:
+                used += os.stat(data_path).st_blocks * 512
+            except OSError:
+                # Evicted since the glob
+                pass
+        return used
+
+    def _evict_other(self):
+        """Removes the least recently used cache of a file which is not
+        being served. Returns False if there is none."""
+        maps = []
+        for map_path in glob.glob(os.path.join(self.cache_dir, '*.map')):
+            if map_path == self.map_path:
+                continue
+            try:
+                maps.append((os.stat(map_path).st_mtime, map_path))
+            except OSError:
+                pass
+        for _, map_path in sorted(maps):
+            try:
+                fd = os.open(map_path, os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError:
+                    # Being served
+                    continue
+                data_path = map_path[:-len('.map')] + '.data'
+                for path in (data_path, map_path):
+                    try:
+                        os.unlink(path)
+                    except OSError as e:
+                        if e.errno != errno.ENOENT:
+                            raise
+            finally:
+                os.close(fd)
+            log.debug('%s: evicted the cache %s', self.dbg, data_path)
+            self.others = self._others_usage()
+            return True
+        return False
+
+    def _make_room(self):
+        """Evicts caches or blocks until another block fits in the budget.
+        Returns False if it cannot."""
+        self.fills += 1
+        if self.fills % RESAMPLE_FILLS == 0:
+            self.others = self._others_usage()
+        while self.others + (len(self.lru) + 1) * BLOCK_SIZE > self.budget:
+            if self._evict_other():
+                continue
+            if not self.lru:
+                return False
+            block, _ = self.lru.popitem(last=False)
+            self._set_cached(block, False)
+            # Clear the bit on disk before the block is gone
+            index = block // 8
+            _pwrite(self.map_fd, bytes(self.bitmap[index:index + 1]),
+                    BITMAP_OFFSET + index)
+            fallocate(self.data_fd, block * BLOCK_SIZE, BLOCK_SIZE,
+                      FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE)
+        return True
+
+    # Reads and writes
+
+    def _read_block(self, block):
+        if block in self.lru:
+            del self.lru[block]
+            self.lru[block] = None
+            return _pread(self.data_fd, BLOCK_SIZE, block * BLOCK_SIZE)
+        data = _pread(self.fd, BLOCK_SIZE, block * BLOCK_SIZE)
+        if self._make_room():
+            _pwrite(self.data_fd, data, block * BLOCK_SIZE)
+            self._set_cached(block, True)
+            self.lru[block] = None
+        return data
+
+    def read(self, offset, length):
+        if offset < 0 or offset + length > self.size:
+            raise IOError(errno.EINVAL, 'read beyond the end of the file')
+        chunks = []
+        while length > 0:
+            block, within = divmod(offset, BLOCK_SIZE)
+            n = min(length, BLOCK_SIZE - within)
+            chunks.append(self._read_block(block)[within:within + n])
+            offset += n
+            length -= n
+        return b''.join(chunks)
+
+    def write(self, offset, data):
+        if self.read_only:
+            raise IOError(errno.EROFS, '{} is read-only'.format(self.path))
+        if offset < 0 or offset + len(data) > self.size:
+            raise IOError(errno.EINVAL, 'write beyond the end of the file')
+        if not self.dirty:
+            # A crash from here until close leaves the cache unusable
+            self._write_header(clean=False)
+            self.dirty = True
+        _pwrite(self.fd, data, offset)
+        while data:
+            block, within = divmod(offset, BLOCK_SIZE)
+            n = min(len(data), BLOCK_SIZE - within)
+            if block in self.lru:
+                _pwrite(self.data_fd, data[:n], offset)
+            offset += n
+            data = data[n:]
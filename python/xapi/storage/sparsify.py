@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""
+Frees the space allocated to the zero-filled blocks of a file by punching
+holes over them, so that a thin-provisioned file which has been written
+with zeros becomes sparse again. Its contents read back the same.
+
+Only the allocated regions of the file are read, found with SEEK_DATA and
+SEEK_HOLE. Each buffer read is compared in one go against a buffer of
+zeros, which is a memcmp in C, and only a buffer which is not all zero is
+examined block by block.
+"""
+
+import errno
+import os
+
+from xapi.storage.libc import (
+    fallocate, FALLOC_FL_KEEP_SIZE, FALLOC_FL_PUNCH_HOLE, SEEK_DATA,
+    SEEK_HOLE)
+
+# The granularity of the holes punched. It must be a multiple of the
+# filesystem block size.
+BLOCK_SIZE = 64 * 1024
+
+READ_SIZE = 1024 * 1024
+
+_ZEROS = b'\0' * READ_SIZE
+
+
+def data_regions(fd, start, end):
+    """Yields the (start, end) of the allocated regions of the file open as
+    [fd] between [start] and [end]"""
+    offset = start
+    while offset < end:
+        try:
+            data = os.lseek(fd, offset, SEEK_DATA)
+        except OSError as e:
+            # No data after offset
+            if e.errno == errno.ENXIO:
+                return
+            raise
+        if data >= end:
+            return
+        hole = min(os.lseek(fd, data, SEEK_HOLE), end)
+        yield data, hole
+        offset = hole
+
+
+def _zero_runs(fd, start, end):
+    """Yields the (start, end) of the runs of zero-filled blocks between
+    [start] and [end], which are aligned to BLOCK_SIZE"""
+    run_start = None
+    offset = start
+    os.lseek(fd, offset, os.SEEK_SET)
+    while offset < end:
+        buf = os.read(fd, min(READ_SIZE, end - offset))
+        if not buf:
+            break
+        if buf == _ZEROS[:len(buf)]:
+            if run_start is None:
+                run_start = offset
+        else:
+            for i in range(0, len(buf), BLOCK_SIZE):
+                block = buf[i:i + BLOCK_SIZE]
+                if block == _ZEROS[:len(block)]:
+                    if run_start is None:
+                        run_start = offset + i
+                elif run_start is not None:
+                    yield run_start, offset + i
+                    run_start = None
+        offset += len(buf)
+    if run_start is not None:
+        yield run_start, offset
+
+
+def punch_zeros(fd, start, end):
+    """Punches holes over the zero-filled, allocated blocks of the file open
+    as [fd] between [start] and [end], which must be aligned to BLOCK_SIZE
+    except at the end of the file. Returns (bytes read, bytes punched)."""
+    read = 0
+    punched = 0
+    for data, hole in data_regions(fd, start, end):
+        # Extend the region to whole blocks: the extra space is a hole, so
+        # it reads as zeros
+        data -= data % BLOCK_SIZE
+        hole = min(end, hole + (-hole % BLOCK_SIZE))
+        read += hole - data
+        for run_start, run_end in _zero_runs(fd, data, hole):
+            fallocate(fd, run_start, run_end - run_start,
+                      FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE)
+            punched += run_end - run_start
+    return read, punched
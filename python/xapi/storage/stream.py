@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+
+"""
+Streams of the contents of a volume file, for copying volumes between SRs
+and hosts without moving the blocks which hold nothing.
+
+A stream is written to and read from a file descriptor in one pass, so it
+may be a pipe or socket. It is in one of FORMATS:
+
+- sparse: a header giving the virtual size, then an extent for each chunk
+  (CHUNK_SIZE) of the file which is not all zeros, in order of offset,
+  then an extent of length 0 which marks the end. An extent is its
+  offset, length, stored length and the CRC-32 of its data, followed by
+  the data, compressed with zlib unless that would not make it smaller.
+  Only the allocated regions of the file, found with SEEK_DATA and
+  SEEK_HOLE, are read.
+- raw: every byte of the file, holes included, as for dd.
+
+Chunks are compressed and decompressed by a pool of threads, as zlib does
+not hold the GIL while it works. At most a few chunks per thread are in
+flight, so the memory used does not depend on the size of the volume.
+Importing a stream punches holes over the chunks it does not hold, so the
+file is as sparse as the stream.
+
+usage: python -m xapi.storage.stream [--format FORMAT] [--threads N]
+                                     {export,import} FILE STREAM
+
+where STREAM may be - for standard output or input.
+"""
+
+# multiprocessing and argparse are imported where they are used, so that
+# importing this module stays cheap
+import collections
+import errno
+import os
+import struct
+import sys
+import zlib
+
+from xapi.storage.libc import FALLOC_FL_KEEP_SIZE, FALLOC_FL_PUNCH_HOLE, \
+    fallocate
+from xapi.storage.sparsify import data_regions
+
+SPARSE = 'sparse'
+RAW = 'raw'
+FORMATS = [SPARSE, RAW]
+
+# The unit of zero detection and compression
+CHUNK_SIZE = 1024 * 1024
+
+MAGIC = b'XSVS'
+VERSION = 1
+
+# magic, version, chunk size, virtual size
+HEADER = struct.Struct('>4sIIQ')
+
+# offset, length, stored length, CRC-32 of the data
+EXTENT = struct.Struct('>QIII')
+
+# Fast, as the chunks worth compressing are mostly zeros or text
+COMPRESS_LEVEL = 1
+
+# The chunks in flight per thread
+QUEUE_DEPTH = 2
+
+_ZEROS = b'\0' * CHUNK_SIZE
+
+
+def _read_exact(fd, length):
+    """Reads [length] bytes from [fd], or fewer at its end"""
+    chunks = []
+    while length > 0:
+        chunk = os.read(fd, length)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b''.join(chunks)
+
+
+def _pread(fd, length, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    return _read_exact(fd, length)
+
+
+def _write(fd, data):
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def _pwrite(fd, data, offset):
+    os.lseek(fd, offset, os.SEEK_SET)
+    _write(fd, data)
+
+
+def _read_stream(fd, length):
+    data = _read_exact(fd, length)
+    if len(data) != length:
+        raise IOError(errno.EIO, 'the stream is truncated')
+    return data
+
+
+def _punch(fd, start, end):
+    if end > start:
+        fallocate(fd, start, end - start,
+                  FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE)
+
+
+def _crc(data):
+    return zlib.crc32(data) & 0xffffffff
+
+
+def _compress(data):
+    stored = zlib.compress(data, COMPRESS_LEVEL)
+    if len(stored) >= len(data):
+        stored = data
+    return stored, _crc(data)
+
+
+def _decompress(offset, length, stored, crc):
+    try:
+        data = stored if len(stored) == length else zlib.decompress(stored)
+    except zlib.error:
+        data = None
+    if data is None or len(data) != length or _crc(data) != crc:
+        raise IOError(errno.EIO,
+                      'the extent at {} of the stream is corrupt'.format(
+                          offset))
+    return data
+
+
+def _pipeline(pool, depth, items, fn):
+    """Yields (item, fn(*item)) for each of [items] in order, running fn in
+    [pool] with at most [depth] calls in flight"""
+    pending = collections.deque()
+    for item in items:
+        pending.append((item, pool.apply_async(fn, item)))
+        if len(pending) >= depth:
+            item, result = pending.popleft()
+            yield item, result.get()
+    while pending:
+        item, result = pending.popleft()
+        yield item, result.get()
+
+
+def _nonzero_chunks(fd, size):
+    """Yields (offset, data) of the chunks of the file open as [fd] which
+    are allocated and not all zeros"""
+    offset = 0
+    for start, end in data_regions(fd, 0, size):
+        # Whole chunks; a chunk shared by two regions is read once
+        offset = max(offset, start - start % CHUNK_SIZE)
+        while offset < end:
+            data = _pread(fd, min(CHUNK_SIZE, size - offset), offset)
+            if data != _ZEROS[:len(data)]:
+                yield offset, data
+            offset += CHUNK_SIZE
+
+
+def _thread_pool(threads):
+    """Returns a pool of [threads] threads, or one per CPU"""
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+    threads = threads or multiprocessing.cpu_count()
+    return threads, ThreadPool(threads)
+
+
+def export_stream(fd, out_fd, size, stream_format, threads=None,
+                  progress=None):
+    """Writes the first [size] bytes of the file open as [fd] to [out_fd]
+    as a stream in [stream_format]. progress(offset) is called as the file
+    is read. Returns (bytes of data, bytes written)."""
+    if stream_format == RAW:
+        return _export_raw(fd, out_fd, size, progress)
+    _write(out_fd, HEADER.pack(MAGIC, VERSION, CHUNK_SIZE, size))
+    written = HEADER.size
+    data_bytes = 0
+    threads, pool = _thread_pool(threads)
+    try:
+        for (offset, data), (stored, crc) in _pipeline(
+                pool, threads * QUEUE_DEPTH, _nonzero_chunks(fd, size),
+                lambda offset, data: _compress(data)):
+            _write(out_fd, EXTENT.pack(offset, len(data), len(stored), crc))
+            _write(out_fd, stored)
+            data_bytes += len(data)
+            written += EXTENT.size + len(stored)
+            if progress:
+                progress(offset + len(data))
+    finally:
+        pool.terminate()
+    _write(out_fd, EXTENT.pack(size, 0, 0, 0))
+    written += EXTENT.size
+    return data_bytes, written
+
+
+def _export_raw(fd, out_fd, size, progress):
+    data_bytes = 0
+    offset = 0
+    for start, end in data_regions(fd, 0, size):
+        while offset < start:
+            n = min(CHUNK_SIZE, start - offset)
+            _write(out_fd, _ZEROS[:n])
+            offset += n
+        while offset < end:
+            data = _pread(fd, min(CHUNK_SIZE, end - offset), offset)
+            if not data:
+                # Shorter than [size]; the rest reads as zeros
+                break
+            _write(out_fd, data)
+            data_bytes += len(data)
+            offset += len(data)
+            if progress:
+                progress(offset)
+    while offset < size:
+        n = min(CHUNK_SIZE, size - offset)
+        _write(out_fd, _ZEROS[:n])
+        offset += n
+    return data_bytes, size
+
+
+def import_stream(in_fd, fd, size, stream_format, threads=None,
+                  progress=None):
+    """Replaces the contents of the file open as [fd], of [size] bytes,
+    with the stream in [stream_format] read from [in_fd]. The parts of the
+    file which the stream does not cover become holes. progress(offset) is
+    called as the file is written. Returns (bytes of data, bytes read)."""
+    if stream_format == RAW:
+        return _import_raw(in_fd, fd, size, progress)
+    magic, version, _, stream_size = HEADER.unpack(
+        _read_stream(in_fd, HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise IOError(errno.EINVAL, 'not a sparse stream of version {}'
+                      .format(VERSION))
+    if stream_size > size:
+        raise IOError(errno.EFBIG, 'the stream holds {} bytes, more than '
+                      'the {} of the volume'.format(stream_size, size))
+    stats = {'read': HEADER.size}
+
+    def extents():
+        while True:
+            offset, length, stored_length, crc = EXTENT.unpack(
+                _read_stream(in_fd, EXTENT.size))
+            if length == 0:
+                return
+            if offset + length > stream_size:
+                raise IOError(errno.EINVAL, 'the extent at {} is beyond the '
+                              'end of the stream'.format(offset))
+            stats['read'] += EXTENT.size + stored_length
+            yield offset, length, _read_stream(in_fd, stored_length), crc
+
+    data_bytes = 0
+    end = 0
+    threads, pool = _thread_pool(threads)
+    try:
+        for (offset, length, _, _), data in _pipeline(
+                pool, threads * QUEUE_DEPTH, extents(), _decompress):
+            if offset < end:
+                raise IOError(errno.EINVAL, 'the extents of the stream are '
+                              'out of order at {}'.format(offset))
+            _punch(fd, end, offset)
+            _pwrite(fd, data, offset)
+            data_bytes += length
+            end = offset + length
+            if progress:
+                progress(end)
+    finally:
+        pool.terminate()
+    _punch(fd, end, size)
+    return data_bytes, stats['read'] + EXTENT.size
+
+
+def _import_raw(in_fd, fd, size, progress):
+    data_bytes = 0
+    offset = 0
+    while True:
+        data = _read_exact(in_fd, CHUNK_SIZE)
+        if not data:
+            break
+        if offset + len(data) > size:
+            raise IOError(errno.EFBIG, 'the stream holds more than the {} '
+                          'bytes of the volume'.format(size))
+        if data == _ZEROS[:len(data)]:
+            _punch(fd, offset, offset + len(data))
+        else:
+            _pwrite(fd, data, offset)
+            data_bytes += len(data)
+        offset += len(data)
+        if progress:
+            progress(offset)
+    _punch(fd, offset, size)
+    return data_bytes, offset
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--format', choices=FORMATS, default=SPARSE)
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Compression threads (default: one per CPU)')
+    parser.add_argument('direction', choices=['export', 'import'])
+    parser.add_argument('file', help='The volume file')
+    parser.add_argument('stream', help='The stream, or - for stdout/stdin')
+    args = parser.parse_args()
+
+    if args.direction == 'export':
+        fd = os.open(args.file, os.O_RDONLY)
+        stream_fd = sys.stdout.fileno() if args.stream == '-' else os.open(
+            args.stream, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        data_bytes, stream_bytes = export_stream(
+            fd, stream_fd, os.fstat(fd).st_size, args.format, args.threads)
+    else:
+        fd = os.open(args.file, os.O_RDWR)
+        stream_fd = sys.stdin.fileno() if args.stream == '-' else os.open(
+            args.stream, os.O_RDONLY)
+        data_bytes, stream_bytes = import_stream(
+            stream_fd, fd, os.fstat(fd).st_size, args.format, args.threads)
+        os.fsync(fd)
+    sys.stderr.write('%d bytes of data, %d bytes of stream\n' % (
+        data_bytes, stream_bytes))
+
+
+if __name__ == '__main__':
+    main()
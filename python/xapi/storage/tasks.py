@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+"""
+Long-running operations run in background processes and tracked as tasks,
+for plugins implementing the Task interface.
+
+Each task is a JSON file in TASK_DIR holding the task struct returned by
+Task.stat, and the pid of the process running the task. That process
+rewrites the file as it makes progress and when it finishes. Task.cancel
+creates a marker file beside it, which the task checks for between units
+of work.
+"""
+
+import errno
+import os
+import time
+
+import xapi
+import xapi.codec
+from xapi.storage import log
+from xapi.storage.common import run_in_background
+
+TASK_DIR = os.environ.get('XAPI_STORAGE_TASK_DIR',
+                          '/var/run/nonpersistent/xapi-storage/tasks')
+
+# The minimum interval, in seconds, between writes of a task's progress
+PROGRESS_INTERVAL = 1.0
+
+
+class Cancelled(Exception):
+    """Raised by Task.check_cancelled in a task which has been cancelled"""
+
+
+def _path(task_id):
+    # Task ids are uuids, and anything else could name a file outside
+    # TASK_DIR
+    if not task_id.replace('-', '').isalnum():
+        raise xapi.InternalError('Invalid task id {!r}'.format(task_id))
+    return os.path.join(TASK_DIR, task_id + '.json')
+
+
+def _write(task):
+    path = _path(task['id'])
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        f.write(xapi.codec.dumps(task))
+    os.rename(tmp_path, path)
+
+
+class Task(object):
+    """The task [task], seen from the process running it"""
+
+    def __init__(self, task):
+        self.task = task
+        self.last_progress = 0
+
+    @property
+    def id(self):
+        return self.task['id']
+
+    def progress(self, fraction):
+        """Records that the task is [fraction] (0..1) complete"""
+        now = time.time()
+        if now - self.last_progress < PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+        self.task['state'] = ['Pending', min(1.0, max(0.0, fraction))]
+        _write(self.task)
+
+    def check_cancelled(self):
+        """Raises Cancelled if Task.cancel has been called"""
+        if os.path.exists(_path(self.id) + '.cancel'):
+            raise Cancelled()
+
+
+def _run(dbg, task, fn, args):
+    task.task['pid'] = os.getpid()
+    _write(task.task)
+    start = time.time()
+    try:
+        fn(task, *args)
+        task.task['state'] = ['Completed', {
+            'duration': time.time() - start,
+            'result': ['UnitResult', None]
+        }]
+    except Cancelled:
+        log.info('%s: task %s cancelled', dbg, task.id)
+        task.task['state'] = ['Failed', 'Cancelled']
+    except Exception as e:
+        log.error('%s: task %s failed', dbg, task.id, exc_info=True)
+        task.task['state'] = ['Failed', str(e)]
+    _write(task.task)
+
+
+def start(dbg, fn, *args):
+    """Runs fn(task, *args) in a background process, where task is a Task
+    through which it reports progress, and returns the id of the task"""
+    try:
+        os.makedirs(TASK_DIR)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    # uuid pulls in ctypes.util and subprocess, which Task.stat and the
+    # other calls do not need
+    import uuid
+    task = {
+        'id': str(uuid.uuid4()),
+        'debug_info': dbg,
+        'ctime': time.time(),
+        'state': ['Pending', 0.0]
+    }
+    _write(task)
+    run_in_background(dbg, _run, dbg, Task(task), fn, args)
+    log.debug('%s: started task %s', dbg, task['id'])
+    return task['id']
+
+
+def _read(task_id):
+    try:
+        with open(_path(task_id)) as f:
+            return xapi.codec.loads(f.read())
+    except IOError as e:
+        if e.errno != errno.ENOENT:
+            raise
+    raise xapi.InternalError('Task {} does not exist'.format(task_id))
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+def stat(task_id):
+    """Returns the task struct of [task_id]"""
+    task = _read(task_id)
+    pid = task.pop('pid', None)
+    if is_pending(task) and pid is not None and not _is_running(pid):
+        # The process may have finished the task just before exiting
+        task = _read(task_id)
+        task.pop('pid', None)
+        if is_pending(task):
+            task['state'] = ['Failed',
+                             'Task process {} exited'.format(pid)]
+    return task
+
+
+def is_pending(task):
+    return task['state'][0] == 'Pending'
+
+
+def cancel(task_id):
+    """Asks the task [task_id] to stop. Returns straight away."""
+    if is_pending(stat(task_id)):
+        open(_path(task_id) + '.cancel', 'w').close()
+
+
+def destroy(task_id):
+    """Forgets the task [task_id], which must have finished"""
+    if is_pending(stat(task_id)):
+        raise xapi.InternalError('Task {} is in progress'.format(task_id))
+    os.unlink(_path(task_id))
+    try:
+        os.unlink(_path(task_id) + '.cancel')
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+def ls():
+    """Returns the ids of all the tasks"""
+    try:
+        names = os.listdir(TASK_DIR)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return []
+    return sorted(name[:-len('.json')] for name in names
+                  if name.endswith('.json'))
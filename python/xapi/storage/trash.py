@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""
+A trash directory in an SR for the files of destroyed volumes, whose
+space is freed later by a background reclaimer.
+
+Unlinking a large file can block for a long time, and stall other I/O on
+the filesystem, while its extents are freed. Moving the file into the
+trash is a single rename. The reclaimer then frees the space a chunk at a
+time, truncating the file from the end and limiting the rate, before
+unlinking what is left.
+"""
+
+import errno
+import fcntl
+import os
+import time
+
+from xapi.storage import log
+
+TRASH_DIR = '.trash'
+
+# The allocated space freed by each truncation
+RECLAIM_CHUNK = 256 * 1024 * 1024
+
+# The maximum rate, in bytes of allocated space per second, at which space
+# is freed
+RECLAIM_RATE = 1024 * 1024 * 1024
+
+
+def allocated(path):
+    """Returns the space allocated to the file at [path]"""
+    return os.stat(path).st_blocks * 512
+
+
+class Trash(object):
+    """The trash directory of the SR at [sr_path]"""
+
+    def __init__(self, sr_path):
+        self.path = os.path.join(sr_path, TRASH_DIR)
+
+    def _entries(self):
+        try:
+            return [os.path.join(self.path, name)
+                    for name in sorted(os.listdir(self.path))]
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return []
+
+    def put(self, path, name):
+        """Moves the file at [path], which must be in the SR, into the trash
+        as [name]"""
+        try:
+            os.mkdir(self.path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        os.rename(path, os.path.join(self.path, name))
+
+    def pending(self):
+        """Returns the space allocated to files in the trash"""
+        total = 0
+        for path in self._entries():
+            try:
+                total += allocated(path)
+            except OSError as e:
+                # Reclaimed meanwhile
+                if e.errno != errno.ENOENT:
+                    raise
+        return total
+
+    def reclaim(self, dbg, rate=RECLAIM_RATE):
+        """Frees the space of every file in the trash, at no more than
+        [rate] bytes per second. Returns straight away if another process
+        is already reclaiming, as it will pick up any new files."""
+        while self._entries():
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except IOError as e:
+                    if e.errno not in (errno.EAGAIN, errno.EACCES):
+                        raise
+                    return
+                for path in self._entries():
+                    self._reclaim_file(dbg, path, rate)
+            finally:
+                # Files trashed after the listing are picked up by the next
+                # iteration, if no other reclaimer has started by then
+                os.close(fd)
+
+    def _reclaim_file(self, dbg, path, rate):
+        start = time.time()
+        freed = 0
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            size = os.fstat(fd).st_size
+            while size > 0:
+                # Free roughly one chunk of allocated space per truncation:
+                # a sparse file may have far less allocated than its size
+                blocks = os.fstat(fd).st_blocks * 512
+                step = RECLAIM_CHUNK
+                if blocks > 0:
+                    step = max(RECLAIM_CHUNK, RECLAIM_CHUNK * size // blocks)
+                size = max(0, size - step)
+                os.ftruncate(fd, size)
+                freed += blocks - os.fstat(fd).st_blocks * 512
+                # Sleep until the average rate is back within the limit
+                delay = freed / float(rate) - (time.time() - start)
+                if delay > 0:
+                    time.sleep(delay)
+        finally:
+            os.close(fd)
+        os.unlink(path)
+        log.debug('%s: reclaimed %d bytes from %s in %.1fs',
+                  dbg, freed, path, time.time() - start)
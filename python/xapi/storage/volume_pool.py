@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+"""
+A pool of spare volume files in an SR, created and provisioned in advance
+so that creating a volume only has to claim one.
+
+The spares are kept in the POOL_DIR directory of the SR, named
+<mode>.<size>.<uuid> after the provisioning mode they were created with,
+their size and the UUID the volume will have. A spare is claimed by
+renaming it into the SR, which succeeds for exactly one claimant. A
+background refiller creates new spares, under a temporary name, and
+renames them into the pool once they are fully provisioned; only one
+refiller runs at a time.
+"""
+
+import errno
+import fcntl
+import os
+
+from xapi.storage import log
+
+POOL_DIR = '.pool'
+
+TMP_SUFFIX = '.tmp'
+
+
+class VolumePool(object):
+    """The pool of spare volume files of the SR at [sr_path]"""
+
+    def __init__(self, sr_path):
+        self.sr_path = sr_path
+        self.path = os.path.join(sr_path, POOL_DIR)
+
+    def _spares(self, mode):
+        """Returns {size: [names]} of the spares provisioned in [mode]"""
+        try:
+            names = os.listdir(self.path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return {}
+        spares = {}
+        for name in sorted(names):
+            if name.endswith(TMP_SUFFIX):
+                continue
+            spare_mode, size, _ = name.split('.', 2)
+            if spare_mode == mode:
+                spares.setdefault(int(size), []).append(name)
+        return spares
+
+    def wanted(self, mode, sizes, depth):
+        """Returns True if there are fewer than [depth] spares of one of
+        [sizes] provisioned in [mode]"""
+        spares = self._spares(mode)
+        return any(len(spares.get(size, [])) < depth for size in sizes)
+
+    def claim(self, mode, size, destination):
+        """Moves the largest spare provisioned in [mode] which is no larger
+        than [size] to destination(uuid) in the SR, and returns its UUID,
+        which is now its volume key, and its size. Returns None if there
+        is none."""
+        spares = self._spares(mode)
+        for spare_size in sorted(spares, reverse=True):
+            if spare_size > size:
+                continue
+            for name in spares[spare_size]:
+                volume_uuid = name.split('.', 2)[2]
+                try:
+                    os.rename(os.path.join(self.path, name),
+                              destination(volume_uuid))
+                except OSError as e:
+                    if e.errno != errno.ENOENT:
+                        raise
+                    # Claimed by another process since the listing
+                    continue
+                return volume_uuid, spare_size
+        return None
+
+    def refill(self, dbg, mode, sizes, depth, make):
+        """Creates spares until there are [depth] of each of [sizes]
+        provisioned in [mode]. make(path, size) creates the file of a spare.
+        Returns straight away if another process is already refilling."""
+        try:
+            os.mkdir(self.path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+                return
+            # Left by a refiller which did not finish
+            for name in os.listdir(self.path):
+                if name.endswith(TMP_SUFFIX):
+                    os.unlink(os.path.join(self.path, name))
+            # uuid pulls in ctypes.util and subprocess, which claiming a
+            # spare does not need
+            import uuid
+            created = 0
+            while True:
+                spares = self._spares(mode)
+                # One of each size at a time, so that every size is
+                # available soon
+                missing = [size for size in sizes
+                           if len(spares.get(size, [])) < depth]
+                if not missing:
+                    break
+                for size in missing:
+                    name = '{}.{}.{}'.format(mode, size, uuid.uuid4())
+                    tmp_path = os.path.join(self.path, name + TMP_SUFFIX)
+                    try:
+                        make(tmp_path, size)
+                    except:
+                        if os.path.exists(tmp_path):
+                            os.unlink(tmp_path)
+                        raise
+                    os.rename(tmp_path, os.path.join(self.path, name))
+                    created += 1
+            log.debug('%s: created %d spare volumes in %s',
+                      dbg, created, self.path)
+        finally:
+            os.close(fd)
+
+    def drain(self, trash):
+        """Moves all the spares into [trash] (see xapi.storage.trash), so
+        that their space is freed"""
+        try:
+            names = os.listdir(self.path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            return
+        for name in names:
+            if name.endswith(TMP_SUFFIX):
+                continue
+            try:
+                trash.put(os.path.join(self.path, name), name)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                # Claimed since the listing